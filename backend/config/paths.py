@@ -14,11 +14,15 @@
 
 TO_SCAN_DIR = DESKTOP_DIR / "Gestio_Tickets"
 SORTED_DIR = DATA_DIR / "tickets_tries"
+DUPLICATES_DIR = DATA_DIR / "tickets_doublons"
 
 REVENUS_A_TRAITER = DESKTOP_DIR / "Gestio_Revenus"
 REVENUS_TRAITES = DATA_DIR / "revenus_traites"
 
 APP_LOG_PATH = DATA_DIR / "gestio_app.log"
+OCR_AUTOSCALER_LOG_PATH = DATA_DIR / "ocr_autoscaler.jsonl"
+EXTRACTION_CACHE_PATH = DATA_DIR / "extraction_cache.db"
+TICKET_HASH_INDEX_PATH = DATA_DIR / "ticket_hashes.jsonl"
 
 OBJECTIFS_DIR = DATA_DIR / "objectifs"
 
@@ -42,6 +46,7 @@
     DATA_DIR,
     TO_SCAN_DIR,
     SORTED_DIR,
+    DUPLICATES_DIR,
     REVENUS_A_TRAITER,
     REVENUS_TRAITES,
     OBJECTIFS_DIR,
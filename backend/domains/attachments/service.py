@@ -149,6 +149,50 @@ def get_file_content(self, attachment_id: int) -> Optional[tuple[bytes, str, str
 attachment_service = AttachmentService()
 
 
+def _archive_target(
+    original_name: str,
+    transaction: Any,
+    is_ticket: bool,
+    target_base_dir: Optional[str],
+) -> tuple[str, str]:
+    """Dossier d'archive (créé) et nom de fichier final d'un document."""
+    import os
+
+    if target_base_dir is None:
+        target_base_dir = REVENUS_TRAITES if not is_ticket else SORTED_DIR
+
+    cat = getattr(transaction, "categorie", "Autre") or "Autre"
+    sub_cat = getattr(transaction, "sous_categorie", "Divers") or "Divers"
+
+    target_dir = os.path.join(target_base_dir, cat, sub_cat)
+    os.makedirs(target_dir, exist_ok=True)
+
+    # Format spécifique pour les fiches de paie
+    if not is_ticket and transaction and hasattr(transaction, "montant") and hasattr(transaction, "date"):
+        ext = os.path.splitext(original_name)[1]
+        safe_date = str(transaction.date).replace(" ", "_")
+        original_name = f"{safe_date}_Salaire_{int(transaction.montant)}€{ext}"
+    else:
+        prefixes = ["ocr_", "income_", "batch_"]
+        for prefix in prefixes:
+            if original_name.startswith(prefix):
+                original_name = original_name[len(prefix) :]
+                break
+    return target_dir, original_name
+
+
+def _unique_path(target_dir: str, name: str) -> str:
+    import os
+
+    target_path = os.path.join(target_dir, name)
+    counter = 1
+    while os.path.exists(target_path):
+        stem, ext = os.path.splitext(name)
+        target_path = os.path.join(target_dir, f"{stem}_{counter}{ext}")
+        counter += 1
+    return target_path
+
+
 def archive_file(
     source_path: str,
     transaction: Any = None,
@@ -158,41 +202,13 @@ def archive_file(
     """
     Archive un fichier temporaire (ticket ou revenu) vers le dossier structuré.
     """
-    if target_base_dir is None:
-        target_base_dir = REVENUS_TRAITES if not is_ticket else SORTED_DIR
-
     try:
         import os
 
-        # Utiliser la transaction fournie
-        main_tx = transaction
-
-        cat = getattr(main_tx, "categorie", "Autre") or "Autre"
-        sub_cat = getattr(main_tx, "sous_categorie", "Divers") or "Divers"
-
-        target_dir = os.path.join(target_base_dir, cat, sub_cat)
-        os.makedirs(target_dir, exist_ok=True)
-
-        original_name = os.path.basename(source_path)
-        
-        # Format spécifique pour les fiches de paie
-        if not is_ticket and main_tx and hasattr(main_tx, "montant") and hasattr(main_tx, "date"):
-            ext = os.path.splitext(original_name)[1]
-            safe_date = str(main_tx.date).replace(" ", "_")
-            original_name = f"{safe_date}_Salaire_{int(main_tx.montant)}€{ext}"
-        else:
-            prefixes = ["ocr_", "income_", "batch_"]
-            for prefix in prefixes:
-                if original_name.startswith(prefix):
-                    original_name = original_name[len(prefix) :]
-                    break
-
-        target_path = os.path.join(target_dir, original_name)
-        counter = 1
-        while os.path.exists(target_path):
-            name, ext = os.path.splitext(original_name)
-            target_path = os.path.join(target_dir, f"{name}_{counter}{ext}")
-            counter += 1
+        target_dir, name = _archive_target(
+            os.path.basename(source_path), transaction, is_ticket, target_base_dir
+        )
+        target_path = _unique_path(target_dir, name)
 
         shutil.copy2(source_path, target_path)
         logger.info(f"Fichier archivé: {target_path}")
@@ -201,3 +217,37 @@ def archive_file(
     except Exception as e:
         logger.error(f"Erreur archivage fichier: {e}")
         return None
+
+
+def archive_bytes(
+    data: bytes,
+    filename: str,
+    transaction: Any = None,
+    is_ticket: bool = True,
+    target_base_dir: str = None,
+) -> Optional[str]:
+    """
+    Archive un document reçu en mémoire (upload) : une seule écriture, directement
+    à son emplacement final. Création exclusive ("xb") : deux scans simultanés du
+    même nom ne s'écrasent pas.
+    """
+    try:
+        import os
+
+        target_dir, name = _archive_target(
+            os.path.basename(filename), transaction, is_ticket, target_base_dir
+        )
+        while True:
+            target_path = _unique_path(target_dir, name)
+            try:
+                with open(target_path, "xb") as f:
+                    f.write(data)
+                break
+            except FileExistsError:
+                continue  # pris entre-temps par un autre scan
+        logger.info(f"Fichier archivé: {target_path}")
+        return target_path
+
+    except Exception as e:
+        logger.error(f"Erreur archivage fichier: {e}")
+        return None
@@ -7,9 +7,9 @@
 
 from backend.domains.transactions.repository import TransactionRepository
 from backend.domains.echeance.service import refresh_echeances
+from backend.shared.utils.json_response import FastJSONResponse
 from backend.shared.utils.dashboard_helpers import (
-    build_daily_history,
-    aggregate_by_type,
+    summarize_transactions,
     build_type_breakdown,
     get_paid_echeance_ids,
     get_active_echeances,
@@ -25,7 +25,7 @@
 async def get_all_categories():
     from backend.shared.utils.categories_loader import _load
 
-    return _load().get("categories", [])
+    return FastJSONResponse(_load().get("categories", []))
 
 
 @router.get("/")
@@ -42,13 +42,9 @@ async def get_summary(
         sd = date.fromisoformat(start_date) if start_date else None
         ed = date.fromisoformat(end_date) if end_date else None
 
-        txs = repo.get_filtered(start_date=sd, end_date=ed, category=category)
-
-        revenus = sum(t.montant for t in txs if t.type == "revenu")
-        depenses = sum(t.montant for t in txs if t.type == "depense")
-
-        history = build_daily_history(txs)
-        data_by_type = aggregate_by_type(txs)
+        revenus, depenses, history, data_by_type = summarize_transactions(
+            repo, start_date=sd, end_date=ed, category=category
+        )
 
         breakdown = [
             build_type_breakdown("revenu", "#10b981", data_by_type),
@@ -59,7 +55,7 @@ async def get_summary(
         echeance_rows = get_active_echeances()
         prochaines = build_echeances_list(echeance_rows, paid_ids)
 
-        return {
+        return FastJSONResponse({
             "total_revenus": revenus,
             "total_depenses": depenses,
             "solde": revenus - depenses,
@@ -67,7 +63,7 @@ async def get_summary(
             "historique": history,
             "prochaines_echeances": prochaines,
             "budget_summary": build_budget_summary(),
-        }
+        })
     except Exception as e:
         import traceback
 
@@ -13,6 +13,7 @@
 from backend.domains.echeance.service import (
     backfill_echeances,
 )
+from backend.shared.utils.json_response import FastJSONResponse
 from backend.domains.echeance.presenters import (
     build_echeance_response,
     build_calendar_occurrence,
@@ -28,7 +29,9 @@ async def get_echeances():
     try:
         echeances = repo.get_all()
         paid_ids = repo.get_paid_this_month()
-        return [build_echeance_response(e, is_paid=e.id in paid_ids) for e in echeances]
+        return FastJSONResponse(
+            [build_echeance_response(e, is_paid=e.id in paid_ids) for e in echeances]
+        )
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -52,7 +55,7 @@ async def get_calendar_echeances():
             )
             current += relativedelta(months=1)
 
-        return all_occurrences
+        return FastJSONResponse(all_occurrences)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -13,6 +13,7 @@
 from backend.shared.database import db_transaction
 from backend.shared.database.base_repository import BaseRepository
 from backend.domains.echeance.model import Echeance
+from backend.domains.transactions import columnar
 
 logger = logging.getLogger(__name__)
 
@@ -94,6 +95,8 @@ def delete(self, echeance_id: int, conn=None) -> bool:
                 cursor.execute("DELETE FROM echeances WHERE id = ?", (echeance_id,))
                 success = cursor.rowcount > 0
                 
+            if transactions_deleted:
+                columnar.invalidate(self.db_path)
             logger.info(f"Échéance ID {echeance_id} supprimée ({transactions_deleted} transactions)")
             return success
         except Exception as e:
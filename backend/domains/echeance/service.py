@@ -15,6 +15,8 @@
 from backend.shared.database import db_transaction
 from backend.shared.database.connection import get_db_connection, close_connection
 from backend.domains.echeance.model import Echeance
+from backend.domains.transactions.duplicates import duplicate_detector
+from backend.domains.transactions import columnar
 
 logger = logging.getLogger(__name__)
 
@@ -117,6 +119,10 @@ def _generate_transactions_for_echeance(echeance: Echeance, cursor, today: date,
                 ),
             )
             created_count += 1
+            try:
+                duplicate_detector.check_transaction(cursor.lastrowid, conn=cursor.connection)
+            except sqlcipher.Error as e:
+                logger.warning(f"Détection doublons ignorée (échéance {echeance.id}): {e}")
 
         if delta is None:
             break
@@ -153,6 +159,8 @@ def backfill_echeances(months_back: int = 3) -> int:
 
         conn.commit()
         conn.close()
+        if created_count:
+            columnar.invalidate()
 
         logger.info(f"Backfill: {created_count} transactions créées")
         return created_count
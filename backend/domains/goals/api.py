@@ -10,6 +10,7 @@
 from backend.domains.goals.model import Goal, GoalWithProgress
 from backend.domains.goals.repository import goal_repository
 from backend.domains.goals.service import goal_service
+from backend.shared.utils.json_response import FastJSONResponse
 
 logger = logging.getLogger(__name__)
 
@@ -97,7 +98,7 @@ async def get_goal_monthly_progress(goal_id: int):
         if not goal:
             raise HTTPException(status_code=404, detail="Objectif non trouvé")
         progress = goal_service.get_monthly_progress(goal_id)
-        return progress
+        return FastJSONResponse(progress)
     except HTTPException:
         raise
     except Exception as e:
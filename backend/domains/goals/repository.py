@@ -65,8 +65,14 @@ def get_montant_actuel(self, goal: Goal) -> float:
         if not start_date:
             return 0.0
 
+        from backend.domains.transactions import columnar
         from backend.domains.transactions.repository import transaction_repository
-        
+
+        store = columnar.get_store(transaction_repository.db_path)
+        if store is not None:
+            with store.reading():
+                return store.total(store.mask(start_date, category=goal.categorie))
+
         result = transaction_repository.get_time_filtered(
             start_date=start_date,
             date_column="date",
@@ -80,11 +86,20 @@ def get_montant_actuel(self, goal: Goal) -> float:
 
     def get_montant_realise_pour_mois(self, categorie: str, current_date: date) -> float:
         """Récupère le montant total des transactions pour un mois donné."""
+        from backend.domains.transactions import columnar
         from backend.domains.transactions.repository import transaction_repository
-        
+
+        end_date = current_date + relativedelta(months=1)
+        store = columnar.get_store(transaction_repository.db_path)
+        if store is not None:
+            with store.reading():
+                return store.total(
+                    store.mask(current_date, end_date, end_inclusive=False, category=categorie)
+                )
+
         result = transaction_repository.get_time_filtered(
             start_date=current_date,
-            end_date=current_date + relativedelta(months=1),
+            end_date=end_date,
             date_column="date",
             where="categorie = ?",
             params=(categorie,),
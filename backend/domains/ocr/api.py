@@ -2,31 +2,42 @@
 OCR API - Endpoints de scan de tickets et fiches de paie.
 """
 
+import asyncio
 import logging
 import os
 from datetime import date as date_type
-from typing import List
+from typing import Dict, List, Tuple
 
 from fastapi import APIRouter, UploadFile, File, HTTPException
 from pydantic import BaseModel
 
+from backend.domains.ocr.core.perceptual_hash import HashIndex
 from backend.domains.ocr.services.ocr_service import get_ocr_service
+from backend.domains.ocr.services.ticket_index import DuplicateMatch, get_ticket_index
 from backend.domains.transactions.model import Transaction
 from backend.domains.ocr.core.pdfplumber_engine import pdfplumber_engine
 
 from backend.config.ocr_config import get_ocr_config, save_ocr_config
 from backend.domains.attachments.api import archive_file
+from backend.domains.attachments.service import archive_bytes
 from backend.shared.utils.file_utils import (
     validate_image_format,
     validate_pdf_format,
     save_upload_to_temp,
-    TempFileManager,
 )
 from .models_api import (
     OCRScanResponse,
     BatchScanResponse,
     OCRConfigResponse,
     OCRConfigUpdate,
+    OCRPoolStatusResponse,
+    OCRResourcePlanResponse,
+    OCRAutoscalerResponse,
+    OCRBatchCategorization,
+    OCRClassifierResponse,
+    OCRGroqStatusResponse,
+    OCRMerchantRulesStatus,
+    OCRWatcherStatusResponse,
 )
 
 logger = logging.getLogger(__name__)
@@ -64,76 +75,201 @@ async def warmup_ocr():
         return {"status": "error", "detail": str(e)}
 
 
+@router.get("/pool", response_model=OCRPoolStatusResponse)
+async def get_pool_status():
+    """État du pool de workers OCR persistant (workers vivants, file d'attente)."""
+    from backend.domains.ocr.services.worker_pool import get_worker_pool
+
+    pool = get_worker_pool()
+    if pool is None:
+        return OCRPoolStatusResponse(status="stopped")
+    return OCRPoolStatusResponse(**pool.health())
+
+
+@router.get("/autoscaler", response_model=OCRAutoscalerResponse)
+async def get_autoscaler_status():
+    """Bornes de l'autoscaler OCR, dernière mesure et dernières décisions."""
+    from backend.domains.ocr.services.autoscaler import get_autoscaler
+
+    autoscaler = get_autoscaler()
+    if autoscaler is None:
+        return OCRAutoscalerResponse(enabled=False)
+    return OCRAutoscalerResponse(**autoscaler.status())
+
+
+@router.get("/plan", response_model=OCRResourcePlanResponse)
+async def get_resource_plan():
+    """Répartition des cœurs entre workers OCR et threads ONNX, débits mesurés."""
+    from backend.domains.ocr.core.resource_planner import get_resource_planner
+
+    return OCRResourcePlanResponse(**get_resource_planner().snapshot())
+
+
+@router.get("/classifier", response_model=OCRClassifierResponse)
+def get_classifier_status():
+    """
+    Décision locale avant Groq : règles commerçants (taux de décision, latence)
+    et classifieur appris (mesures sur le jeu de validation, escalades).
+    """
+    from backend.domains.ocr.services.merchant_classifier import get_merchant_classifier
+    from backend.domains.ocr.services.merchant_rules import get_merchant_rules
+
+    rules = get_merchant_rules()
+    if rules is not None:
+        rules.reload_if_changed()
+        rules_status = OCRMerchantRulesStatus(**rules.status())
+    else:
+        rules_status = OCRMerchantRulesStatus(enabled=False)
+
+    classifier = get_merchant_classifier()
+    if classifier is None:
+        return OCRClassifierResponse(enabled=False, rules=rules_status)
+    classifier.refresh_if_due()
+    return OCRClassifierResponse(**classifier.status(), rules=rules_status)
+
+
+@router.get("/groq", response_model=OCRGroqStatusResponse)
+async def get_groq_status():
+    """Appels Groq de ce processus : disjoncteur, appels en cours, reprises, délais dépassés."""
+    from backend.domains.ocr.core.groq_resilience import get_groq_resilience
+
+    return OCRGroqStatusResponse(**get_groq_resilience().metrics())
+
+
 @router.post("/scan", response_model=OCRScanResponse)
-async def scan_ticket(file: UploadFile = File(...)):
+async def scan_ticket(file: UploadFile = File(...), force: bool = False):
+    """
+    Scanne un ticket. Un quasi-doublon d'un ticket déjà archivé est refusé
+    (409) avant toute inférence, sauf avec `force=true`.
+    """
     if not validate_image_format(file.filename):
         raise HTTPException(400, f"Format non supporté. Acceptés: {', '.join(IMAGES)}")
 
-    path = None
     try:
-        path = await save_upload_to_temp(file, "ocr_")
-        ocr = get_ocr_service()
-        raw = ocr.ocr_engine.extract_text(path)
-        tx = ocr.process_ticket(path)
+        # Upload décodé en mémoire ; seule écriture disque : l'archive finale
+        data = await file.read()
+        index = get_ticket_index()
+        # Décodage + empreinte hors de la boucle d'événements
+        fingerprint, duplicate = (
+            await asyncio.to_thread(index.check, data) if index is not None else (None, None)
+        )
+        if duplicate and not force:
+            raise HTTPException(
+                409,
+                f"Doublon probable du ticket archivé {os.path.basename(duplicate.path)} "
+                f"(distance {duplicate.distance}). Renvoyer avec force=true pour le traiter.",
+            )
+
+        tx, result = await get_ocr_service().process_ticket_result_async(data, name=file.filename)
 
-        archived_path = archive_file(path, transaction=tx)
+        archived_path = archive_bytes(data, file.filename, transaction=tx)
+        if index is not None and archived_path:
+            index.add(archived_path, fingerprint)
 
         return OCRScanResponse(
             transaction=tx,
-            raw_ocr_text=raw,
+            raw_ocr_text=result.text,
+            ocr_lines=result.lines,
+            ocr_confidence=result.mean_score,
+            ocr_timings=result.timings,
+            receipt=result.receipt,
             archived_path=archived_path,
         )
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"OCR scan error: {e}", exc_info=True)
         raise HTTPException(500, f"Échec du scan: {str(e)}")
-    finally:
-        if path and os.path.exists(path):
-            os.remove(path)
+
+
+def _split_duplicates(index, uploads: list) -> Tuple[List[int], Dict[int, tuple]]:
+    """
+    Rangs des tickets à traiter et quasi-doublons {rang: (nom, correspondance)},
+    d'un ticket archivé ou d'un autre ticket du lot.
+    """
+    seen, unique, duplicates = HashIndex(), [], {}
+    for pos, (name, data) in enumerate(uploads):
+        fingerprint, match = index.check(data)
+        if match is None and fingerprint is not None:
+            hits = seen.search(fingerprint, index.max_distance)
+            if hits:
+                match = DuplicateMatch(path=hits[0][0], distance=hits[0][1])
+            else:
+                seen.add(fingerprint, name)
+        if match:
+            duplicates[pos] = (name, match)
+        else:
+            unique.append(pos)
+    return unique, duplicates
 
 
 @router.post("/scan-batch", response_model=BatchScanResponse)
 async def scan_batch(files: List[UploadFile] = File(...)):
-    mgr = TempFileManager()
     try:
-        paths = [
-            await mgr.save_upload(f, "batch_")
+        # Couples (nom, octets) : décodés en mémoire par les workers, sans fichier temporaire
+        uploads = [
+            (f.filename, await f.read())
             for f in files
             if validate_image_format(f.filename)
         ]
-        if not paths:
+        if not uploads:
             raise HTTPException(400, "Aucun fichier valide fourni")
 
-        ocr = get_ocr_service()
-        results = ocr.process_batch_tickets(paths)
+        # Quasi-doublons écartés avant l'OCR (empreintes hors de la boucle d'événements)
+        positions, duplicates = list(range(len(uploads))), {}
+        index = get_ticket_index()
+        if index is not None:
+            positions, duplicates = await asyncio.to_thread(_split_duplicates, index, uploads)
+        to_scan = [uploads[pos] for pos in positions]
 
-        formatted = []
-        for fname, tx, err, _ in results:
+        ocr = get_ocr_service()
+        report: dict = {}
+        results = ocr.process_batch_tickets(to_scan, report=report) if to_scan else []
+
+        # Réponses dans l'ordre des fichiers envoyés
+        formatted: List[OCRScanResponse] = [None] * len(uploads)
+        for pos, (fname, match) in duplicates.items():
+            formatted[pos] = OCRScanResponse(
+                transaction=Transaction(
+                    type="depense",
+                    categorie="Doublon",
+                    sous_categorie="Autre",
+                    montant=0,
+                    date=date_type.today(),
+                    description=f"Doublon ignoré : {fname}",
+                ),
+                warnings=[
+                    f"Doublon probable de {os.path.basename(match.path)} "
+                    f"(distance {match.distance}) : non traité"
+                ],
+                raw_ocr_text=None,
+            )
+        for pos, (fname, tx, err, _) in zip(positions, results):
             if err:
-                formatted.append(
-                    OCRScanResponse(
-                        transaction=Transaction(
-                            type="depense",
-                            categorie="Erreur",
-                            sous_categorie="Autre",
-                            montant=0,
-                            date=date_type.today(),
-                            description=f"Erreur sur {fname}",
-                        ),
-                        warnings=[f"Échec: {err}"],
-                        raw_ocr_text=None,
-                    )
+                formatted[pos] = OCRScanResponse(
+                    transaction=Transaction(
+                        type="depense",
+                        categorie="Erreur",
+                        sous_categorie="Autre",
+                        montant=0,
+                        date=date_type.today(),
+                        description=f"Erreur sur {fname}",
+                    ),
+                    warnings=[f"Échec: {err}"],
+                    raw_ocr_text=None,
                 )
             else:
-                formatted.append(
-                    OCRScanResponse(transaction=tx, raw_ocr_text=None)
-                )
+                formatted[pos] = OCRScanResponse(transaction=tx, raw_ocr_text=None)
 
-        return BatchScanResponse(results=formatted)
+        return BatchScanResponse(
+            results=formatted,
+            categorization=OCRBatchCategorization(**report) if report else None,
+        )
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Batch scan error: {e}", exc_info=True)
         raise HTTPException(500, f"Échec du traitement par lot: {str(e)}")
-    finally:
-        mgr.cleanup()
 
 
 @router.post("/scan-income", response_model=OCRScanResponse)
@@ -185,9 +321,17 @@ async def scan_income(file: UploadFile = File(...)):
             os.remove(path)
 
 
+@router.get("/watcher", response_model=OCRWatcherStatusResponse)
+async def get_watcher_status():
+    """Watcher des dossiers de dépôt : mode (événements ou scrutation), fichiers en attente."""
+    from .watcher import watcher_status
+
+    return OCRWatcherStatusResponse(**watcher_status())
+
+
 @router.post("/scan-pending", response_model=BatchScanResponse)
 async def scan_pending_folder():
-    """Déclenche manuellement le scan du dossier TO_SCAN_DIR."""
+    """Déclenche manuellement le scan des dossiers TO_SCAN_DIR et REVENUS_A_TRAITER."""
     from .watcher import trigger_scan
 
     try:
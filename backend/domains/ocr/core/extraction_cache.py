@@ -0,0 +1,273 @@
+"""
+Cache persistant des résultats d'extraction (OCR des tickets, texte des PDF).
+
+Ré-uploader un ticket, rescanner un dossier après un arrêt ou relancer un lot
+en échec refaisait toute l'inférence RapidOCR ou l'extraction PDF. Le cache
+associe l'empreinte SHA-256 du contenu du fichier, le type d'extraction et la
+version du moteur (plus sa configuration : un changement de prétraitement
+invalide les entrées) au résultat sérialisé : un document déjà vu ne coûte
+plus qu'un hachage et une lecture. Les classifications LLM (groq_parser) y
+sont aussi conservées, lues avec une durée de vie maximale (`max_age`).
+
+Stockage : base SQLCipher dédiée dans DATA_DIR (le texte des tickets est aussi
+sensible que la base principale), une connexion par thread et par processus.
+Éviction LRU : au-delà de la taille maximale, les entrées les moins récemment
+lues sont supprimées jusqu'à 90 % de cette taille. La base est partagée par
+les workers du pool et lue à chaque classification : une lecture n'écrit la
+date d'accès que si elle a plus d'une heure (LRU à l'heure près), et la taille
+totale est tenue à jour par `put` et l'éviction dans une table d'une ligne
+plutôt que recalculée sur toute la table.
+
+Un cache indisponible (clé maître absente, base illisible) ne bloque jamais
+l'extraction : elle est simplement recalculée.
+
+Configuration (variables d'environnement) :
+- OCR_CACHE : "0" pour désactiver
+- OCR_CACHE_MAX_MB : taille maximale des résultats stockés (défaut 64)
+"""
+
+import hashlib
+import logging
+import os
+import threading
+import time
+from functools import lru_cache
+from importlib import metadata
+from pathlib import Path
+from typing import Callable, Optional, TypeVar, Union
+
+from backend.config.paths import EXTRACTION_CACHE_PATH
+
+logger = logging.getLogger(__name__)
+
+ENV_CACHE = "OCR_CACHE"
+ENV_MAX_MB = "OCR_CACHE_MAX_MB"
+DEFAULT_MAX_MB = 64
+
+# Après éviction, la taille retombe à 90 % du maximum (évite d'évincer à
+# chaque insertion une fois le cache plein)
+_EVICT_TARGET = 0.9
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS extraction_cache (
+    key TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    last_access REAL NOT NULL
+)
+"""
+_INDEX = "CREATE INDEX IF NOT EXISTS idx_extraction_cache_access ON extraction_cache(last_access)"
+_SIZE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS extraction_cache_size (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    total INTEGER NOT NULL
+)
+"""
+# Total initial calculé une seule fois (base créée avant cette table) ; OR IGNORE :
+# les workers du pool ouvrent la base en même temps
+_SIZE_INIT = """
+INSERT OR IGNORE INTO extraction_cache_size (id, total)
+SELECT 1, COALESCE(SUM(size), 0) FROM extraction_cache
+WHERE NOT EXISTS (SELECT 1 FROM extraction_cache_size)
+"""
+_ADD_SIZE = "UPDATE extraction_cache_size SET total = total + ? WHERE id = 1"
+
+# Date d'accès réécrite au plus une fois par heure et par entrée
+TOUCH_INTERVAL = 3600.0
+
+T = TypeVar("T")
+
+
+@lru_cache(maxsize=None)
+def engine_version(distribution: str) -> str:
+    """Version installée d'un moteur ("inconnue" si les métadonnées manquent)."""
+    try:
+        return metadata.version(distribution)
+    except metadata.PackageNotFoundError:
+        return "inconnue"
+
+
+def read_content(source: Union[str, Path, bytes]) -> bytes:
+    return source if isinstance(source, bytes) else Path(source).read_bytes()
+
+
+class ExtractionCache:
+    """Résultats d'extraction indexés par empreinte du contenu, éviction LRU."""
+
+    def __init__(
+        self, db_path: Union[str, Path], max_bytes: int, touch_interval: float = TOUCH_INTERVAL
+    ):
+        self.db_path = str(db_path)
+        self.max_bytes = max_bytes
+        self.touch_interval = touch_interval
+        self.hits = 0
+        self.misses = 0
+        self._local = threading.local()
+        self._evict_lock = threading.Lock()
+
+    @staticmethod
+    def make_key(content: bytes, kind: str, version: str) -> str:
+        return f"{hashlib.sha256(content).hexdigest()}:{kind}:{version}"
+
+    def connect(self):
+        # Une connexion SQLCipher par thread, rouverte après un fork
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            from backend.shared.database.connection import get_db_connection
+
+            conn = get_db_connection(db_path=self.db_path)
+            conn.execute(_SCHEMA)
+            conn.execute(_INDEX)
+            conn.execute(_SIZE_SCHEMA)
+            conn.execute(_SIZE_INIT)
+            conn.commit()
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    def get(self, key: str, max_age: Optional[float] = None) -> Optional[str]:
+        """Résultat en cache, None s'il est absent ou plus vieux que `max_age` secondes."""
+        conn = self.connect()
+        row = conn.execute(
+            "SELECT payload, created_at, last_access, size FROM extraction_cache WHERE key = ?",
+            (key,),
+        ).fetchone()
+        now = time.time()
+        if row is not None and max_age is not None and row[1] < now - max_age:
+            if conn.execute("DELETE FROM extraction_cache WHERE key = ?", (key,)).rowcount:
+                conn.execute(_ADD_SIZE, (-row[3],))
+            conn.commit()
+            row = None
+        if row is None:
+            self.misses += 1
+            return None
+        if now - row[2] >= self.touch_interval:
+            # Lecture sans écriture la plupart du temps : pas de verrou d'écriture
+            conn.execute("UPDATE extraction_cache SET last_access = ? WHERE key = ?", (now, key))
+            conn.commit()
+        self.hits += 1
+        return row[0]
+
+    def put(self, key: str, kind: str, payload: str) -> None:
+        conn = self.connect()
+        now = time.time()
+        size = len(payload.encode("utf-8"))
+        # Total ajusté dans la même transaction (taille remplacée déduite)
+        conn.execute(
+            "UPDATE extraction_cache_size SET total = total + ? - COALESCE("
+            "(SELECT size FROM extraction_cache WHERE key = ?), 0) WHERE id = 1",
+            (size, key),
+        )
+        conn.execute(
+            "INSERT OR REPLACE INTO extraction_cache "
+            "(key, kind, payload, size, created_at, last_access) VALUES (?, ?, ?, ?, ?, ?)",
+            (key, kind, payload, size, now, now),
+        )
+        conn.commit()
+        self._evict(conn)
+
+    def _total(self, conn) -> int:
+        row = conn.execute("SELECT total FROM extraction_cache_size WHERE id = 1").fetchone()
+        return row[0] if row else 0
+
+    def _evict(self, conn) -> None:
+        total = self._total(conn)
+        if total <= self.max_bytes:
+            return
+        with self._evict_lock:
+            target = total - int(self.max_bytes * _EVICT_TARGET)
+            freed, deleted = 0, 0
+            for key, size in conn.execute(
+                "SELECT key, size FROM extraction_cache ORDER BY last_access"
+            ).fetchall():
+                if freed >= target:
+                    break
+                # Entrée déjà évincée par un autre worker : rien à déduire
+                if conn.execute("DELETE FROM extraction_cache WHERE key = ?", (key,)).rowcount:
+                    freed += size
+                    deleted += 1
+            conn.execute(_ADD_SIZE, (-freed,))
+            conn.commit()
+        logger.info(f"[Cache] {deleted} entrées évincées ({freed / 1e6:.1f} Mo)")
+
+    def get_or_compute(
+        self,
+        source: Union[str, Path, bytes],
+        kind: str,
+        version: str,
+        compute: Callable[[], T],
+        dump: Callable[[T], str],
+        load: Callable[[str], T],
+    ) -> T:
+        """
+        Résultat en cache pour ce contenu, sinon `compute()` stocké via `dump`.
+
+        Les erreurs du cache sont journalisées et ignorées ; celles de
+        `compute` remontent à l'appelant (rien n'est stocké).
+        """
+        try:
+            key = self.make_key(read_content(source), kind, version)
+            payload = self.get(key)
+        except Exception as e:
+            logger.warning(f"[Cache] lecture impossible ({kind}): {e}")
+            return compute()
+        if payload is not None:
+            return load(payload)
+
+        value = compute()
+        try:
+            self.put(key, kind, dump(value))
+        except Exception as e:
+            logger.warning(f"[Cache] écriture impossible ({kind}): {e}")
+        return value
+
+    def stats(self) -> dict:
+        conn = self.connect()
+        entries = conn.execute("SELECT COUNT(*) FROM extraction_cache").fetchone()[0]
+        return {
+            "entries": entries,
+            "bytes": self._total(conn),
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+    def clear(self) -> None:
+        conn = self.connect()
+        conn.execute("DELETE FROM extraction_cache")
+        conn.execute("UPDATE extraction_cache_size SET total = 0 WHERE id = 1")
+        conn.commit()
+
+
+_cache: Optional[ExtractionCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_extraction_cache() -> Optional[ExtractionCache]:
+    """Cache partagé du processus, None si désactivé (OCR_CACHE=0)."""
+    global _cache
+    if os.getenv(ENV_CACHE, "1").strip().lower() in ("0", "off", "false"):
+        return None
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                max_mb = os.getenv(ENV_MAX_MB, "").strip()
+                max_bytes = (int(max_mb) if max_mb.isdigit() else DEFAULT_MAX_MB) * 1024 * 1024
+                _cache = ExtractionCache(EXTRACTION_CACHE_PATH, max_bytes)
+    return _cache
+
+
+def cached(
+    source: Union[str, Path, bytes],
+    kind: str,
+    version: str,
+    compute: Callable[[], T],
+    dump: Callable[[T], str] = str,
+    load: Callable[[str], T] = str,
+) -> T:
+    """`get_or_compute` sur le cache partagé, ou `compute()` s'il est désactivé."""
+    cache = get_extraction_cache()
+    if cache is None:
+        return compute()
+    return cache.get_or_compute(source, kind, version, compute, dump, load)
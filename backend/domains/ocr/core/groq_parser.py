@@ -2,20 +2,124 @@
 Groq Parser - Extraction intelligente Ultra-Rapide (LPU)
 Utilise un LLM distant de chez Groq (Llama-3) pour structurer les données issues de l'OCR.
 Garanti un temps de réponse < 1 seconde grâce à l'architecture spécialisée.
+
+Les réponses (température 0, liste de catégories fixe : déterministes) sont
+mises en cache, indexées par le texte OCR normalisé (sans les jetons contenant
+des chiffres : dates, heures, montants, numéros de transaction) et versionnées
+par le modèle et le prompt, donc par le contenu de categories.yaml. Un ticket
+rescanné ou une facturette du même commerçant se classe sans appel réseau :
+mémoire du processus d'abord, puis cache chiffré partagé (extraction_cache).
+
+Lots (`parse_batch`) : les tickets absents du cache sont envoyés par
+groupes de GROQ_BATCH_SIZE dans une même requête (prompt des catégories
+envoyé une fois par groupe au lieu d'une fois par ticket) ; la réponse est
+une liste indexée compacte {"r": [{"i", "c", "s", "d"}]}. Chaque entrée est
+validée comme une réponse unitaire ; un ticket absent ou mal formé dans la
+réponse (ou un groupe en échec) est reclassé seul, puis retombe sur "Autre".
+
+Prompt compact (par défaut) : catégories et sous-catégories désignées par
+des codes courts (lettre de catégorie, numéro de sous-catégorie : "B1") dans
+une table dérivée de categories.yaml ; le modèle répond {"c": code, "d":
+commerçant}. Le prompt ne grossit plus que d'un code et d'un nom par
+sous-catégorie, et la réponse est plus courte. La table (donc le prompt et
+les clés de cache) est recalculée dès que le YAML change ; `code_version` la
+versionne. GROQ_PROMPT=full rétablit le prompt rédigé d'origine.
+
+Appels réseau : concurrence bornée, délais, reprises et disjoncteur communs
+(groq_resilience.py). `aparse` est la variante asynchrone de `parse` (client
+AsyncGroq) pour les endpoints : un Groq lent ne bloque plus la boucle
+d'événements, et disjoncteur ouvert = valeur par défaut immédiate.
+
+Configuration :
+- GROQ_CACHE_TTL_DAYS : durée de vie des réponses (défaut 90, 0 pour désactiver le cache)
+- GROQ_BATCH_SIZE : tickets par requête groupée (défaut 8, 1 pour un appel par ticket)
+- GROQ_PROMPT : "compact" (défaut, codes) ou "full" (noms en toutes lettres)
 """
 
+import hashlib
 import json
 import logging
 import os
-from typing import Dict, Any
+import re
+import unicodedata
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Tuple
+
+from groq import AsyncGroq, Groq
 
-from groq import Groq
+from .extraction_cache import ExtractionCache, get_extraction_cache
+from .groq_resilience import CircuitOpenError, GroqResilience, get_groq_resilience
 
 # Chargement dynamique depuis categories.yaml
-from backend.shared.utils.categories_loader import get_categories, get_all_subcategories
+from backend.shared.utils.categories_loader import (
+    categories_fingerprint,
+    get_categories,
+    get_all_subcategories,
+)
 
 logger = logging.getLogger(__name__)
 
+ENV_CACHE_TTL_DAYS = "GROQ_CACHE_TTL_DAYS"
+DEFAULT_CACHE_TTL_DAYS = 90
+ENV_BATCH_SIZE = "GROQ_BATCH_SIZE"
+DEFAULT_BATCH_SIZE = 8
+ENV_PROMPT = "GROQ_PROMPT"
+PROMPT_FORMATS = ("compact", "full")
+# Texte OCR cumulé maximal d'une requête groupée (contexte et latence bornés)
+BATCH_MAX_CHARS = 12000
+# Réponses gardées en mémoire par processus (commerçants récurrents)
+MEMO_SIZE = 512
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+
+def normalize_ocr_text(text: str) -> str:
+    """
+    Squelette stable du texte OCR : minuscules sans accents, ponctuation
+    retirée, jetons numériques supprimés (dates, montants, identifiants), une
+    ligne par ligne non vide. Deux passages du même ticket (ou deux
+    facturettes du même commerçant) ont le même squelette.
+    """
+    text = text.lower()
+    if not text.isascii():  # décomposition (lente) seulement si accents possibles
+        text = unicodedata.normalize("NFKD", text)
+        text = "".join(c for c in text if not unicodedata.combining(c))
+    # Codes courts alphanumériques conservés (carburants SP95, E10 : ils décident
+    # de la catégorie), autres jetons avec chiffres écartés. Test en ligne
+    # plutôt qu'un appel de fonction par jeton : appelé sur chaque ticket.
+    lines = (
+        " ".join(t for t in _TOKEN.findall(line) if t.isalpha() or (t[0].isalpha() and len(t) <= 4))
+        for line in text.splitlines()
+    )
+    return "\n".join(line for line in lines if line)
+
+
+def _category_code(index: int) -> str:
+    """A..Z, puis AA, AB... (codes de catégorie)."""
+    code = ""
+    index += 1
+    while index:
+        index, rest = divmod(index - 1, 26)
+        code = chr(ord("A") + rest) + code
+    return code
+
+
+def build_code_table(
+    categories: List[str], subcategories: Dict[str, List[str]]
+) -> Dict[str, Tuple[str, Optional[str]]]:
+    """
+    Code court -> (catégorie, sous-catégorie) : une lettre par catégorie dans
+    l'ordre du YAML ("B" -> ("Voiture", None)), suivie du rang de la
+    sous-catégorie ("B1" -> ("Voiture", "Essence")).
+    """
+    table: Dict[str, Tuple[str, Optional[str]]] = {}
+    for i, category in enumerate(categories):
+        code = _category_code(i)
+        table[code] = (category, None)
+        for j, sub in enumerate(subcategories.get(category) or [], start=1):
+            table[f"{code}{j}"] = (category, sub)
+    return table
+
 
 class GroqParser:
     """
@@ -24,10 +128,15 @@ class GroqParser:
     Catégories et sous-catégories chargées depuis categories.yaml.
     """
 
-    def __init__(self, model_name: str = "llama-3.3-70b-versatile"):
+    def __init__(
+        self,
+        model_name: str = "llama-3.3-70b-versatile",
+        resilience: Optional[GroqResilience] = None,
+    ):
         """
         Initialise le parser. Charge automatiquement le fichier .env si présent,
         puis récupère la clé d'API (GROQ_API_KEY).
+        `resilience` : politique d'appel (défaut : celle, partagée, du processus).
         """
         from dotenv import load_dotenv
         from backend.config.paths import ENV_PATH
@@ -39,8 +148,25 @@ def __init__(self, model_name: str = "llama-3.3-70b-versatile"):
         # Pas d'initialisation du client ici - fait à la demande (lazy loading)
         # pour permettre une mise à jour de la clé API après le démarrage
         self._client = None
+        self._async_client = None
         self._api_key = None
+        self.resilience = resilience or get_groq_resilience()
+
+        ttl_days = os.getenv(ENV_CACHE_TTL_DAYS, "").strip()
+        ttl_days = int(ttl_days) if ttl_days.isdigit() else DEFAULT_CACHE_TTL_DAYS
+        self.cache_ttl: Optional[float] = ttl_days * 86400 if ttl_days else None
+        self._memo: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+
+        batch_size = os.getenv(ENV_BATCH_SIZE, "").strip()
+        self.batch_size = max(1, int(batch_size)) if batch_size.isdigit() else DEFAULT_BATCH_SIZE
+        prompt_format = os.getenv(ENV_PROMPT, "").strip().lower()
+        self.prompt_format = prompt_format if prompt_format in PROMPT_FORMATS else "compact"
+
+        self._build_prompt()
 
+    def _build_prompt(self) -> None:
+        """Prompt système et version du cache, depuis l'état courant de categories.yaml."""
+        self._categories_version = categories_fingerprint()
         # Construction du prompt avec catégories + sous-catégories depuis le YAML
         # Mise en cache pour éviter rechargement à chaque parse()
         GroqParser._categories = get_categories()
@@ -52,7 +178,7 @@ def __init__(self, model_name: str = "llama-3.3-70b-versatile"):
             if subs
         )
 
-        self.system_prompt = f"""
+        rules = f"""
 Tu es un expert comptable ultra-rapide.
 Ta tâche : Analyser un texte brut OCR extrait d'un ticket de caisse, d'une facture ou d'un PDF.
 Tu dois extraire le nom du commerçant et classifier la transaction.
@@ -69,102 +195,388 @@ def __init__(self, model_name: str = "llama-3.3-70b-versatile"):
 
 Sous-catégories disponibles par catégorie (utilise EXACTEMENT ces termes) :
 {subcat_lines}
-
+"""
+        self.system_prompt = rules + """
 Règles de sortie du JSON :
-{{
+{
   "category": "Choisis OBLIGATOIREMENT une SEULE catégorie parmi la liste exacte ci-dessus.",
   "subcategory": "Choisis OBLIGATOIREMENT une sous-catégorie EXACTE de la liste ci-dessus pour la catégorie choisie.",
   "description": "Le nom du commerçant principal en Majuscules (ex: 'TOTAL STATION'). Si introuvable, mets 'Achat'."
-}}
+}
 
 Rien d'autre ne doit être renvoyé à part l'objet JSON contenant ces 3 clés.
 """
+        self.batch_prompt = rules + """
+Tu reçois PLUSIEURS tickets, chacun précédé de "### Ticket <numéro>".
+Règles de sortie du JSON, une entrée par ticket :
+{"r": [{"i": <numéro>, "c": "<catégorie>", "s": "<sous-catégorie>", "d": "<COMMERÇANT>"}]}
+- c : une SEULE catégorie de la liste exacte ci-dessus.
+- s : une sous-catégorie EXACTE de la liste ci-dessus pour cette catégorie.
+- d : le nom du commerçant principal en Majuscules. Si introuvable, mets 'Achat'.
+
+Rien d'autre ne doit être renvoyé à part cet objet JSON.
+"""
+        self.codes = build_code_table(GroqParser._categories, GroqParser._subcategories_map)
+        self._codes_by_label = {label: code for code, label in self.codes.items()}
+        table_hash = hashlib.sha256(
+            json.dumps(self.codes, ensure_ascii=False).encode()
+        ).hexdigest()[:8]
+        self.code_version = f"{self._categories_version}-{table_hash}"
+        if self.prompt_format == "compact":
+            self.system_prompt, self.batch_prompt = self._compact_prompts()
+
+        prompt_hash = hashlib.sha256(self.system_prompt.encode()).hexdigest()[:12]
+        self.cache_version = f"{self.model_name}-{prompt_hash}"
+        self._memo.clear()
+
+    def _compact_prompts(self) -> Tuple[str, str]:
+        """Prompts unitaire et groupé à codes courts."""
+        groups: Dict[str, List[str]] = {}
+        for code, (category, sub) in self.codes.items():
+            if sub is None:
+                groups[code] = [f"{code} {category}"]
+            else:
+                groups[code.rstrip("0123456789")].append(f"{code} {sub}")
+        table = "\n".join(
+            items[0] + (" : " + ", ".join(items[1:]) if len(items) > 1 else "")
+            for items in groups.values()
+        )
+        fuel = self._codes_by_label.get(("Voiture", "Essence"))
+        grocery = self._codes_by_label.get(("Alimentation", "Supermarché"))
+        rules = []
+        if fuel:
+            rules.append(
+                "Carburant (gazole, SP95, SP98, E10, E85, litre, pompe, station, Total, BP, "
+                f"Shell, Esso, Q8) : {fuel}, même dans un supermarché."
+            )
+        if grocery:
+            rules.append(f"Supermarché sans carburant : {grocery}.")
+
+        header = (
+            "Classe des tickets de caisse (texte OCR bruité).\n"
+            "c : code de la table (celui de la sous-catégorie si la catégorie en a). "
+            "d : commerçant principal en majuscules, 'Achat' si introuvable.\n"
+            + "".join(f"{rule}\n" for rule in rules)
+            + f"Codes :\n{table}\n"
+        )
+        single = header + 'Réponds UNIQUEMENT en JSON : {"c":"<code>","d":"<COMMERÇANT>"}'
+        batch = header + (
+            'Tickets précédés de "### Ticket <i>". Réponds UNIQUEMENT en JSON, '
+            'une entrée par ticket : {"r":[{"i":<i>,"c":"<code>","d":"<COMMERÇANT>"}]}'
+        )
+        return single, batch
+
+    def _decode(self, entry: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Réponse {c, s?, d} -> {category, subcategory, description} : `c` est un
+        code de la table, ou (prompt complet) un nom de catégorie avec `s`.
+        None si `c` manque.
+        """
+        code = entry.get("c")
+        if not isinstance(code, str):
+            return None
+        label = self.codes.get(code.strip().upper())
+        if label is not None:
+            category, subcategory = label
+        else:
+            category = code
+            subcategory = entry.get("s") if isinstance(entry.get("s"), str) else None
+        description = entry.get("d")
+        return {
+            "category": category,
+            "subcategory": subcategory or "",
+            "description": description if isinstance(description, str) and description else "Achat",
+        }
 
     def parse(self, text: str) -> Dict[str, Any]:
         """
         Analyse le texte brut de l'OCR et renvoie {category, subcategory, description}.
         """
+        key, ready = self._prepare(text)
+        if ready is not None:
+            return ready
+        if not self._has_client():
+            return self._fallback()
+        return self._finish(key, self._classify(text))
+
+    async def aparse(self, text: str) -> Dict[str, Any]:
+        """Comme `parse`, sans bloquer la boucle d'événements (client AsyncGroq)."""
+        key, ready = self._prepare(text)
+        if ready is not None:
+            return ready
+        if not self._has_client() or self._async_client is None:
+            return self._fallback()
+        return self._finish(key, await self._aclassify(text))
+
+    def _prepare(self, text: str) -> Tuple[Optional[str], Optional[Dict[str, Any]]]:
+        """Clé de cache du texte, et réponse immédiate (texte trop court, cache) s'il y en a une."""
+        if not text or len(text.strip()) < 10:
+            logger.warning("Texte OCR trop court pour Groq.")
+            return None, self._fallback()
+
+        # categories.yaml modifié : nouveau prompt, donc nouvelles clés de cache
+        if categories_fingerprint() != self._categories_version:
+            self._build_prompt()
+
+        key = ExtractionCache.make_key(
+            normalize_ocr_text(text).encode("utf-8"), "llm", self.cache_version
+        )
+        return key, self._cache_get(key)
+
+    def _has_client(self) -> bool:
         # Lazy loading du client Groq - permet mise à jour dynamique de la clé
         if self._client is None:
             self._ensure_client()
 
         if not self._client:
             logger.error("Tentative d'utilisation de GroqParser sans GROQ_API_KEY.")
-            return self._fallback()
+            return False
+        return True
 
-        if not text or len(text.strip()) < 10:
-            logger.warning("Texte OCR trop court pour Groq.")
+    def _finish(self, key: str, data: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        if data is None:
             return self._fallback()
+        self._cache_put(key, data)
+        return data
 
+    def parse_batch(self, texts: List[str]) -> List[Dict[str, Any]]:
+        """
+        Comme `parse` pour une liste de textes (même ordre en sortie) : cache
+        d'abord, puis requêtes groupées pour les textes restants.
+        """
+        if categories_fingerprint() != self._categories_version:
+            self._build_prompt()
+
+        results: List[Optional[Dict[str, Any]]] = [None] * len(texts)
+        pending: Dict[str, List[int]] = {}  # clé -> positions (textes identiques fusionnés)
+        for i, text in enumerate(texts):
+            if not text or len(text.strip()) < 10:
+                results[i] = self._fallback()
+                continue
+            key = ExtractionCache.make_key(
+                normalize_ocr_text(text).encode("utf-8"), "llm", self.cache_version
+            )
+            cached = self._cache_get(key)
+            if cached is not None:
+                results[i] = cached
+            else:
+                pending.setdefault(key, []).append(i)
+
+        if pending:
+            keys = list(pending)
+            if not self._has_client():
+                classified = [None] * len(keys)
+            else:
+                classified = self._classify_many([texts[pending[k][0]] for k in keys])
+            for key, data in zip(keys, classified):
+                if data is not None:
+                    self._cache_put(key, data)
+                for i in pending[key]:
+                    results[i] = dict(data) if data is not None else self._fallback()
+        return results
+
+    def _classify_many(self, texts: List[str]) -> List[Optional[Dict[str, Any]]]:
+        """Requêtes groupées (batch_size tickets, BATCH_MAX_CHARS), repli unitaire par ticket."""
+        results: List[Optional[Dict[str, Any]]] = [None] * len(texts)
+        groups: List[List[int]] = []
+        size = 0
+        for i, text in enumerate(texts):
+            if not groups or len(groups[-1]) >= self.batch_size or size + len(text) > BATCH_MAX_CHARS:
+                groups.append([])
+                size = 0
+            groups[-1].append(i)
+            size += len(text)
+
+        for group in groups:
+            answers = self._classify_group([texts[i] for i in group]) if len(group) > 1 else {}
+            for local, i in enumerate(group):
+                results[i] = answers.get(local) or self._classify(texts[i])
+        return results
+
+    def _classify_group(self, texts: List[str]) -> Dict[int, Dict[str, Any]]:
+        """Une requête pour plusieurs tickets ; réponses valides indexées par position."""
+        user = "\n\n".join(f"### Ticket {i}\n{text}" for i, text in enumerate(texts))
         try:
             logger.info(
-                f"Envoi du texte brut ({len(text)} car) à Groq ({self.model_name})..."
+                f"Envoi de {len(texts)} tickets ({len(user)} car) à Groq ({self.model_name})..."
             )
+            entries = json.loads(self._complete(self.batch_prompt, user)).get("r")
+        except CircuitOpenError:
+            return {}
+        except Exception as e:
+            logger.error(f"Erreur API Groq (lot): {e}")
+            return {}
+        if not isinstance(entries, list):
+            logger.warning("Réponse Groq (lot) sans liste 'r'")
+            return {}
+
+        answers: Dict[int, Dict[str, Any]] = {}
+        for entry in entries:
+            if not isinstance(entry, dict):
+                continue
+            i = entry.get("i")
+            if not isinstance(i, int) or not 0 <= i < len(texts) or i in answers:
+                continue
+            decoded = self._decode(entry)
+            if decoded is not None:
+                answers[i] = self._validate(decoded)
+        if len(answers) < len(texts):
+            logger.warning(f"Réponse Groq (lot): {len(texts) - len(answers)} tickets à reclasser seuls")
+        return answers
+
+    def _cache_get(self, key: str) -> Optional[Dict[str, Any]]:
+        if self.cache_ttl is None:
+            return None
+        if key in self._memo:
+            self._memo.move_to_end(key)
+            return dict(self._memo[key])
+        cache = get_extraction_cache()
+        if cache is None:
+            return None
+        try:
+            payload = cache.get(key, max_age=self.cache_ttl)
+        except Exception as e:
+            logger.warning(f"[Groq] Cache indisponible: {e}")
+            return None
+        if payload is None:
+            return None
+        data = json.loads(payload)
+        self._memoize(key, data)
+        return dict(data)
+
+    def _cache_put(self, key: str, data: Dict[str, Any]) -> None:
+        if self.cache_ttl is None:
+            return
+        self._memoize(key, data)
+        cache = get_extraction_cache()
+        if cache is None:
+            return
+        try:
+            cache.put(key, "llm", json.dumps(data, ensure_ascii=False))
+        except Exception as e:
+            logger.warning(f"[Groq] Écriture du cache impossible: {e}")
 
-            chat_completion = self._client.chat.completions.create(
-                messages=[
-                    {
-                        "role": "system",
-                        "content": self.system_prompt,
-                    },
-                    {
-                        "role": "user",
-                        "content": f"Texte du Ticket :\n{text}",
-                    },
-                ],
-                model=self.model_name,
-                response_format={
-                    "type": "json_object"
-                },  # Clé magique pour la sécurité du parsing
-                temperature=0.0,  # 0 = Logique mathématique absolue, pas "d'imagination"
-            )
+    def _memoize(self, key: str, data: Dict[str, Any]) -> None:
+        self._memo[key] = dict(data)
+        self._memo.move_to_end(key)
+        if len(self._memo) > MEMO_SIZE:
+            self._memo.popitem(last=False)
 
-            content = chat_completion.choices[0].message.content
-            logger.debug(f"Réponse JSON de Groq: {content}")
+    def _request(self, system: str, user: str) -> Dict[str, Any]:
+        return {
+            "messages": [
+                {
+                    "role": "system",
+                    "content": system,
+                },
+                {
+                    "role": "user",
+                    "content": user,
+                },
+            ],
+            "model": self.model_name,
+            "response_format": {
+                "type": "json_object"
+            },  # Clé magique pour la sécurité du parsing
+            "temperature": 0.0,  # 0 = Logique mathématique absolue, pas "d'imagination"
+        }
 
-            data = json.loads(content)
+    def _complete(self, system: str, user: str) -> str:
+        """Appel Groq en mode JSON (délai, reprises, disjoncteur), contenu brut de la réponse."""
+        request = self._request(system, user)
+        chat_completion = self.resilience.call(
+            lambda timeout: self._client.chat.completions.create(**request, timeout=timeout)
+        )
+        content = chat_completion.choices[0].message.content
+        logger.debug(f"Réponse JSON de Groq: {content}")
+        return content
+
+    async def _acomplete(self, system: str, user: str) -> str:
+        request = self._request(system, user)
+        chat_completion = await self.resilience.acall(
+            lambda: self._async_client.chat.completions.create(**request)
+        )
+        content = chat_completion.choices[0].message.content
+        logger.debug(f"Réponse JSON de Groq: {content}")
+        return content
 
-            # Validation catégorie
-            if data.get("category") not in GroqParser._categories:
-                data["category"] = "Autre"
+    def _classify(self, text: str) -> Optional[Dict[str, Any]]:
+        """Appel Groq et validation de la réponse ; None en cas d'échec."""
+        try:
+            logger.info(
+                f"Envoi du texte brut ({len(text)} car) à Groq ({self.model_name})..."
+            )
+            return self._read_answer(
+                self._complete(self.system_prompt, f"Texte du Ticket :\n{text}")
+            )
 
-            # Validation sous-catégorie : cherche la correspondance la plus proche
-            category = data.get("category", "Autre")
-            subcategory = data.get("subcategory", "")
-            valid_subs = GroqParser._subcategories_map.get(category, [])
+        except CircuitOpenError:
+            logger.debug("Disjoncteur Groq ouvert : classification par défaut")
+            return None
+        except Exception as e:
+            logger.error(f"Erreur API Groq: {e}")
+            return None
 
-            if valid_subs and subcategory:
-                # Correspondance exacte
-                if subcategory not in valid_subs:
-                    # Correspondance insensible à la casse
-                    sub_lower = subcategory.lower()
+    async def _aclassify(self, text: str) -> Optional[Dict[str, Any]]:
+        try:
+            return self._read_answer(
+                await self._acomplete(self.system_prompt, f"Texte du Ticket :\n{text}")
+            )
+        except CircuitOpenError:
+            logger.debug("Disjoncteur Groq ouvert : classification par défaut")
+            return None
+        except Exception as e:
+            logger.error(f"Erreur API Groq: {e!r}")
+            return None
+
+    def _read_answer(self, content: str) -> Dict[str, Any]:
+        """Réponse unitaire (codes ou noms) décodée et validée."""
+        data = json.loads(content)
+        if "c" in data:
+            data = self._decode(data)
+            if data is None:
+                raise ValueError(f"Code de catégorie invalide: {content}")
+        return self._validate(data)
+
+    def _validate(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Ramène catégorie et sous-catégorie aux valeurs de categories.yaml."""
+        # Validation catégorie
+        if data.get("category") not in GroqParser._categories:
+            data["category"] = "Autre"
+
+        # Validation sous-catégorie : cherche la correspondance la plus proche
+        category = data.get("category", "Autre")
+        subcategory = data.get("subcategory", "")
+        valid_subs = GroqParser._subcategories_map.get(category, [])
+
+        if valid_subs and subcategory:
+            # Correspondance exacte
+            if subcategory not in valid_subs:
+                # Correspondance insensible à la casse
+                sub_lower = subcategory.lower()
+                match = next(
+                    (s for s in valid_subs if s.lower() == sub_lower), None
+                )
+                if match:
+                    data["subcategory"] = match
+                else:
+                    # Correspondance partielle (ex: "Gazole" → "Essence")
                     match = next(
-                        (s for s in valid_subs if s.lower() == sub_lower), None
+                        (
+                            s
+                            for s in valid_subs
+                            if s.lower() in sub_lower or sub_lower in s.lower()
+                        ),
+                        None,
                     )
-                    if match:
-                        data["subcategory"] = match
-                    else:
-                        # Correspondance partielle (ex: "Gazole" → "Essence")
-                        match = next(
-                            (
-                                s
-                                for s in valid_subs
-                                if s.lower() in sub_lower or sub_lower in s.lower()
-                            ),
-                            None,
-                        )
-                        data["subcategory"] = match if match else valid_subs[0]
-                        logger.info(
-                            f"Sous-catégorie '{subcategory}' → '{data['subcategory']}' (correction)"
-                        )
-            elif valid_subs and not subcategory:
-                data["subcategory"] = valid_subs[0]
-
-            return data
+                    data["subcategory"] = match if match else valid_subs[0]
+                    logger.info(
+                        f"Sous-catégorie '{subcategory}' → '{data['subcategory']}' (correction)"
+                    )
+        elif valid_subs and not subcategory:
+            data["subcategory"] = valid_subs[0]
 
-        except Exception as e:
-            logger.error(f"Erreur API Groq: {e}")
-            return self._fallback()
+        return data
 
     def _fallback(self) -> Dict[str, Any]:
         """Valeurs par défaut si le LLM échoue ou n'est pas configuré."""
@@ -191,4 +603,6 @@ def _ensure_client(self) -> None:
         if self._api_key != api_key:
             logger.info("Initialisation du client Groq...")
             self._api_key = api_key
-            self._client = Groq(api_key=api_key)
+            # Reprises et délais gérés par self.resilience, pas par le SDK
+            self._client = Groq(api_key=api_key, max_retries=0)
+            self._async_client = AsyncGroq(api_key=api_key, max_retries=0)
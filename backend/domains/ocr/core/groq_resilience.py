@@ -0,0 +1,359 @@
+"""
+Politique d'appel de l'API Groq : concurrence bornée, délais, reprises et disjoncteur.
+
+Sans délai explicite, un appel Groq lent bloquait le scan (et, depuis un
+endpoint async, la boucle d'événements) aussi longtemps que le serveur tardait.
+Chaque appel passe désormais par `GroqResilience` (version synchrone `call`
+pour les workers et threads, asynchrone `acall` pour les endpoints) :
+
+- au plus `max_in_flight` appels simultanés par processus (et par boucle) ;
+- délai maximal par tentative (`timeout`) ;
+- reprises des erreurs transitoires (délai dépassé, connexion, 429, 5xx) avec
+  attente exponentielle à gigue complète ;
+- disjoncteur : après `failure_threshold` échecs consécutifs, les appels sont
+  refusés immédiatement (`CircuitOpenError`, l'appelant retombe sur sa valeur
+  par défaut) pendant `reset_timeout` secondes, puis un appel d'essai décide
+  de la fermeture ou d'une nouvelle ouverture.
+
+Configuration (variables d'environnement) :
+- GROQ_TIMEOUT : délai par tentative en secondes (défaut 10)
+- GROQ_MAX_RETRIES : reprises après une erreur transitoire (défaut 2)
+- GROQ_MAX_IN_FLIGHT : appels simultanés maximum (défaut 4)
+- GROQ_BREAKER_THRESHOLD : échecs consécutifs avant ouverture (défaut 5)
+- GROQ_BREAKER_RESET_SECONDS : durée d'ouverture du disjoncteur (défaut 30)
+"""
+
+import asyncio
+import logging
+import os
+import random
+import statistics
+import threading
+import time
+import weakref
+from collections import Counter, deque
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+import groq
+
+logger = logging.getLogger(__name__)
+
+ENV_TIMEOUT = "GROQ_TIMEOUT"
+ENV_MAX_RETRIES = "GROQ_MAX_RETRIES"
+ENV_MAX_IN_FLIGHT = "GROQ_MAX_IN_FLIGHT"
+ENV_BREAKER_THRESHOLD = "GROQ_BREAKER_THRESHOLD"
+ENV_BREAKER_RESET = "GROQ_BREAKER_RESET_SECONDS"
+
+DEFAULT_TIMEOUT = 10.0
+DEFAULT_MAX_RETRIES = 2
+DEFAULT_MAX_IN_FLIGHT = 4
+DEFAULT_BREAKER_THRESHOLD = 5
+DEFAULT_BREAKER_RESET = 30.0
+BACKOFF_BASE = 0.25
+BACKOFF_MAX = 4.0
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+# asyncio.wait_for lève asyncio.TimeoutError, distinct de TimeoutError avant 3.11
+TIMEOUT_ERRORS = (TimeoutError, asyncio.TimeoutError)
+
+
+class CircuitOpenError(RuntimeError):
+    """Appel refusé : le disjoncteur Groq est ouvert."""
+
+
+def is_transient(error: BaseException) -> bool:
+    """Erreur qui mérite une reprise : délai, connexion, 429 ou 5xx."""
+    if isinstance(error, (*TIMEOUT_ERRORS, ConnectionError)):
+        return True
+    if isinstance(error, (groq.APITimeoutError, groq.APIConnectionError)):
+        return True
+    if isinstance(error, groq.APIStatusError):
+        return error.status_code == 429 or error.status_code >= 500
+    return False
+
+
+class CircuitBreaker:
+    """Disjoncteur à échecs consécutifs (fermé -> ouvert -> demi-ouvert)."""
+
+    def __init__(
+        self,
+        failure_threshold: int = DEFAULT_BREAKER_THRESHOLD,
+        reset_timeout: float = DEFAULT_BREAKER_RESET,
+    ):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+        self.opened = 0  # nombre d'ouvertures
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                return HALF_OPEN
+            return self._state
+
+    def acquire(self) -> Optional[bool]:
+        """
+        None si l'appel est refusé, sinon True pour l'appel d'essai du
+        demi-ouvert (un seul à la fois) et False pour un appel ordinaire.
+        """
+        with self._lock:
+            if self._state == CLOSED:
+                return False
+            if self._state == OPEN:
+                if time.monotonic() - self._opened_at < self.reset_timeout:
+                    return None
+                self._state = HALF_OPEN
+                self._probing = False
+            if self._probing:
+                return None
+            self._probing = True
+            return True
+
+    def allow(self) -> bool:
+        """Autorise l'appel ; en demi-ouvert, un seul appel d'essai à la fois."""
+        return self.acquire() is not None
+
+    def release_probe(self) -> None:
+        """Appel d'essai interrompu sans verdict (annulation) : un autre pourra essayer."""
+        with self._lock:
+            if self._state == HALF_OPEN:
+                self._probing = False
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self._state != CLOSED:
+                logger.info("[Groq] Disjoncteur refermé")
+            self._state, self._failures, self._probing = CLOSED, 0, False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            self._probing = False
+            if self._state == HALF_OPEN or (
+                self._state == CLOSED and self._failures >= self.failure_threshold
+            ):
+                self._state = OPEN
+                self._opened_at = time.monotonic()
+                self.opened += 1
+                logger.warning(
+                    f"[Groq] Disjoncteur ouvert ({self._failures} échecs consécutifs), "
+                    f"repli local pendant {self.reset_timeout:.0f}s"
+                )
+
+    def snapshot(self) -> Dict[str, Any]:
+        state = self.state
+        with self._lock:
+            retry_in = (
+                max(0.0, self.reset_timeout - (time.monotonic() - self._opened_at))
+                if self._state == OPEN
+                else None
+            )
+            return {
+                "state": state,
+                "consecutive_failures": self._failures,
+                "failure_threshold": self.failure_threshold,
+                "reset_timeout": self.reset_timeout,
+                "opened": self.opened,
+                "retry_in_seconds": round(retry_in, 1) if retry_in is not None else None,
+            }
+
+
+class GroqResilience:
+    """Concurrence, délais, reprises et disjoncteur partagés par les appels Groq du processus."""
+
+    def __init__(
+        self,
+        timeout: float = DEFAULT_TIMEOUT,
+        max_retries: int = DEFAULT_MAX_RETRIES,
+        max_in_flight: int = DEFAULT_MAX_IN_FLIGHT,
+        breaker: Optional[CircuitBreaker] = None,
+        backoff_base: float = BACKOFF_BASE,
+        backoff_max: float = BACKOFF_MAX,
+    ):
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.max_in_flight = max_in_flight
+        self.breaker = breaker or CircuitBreaker()
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.counters: Counter = Counter()
+        self._latencies: deque = deque(maxlen=200)
+        self._in_flight = 0
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max_in_flight)
+        # asyncio.Semaphore est lié à sa boucle : un par boucle d'événements
+        self._async_slots: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+
+    def backoff(self, attempt: int) -> float:
+        """Attente avant la reprise `attempt` (0, 1...) : gigue complète."""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    def _count(self, name: str, in_flight: int = 0) -> None:
+        with self._lock:
+            self.counters[name] += 1
+            self._in_flight += in_flight
+
+    def _enter(self) -> bool:
+        """Vérifie le disjoncteur ; True si l'appel est l'appel d'essai."""
+        probe = self.breaker.acquire()
+        if probe is None:
+            self._count("short_circuited")
+            raise CircuitOpenError("Disjoncteur Groq ouvert")
+        self._count("calls")
+        return probe
+
+    def _attempt_failed(self, error: BaseException, attempt: int) -> bool:
+        """Comptabilise l'échec ; True si une reprise doit suivre."""
+        if isinstance(error, (*TIMEOUT_ERRORS, groq.APITimeoutError)):
+            self._count("timeouts")
+        if is_transient(error) and attempt < self.max_retries:
+            self._count("retries")
+            return True
+        self._count("failures")
+        self.breaker.record_failure()
+        return False
+
+    def _succeeded(self, t0: float) -> None:
+        self._count("successes")
+        self._latencies.append(time.perf_counter() - t0)
+        self.breaker.record_success()
+
+    def call(self, fn: Callable[[float], Any]) -> Any:
+        """
+        Appel synchrone ; `fn(timeout)` doit respecter le délai qui lui est
+        passé (paramètre `timeout` du client Groq).
+        """
+        probe = self._enter()
+        try:
+            return self._call(fn)
+        except BaseException:
+            # Sortie sans verdict (saturation locale, KeyboardInterrupt...) :
+            # l'appel d'essai ne doit pas bloquer le demi-ouvert
+            if probe:
+                self.breaker.release_probe()
+            raise
+
+    def _call(self, fn: Callable[[float], Any]) -> Any:
+        t0 = time.perf_counter()
+        if not self._slots.acquire(timeout=self.timeout):
+            # Saturation locale, pas une panne de Groq : disjoncteur inchangé
+            self._count("saturated")
+            raise TimeoutError("Trop d'appels Groq simultanés")
+        self._count("started", in_flight=1)
+        try:
+            attempt = 0
+            while True:
+                try:
+                    result = fn(self.timeout)
+                except Exception as e:
+                    if not self._attempt_failed(e, attempt):
+                        raise
+                    time.sleep(self.backoff(attempt))
+                    attempt += 1
+                    continue
+                self._succeeded(t0)
+                return result
+        finally:
+            self._count("finished", in_flight=-1)
+            self._slots.release()
+
+    def _async_semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        semaphore = self._async_slots.get(loop)
+        if semaphore is None:
+            semaphore = self._async_slots[loop] = asyncio.Semaphore(self.max_in_flight)
+        return semaphore
+
+    async def acall(self, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Appel asynchrone ; chaque tentative est annulée au-delà de `timeout`."""
+        probe = self._enter()
+        try:
+            return await self._acall(fn)
+        except BaseException:
+            # Saturation locale, ou CancelledError (client déconnecté...) qui
+            # n'est pas une `Exception`
+            if probe:
+                self.breaker.release_probe()
+            raise
+
+    async def _acall(self, fn: Callable[[], Awaitable[Any]]) -> Any:
+        t0 = time.perf_counter()
+        semaphore = self._async_semaphore()
+        try:
+            await asyncio.wait_for(semaphore.acquire(), self.timeout)
+        except TIMEOUT_ERRORS:
+            # Saturation locale, pas une panne de Groq : disjoncteur inchangé
+            self._count("saturated")
+            raise TimeoutError("Trop d'appels Groq simultanés")
+        self._count("started", in_flight=1)
+        try:
+            attempt = 0
+            while True:
+                try:
+                    result = await asyncio.wait_for(fn(), self.timeout)
+                except Exception as e:
+                    if not self._attempt_failed(e, attempt):
+                        raise
+                    await asyncio.sleep(self.backoff(attempt))
+                    attempt += 1
+                    continue
+                self._succeeded(t0)
+                return result
+        finally:
+            self._count("finished", in_flight=-1)
+            semaphore.release()
+
+    def metrics(self) -> Dict[str, Any]:
+        latencies = list(self._latencies)
+        return {
+            "breaker": self.breaker.snapshot(),
+            "in_flight": self._in_flight,
+            "max_in_flight": self.max_in_flight,
+            "timeout": self.timeout,
+            "max_retries": self.max_retries,
+            "calls": self.counters["calls"],
+            "successes": self.counters["successes"],
+            "failures": self.counters["failures"],
+            "retries": self.counters["retries"],
+            "timeouts": self.counters["timeouts"],
+            "short_circuited": self.counters["short_circuited"],
+            "saturated": self.counters["saturated"],
+            "latency_p50_seconds": round(statistics.median(latencies), 3) if latencies else None,
+        }
+
+
+def _env_number(name: str, default, cast=float):
+    try:
+        return cast(os.getenv(name, ""))
+    except ValueError:
+        return default
+
+
+_resilience: Optional[GroqResilience] = None
+_resilience_lock = threading.Lock()
+
+
+def get_groq_resilience() -> GroqResilience:
+    """Politique partagée par les parsers Groq du processus (disjoncteur commun)."""
+    global _resilience
+    if _resilience is None:
+        with _resilience_lock:
+            if _resilience is None:
+                _resilience = GroqResilience(
+                    timeout=_env_number(ENV_TIMEOUT, DEFAULT_TIMEOUT),
+                    max_retries=_env_number(ENV_MAX_RETRIES, DEFAULT_MAX_RETRIES, int),
+                    max_in_flight=max(1, _env_number(ENV_MAX_IN_FLIGHT, DEFAULT_MAX_IN_FLIGHT, int)),
+                    breaker=CircuitBreaker(
+                        failure_threshold=_env_number(
+                            ENV_BREAKER_THRESHOLD, DEFAULT_BREAKER_THRESHOLD, int
+                        ),
+                        reset_timeout=_env_number(ENV_BREAKER_RESET, DEFAULT_BREAKER_RESET),
+                    ),
+                )
+    return _resilience
@@ -13,6 +13,12 @@
 # RAM requise estimée par worker (Modèle ONNX + Buffers image = ~150-200 Mo)
 _RAM_PER_WORKER_GB: float = 0.2
 
+# Workers forkés depuis le forkserver préchargé (services/ocr_preload.py) :
+# les modèles sont partagés en copy-on-write, seuls restent propres au worker
+# les buffers d'inférence et les pages réécrites. Mémoire propre (USS) mesurée
+# ~35 % plus basse qu'en spawn (scripts/bench_ocr_worker_memory.py).
+_RAM_PER_WORKER_SHARED_GB: float = 0.13
+
 
 def get_cpu_info() -> dict:
     """Retourne les infos CPU/RAM"""
@@ -55,7 +61,7 @@ def get_optimal_batch_size() -> int:
         return 1
 
 
-def get_optimal_workers(task_count: int) -> int:
+def get_optimal_workers(task_count: int, shared_models: bool = False) -> int:
     """
     Calcule le nombre de workers (Threads) à utiliser pour le pool OCR.
 
@@ -66,6 +72,8 @@ def get_optimal_workers(task_count: int) -> int:
 
     Args:
         task_count: Nombre de fichiers à traiter.
+        shared_models: Workers partageant les modèles (forkserver préchargé) :
+            budget RAM par worker réduit.
 
     Returns:
         Nombre de workers >= 1.
@@ -80,7 +88,8 @@ def get_optimal_workers(task_count: int) -> int:
     try:
         info = get_cpu_info()
         available_ram = info.get("available_ram_gb", 4.0)
-        ram_workers = max(1, int(available_ram / _RAM_PER_WORKER_GB))
+        per_worker = _RAM_PER_WORKER_SHARED_GB if shared_models else _RAM_PER_WORKER_GB
+        ram_workers = max(1, int(available_ram / per_worker))
     except Exception:
         ram_workers = cpu_workers
 
@@ -0,0 +1,75 @@
+"""
+Automate d'Aho-Corasick sur des mots : toutes les occurrences d'un ensemble de
+mots-clés (un ou plusieurs mots consécutifs) en un seul passage sur le texte.
+
+Les transitions portent sur des mots entiers du texte normalisé
+(`normalize_ocr_text`), pas sur des caractères : "bp" ne correspond pas dans
+"bpce", ni "shell" dans "shells". Le coût d'une recherche est linéaire en
+nombre de mots du ticket, quel que soit le nombre de mots-clés.
+"""
+
+from collections import deque
+from typing import Any, Dict, Iterator, List, Sequence, Tuple
+
+
+class KeywordAutomaton:
+    """Mots-clés -> valeur associée ; `build()` après les ajouts, puis `find`."""
+
+    def __init__(self):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        # état -> [(nombre de mots du mot-clé, valeur)] : mots-clés finissant
+        # dans l'état, puis (après build) sorties des suffixes incluses
+        self._own: List[List[Tuple[int, Any]]] = [[]]
+        self._out: List[List[Tuple[int, Any]]] = [[]]
+        self._built = False
+        self.size = 0
+
+    def add(self, keyword: Sequence[str], value: Any) -> None:
+        """Ajoute un mot-clé (suite de mots normalisés)."""
+        if not keyword:
+            return
+        state = 0
+        for word in keyword:
+            nxt = self._goto[state].get(word)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][word] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._own.append([])
+            state = nxt
+        self._own[state].append((len(keyword), value))
+        self._built = False
+        self.size += 1
+
+    def build(self) -> "KeywordAutomaton":
+        """Liens d'échec en largeur d'abord (sorties des suffixes fusionnées)."""
+        self._out = [list(own) for own in self._own]
+        queue = deque(self._goto[0].values())
+        for state in queue:
+            self._fail[state] = 0
+        while queue:
+            state = queue.popleft()
+            for word, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fail = self._fail[state]
+                while fail and word not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[nxt] = self._goto[fail].get(word, 0)
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+        self._built = True
+        return self
+
+    def find(self, words: Sequence[str]) -> Iterator[Tuple[int, int, Any]]:
+        """Occurrences (début, fin exclue, valeur), dans l'ordre de leur fin."""
+        if not self._built:
+            self.build()
+        goto, fail, out = self._goto, self._fail, self._out
+        state = 0
+        for i, word in enumerate(words):
+            while state and word not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(word, 0)
+            for length, value in out[state]:
+                yield i + 1 - length, i + 1, value
@@ -0,0 +1,122 @@
+"""
+Classifieur bayésien naïf local : texte de ticket -> (catégorie, sous-catégorie).
+
+Caractéristiques : mots normalisés (squelette OCR de groq_parser, sans les
+jetons numériques ni le vocabulaire commun à tous les tickets) et paires de
+mots consécutifs, hachés en crc32 comme les trigrammes de duplicates.py.
+
+Le modèle n'est fait que de compteurs : apprendre ou oublier un exemple est
+une mise à jour O(nombre de mots), sans réentraînement. Seuls les mots déjà
+vus à l'entraînement comptent dans le score (un ticket contient surtout des
+articles jamais vus dans les descriptions), la confiance est la probabilité a
+posteriori de la meilleure classe.
+"""
+
+import math
+import zlib
+from collections import Counter, defaultdict
+from typing import Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+from .groq_parser import normalize_ocr_text
+
+# Vocabulaire présent sur presque tous les tickets : ne discrimine rien et
+# ferait pencher tout ticket vers une enseigne homonyme ("TOTAL")
+STOP_WORDS = frozenset(
+    """
+    total sous ttc tva eur euro euros montant prix qte quantite article articles
+    carte bancaire sans contact debit credit paiement paye rendu especes cheque
+    ticket client caisse caissier merci revoir bientot conserver date heure
+    achat vente magasin visa mastercard code transaction facture
+    les des une pour par avec sur aux dans vous votre nous
+    """.split()
+)
+_MIN_WORD = 3
+
+Label = Tuple[str, Optional[str]]
+
+
+def features(text: str) -> FrozenSet[int]:
+    """Mots et paires de mots consécutifs (par ligne) du texte, hachés."""
+    feats = set()
+    for line in normalize_ocr_text(text).splitlines():
+        words = [w for w in line.split() if len(w) >= _MIN_WORD and w not in STOP_WORDS]
+        feats.update(zlib.crc32(w.encode()) for w in words)
+        feats.update(zlib.crc32(f"{a} {b}".encode()) for a, b in zip(words, words[1:]))
+    return frozenset(feats)
+
+
+class NaiveBayesClassifier:
+    """Bayes naïf multinomial à comptes binaires, lissage de Laplace `alpha`."""
+
+    def __init__(self, alpha: float = 0.5):
+        self.alpha = alpha
+        self._docs: Counter = Counter()  # label -> exemples
+        self._totals: Counter = Counter()  # label -> caractéristiques cumulées
+        self._counts: Dict[int, Counter] = defaultdict(Counter)  # feature -> label -> n
+        # feature -> [(label, log(1 + n / alpha))], recalculé après learn/forget
+        self._weights: Dict[int, List[Tuple[Label, float]]] = {}
+
+    @property
+    def labels(self) -> List[Label]:
+        return [label for label, n in self._docs.items() if n > 0]
+
+    @property
+    def vocabulary(self) -> int:
+        return len(self._counts)
+
+    @property
+    def examples(self) -> int:
+        return sum(self._docs.values())
+
+    def learn(self, feats: Iterable[int], label: Label) -> None:
+        feats = list(feats)
+        self._docs[label] += 1
+        self._totals[label] += len(feats)
+        for f in feats:
+            self._counts[f][label] += 1
+            self._weights.pop(f, None)
+
+    def forget(self, feats: Iterable[int], label: Label) -> None:
+        feats = list(feats)
+        self._docs[label] -= 1
+        self._totals[label] -= len(feats)
+        for f in feats:
+            self._weights.pop(f, None)
+            counts = self._counts.get(f)
+            if counts is None:
+                continue
+            counts[label] -= 1
+            if counts[label] <= 0:
+                del counts[label]
+            if not counts:
+                del self._counts[f]
+
+    def predict(self, feats: Iterable[int]) -> Optional[Tuple[Label, float, int]]:
+        """
+        (label, probabilité a posteriori, nombre de caractéristiques connues),
+        None si aucune caractéristique n'a été vue à l'entraînement.
+        """
+        known = [f for f in feats if f in self._counts]
+        labels = self.labels
+        if not known or not labels:
+            return None
+
+        n_docs = sum(self._docs[label] for label in labels)
+        denominator = self.alpha * self.vocabulary
+        scores = {
+            label: math.log(self._docs[label] / n_docs)
+            - len(known) * math.log((self._totals[label] + denominator) / self.alpha)
+            for label in labels
+        }
+        for f in known:
+            weights = self._weights.get(f)
+            if weights is None:
+                weights = [(label, math.log1p(n / self.alpha)) for label, n in self._counts[f].items()]
+                self._weights[f] = weights
+            for label, w in weights:
+                scores[label] += w
+
+        best = max(scores, key=scores.get)
+        top = scores[best]
+        posterior = 1.0 / sum(math.exp(s - top) for s in scores.values())
+        return best, posterior, len(known)
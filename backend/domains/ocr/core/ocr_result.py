@@ -0,0 +1,91 @@
+"""
+Résultat structuré d'une inférence OCR.
+
+Une seule inférence RapidOCR produit, pour chaque ligne détectée, le texte, la
+boîte englobante (4 points, pixels de l'image analysée) et le score de
+reconnaissance. Tout est conservé ici, avec les temps par étape, pour que le
+service et les parsers travaillent sur le même résultat sans relancer l'OCR.
+Les champs du ticket lus sur ce résultat (core/receipt_extractor.py) y sont
+rattachés (`receipt`).
+"""
+
+from datetime import date
+from typing import Dict, List, Optional, Union
+
+from pydantic import BaseModel, Field
+
+
+class OCRLine(BaseModel):
+    text: str
+    # Coins (x, y) dans l'ordre : haut-gauche, haut-droit, bas-droit, bas-gauche
+    box: List[List[float]] = []
+    score: float = 0.0
+
+    @property
+    def top(self) -> float:
+        return min((p[1] for p in self.box), default=0.0)
+
+    @property
+    def left(self) -> float:
+        return min((p[0] for p in self.box), default=0.0)
+
+
+class ReceiptField(BaseModel):
+    value: Union[date, float, str]
+    # 0..1 : score OCR de la ligne × certitude de la règle, renforcée par les recoupements
+    confidence: float = 0.0
+
+
+class ReceiptItem(BaseModel):
+    label: str
+    amount: float
+    quantity: Optional[float] = None
+    unit_price: Optional[float] = None
+    confidence: float = 0.0
+
+
+class VatLine(BaseModel):
+    rate: float
+    base: Optional[float] = None
+    vat: Optional[float] = None
+    total: Optional[float] = None
+    confidence: float = 0.0
+
+
+class ReceiptData(BaseModel):
+    """Champs d'un ticket de caisse, chacun avec sa confiance."""
+    total: Optional[ReceiptField] = None
+    date: Optional[ReceiptField] = None
+    merchant: Optional[ReceiptField] = None
+    # carte, especes, cheque, titre_restaurant
+    payment_method: Optional[ReceiptField] = None
+    vat: List[VatLine] = []
+    items: List[ReceiptItem] = []
+
+
+class OCRResult(BaseModel):
+    lines: List[OCRLine] = []
+    width: Optional[int] = None
+    height: Optional[int] = None
+    # Secondes par étape : decode, det, cls, rec, total (+ receipt : extraction des champs)
+    timings: Dict[str, float] = Field(default_factory=dict)
+    # Renseigné par OCRService après l'inférence (jamais mis en cache)
+    receipt: Optional[ReceiptData] = None
+
+    @property
+    def text(self) -> str:
+        """Texte brut, une ligne OCR par ligne (ordre de lecture RapidOCR)."""
+        return "\n".join(line.text for line in self.lines)
+
+    @property
+    def mean_score(self) -> Optional[float]:
+        if not self.lines:
+            return None
+        return sum(line.score for line in self.lines) / len(self.lines)
+
+    def text_above(self, min_score: float) -> str:
+        """Texte limité aux lignes reconnues avec un score >= `min_score`."""
+        return "\n".join(line.text for line in self.lines if line.score >= min_score)
+
+    def low_confidence_lines(self, threshold: float) -> List[OCRLine]:
+        return [line for line in self.lines if line.score < threshold]
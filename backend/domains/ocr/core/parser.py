@@ -1,23 +1,137 @@
 """
 Parser - Extraction de données structurées via Regex
 Fonctions pures qui appliquent des patterns sur du texte brut
+
+Les listes de patterns sont compilées une fois en `PatternSet` (ordre de
+priorité conservé). Chaque pattern y est accompagné de ses littéraux
+obligatoires (mot en tête ou en fin de pattern : "TOTAL", "€") : absents du
+texte, le pattern est écarté sans parcourir le texte. Une alternative unique
+combinant tous les patterns serait plus lente : le moteur essaie chaque
+branche à chaque position (mesuré par backend/scripts/bench_ocr_patterns.py).
 """
 
 import logging
 import re
 from datetime import datetime, date
-from typing import Optional, List
+from functools import lru_cache
+from typing import Iterator, List, Optional, Sequence, Tuple, Union
 
 logger = logging.getLogger(__name__)
 
+DEFAULT_FLAGS = re.IGNORECASE | re.MULTILINE
+
+_LEADING_LITERAL = re.compile(r"^[A-Za-z€]+")
+_TRAILING_LITERAL = re.compile(r"[A-Za-z€]+$")
+
+
+def required_literals(pattern: str) -> Tuple[str, ...]:
+    """
+    Littéraux que toute correspondance contient : mot en tête du pattern
+    (hors dernière lettre si elle est optionnelle) et mot en fin de pattern.
+    Analyse volontairement prudente : rien si le pattern a une alternative
+    de premier niveau.
+    """
+    depth, escaped, class_start = 0, False, None
+    for i, ch in enumerate(pattern):
+        if escaped:
+            escaped = False
+        elif ch == "\\":
+            escaped = True
+        elif class_start is not None:
+            # Dans une classe [...] : "(" ou "|" sont des caractères ordinaires,
+            # "]" en tête ("[]" ou "[^]") aussi
+            if ch == "]" and pattern[class_start:i] not in ("", "^"):
+                class_start = None
+        elif ch == "[":
+            class_start = i + 1
+        elif ch == "(":
+            depth += 1
+        elif ch == ")":
+            depth -= 1
+        elif ch == "|" and depth == 0:
+            return ()
+
+    literals = []
+    lead = _LEADING_LITERAL.match(pattern)
+    if lead:
+        word = lead.group()
+        if pattern[lead.end():lead.end() + 1] in ("?", "*", "{"):
+            word = word[:-1]
+        if word:
+            literals.append(word)
+    tail = _TRAILING_LITERAL.search(pattern)
+    if tail and tail.start() > 0:
+        backslashes = len(pattern[:tail.start()]) - len(pattern[:tail.start()].rstrip("\\"))
+        if backslashes % 2 == 0:  # "\s" en fin de pattern n'est pas un littéral
+            literals.append(tail.group())
+    return tuple(literals)
+
+
+class PatternSet:
+    """Patterns regex compilés une fois, dans leur ordre de priorité."""
+
+    def __init__(self, patterns: Sequence[str], flags: int = DEFAULT_FLAGS):
+        self.flags = flags
+        self._ignorecase = bool(flags & re.IGNORECASE)
+        self._entries: List[Tuple[str, "re.Pattern[str]", Tuple[str, ...]]] = []
+        for pattern in patterns:
+            try:
+                compiled = re.compile(pattern, flags)
+            except re.error as e:
+                logger.warning(f"Pattern invalide ignoré '{pattern}': {e}")
+                continue
+            literals = required_literals(pattern)
+            if self._ignorecase:
+                literals = tuple(lit.upper() for lit in literals)
+            self._entries.append((pattern, compiled, literals))
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def patterns(self) -> List[str]:
+        return [pattern for pattern, _, _ in self._entries]
+
+    def candidates(
+        self, text: str, upper: Optional[str] = None
+    ) -> Iterator[Tuple[str, "re.Pattern[str]"]]:
+        """
+        (pattern, compilé) dans l'ordre, sauf ceux dont un littéral manque au
+        texte. `upper` : `text.upper()` déjà calculé par l'appelant.
+        """
+        if self._ignorecase:
+            haystack = text.upper() if upper is None else upper
+        else:
+            haystack = text
+        for pattern, compiled, literals in self._entries:
+            if all(lit in haystack for lit in literals):
+                yield pattern, compiled
+
+
+@lru_cache(maxsize=64)
+def _pattern_set(patterns: Tuple[str, ...], flags: int) -> PatternSet:
+    return PatternSet(patterns, flags)
 
-def parse_amount(text: str, patterns: List[str]) -> Optional[float]:
+
+def as_pattern_set(
+    patterns: Union[Sequence[str], PatternSet], flags: int = DEFAULT_FLAGS
+) -> PatternSet:
+    """PatternSet tel quel, ou liste de patterns compilée (mise en cache par contenu)."""
+    if isinstance(patterns, PatternSet):
+        return patterns
+    return _pattern_set(tuple(patterns), flags)
+
+
+def parse_amount(
+    text: str, patterns: Union[List[str], PatternSet], upper: Optional[str] = None
+) -> Optional[float]:
     """
     Extrait le montant total d'un ticket depuis le texte OCR
     
     Args:
         text: Texte brut extrait par OCR
-        patterns: Liste de regex à essayer (ordre de priorité)
+        patterns: Liste de regex à essayer (ordre de priorité), ou PatternSet
+        upper: `text.upper()` s'il est déjà calculé (plusieurs parsers, un texte)
         
     Returns:
         Montant en float, ou None si non trouvé
@@ -27,11 +141,11 @@ def parse_amount(text: str, patterns: List[str]) -> Optional[float]:
         >>> parse_amount("TOTAL : 42.50 EUR", patterns)
         42.50
     """
-    text_upper = text.upper()
+    text_upper = text.upper() if upper is None else upper
 
-    for pattern in patterns:
+    for pattern, compiled in as_pattern_set(patterns).candidates(text_upper, upper=text_upper):
         try:
-            matches = re.findall(pattern, text_upper, re.IGNORECASE | re.MULTILINE)
+            matches = compiled.findall(text_upper)
             if matches:
                 # Prendre la dernière occurrence (souvent le total final)
                 amount_str = matches[-1]
@@ -50,13 +164,16 @@ def parse_amount(text: str, patterns: List[str]) -> Optional[float]:
     return None
 
 
-def parse_date(text: str, patterns: List[str]) -> Optional[date]:
+def parse_date(
+    text: str, patterns: Union[List[str], PatternSet], upper: Optional[str] = None
+) -> Optional[date]:
     """
     Extrait la date de transaction depuis le texte OCR
     
     Args:
         text: Texte brut extrait par OCR
-        patterns: Liste de regex à essayer
+        patterns: Liste de regex à essayer, ou PatternSet
+        upper: `text.upper()` s'il est déjà calculé (filtre des patterns)
         
     Returns:
         Date au format date, ou None si non trouvé
@@ -66,9 +183,9 @@ def parse_date(text: str, patterns: List[str]) -> Optional[date]:
         >>> parse_date("Date: 04/02/2024", patterns)
         datetime.date(2024, 2, 4)
     """
-    for pattern in patterns:
+    for pattern, compiled in as_pattern_set(patterns).candidates(text, upper=upper):
         try:
-            matches = re.finditer(pattern, text, re.IGNORECASE | re.MULTILINE)
+            matches = compiled.finditer(text)
             for match in matches:
                 # Si on a capturé jour, mois, année séparément (notre pattern flexible)
                 if len(match.groups()) >= 3:
@@ -99,6 +216,49 @@ def parse_date(text: str, patterns: List[str]) -> Optional[date]:
     return None
 
 
+def parse_merchant(text: str, max_lines: int = 5) -> Optional[str]:
+    """
+    Commerçant candidat : première ligne de l'en-tête (au plus `max_lines`
+    premières lignes non vides) contenant au moins trois lettres, en
+    majuscules, espaces normalisés, 60 caractères au plus.
+    """
+    seen = 0
+    for line in text.splitlines():
+        line = " ".join(line.split())
+        if not line:
+            continue
+        if sum(c.isalpha() for c in line) >= 3:
+            return line.upper()[:60]
+        seen += 1
+        if seen >= max_lines:
+            break
+    return None
+
+
+# === PATTERNS SPÉCIFIQUES (Salaires, virements) ===
+_REVENUE_AMOUNT_PATTERNS = PatternSet([
+    r"NET\s+(?:À\s+)?PAYER\s*:?\s*([\d\s]+[.,]\d{2})",
+    r"MONTANT\s+NET\s*:?\s*([\d\s]+[.,]\d{2})",
+    r"NET\s+PAYÉ\s*:?\s*([\d\s]+[.,]\d{2})",
+    r"VIREMENT\s*:?\s*([\d\s]+[.,]\d{2})",
+    r"TOTAL\s*:?\s*([\d\s]+[.,]\d{2})\s*€",
+    r"MONTANT\s+TOTAL\s*:?\s*([\d\s]+[.,]\d{2})"
+])
+
+# === PATTERNS GÉNÉRIQUES (Fallback) ===
+# Cherche n'importe quel montant avec € (prend le plus grand trouvé)
+_REVENUE_GENERIC_AMOUNT = re.compile(r"([\d\s]+[.,]\d{2})\s*€")
+
+# === PATTERNS DATES ===
+_REVENUE_DATE_PATTERNS = PatternSet([
+    r"DATE\s+(?:DE\s+)?(?:PAIEMENT|VIREMENT|LA\s+)?(?:FACTURE)?\s*:?\s*(\d{2}[/\-\.]\d{2}[/\-\.]\d{2,4})",
+    r"VIREMENT\s+(?:LE\s+)?(\d{2}[/\-\.]\d{2}[/\-\.]\d{2,4})",
+    r"PAYÉ\s+LE\s*:?\s*(\d{2}[/\-\.]\d{2}[/\-\.]\d{2,4})",
+    r"FACTURE\s+(?:ÉTABLIE)?\s*(?:LE)?\s*(\d{2}[/\-\.]\d{2}[/\-\.]\d{2,4})",
+    r"(\d{2}[/\-\.]\d{2}[/\-\.]\d{2,4})"  # Date générique (en dernier)
+])
+
+
 def parse_pdf_revenue(text: str) -> Optional[dict]:
     """
     Parse spécifique pour les relevés de revenus au format PDF.
@@ -115,36 +275,13 @@ def parse_pdf_revenue(text: str) -> Optional[dict]:
     """
     text_upper = text.upper()
 
-    # === PATTERNS SPÉCIFIQUES (Salaires, virements) ===
-    specific_amount_patterns = [
-        r"NET\s+(?:À\s+)?PAYER\s*:?\s*([\d\s]+[.,]\d{2})",
-        r"MONTANT\s+NET\s*:?\s*([\d\s]+[.,]\d{2})",
-        r"NET\s+PAYÉ\s*:?\s*([\d\s]+[.,]\d{2})",
-        r"VIREMENT\s*:?\s*([\d\s]+[.,]\d{2})",
-        r"TOTAL\s*:?\s*([\d\s]+[.,]\d{2})\s*€",
-        r"MONTANT\s+TOTAL\s*:?\s*([\d\s]+[.,]\d{2})"
-    ]
-
-    # === PATTERNS GÉNÉRIQUES (Fallback) ===
-    # Cherche n'importe quel montant avec € (prend le plus grand trouvé)
-    generic_amount_pattern = r"([\d\s]+[.,]\d{2})\s*€"
-
-    # === PATTERNS DATES ===
-    date_patterns = [
-        r"DATE\s+(?:DE\s+)?(?:PAIEMENT|VIREMENT|LA\s+)?(?:FACTURE)?\s*:?\s*(\d{2}[/\-\.]\d{2}[/\-\.]\d{2,4})",
-        r"VIREMENT\s+(?:LE\s+)?(\d{2}[/\-\.]\d{2}[/\-\.]\d{2,4})",
-        r"PAYÉ\s+LE\s*:?\s*(\d{2}[/\-\.]\d{2}[/\-\.]\d{2,4})",
-        r"FACTURE\s+(?:ÉTABLIE)?\s*(?:LE)?\s*(\d{2}[/\-\.]\d{2}[/\-\.]\d{2,4})",
-        r"(\d{2}[/\-\.]\d{2}[/\-\.]\d{2,4})"  # Date générique (en dernier)
-    ]
-
     # === EXTRACTION MONTANT (Stratégie en cascade) ===
-    amount = parse_amount(text, specific_amount_patterns)
+    amount = parse_amount(text, _REVENUE_AMOUNT_PATTERNS, upper=text_upper)
 
     if amount is None:
         logger.info("Patterns spécifiques échoués, tentative pattern générique")
         # Fallback: chercher tous les montants avec € et prendre le plus grand
-        matches = re.findall(generic_amount_pattern, text_upper)
+        matches = _REVENUE_GENERIC_AMOUNT.findall(text_upper)
         if matches:
             # Convertir tous les montants et prendre le maximum
             amounts = []
@@ -164,7 +301,7 @@ def parse_pdf_revenue(text: str) -> Optional[dict]:
         return None
 
     # === EXTRACTION DATE (Optionnel) ===
-    payment_date = parse_date(text, date_patterns)
+    payment_date = parse_date(text, _REVENUE_DATE_PATTERNS, upper=text_upper)
     if not payment_date:
         logger.info("Aucune date trouvée, utilisation de la date du jour")
 
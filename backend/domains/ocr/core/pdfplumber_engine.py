@@ -9,8 +9,25 @@
 from pathlib import Path
 from typing import Dict, Any, Optional, Tuple
 
+from .extraction_cache import cached, engine_version
+from .parser import PatternSet
+
 logger = logging.getLogger(__name__)
 
+# Montant net d'une fiche de paie, par priorité (texte en majuscules)
+_NET_PATTERNS = PatternSet(
+    [
+        r"NET\s+(?:À\s+)?PAYER\s*[,:]?\s*([\d\s]+[.,]\d{2})",
+        r"NET\s+(?:À\s+)?PAYER\s*\n?\s*([\d\s]+[.,]\d{2})",
+        r"MONTANT\s+NET\s*[,:]?\s*([\d\s]+[.,]\d{2})",
+        r"NET\s+PAYÉ\s*[,:]?\s*([\d\s]+[.,]\d{2})",
+        r"SALAIRE\s+NET\s*[,:]?\s*([\d\s]+[.,]\d{2})",
+        r"TOTAL\s+NET\s*[,:]?\s*([\d\s]+[.,]\d{2})",
+    ],
+    re.MULTILINE,
+)
+_GENERIC_AMOUNT = re.compile(r"([\d\s]+[.,]\d{2})\s*€")
+
 PDFPLUMBER_AVAILABLE = False
 
 try:
@@ -90,7 +107,12 @@ def extract_payroll_data(self, pdf_path: str) -> Dict[str, Any]:
         Raises:
             ValueError: Si les données essentielles ne peuvent être extraites
         """
-        text = self.extract_text_from_pdf(pdf_path)
+        text = cached(
+            pdf_path,
+            "payroll_text",
+            f"pdfplumber-{engine_version('pdfplumber')}",
+            lambda: self.extract_text_from_pdf(pdf_path),
+        )
 
         net = self._extract_net_amount(text)
         payroll_date = self._extract_payroll_date(text)
@@ -109,17 +131,8 @@ def _extract_net_amount(self, text: str) -> Optional[float]:
         """
         text_upper = text.upper()
 
-        patterns = [
-            r"NET\s+(?:À\s+)?PAYER\s*[,:]?\s*([\d\s]+[.,]\d{2})",
-            r"NET\s+(?:À\s+)?PAYER\s*\n?\s*([\d\s]+[.,]\d{2})",
-            r"MONTANT\s+NET\s*[,:]?\s*([\d\s]+[.,]\d{2})",
-            r"NET\s+PAYÉ\s*[,:]?\s*([\d\s]+[.,]\d{2})",
-            r"SALAIRE\s+NET\s*[,:]?\s*([\d\s]+[.,]\d{2})",
-            r"TOTAL\s+NET\s*[,:]?\s*([\d\s]+[.,]\d{2})",
-        ]
-
-        for pattern in patterns:
-            matches = re.findall(pattern, text_upper, re.MULTILINE)
+        for _, compiled in _NET_PATTERNS.candidates(text_upper, upper=text_upper):
+            matches = compiled.findall(text_upper)
             if matches:
                 amount_str = matches[-1]
                 amount_str = amount_str.replace(" ", "").replace(",", ".")
@@ -131,8 +144,7 @@ def _extract_net_amount(self, text: str) -> Optional[float]:
                 except ValueError:
                     continue
 
-        generic_pattern = r"([\d\s]+[.,]\d{2})\s*€"
-        matches = re.findall(generic_pattern, text_upper)
+        matches = _GENERIC_AMOUNT.findall(text_upper)
         if matches:
             amounts = []
             for m in matches:
@@ -0,0 +1,253 @@
+"""
+Prétraitement des images de tickets avant RapidOCR.
+
+Les photos de tickets prises au téléphone arrivent en pleine résolution
+(souvent 12 Mpx), avec de larges marges de fond et une inclinaison, alors que
+le temps de détection croît avec le nombre de pixels. Le pipeline, configurable
+étape par étape, ramène l'image à l'essentiel :
+
+- resize    : décodage JPEG en mode draft (réduction DCT à la source, sans
+              décoder les 12 Mpx), puis, après recadrage et redressement,
+              réduction à `max_side` pixels ;
+- grayscale : niveaux de gris dès le décodage (RapidOCR n'a pas besoin de la
+              couleur) ;
+- crop      : recadrage sur la zone du ticket (papier clair sur fond plus
+              sombre), ignoré si le ticket occupe déjà toute l'image ;
+- deskew    : redressement, angle estimé par profil de projection des lignes
+              de texte ;
+- contrast  : normalisation du contraste (CLAHE), pour les photos sombres.
+
+Ordre d'exécution : décodage (draft, gris) → crop → deskew → réduction → contraste.
+
+Chaque étape est chronométrée (`pre_<étape>` dans les temps de l'OCRResult).
+
+Configuration (variables d'environnement) :
+- OCR_PREPROCESS : étapes actives séparées par des virgules, "0" pour
+  désactiver (défaut : resize,grayscale,crop,deskew)
+- OCR_PREPROCESS_MAX_SIDE : plus grand côté après réduction (défaut 1600)
+"""
+
+import logging
+import os
+import time
+from io import BytesIO
+from pathlib import Path
+from typing import List, Optional
+
+import numpy as np
+from PIL import Image, ImageOps
+from pydantic import BaseModel
+
+try:
+    import cv2
+
+    CV2_AVAILABLE = True
+except ImportError:
+    CV2_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+ENV_STAGES = "OCR_PREPROCESS"
+ENV_MAX_SIDE = "OCR_PREPROCESS_MAX_SIDE"
+
+STAGES = ("resize", "grayscale", "crop", "deskew", "contrast")
+# contrast reste optionnel : sans gain de précision mesuré sur des photos
+# correctement exposées (scripts/bench_ocr_preprocessing.py)
+DEFAULT_STAGES = ("resize", "grayscale", "crop", "deskew")
+
+# Taille de travail des analyses (recadrage, angle) : rapide et suffisante
+_ANALYSIS_SIDE = 600
+
+
+class PreprocessConfig(BaseModel):
+    stages: List[str] = list(DEFAULT_STAGES)
+    max_side: int = 1600
+    # Recadrage appliqué si le ticket couvre entre 10 % et 90 % de l'image
+    crop_min_fraction: float = 0.10
+    crop_max_fraction: float = 0.90
+    crop_margin: float = 0.02
+    deskew_max_angle: float = 15.0
+    # En dessous, l'inclinaison ne gêne pas la détection : pas de rotation
+    deskew_min_angle: float = 0.5
+    clahe_clip_limit: float = 2.0
+
+    @classmethod
+    def from_env(cls) -> "PreprocessConfig":
+        config = cls()
+        value = os.getenv(ENV_STAGES, "").strip().lower()
+        if value in ("0", "off", "none", "false"):
+            config.stages = []
+        elif value:
+            unknown = [s for s in value.split(",") if s.strip() and s.strip() not in STAGES]
+            if unknown:
+                logger.warning(f"{ENV_STAGES}: étapes inconnues ignorées {unknown}")
+            config.stages = [s for s in STAGES if s in {v.strip() for v in value.split(",")}]
+        max_side = os.getenv(ENV_MAX_SIDE, "").strip()
+        if max_side.isdigit() and int(max_side) > 0:
+            config.max_side = int(max_side)
+        elif max_side:
+            logger.warning(f"{ENV_MAX_SIDE}={max_side!r} invalide, {config.max_side} conservé")
+        return config
+
+
+class ImagePreprocessor:
+    """Applique les étapes configurées et mesure leur durée."""
+
+    def __init__(self, config: Optional[PreprocessConfig] = None):
+        self.config = config or PreprocessConfig()
+        if self.config.stages and not CV2_AVAILABLE:
+            raise ImportError("opencv non installé: uv add opencv-python-headless")
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.config.stages)
+
+    def run(self, image) -> tuple[object, dict[str, float]]:
+        """
+        Retourne (image prête pour RapidOCR, temps par étape en secondes).
+
+        Sans étape active, l'image est rendue telle quelle (RapidOCR la charge).
+        """
+        if not self.enabled:
+            return image, {}
+        stages = set(self.config.stages)
+        timings: dict[str, float] = {}
+
+        t = time.perf_counter()
+        try:
+            img = self._load(image, gray="grayscale" in stages, draft="resize" in stages)
+        except OSError as e:  # UnidentifiedImageError, fichier tronqué...
+            raise ValueError(f"Image illisible: {e}")
+        timings["pre_load"] = time.perf_counter() - t
+
+        if "crop" in stages:
+            t = time.perf_counter()
+            img = self._crop(img)
+            timings["pre_crop"] = time.perf_counter() - t
+
+        if "deskew" in stages:
+            t = time.perf_counter()
+            img = self._deskew(img)
+            timings["pre_deskew"] = time.perf_counter() - t
+
+        # Réduction finale après recadrage : le ticket garde toute la résolution
+        # disponible au lieu de partager `max_side` avec les marges de fond
+        if "resize" in stages:
+            t = time.perf_counter()
+            img = _fit(img, self.config.max_side)
+            timings["pre_resize"] = time.perf_counter() - t
+
+        if "contrast" in stages:
+            t = time.perf_counter()
+            img = self._contrast(img)
+            timings["pre_contrast"] = time.perf_counter() - t
+
+        timings["pre_total"] = sum(timings.values())
+        return img, timings
+
+    # ── Étapes ────────────────────────────────────────────────────────────
+
+    def _load(self, image, gray: bool, draft: bool) -> np.ndarray:
+        """Décode en tableau (BGR, ou niveaux de gris si `gray`)."""
+        if isinstance(image, np.ndarray):
+            if gray and image.ndim == 3:
+                return cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+            return image
+
+        source = BytesIO(image) if isinstance(image, bytes) else Path(image)
+        with Image.open(source) as pil:
+            if draft and pil.format == "JPEG":
+                # Réduction par puissance de 2 pendant le décodage, plus grand
+                # côté >= max_side (draft garde une taille >= celle demandée)
+                ratio = self.config.max_side / float(max(pil.size))
+                if ratio < 1:
+                    target = (max(1, int(pil.width * ratio)), max(1, int(pil.height * ratio)))
+                    pil.draft("L" if gray else "RGB", target)
+            pil = ImageOps.exif_transpose(pil)
+            if gray:
+                return np.asarray(pil.convert("L"))
+            return cv2.cvtColor(np.asarray(pil.convert("RGB")), cv2.COLOR_RGB2BGR)
+
+    def _crop(self, img: np.ndarray) -> np.ndarray:
+        gray = _gray(img)
+        small, scale = _analysis_view(gray)
+        blur = cv2.GaussianBlur(small, (5, 5), 0)
+        _, paper = cv2.threshold(blur, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+        # Referme les lignes de texte sombres à l'intérieur du ticket
+        paper = cv2.morphologyEx(paper, cv2.MORPH_CLOSE, np.ones((15, 15), np.uint8))
+        contours, _ = cv2.findContours(paper, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        if not contours:
+            return img
+        x, y, w, h = cv2.boundingRect(max(contours, key=cv2.contourArea))
+        fraction = (w * h) / float(small.shape[0] * small.shape[1])
+        if not self.config.crop_min_fraction <= fraction <= self.config.crop_max_fraction:
+            return img
+
+        margin = int(self.config.crop_margin * max(small.shape))
+        x0, y0 = max(0, x - margin), max(0, y - margin)
+        x1, y1 = min(small.shape[1], x + w + margin), min(small.shape[0], y + h + margin)
+        return img[int(y0 / scale):int(y1 / scale), int(x0 / scale):int(x1 / scale)]
+
+    def _deskew(self, img: np.ndarray) -> np.ndarray:
+        angle = estimate_skew(_gray(img), self.config.deskew_max_angle)
+        if abs(angle) < self.config.deskew_min_angle:
+            return img
+        h, w = img.shape[:2]
+        matrix = cv2.getRotationMatrix2D((w / 2, h / 2), angle, 1.0)
+        border = 255 if img.ndim == 2 else (255, 255, 255)
+        return cv2.warpAffine(
+            img, matrix, (w, h), flags=cv2.INTER_LINEAR,
+            borderMode=cv2.BORDER_CONSTANT, borderValue=border,
+        )
+
+    def _contrast(self, img: np.ndarray) -> np.ndarray:
+        clahe = cv2.createCLAHE(clipLimit=self.config.clahe_clip_limit, tileGridSize=(8, 8))
+        if img.ndim == 2:
+            return clahe.apply(img)
+        lab = cv2.cvtColor(img, cv2.COLOR_BGR2LAB)
+        lab[:, :, 0] = clahe.apply(lab[:, :, 0])
+        return cv2.cvtColor(lab, cv2.COLOR_LAB2BGR)
+
+
+def estimate_skew(gray: np.ndarray, max_angle: float = 15.0) -> float:
+    """
+    Angle (degrés, sens trigonométrique d'OpenCV) qui remet les lignes de texte
+    à l'horizontale : celui qui maximise la variance du profil horizontal du
+    masque de texte (lignes nettes = alternance franche encre / interligne).
+    """
+    small, _ = _analysis_view(gray)
+    _, ink = cv2.threshold(small, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+    if cv2.countNonZero(ink) < 50:
+        return 0.0
+    h, w = ink.shape
+    center = (w / 2, h / 2)
+
+    def score(angle: float) -> float:
+        matrix = cv2.getRotationMatrix2D(center, angle, 1.0)
+        rotated = cv2.warpAffine(ink, matrix, (w, h), flags=cv2.INTER_NEAREST)
+        return float(np.var(rotated.sum(axis=1, dtype=np.float64)))
+
+    coarse = max(np.arange(-max_angle, max_angle + 0.01, 1.0), key=score)
+    fine = max(np.arange(coarse - 1.0, coarse + 1.01, 0.2), key=score)
+    return round(float(fine), 1)
+
+
+def _gray(img: np.ndarray) -> np.ndarray:
+    return img if img.ndim == 2 else cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+
+
+def _fit(img: np.ndarray, max_side: int) -> np.ndarray:
+    h, w = img.shape[:2]
+    if max(h, w) <= max_side:
+        return img
+    scale = max_side / float(max(h, w))
+    return cv2.resize(img, (round(w * scale), round(h * scale)), interpolation=cv2.INTER_AREA)
+
+
+def _analysis_view(gray: np.ndarray) -> tuple[np.ndarray, float]:
+    """Copie réduite pour les analyses, et son facteur d'échelle."""
+    h, w = gray.shape[:2]
+    scale = min(1.0, _ANALYSIS_SIDE / float(max(h, w)))
+    if scale == 1.0:
+        return gray, 1.0
+    return cv2.resize(gray, (round(w * scale), round(h * scale)), interpolation=cv2.INTER_AREA), scale
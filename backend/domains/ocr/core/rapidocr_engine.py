@@ -4,12 +4,22 @@
 """
 
 import logging
+import queue
+import threading
 import time
-import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, Optional, Union
+
+import numpy as np
+from PIL import Image
+
+from .ocr_result import OCRLine, OCRResult
 
 try:
     # noinspection PyUnusedImports
     from rapidocr_onnxruntime import RapidOCR
+    import cv2
 
     RAPIDOCR_AVAILABLE = True
 except ImportError:
@@ -17,6 +27,28 @@
 
 logger = logging.getLogger(__name__)
 
+# Chemin sur disque, image encodée (octets d'un upload) ou tableau BGR déjà décodé
+ImageInput = Union[str, Path, bytes, np.ndarray]
+
+
+def decode_image(data: bytes) -> np.ndarray:
+    """Décode une image encodée (JPEG, PNG...) en tableau BGR, sans passer par le disque."""
+    if not RAPIDOCR_AVAILABLE:
+        raise ImportError("rapidocr_onnxruntime n'est pas installe. uv add rapidocr-onnxruntime")
+    image = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+    if image is None:
+        raise ValueError("Image illisible (format non reconnu ou fichier corrompu)")
+    return image
+
+
+def image_label(image: ImageInput) -> str:
+    """Libellé d'une image pour les logs."""
+    if isinstance(image, (str, Path)):
+        return str(image)
+    if isinstance(image, bytes):
+        return f"<{len(image)} octets>"
+    return f"<image {image.shape[1]}x{image.shape[0]}>"
+
 
 class RapidOCREngine:
     """
@@ -24,42 +56,135 @@ class RapidOCREngine:
     Rapide, léger, et efficace pour les tickets.
     """
 
-    def __init__(self):
+    def __init__(
+        self,
+        intra_op_num_threads: Optional[int] = None,
+        inter_op_num_threads: Optional[int] = None,
+    ):
+        """
+        Args:
+            intra_op_num_threads: Threads ONNX Runtime par opérateur (None = défaut ORT).
+            inter_op_num_threads: Threads ONNX Runtime entre opérateurs (None = défaut ORT).
+        """
         if not RAPIDOCR_AVAILABLE:
             raise ImportError("rapidocr_onnxruntime n'est pas installe. uv add rapidocr-onnxruntime")
 
+        self.intra_op_num_threads = intra_op_num_threads
+        self.inter_op_num_threads = inter_op_num_threads
+        params = {}
+        if intra_op_num_threads:
+            params["intra_op_num_threads"] = intra_op_num_threads
+        if inter_op_num_threads:
+            params["inter_op_num_threads"] = inter_op_num_threads
+
         # Initialisation du moteur
         # det_model_path, rec_model_path peuvent être configurés si besoin,
         # mais les défauts sont généralement bons (téléchargés auto).
         try:
-            self.engine = RapidOCR()
+            self.engine = RapidOCR(**params)
             logger.info("RapidOCR engine initialisé avec succès")
         except Exception as e:
             logger.error(f"Erreur lors de l'init de RapidOCR: {e}")
             raise e
 
-    def extract_text(self, image_path: str) -> str:
+    def recognize(self, image: ImageInput) -> OCRResult:
         """
-        Extrait le texte d'une image.
+        Une inférence RapidOCR : lignes, boîtes, scores et temps par étape.
+        `image` : chemin, octets encodés (upload) ou tableau BGR.
         """
         t0 = time.time()
-        logger.info(f"[OCR] extract_text démarré pour : {image_path}")
+        image_path = image_label(image)
+        logger.info(f"[OCR] recognize démarré pour : {image_path}")
 
         try:
+            timings = {}
+            if isinstance(image, bytes):
+                image = decode_image(image)
+                timings["decode"] = time.time() - t0
+            if isinstance(image, np.ndarray):
+                height, width = image.shape[:2]
+            else:
+                with Image.open(image) as img:  # lecture de l'en-tête seulement
+                    width, height = img.size
+
             logger.info(f"[OCR] Appel RapidOCR engine... ({time.time()-t0:.2f}s)")
-            result, elapse = self.engine(image_path)
-            logger.info(f"[OCR] RapidOCR terminé en {time.time()-t0:.2f}s — résultat: {type(result)}, nb lignes: {len(result) if result else 0}")
+            result, elapse = self.engine(image)
+            if isinstance(elapse, list):
+                timings.update(zip(("det", "cls", "rec"), (float(e) for e in elapse)))
+            timings["total"] = time.time() - t0
 
-            if not result:
+            lines = [
+                OCRLine(
+                    text=text,
+                    box=[[float(x), float(y)] for x, y in box],
+                    score=float(score),
+                )
+                for box, text, score in (result or [])
+            ]
+            if not lines:
                 logger.warning(f"[OCR] Aucun texte détecté pour {image_path} ({time.time()-t0:.2f}s)")
-                return ""
-
-            text_lines = [line[1] for line in result]
-            full_text = "\n".join(text_lines)
-            total_time = sum(elapse) if isinstance(elapse, list) else float(elapse or 0.0)
-            logger.info(f"[OCR] {len(text_lines)} lignes extraites, temps ONNX={total_time:.3f}s, total={time.time()-t0:.2f}s")
-            return full_text
+            else:
+                onnx_time = sum(timings.get(k, 0.0) for k in ("det", "cls", "rec"))
+                logger.info(f"[OCR] {len(lines)} lignes extraites, temps ONNX={onnx_time:.3f}s, total={time.time()-t0:.2f}s")
+            return OCRResult(lines=lines, width=width, height=height, timings=timings)
 
         except Exception as e:
             logger.error(f"[OCR] Erreur RapidOCR après {time.time()-t0:.2f}s : {e}")
             raise ValueError(f"Echec extraction OCR: {e}")
+
+    def extract_text(self, image: ImageInput) -> str:
+        """
+        Extrait le texte d'une image (chemin, octets encodés ou tableau BGR).
+        """
+        return self.recognize(image).text
+
+
+class RapidOCREnginePool:
+    """
+    Petit cache de moteurs RapidOCR partagé entre threads.
+
+    ONNX Runtime libère le GIL pendant l'inférence, mais le pré/post-traitement
+    Python de RapidOCR garde un état par appel : un moteur n'est donc utilisé que
+    par un thread à la fois. Les moteurs sont créés à la demande (au plus `size`)
+    puis réutilisés d'un lot à l'autre.
+    """
+
+    def __init__(self, size: int, intra_op_num_threads: int = 1):
+        self.size = max(1, size)
+        self.intra_op_num_threads = max(1, intra_op_num_threads)
+        self._idle: "queue.LifoQueue[RapidOCREngine]" = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+
+    @property
+    def created(self) -> int:
+        return self._created
+
+    def _acquire(self) -> RapidOCREngine:
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            create = self._created < self.size
+            if create:
+                self._created += 1
+        if not create:
+            return self._idle.get()
+        try:
+            return RapidOCREngine(
+                intra_op_num_threads=self.intra_op_num_threads, inter_op_num_threads=1
+            )
+        except Exception:
+            with self._lock:
+                self._created -= 1
+            raise
+
+    @contextmanager
+    def borrow(self) -> Iterator[RapidOCREngine]:
+        """Emprunte un moteur libre (bloque si les `size` moteurs sont occupés)."""
+        engine = self._acquire()
+        try:
+            yield engine
+        finally:
+            self._idle.put(engine)
@@ -0,0 +1,347 @@
+"""
+Extraction structurée d'un ticket de caisse en un passage sur les lignes OCR.
+
+`parse_amount`, `parse_date` et `parse_merchant` relisent chacun tout le
+texte pour un seul champ. Ici, les fragments RapidOCR sont d'abord regroupés
+en lignes physiques d'après leurs boîtes (libellé à gauche et prix à droite
+sont deux détections sur la même hauteur), puis chaque ligne est classée une
+fois : en-tête (commerçant), date, total, ventilation TVA, moyen de paiement
+ou article (libellé, quantité × prix unitaire, montant).
+
+Confiance d'un champ : score OCR de la ligne × certitude de la règle
+("NET A PAYER" est plus sûr que "MONTANT"). Les recoupements la renforcent :
+somme des articles, montant payé par carte ou total TTC de la TVA égaux au
+total. Aucune inférence supplémentaire : environ une milliseconde pour un
+ticket d'une centaine de fragments, dans le worker qui a fait l'OCR, contre
+plusieurs centaines pour l'inférence (backend/scripts/bench_receipt_extractor.py).
+"""
+
+import re
+from datetime import date
+from typing import List, Optional, Tuple, Union
+
+from .ocr_result import OCRLine, OCRResult, ReceiptData, ReceiptField, ReceiptItem, VatLine
+
+# Lignes d'en-tête examinées pour le commerçant
+HEADER_ROWS = 5
+AMOUNT_TOLERANCE = 0.011
+
+_ACCENTS = str.maketrans("ÀÂÄÉÈÊËÎÏÔÖÙÛÜÇ", "AAAEEEEIIOOUUUC")
+
+_AMOUNT = re.compile(r"(?<![\d.,])(-?\d{1,6}[.,]\d{2})(?![\d.,%])")
+# Après le dernier montant d'un article : symbole monétaire, code TVA ("A", "1")
+_AMOUNT_SUFFIX = re.compile(r"\s*(?:€|EUR)?\s*(?:[A-Z0-9*]\b)?\s*$")
+_QUANTITY = re.compile(r"(\d+(?:[.,]\d{1,3})?)\s*(?:KG|G|L)?\s*[X*]\s*(-?\d{1,6}[.,]\d{2})")
+_DATE = re.compile(r"(?<!\d)(\d{1,2})[/\-.](\d{1,2})[/\-.](\d{4}|\d{2})(?!\d)")
+_DATE_KEYWORD = re.compile(r"\b(?:LE|DATE)\b")
+_RATE = re.compile(r"(\d{1,2}(?:[.,]\d{1,2})?)\s*%")
+_VAT_KEYWORD = re.compile(r"\bT\.?V\.?A\b|\bTAUX\b")
+_VAT_RATES = (2.1, 5.5, 10.0, 20.0)
+_LETTERS = re.compile(r"[A-Z]{2,}")
+_NOT_MERCHANT = re.compile(r"\b(?:TEL|FAX|SIRET|SIREN|TVA|WWW|HTTP|BIENVENUE|TICKET|CAISSE)\b")
+_NOT_ITEM = re.compile(
+    r"\b(?:RENDU|RENDRE|MONNAIE|TICKET|FIDELITE|POINTS|CAGNOTTE|ECONOMIES?|ARTICLES|"
+    r"TRANSACTION|AUTORISATION|MERCI)\b"
+)
+_LOYALTY = re.compile(r"\bFIDELITE\b")
+# Filtre commun aux motifs de total et de paiement : une recherche par ligne
+# d'article au lieu d'une douzaine
+_KEYWORD_HINT = re.compile(
+    r"TOTA|PAYER|MON[TY]ANT|\bCB\b|CARTE|VISA|MASTERCARD|CONTACT|AMEX|\bESP|\bCH[EQ]|"
+    r"RESTAURANT|SWILE|CONECS"
+)
+
+# (motif, certitude) : le premier motif trouvé classe la ligne comme total
+_TOTAL_KEYWORDS = [
+    (re.compile(r"NET\s*A?\s*PAYER"), 1.0),
+    (re.compile(r"TOTA[L7]\s*TTC"), 1.0),
+    (re.compile(r"MONTANT\s*TTC"), 0.95),
+    (re.compile(r"\bA\s*PAYER"), 0.9),
+    (re.compile(r"SOUS[\s-]*TOTA[L7]"), 0.4),
+    (re.compile(r"TOTA[L7]\s*(?:HT|H\.T|TVA)\b"), 0.0),
+    (re.compile(r"\bTOTA[L7]\b"), 0.85),
+    (re.compile(r"\bMON[TY]ANT\b"), 0.6),
+]
+
+# (motif, moyen de paiement) sur le texte sans accents, en majuscules
+_PAYMENT_KEYWORDS = [
+    (re.compile(r"TITRES?[\s-]*RESTAURANT|TICKETS?[\s-]*RESTAURANT|\bSWILE\b|\bCONECS\b"), "titre_restaurant"),
+    (re.compile(r"\bCB\b|CARTE\s*BANCAIRE|\bCARTE\b|\bVISA\b|MASTERCARD|SANS\s*CONTACT|\bAMEX\b"), "carte"),
+    (re.compile(r"\bESPECES?\b|\bESP\b"), "especes"),
+    (re.compile(r"\bCHEQUES?\b|\bCHQ\b"), "cheque"),
+]
+
+
+def _to_amount(value: str) -> float:
+    return round(float(value.replace(",", ".")), 2)
+
+
+def _agree(confidence: float) -> float:
+    """Confiance renforcée par un recoupement : le doute restant est divisé par deux."""
+    return round(1.0 - (1.0 - confidence) / 2, 3)
+
+
+def _same(a: float, b: float) -> bool:
+    return abs(a - b) <= AMOUNT_TOLERANCE
+
+
+def _row_of(fragments: List[Tuple[float, OCRLine]]) -> Tuple[str, float]:
+    fragments.sort(key=lambda item: item[0])
+    text = " ".join(" ".join(line.text.split()) for _, line in fragments)
+    return text, sum(line.score for _, line in fragments) / len(fragments)
+
+
+def group_rows(lines: List[OCRLine]) -> List[Tuple[str, float]]:
+    """
+    Fragments OCR regroupés en lignes physiques (texte de gauche à droite,
+    score moyen) : deux fragments sont sur la même ligne si leurs centres
+    verticaux sont à moins d'une demi-hauteur. Sans boîtes, une ligne OCR par
+    ligne physique.
+    """
+    if not lines or any(len(line.box) != 4 for line in lines):
+        return [(" ".join(line.text.split()), line.score) for line in lines]
+
+    placed = []
+    for line in lines:
+        (x0, y0), (x1, y1), (x2, y2), (x3, y3) = line.box
+        top, bottom = min(y0, y1, y2, y3), max(y0, y1, y2, y3)
+        placed.append(((top + bottom) / 2, max(bottom - top, 1.0), min(x0, x3), line))
+    placed.sort(key=lambda item: item[0])
+
+    rows, current, center, height = [], [], 0.0, 0.0
+    for y, h, left, line in placed:
+        if current and abs(y - center) <= min(h, height) / 2:
+            current.append((left, line))
+            center += (y - center) / len(current)
+            continue
+        if current:
+            rows.append(_row_of(current))
+        current, center, height = [(left, line)], y, h
+    if current:
+        rows.append(_row_of(current))
+    return rows
+
+
+def _parse_date(match: "re.Match[str]") -> Optional[date]:
+    day, month, year = (int(g) for g in match.groups())
+    if year < 100:
+        year += 2000
+    if not 2000 <= year <= date.today().year + 1:
+        return None
+    try:
+        return date(year, month, day)
+    except ValueError:
+        return None
+
+
+def _vat_line(rate: float, amounts: List[float], score: float) -> VatLine:
+    """
+    Affecte les montants d'une ligne de TVA : base HT et TVA vérifiées par
+    base × taux ≈ TVA, ou TTC et TVA par TTC × taux / (100 + taux).
+    """
+    for base in amounts:
+        for vat in amounts:
+            if vat is base or vat >= base:
+                continue
+            if abs(base * rate / 100 - vat) <= 0.02:
+                total = round(base + vat, 2)
+                listed = any(_same(a, total) for a in amounts)
+                return VatLine(rate=rate, base=base, vat=vat, total=total,
+                               confidence=round(score * (0.98 if listed else 0.9), 3))
+            if abs(base * rate / (100 + rate) - vat) <= 0.02:
+                return VatLine(rate=rate, base=round(base - vat, 2), vat=vat, total=base,
+                               confidence=round(score * 0.9, 3))
+    base, vat = (amounts + [None])[:2]
+    return VatLine(rate=rate, base=base, vat=vat, confidence=round(score * 0.4, 3))
+
+
+def extract_receipt(source: Union[OCRResult, str]) -> ReceiptData:
+    """
+    Total, date, commerçant, TVA, moyen de paiement et articles d'un ticket.
+
+    `source` : résultat OCR (lignes regroupées par boîtes, scores de
+    reconnaissance), ou texte brut (une ligne par ligne, score 1).
+    """
+    if isinstance(source, str):
+        rows = [(" ".join(line.split()), 1.0) for line in source.splitlines()]
+    else:
+        rows = group_rows(source.lines)
+
+    receipt = ReceiptData()
+    totals: List[Tuple[float, int, float, float]] = []  # certitude, rang, montant, confiance
+    payments: List[Tuple[str, Optional[float], float]] = []
+    pending_total: Optional[Tuple[float, float]] = None
+    pending_label: Optional[str] = None
+    items_closed = False
+    header_seen = 0
+
+    for index, (text, score) in enumerate(rows):
+        if not text:
+            continue
+        upper = text.upper().translate(_ACCENTS)
+        matches = list(_AMOUNT.finditer(upper))
+        amounts = [_to_amount(m.group(1)) for m in matches]
+
+        # Montant seul sous un libellé de total ("NET A PAYER EN EUROS" puis "42,10")
+        if pending_total is not None:
+            strength, total_score = pending_total
+            pending_total = None
+            if amounts and not _LETTERS.search(upper):
+                totals.append((strength, index, amounts[-1], strength * min(score, total_score)))
+                continue
+
+        if receipt.merchant is None and header_seen < HEADER_ROWS:
+            header_seen += 1
+            letters = sum(c.isalpha() for c in upper)
+            if letters >= 3 and letters >= len(upper.replace(" ", "")) / 2 and not _NOT_MERCHANT.search(upper):
+                certainty = 0.8 if header_seen == 1 else 0.6
+                receipt.merchant = ReceiptField(value=upper[:60], confidence=round(score * certainty, 3))
+                continue
+
+        if receipt.date is None:
+            for match in _DATE.finditer(upper):
+                found = _parse_date(match)
+                if found:
+                    certainty = 0.95 if _DATE_KEYWORD.search(upper) else 0.85
+                    receipt.date = ReceiptField(value=found, confidence=round(score * certainty, 3))
+                    break
+            if receipt.date is not None and not amounts:
+                continue
+
+        rate = _RATE.search(upper) if "%" in upper else None
+        if rate and (_VAT_KEYWORD.search(upper) or _to_amount(rate.group(1)) in _VAT_RATES):
+            values = [_to_amount(m.group(1)) for m in _AMOUNT.finditer(upper[:rate.start()] + upper[rate.end():])]
+            if values:
+                receipt.vat.append(_vat_line(_to_amount(rate.group(1)), values, score))
+            items_closed = True
+            continue
+
+        payment = total_strength = None
+        if _KEYWORD_HINT.search(upper):
+            if not _LOYALTY.search(upper):  # "CARTE FIDELITE" n'est pas un paiement
+                payment = next((m for pattern, m in _PAYMENT_KEYWORDS if pattern.search(upper)), None)
+            total_strength = next((s for pattern, s in _TOTAL_KEYWORDS if pattern.search(upper)), None)
+
+        if total_strength is not None:
+            if total_strength >= 0.4:
+                items_closed = True
+            if total_strength > 0:
+                if amounts:
+                    totals.append((total_strength, index, amounts[-1], total_strength * score))
+                else:
+                    pending_total = (total_strength, score)
+            if payment and amounts:
+                payments.append((payment, amounts[-1], score))
+            continue
+
+        if payment:
+            payments.append((payment, amounts[-1] if amounts else None, score))
+            items_closed = True
+            continue
+
+        # Remise (montant négatif) gardée comme article : elle entre dans la somme
+        discount = bool(amounts) and amounts[-1] < 0
+        if items_closed or (_NOT_ITEM.search(upper) and not discount):
+            pending_label = None
+            continue
+
+        item = _item(text, upper, matches, amounts, score, pending_label, receipt.items)
+        pending_label = None
+        if item is None:
+            if not amounts and _LETTERS.search(upper):
+                pending_label = text  # libellé seul, quantité et prix sur la ligne suivante
+            continue
+        if item is not False:
+            receipt.items.append(item)
+
+    _resolve(receipt, totals, payments)
+    return receipt
+
+
+def _item(
+    text: str,
+    upper: str,
+    matches: List["re.Match[str]"],
+    amounts: List[float],
+    score: float,
+    pending_label: Optional[str],
+    items: List[ReceiptItem],
+) -> "ReceiptItem | bool | None":
+    """
+    Article lu sur une ligne : libellé, [quantité × prix unitaire], montant.
+    None si la ligne n'en est pas un ; False si elle complète l'article
+    précédent (ligne "2 X 1,50" sous son libellé déjà compté).
+    """
+    if not amounts:
+        return None
+    quantity = unit_price = None
+    qty = _QUANTITY.search(upper)
+    if qty:
+        quantity = _to_amount(qty.group(1))
+        unit_price = _to_amount(qty.group(2))
+        label_end = qty.start()
+        tail = [_to_amount(m.group(1)) for m in _AMOUNT.finditer(upper[qty.end():])]
+        amount = tail[-1] if tail else round(quantity * unit_price, 2)
+    else:
+        last = matches[-1]
+        if not _AMOUNT_SUFFIX.fullmatch(upper[last.end():]):
+            return None
+        label_end = last.start()
+        amount = amounts[-1]
+
+    label = " ".join(text[:label_end].split()).strip(" :-*")
+    if not _LETTERS.search(label.upper()):
+        if pending_label:
+            label = " ".join(pending_label.split())
+        elif qty and items and _same(items[-1].amount, amount):
+            items[-1].quantity, items[-1].unit_price = quantity, unit_price
+            return False
+        else:
+            return None
+
+    certainty = 1.0 if qty is None or _same(quantity * unit_price, amount) else 0.7
+    return ReceiptItem(
+        label=label[:60],
+        amount=amount,
+        quantity=quantity,
+        unit_price=unit_price,
+        confidence=round(score * certainty * 0.9, 3),
+    )
+
+
+def _resolve(
+    receipt: ReceiptData,
+    totals: List[Tuple[float, int, float, float]],
+    payments: List[Tuple[str, Optional[float], float]],
+) -> None:
+    """Choix du total et du paiement, puis recoupements des montants."""
+    if totals:
+        # Règle la plus sûre, puis la dernière du ticket (total final après sous-total)
+        _, _, amount, confidence = max(totals, key=lambda t: (t[0], t[1]))
+        receipt.total = ReceiptField(value=amount, confidence=round(confidence, 3))
+
+    if payments:
+        total = receipt.total.value if receipt.total else None
+        method, paid, score = next(
+            (p for p in payments if total is not None and p[1] is not None and _same(p[1], total)),
+            payments[0],
+        )
+        receipt.payment_method = ReceiptField(value=method, confidence=round(score * 0.9, 3))
+        if receipt.total is None and paid is not None:
+            receipt.total = ReceiptField(value=paid, confidence=round(score * 0.6, 3))
+        elif total is not None and paid is not None and _same(paid, total):
+            receipt.total.confidence = _agree(receipt.total.confidence)
+            receipt.payment_method.confidence = _agree(receipt.payment_method.confidence)
+
+    if receipt.total is None:
+        return
+    total = receipt.total.value
+    if receipt.items and _same(round(sum(i.amount for i in receipt.items), 2), total):
+        receipt.total.confidence = _agree(receipt.total.confidence)
+        for item in receipt.items:
+            item.confidence = _agree(item.confidence)
+    vat_totals = [line.total for line in receipt.vat]
+    if vat_totals and None not in vat_totals and _same(round(sum(vat_totals), 2), total):
+        receipt.total.confidence = _agree(receipt.total.confidence)
+        for line in receipt.vat:
+            line.confidence = _agree(line.confidence)
@@ -0,0 +1,203 @@
+"""
+Planification des ressources CPU de l'OCR : workers × threads ONNX.
+
+Chaque session ONNX Runtime démarre ses propres pools de threads intra-op et
+inter-op, dimensionnés par défaut sur tous les cœurs de la machine. Avec N
+workers (processus ou threads) on obtient donc N × cœurs threads actifs qui se
+disputent les mêmes cœurs.
+
+Le planificateur répartit explicitement les cœurs disponibles :
+- workers × threads intra-op ≈ cœurs (inter-op = 1, RapidOCR exécute les
+  graphes en séquentiel) ;
+- optionnellement, chaque worker process est épinglé sur son propre jeu de
+  cœurs (OCR_PIN_WORKERS=1, Linux uniquement) ;
+- le plan s'ajuste à partir du débit mesuré (tickets/s) : après quelques lots
+  sur une configuration, les configurations voisines sont essayées puis la
+  meilleure mesurée est conservée (montée de colline).
+
+Un plan est tenu par type d'exécution ("process" pour le pool de workers,
+"thread" pour le mode thread d'OCRService). Le pool de processus applique un
+nouveau plan à la génération de workers suivante (recyclage).
+"""
+
+import logging
+import os
+import threading
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+ENV_PIN_WORKERS = "OCR_PIN_WORKERS"
+
+# Lots mesurés sur une configuration avant d'essayer ses voisines
+DEFAULT_MIN_SAMPLES = 3
+# Lissage exponentiel du débit mesuré
+_EMA_ALPHA = 0.5
+
+
+def available_cores() -> list[int]:
+    """Cœurs utilisables par ce processus (affinité Linux, sinon tous)."""
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def split_cpu_sets(cores: list[int], workers: int, per_worker: int) -> list[list[int]]:
+    """Découpe `cores` en `workers` jeux contigus de `per_worker` cœurs (recyclés si trop peu)."""
+    if not cores:
+        return []
+    return [
+        [cores[(w * per_worker + i) % len(cores)] for i in range(per_worker)]
+        for w in range(workers)
+    ]
+
+
+def pin_current_process(cpu_set: list[int]) -> bool:
+    """Épingle le processus courant sur `cpu_set` (no-op hors Linux)."""
+    if not cpu_set or not hasattr(os, "sched_setaffinity"):
+        return False
+    try:
+        os.sched_setaffinity(0, cpu_set)
+        return True
+    except OSError as e:
+        logger.warning(f"[OCR plan] Épinglage sur {cpu_set} impossible: {e}")
+        return False
+
+
+class OCRResourcePlanner:
+    """Choisit (workers, threads intra-op) par type d'exécution et l'ajuste au débit mesuré."""
+
+    def __init__(
+        self,
+        cores: Optional[list[int]] = None,
+        pin_workers: Optional[bool] = None,
+        min_samples: int = DEFAULT_MIN_SAMPLES,
+    ):
+        self.cores = cores or available_cores()
+        if pin_workers is None:
+            pin_workers = os.getenv(ENV_PIN_WORKERS, "").strip().lower() in ("1", "true", "yes")
+        self.pin_workers = pin_workers and hasattr(os, "sched_setaffinity")
+        self.min_samples = max(1, min_samples)
+        self._lock = threading.Lock()
+        self._plans: dict[str, dict] = {}
+
+    # ── Plan ──────────────────────────────────────────────────────────────
+
+    def _candidates(self, max_workers: int, max_intra: Optional[int]) -> list[tuple[int, int]]:
+        """Configurations (workers, intra) qui couvrent les cœurs sans les dépasser."""
+        n_cores = len(self.cores)
+        out = []
+        for workers in range(1, max(1, max_workers) + 1):
+            intra = max(1, n_cores // workers)
+            if max_intra:
+                intra = min(intra, max_intra)
+            if (workers, intra) not in out:
+                out.append((workers, intra))
+        return out
+
+    def plan(self, kind: str, max_workers: int, max_intra: Optional[int] = None) -> dict:
+        """
+        Plan courant pour `kind` ("process" ou "thread").
+
+        Args:
+            max_workers: Borne haute des workers (RAM, nombre de tâches...).
+            max_intra: Borne des threads intra-op (1 en forkserver : les threads
+                ORT ne survivent pas au fork).
+        """
+        with self._lock:
+            state = self._plans.get(kind)
+            candidates = self._candidates(max_workers, max_intra)
+            if state is None or state["candidates"] != candidates:
+                workers, intra = candidates[-1]
+                state = self._plans[kind] = {
+                    "candidates": candidates,
+                    "current": (workers, intra),
+                    "samples": {},
+                    "state": "initial",
+                }
+                logger.info(
+                    f"[OCR plan] {kind}: {workers} workers × {intra} threads ONNX "
+                    f"sur {len(self.cores)} cœurs{' (épinglés)' if self.pin_workers else ''}"
+                )
+            return self._describe(kind, state)
+
+    def _describe(self, kind: str, state: dict) -> dict:
+        workers, intra = state["current"]
+        measured = state["samples"].get((workers, intra))
+        return {
+            "kind": kind,
+            "cores": len(self.cores),
+            "workers": workers,
+            "intra_op_threads": intra,
+            "inter_op_threads": 1,
+            "pinned": self.pin_workers and kind == "process",
+            "cpu_sets": split_cpu_sets(self.cores, workers, intra) if self.pin_workers and kind == "process" else [],
+            "state": state["state"],
+            "tickets_per_second": round(measured[0], 3) if measured else None,
+            "measured": {
+                f"{w}x{i}": round(tps, 3) for (w, i), (tps, _) in sorted(state["samples"].items())
+            },
+        }
+
+    # ── Ajustement ────────────────────────────────────────────────────────
+
+    def record(self, kind: str, workers: int, intra: int, tickets: int, seconds: float) -> None:
+        """
+        Enregistre le débit d'un lot exécuté avec (workers, intra).
+
+        Seuls les lots qui occupent tous les workers sont représentatifs.
+        """
+        if tickets < workers or seconds <= 0:
+            return
+        with self._lock:
+            state = self._plans.get(kind)
+            if state is None:
+                return
+            key = (workers, intra)
+            tps = tickets / seconds
+            ema, count = state["samples"].get(key, (tps, 0))
+            state["samples"][key] = (ema + _EMA_ALPHA * (tps - ema) if count else tps, count + 1)
+            if key == state["current"] and count + 1 >= self.min_samples:
+                self._adjust(kind, state)
+
+    def _adjust(self, kind: str, state: dict) -> None:
+        candidates, samples = state["candidates"], state["samples"]
+        idx = candidates.index(state["current"])
+        neighbours = [candidates[i] for i in (idx - 1, idx + 1) if 0 <= i < len(candidates)]
+        untested = [c for c in neighbours if c not in samples]
+        if untested:
+            nxt, status = untested[0], "exploring"
+        else:
+            nxt = max((c for c in candidates if c in samples), key=lambda c: samples[c][0])
+            status = "settled" if nxt == state["current"] else "exploring"
+        if nxt != state["current"]:
+            logger.info(
+                f"[OCR plan] {kind}: {state['current'][0]}×{state['current'][1]} → "
+                f"{nxt[0]}×{nxt[1]} ({samples[state['current']][0]:.2f} tickets/s mesurés)"
+            )
+        state["current"], state["state"] = nxt, status
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "cores": len(self.cores),
+                "pin_workers": self.pin_workers,
+                "plans": [self._describe(kind, state) for kind, state in sorted(self._plans.items())],
+            }
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Singleton
+# ─────────────────────────────────────────────────────────────────────────────
+
+_planner: Optional[OCRResourcePlanner] = None
+_planner_lock = threading.Lock()
+
+
+def get_resource_planner() -> OCRResourcePlanner:
+    global _planner
+    if _planner is None:
+        with _planner_lock:
+            if _planner is None:
+                _planner = OCRResourcePlanner()
+    return _planner
@@ -1,16 +1,26 @@
 """OCR API Models - Pydantic models for OCR endpoints."""
 
 from datetime import date as date_type
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
 
 from pydantic import BaseModel, field_validator, model_validator
 from backend.domains.transactions.model import Transaction
+from backend.domains.ocr.core.ocr_result import OCRLine, ReceiptData
+
+
+# Confiance moyenne OCR sous laquelle le ticket est signalé comme peu lisible
+LOW_OCR_CONFIDENCE = 0.6
 
 
 class OCRScanResponse(BaseModel):
     transaction: Transaction
     warnings: List[str] = []
     raw_ocr_text: Optional[str] = None
+    ocr_lines: List[OCRLine] = []
+    ocr_confidence: Optional[float] = None
+    ocr_timings: Dict[str, float] = {}
+    # Total, date, commerçant, TVA, paiement et articles lus sur le ticket
+    receipt: Optional[ReceiptData] = None
     archived_path: Optional[str] = None
 
     @model_validator(mode="after")
@@ -25,6 +35,8 @@ def compute_warnings(self) -> "OCRScanResponse":
             w.append("catégorie non identifiée")
         if not t.sous_categorie:
             w.append("sous-catégorie non identifiée")
+        if self.ocr_confidence is not None and self.ocr_confidence < LOW_OCR_CONFIDENCE:
+            w.append(f"texte OCR peu lisible (confiance {self.ocr_confidence:.0%})")
         
         # Merge with existing warnings if any
         if not self.warnings:
@@ -47,8 +59,168 @@ def validate_api_key(cls, v: str) -> str:
         return v
 
 
+class OCRBatchCategorization(BaseModel):
+    tickets: int = 0
+    rules: int = 0
+    local: int = 0
+    llm: int = 0
+    hit_rate: Optional[float] = None
+    llm_seconds: float = 0.0
+    llm_seconds_saved: Optional[float] = None
+    seconds: float = 0.0
+
+
 class BatchScanResponse(BaseModel):
     results: List[OCRScanResponse]
+    categorization: Optional[OCRBatchCategorization] = None
+
+
+class OCRPoolStatusResponse(BaseModel):
+    status: str
+    start_method: Optional[str] = None
+    max_workers: int = 0
+    intra_op_threads: Optional[int] = None
+    cpu_sets: List[List[int]] = []
+    max_tasks_per_child: Optional[int] = None
+    workers_alive: int = 0
+    worker_pids: List[int] = []
+    in_flight: int = 0
+    queue_depth: int = 0
+    completed: int = 0
+    failed: int = 0
+    restarts: int = 0
+    recycles: int = 0
+    avg_task_seconds: Optional[float] = None
+    uptime_seconds: Optional[float] = None
+
+
+class OCRResourcePlan(BaseModel):
+    kind: str
+    cores: int
+    workers: int
+    intra_op_threads: int
+    inter_op_threads: int
+    pinned: bool = False
+    cpu_sets: List[List[int]] = []
+    state: str
+    tickets_per_second: Optional[float] = None
+    measured: Dict[str, float] = {}
+
+
+class OCRResourcePlanResponse(BaseModel):
+    cores: int
+    pin_workers: bool
+    plans: List[OCRResourcePlan] = []
+
+
+class OCRAutoscalerDecision(BaseModel):
+    at: float
+    action: str
+    reason: str
+    from_workers: int
+    to_workers: int
+    in_flight: int = 0
+    queue_depth: int = 0
+    median_latency_s: Optional[float] = None
+    workers_rss_mb: float = 0.0
+    worker_rss_mb: Optional[float] = None
+    memory_percent: float = 0.0
+    available_mb: float = 0.0
+
+
+class OCRAutoscalerResponse(BaseModel):
+    enabled: bool
+    min_workers: Optional[int] = None
+    max_workers: Optional[int] = None
+    interval_seconds: Optional[float] = None
+    memory_high_percent: Optional[float] = None
+    workers: Optional[int] = None
+    last_sample: Optional[Dict[str, Any]] = None
+    decisions: List[OCRAutoscalerDecision] = []
+
+
+class OCRClassifierMetrics(BaseModel):
+    holdout: int = 0
+    accuracy: Optional[float] = None
+    coverage: Optional[float] = None
+    confident_accuracy: Optional[float] = None
+    latency_us_p50: Optional[float] = None
+    examples: int = 0
+    labels: int = 0
+    vocabulary: int = 0
+    train_seconds: Optional[float] = None
+
+
+class OCRMerchantRulesStatus(BaseModel):
+    enabled: bool
+    rules: int = 0
+    keywords: int = 0
+    min_confidence: Optional[float] = None
+    hits: int = 0
+    escalations: int = 0
+    hit_rate: Optional[float] = None
+    latency_us_p50: Optional[float] = None
+
+
+class OCRClassifierResponse(BaseModel):
+    enabled: bool
+    trained: bool = False
+    min_confidence: Optional[float] = None
+    metrics: OCRClassifierMetrics = OCRClassifierMetrics()
+    local_predictions: int = 0
+    escalations: int = 0
+    rules: OCRMerchantRulesStatus = OCRMerchantRulesStatus(enabled=False)
+
+
+class OCRGroqBreaker(BaseModel):
+    state: str
+    consecutive_failures: int = 0
+    failure_threshold: int
+    reset_timeout: float
+    opened: int = 0
+    retry_in_seconds: Optional[float] = None
+
+
+class OCRGroqStatusResponse(BaseModel):
+    breaker: OCRGroqBreaker
+    in_flight: int = 0
+    max_in_flight: int
+    timeout: float
+    max_retries: int
+    calls: int = 0
+    successes: int = 0
+    failures: int = 0
+    retries: int = 0
+    timeouts: int = 0
+    short_circuited: int = 0
+    saturated: int = 0
+    latency_p50_seconds: Optional[float] = None
+
 
+class OCRWatcherScanReport(BaseModel):
+    files: int = 0
+    tickets: int = 0
+    payslips: int = 0
+    duplicates: int = 0
+    errors: int = 0
+    inserted: int = 0
+    mode: Optional[str] = None  # "pool" (file bornée) ou "batch" (pool arrêté)
+    max_in_flight: Optional[int] = None
+    ocr_seconds: float = 0.0
+    seconds: float = 0.0
+    files_per_second: Optional[float] = None
 
 
+class OCRWatcherStatusResponse(BaseModel):
+    running: bool = False
+    mode: Optional[str] = None  # "events" ou "poll"
+    directories: List[str] = []
+    poll_interval: Optional[float] = None
+    sweep_interval: Optional[float] = None  # mode événements : reprise des fichiers restés
+    debounce: Optional[float] = None
+    stable_seconds: Optional[float] = None
+    pending: int = 0
+    events: int = 0
+    polls: int = 0
+    processed: int = 0
+    last_scan: Optional[OCRWatcherScanReport] = None
@@ -0,0 +1,281 @@
+"""
+Autoscaler du pool de workers OCR.
+
+`get_optimal_workers` fixe le nombre de workers une fois pour toutes, à partir
+d'une photo CPU/RAM prise au démarrage. L'autoscaler ajuste ce nombre pendant
+que l'API tourne, à partir de la charge réelle :
+- file d'attente : des tickets attendent un worker libre → +1 worker ;
+- latence par ticket : si elle se dégrade nettement après un ajout (cœurs
+  saturés), on n'ajoute plus de workers ;
+- mémoire : au-delà du seuil haut (RAM système ou RSS des workers) → -1 worker,
+  même pendant la période de stabilisation ; pas d'ajout au-dessus du seuil bas ;
+- inactivité prolongée → -1 worker (jusqu'au minimum).
+
+L'autoscaler pilote seul le nombre de workers : à son démarrage, le
+planificateur de ressources cesse de le modifier. Un changement de taille
+s'applique aussitôt à l'admission des tickets ; les workers en trop ne sont
+libérés qu'une fois le pool inactif (cf. `OCRWorkerPool.resize`) et, d'ici là,
+aucune nouvelle décision n'est prise.
+
+Chaque évaluation produit une décision (grow / shrink / hold) avec la mesure
+qui l'a motivée. Les changements sont journalisés et ajoutés à
+OCR_AUTOSCALER_LOG_PATH (JSON lines) pour dimensionner la capacité à partir du
+trafic réel ; les dernières décisions sont exposées par /api/ocr/autoscaler.
+
+Configuration (variables d'environnement) :
+- OCR_AUTOSCALE : 0 pour désactiver (actif par défaut avec le pool)
+- OCR_AUTOSCALE_MIN / OCR_AUTOSCALE_MAX : bornes du nombre de workers
+- OCR_AUTOSCALE_INTERVAL : secondes entre deux évaluations (défaut 10)
+- OCR_AUTOSCALE_MEMORY_HIGH : % de RAM système déclenchant un retrait (défaut 85)
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from statistics import median
+from typing import Optional
+
+import psutil
+
+from backend.config.paths import OCR_AUTOSCALER_LOG_PATH
+from ..core.resource_planner import available_cores
+from .worker_pool import OCRWorkerPool, _int_from_env
+
+logger = logging.getLogger(__name__)
+
+ENV_ENABLED = "OCR_AUTOSCALE"
+ENV_MIN = "OCR_AUTOSCALE_MIN"
+ENV_MAX = "OCR_AUTOSCALE_MAX"
+ENV_INTERVAL = "OCR_AUTOSCALE_INTERVAL"
+ENV_MEMORY_HIGH = "OCR_AUTOSCALE_MEMORY_HIGH"
+
+DEFAULT_INTERVAL = 10
+DEFAULT_MEMORY_HIGH = 85.0
+# Pas d'ajout de worker à moins de 10 points du seuil haut
+_MEMORY_HYSTERESIS = 10.0
+# Évaluations sans nouveau changement après un grow / shrink
+_COOLDOWN_ROUNDS = 3
+# Évaluations consécutives sans ticket avant de retirer un worker
+_IDLE_ROUNDS = 6
+# Latence médiane dégradée de plus de 50 % après un ajout → contention CPU
+_LATENCY_DEGRADATION = 1.5
+
+_MB = 1024 * 1024
+
+
+class OCRAutoscaler:
+    """Fait varier les workers d'un `OCRWorkerPool` entre deux bornes selon la charge mesurée."""
+
+    def __init__(
+        self,
+        pool: OCRWorkerPool,
+        min_workers: Optional[int] = None,
+        max_workers: Optional[int] = None,
+        interval: Optional[float] = None,
+        memory_high_percent: Optional[float] = None,
+        log_path=OCR_AUTOSCALER_LOG_PATH,
+    ):
+        self.pool = pool
+        self.min_workers = max(1, min_workers or _int_from_env(ENV_MIN, 1))
+        self.max_workers = max(
+            self.min_workers, max_workers or _int_from_env(ENV_MAX, len(available_cores()))
+        )
+        self.interval = interval or _int_from_env(ENV_INTERVAL, DEFAULT_INTERVAL)
+        self.memory_high = memory_high_percent or float(
+            os.getenv(ENV_MEMORY_HIGH, "") or DEFAULT_MEMORY_HIGH
+        )
+        self.log_path = log_path
+
+        self.decisions: deque[dict] = deque(maxlen=200)
+        self.last_sample: Optional[dict] = None
+        self._cooldown = 0
+        self._idle_rounds = 0
+        self._latency_before_grow: Optional[float] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    # ── Mesure ────────────────────────────────────────────────────────────
+
+    def sample(self) -> dict:
+        """Photo de la charge : workers, file d'attente, latence, mémoire."""
+        health = self.pool.health()
+        latencies = self.pool.recent_latencies()[-20:]
+        worker_rss = []
+        for pid in health["worker_pids"]:
+            try:
+                worker_rss.append(psutil.Process(pid).memory_info().rss / _MB)
+            except psutil.Error:
+                pass
+        memory = psutil.virtual_memory()
+        return {
+            "workers": self.pool.max_workers,
+            "in_flight": health["in_flight"],
+            "queue_depth": health["queue_depth"],
+            "resize_pending": self.pool.resize_pending,
+            "median_latency_s": round(median(latencies), 3) if latencies else None,
+            "workers_rss_mb": round(sum(worker_rss), 1),
+            "worker_rss_mb": round(sum(worker_rss) / len(worker_rss), 1) if worker_rss else None,
+            "memory_percent": memory.percent,
+            "available_mb": round(memory.available / _MB, 1),
+        }
+
+    # ── Décision ──────────────────────────────────────────────────────────
+
+    def decide(self, sample: dict) -> tuple[int, str]:
+        """Nombre de workers cible et raison, pour une mesure donnée."""
+        workers = sample["workers"]
+        self._idle_rounds = self._idle_rounds + 1 if sample["in_flight"] == 0 else 0
+
+        # Retrait précédent pas encore appliqué : la mesure ne le reflète pas
+        if sample.get("resize_pending"):
+            return workers, "pending"
+        # Pression mémoire : prioritaire, ignore la période de stabilisation
+        if sample["memory_percent"] >= self.memory_high and workers > self.min_workers:
+            return workers - 1, "memory"
+        if workers > self.max_workers:
+            return self.max_workers, "bounds"
+        if workers < self.min_workers:
+            return self.min_workers, "bounds"
+        if self._cooldown > 0:
+            return workers, "cooldown"
+
+        if sample["queue_depth"] >= workers and workers < self.max_workers:
+            if sample["memory_percent"] >= self.memory_high - _MEMORY_HYSTERESIS:
+                return workers, "memory-headroom"
+            per_worker = sample["worker_rss_mb"] or 0.0
+            if per_worker and sample["available_mb"] < 2 * per_worker:
+                return workers, "memory-headroom"
+            latency, before = sample["median_latency_s"], self._latency_before_grow
+            if latency and before and latency > before * _LATENCY_DEGRADATION:
+                return workers, "latency"
+            return workers + 1, "queue"
+
+        if self._idle_rounds >= _IDLE_ROUNDS and workers > self.min_workers:
+            return workers - 1, "idle"
+        return workers, "steady"
+
+    def step(self) -> dict:
+        """Une évaluation : mesure, décision, application, enregistrement."""
+        self.pool.apply_pending_resize()
+        sample = self.sample()
+        target, reason = self.decide(sample)
+        workers = sample["workers"]
+        action = "grow" if target > workers else "shrink" if target < workers else "hold"
+        decision = {
+            "at": time.time(),
+            "action": action,
+            "reason": reason,
+            "from_workers": workers,
+            "to_workers": target,
+            **{k: v for k, v in sample.items() if k != "workers"},
+        }
+        self.last_sample = sample
+        self._cooldown = max(0, self._cooldown - 1)
+
+        if action != "hold":
+            if action == "grow":
+                self._latency_before_grow = sample["median_latency_s"]
+            self._cooldown = _COOLDOWN_ROUNDS
+            self._idle_rounds = 0
+            self.pool.resize(target)
+            self.decisions.append(decision)
+            self._persist(decision)
+            logger.info(
+                f"[OCR autoscaler] {action} {workers} → {target} ({reason}, "
+                f"file={sample['queue_depth']}, latence={sample['median_latency_s']}s, "
+                f"RAM={sample['memory_percent']}%)"
+            )
+        return decision
+
+    def _persist(self, decision: dict) -> None:
+        if self.log_path is None:
+            return
+        try:
+            with open(self.log_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(decision) + "\n")
+        except OSError as e:
+            logger.warning(f"[OCR autoscaler] Journal des décisions non écrit: {e}")
+
+    # ── Boucle ────────────────────────────────────────────────────────────
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        # Nombre de workers repris au planificateur : un seul pilote
+        self.pool.resize(self.pool.max_workers)
+        self._thread = threading.Thread(target=self._run, name="ocr-autoscaler", daemon=True)
+        self._thread.start()
+        logger.info(
+            f"[OCR autoscaler] Démarré: {self.min_workers}-{self.max_workers} workers, "
+            f"évaluation toutes les {self.interval}s"
+        )
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            if not self.pool.running:
+                continue
+            try:
+                self.step()
+            except Exception as e:
+                logger.error(f"[OCR autoscaler] Évaluation échouée: {e}")
+
+    def stop(self) -> None:
+        self._stop.set()
+        thread, self._thread = self._thread, None
+        if thread is not None:
+            thread.join(timeout=self.interval + 1)
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None
+
+    def status(self) -> dict:
+        return {
+            "enabled": self.running,
+            "min_workers": self.min_workers,
+            "max_workers": self.max_workers,
+            "interval_seconds": self.interval,
+            "memory_high_percent": self.memory_high,
+            "workers": self.pool.max_workers,
+            "last_sample": self.last_sample,
+            "decisions": list(self.decisions),
+        }
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Singleton (démarré / arrêté par le lifespan de l'API, après le pool)
+# ─────────────────────────────────────────────────────────────────────────────
+
+_autoscaler: Optional[OCRAutoscaler] = None
+_autoscaler_lock = threading.Lock()
+
+
+def start_autoscaler(pool: Optional[OCRWorkerPool], **kwargs) -> Optional[OCRAutoscaler]:
+    """Démarre l'autoscaler du pool partagé (no-op sans pool ou si OCR_AUTOSCALE=0)."""
+    global _autoscaler
+    if pool is None:
+        return None
+    if os.getenv(ENV_ENABLED, "1").strip().lower() in ("0", "false", "no"):
+        logger.info("[OCR autoscaler] Désactivé (OCR_AUTOSCALE=0)")
+        return None
+    with _autoscaler_lock:
+        if _autoscaler is None:
+            _autoscaler = OCRAutoscaler(pool, **kwargs)
+        _autoscaler.start()
+        return _autoscaler
+
+
+def get_autoscaler() -> Optional[OCRAutoscaler]:
+    return _autoscaler
+
+
+def stop_autoscaler() -> None:
+    global _autoscaler
+    with _autoscaler_lock:
+        autoscaler, _autoscaler = _autoscaler, None
+    if autoscaler is not None:
+        autoscaler.stop()
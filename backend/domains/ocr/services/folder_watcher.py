@@ -0,0 +1,297 @@
+"""
+Surveillance de dossiers par événements du système de fichiers.
+
+Un ticket déposé dans un dossier surveillé est traité dès qu'il est complet,
+au lieu d'attendre le prochain passage d'une boucle de scrutation : les
+événements (inotify sous Linux, ReadDirectoryChangesW sous Windows, FSEvents
+sous macOS) arrivent par `watchdog`, dépendance optionnelle.
+
+Un fichier signalé n'est lu qu'une fois stable : aucun événement depuis
+`debounce` secondes, puis taille et date de modification inchangées sur
+`stable_seconds` (une photo en cours de copie grossit encore). Un fichier
+disparu entre-temps est oublié.
+
+Sans watchdog, ou si le dossier ne fournit pas d'événements (partage réseau,
+limite de surveillances inotify atteinte), repli sur une scrutation
+(`os.scandir`) toutes les `poll_interval` secondes, avec le même contrôle de
+stabilité.
+
+En mode événements, un parcours espacé (`sweep_interval`) reprend les
+fichiers restés dans les dossiers : ticket dont l'OCR a échoué (il n'est pas
+archivé, et aucun nouvel événement ne le signalerait) ou événement perdu.
+
+Configuration (variables d'environnement) :
+- OCR_WATCH_MODE : "auto" (événements si possible, défaut), "events" ou "poll"
+- OCR_WATCH_DEBOUNCE : secondes sans événement avant contrôle (défaut 1)
+- OCR_WATCH_STABLE_SECONDS : durée sans changement de taille exigée (défaut 2)
+- OCR_WATCH_SWEEP_INTERVAL : secondes entre deux parcours en mode événements (défaut 600)
+"""
+
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+WATCHDOG_AVAILABLE = False
+
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+
+    WATCHDOG_AVAILABLE = True
+except ImportError:
+    FileSystemEventHandler = object
+    Observer = None
+
+ENV_MODE = "OCR_WATCH_MODE"
+ENV_DEBOUNCE = "OCR_WATCH_DEBOUNCE"
+ENV_STABLE_SECONDS = "OCR_WATCH_STABLE_SECONDS"
+ENV_SWEEP_INTERVAL = "OCR_WATCH_SWEEP_INTERVAL"
+WATCH_MODES = ("auto", "events", "poll")
+DEFAULT_DEBOUNCE = 1.0
+DEFAULT_STABLE_SECONDS = 2.0
+DEFAULT_POLL_INTERVAL = 60.0
+DEFAULT_SWEEP_INTERVAL = 600.0
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return max(0.0, float(os.getenv(name, "")))
+    except ValueError:
+        return default
+
+
+class _EventHandler(FileSystemEventHandler):
+    """Création, écriture, fermeture ou renommage d'un fichier -> `notify`."""
+
+    def __init__(self, watcher: "FolderWatcher"):
+        super().__init__()
+        self._watcher = watcher
+
+    def on_any_event(self, event) -> None:
+        if event.is_directory or event.event_type not in ("created", "modified", "closed", "moved"):
+            return
+        self._watcher.notify(getattr(event, "dest_path", "") or event.src_path)
+
+
+class FolderWatcher:
+    """
+    Fichiers des dossiers surveillés passés à `process` une fois stables.
+
+    `process(paths)` reçoit les fichiers prêts (chemins absolus), depuis le
+    thread du watcher ; `accept(path)` filtre les fichiers à considérer.
+    """
+
+    def __init__(
+        self,
+        directories: Sequence[Path],
+        process: Callable[[List[Path]], Any],
+        accept: Callable[[Path], bool] = lambda path: True,
+        mode: Optional[str] = None,
+        poll_interval: float = DEFAULT_POLL_INTERVAL,
+        debounce: Optional[float] = None,
+        stable_seconds: Optional[float] = None,
+        sweep_interval: Optional[float] = None,
+    ):
+        self.directories = [Path(d) for d in directories]
+        self.process = process
+        self.accept = accept
+        mode = (mode or os.getenv(ENV_MODE, "") or "auto").strip().lower()
+        if mode not in WATCH_MODES:
+            logger.warning(f"[Watcher] Mode {mode!r} inconnu, repli sur auto")
+            mode = "auto"
+        self.requested_mode = mode
+        self.mode: Optional[str] = None  # "events" ou "poll" une fois démarré
+        self.poll_interval = poll_interval
+        self.debounce = _env_float(ENV_DEBOUNCE, DEFAULT_DEBOUNCE) if debounce is None else debounce
+        self.stable_seconds = (
+            _env_float(ENV_STABLE_SECONDS, DEFAULT_STABLE_SECONDS)
+            if stable_seconds is None
+            else stable_seconds
+        )
+        self.sweep_interval = (
+            _env_float(ENV_SWEEP_INTERVAL, DEFAULT_SWEEP_INTERVAL)
+            if sweep_interval is None
+            else sweep_interval
+        )
+        # chemin -> (dernier événement, (taille, mtime) observée, depuis quand)
+        self._pending: Dict[Path, Tuple[float, Optional[Tuple[int, int]], float]] = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._observer = None
+        self._next_poll = 0.0
+        self.events = 0
+        self.polls = 0
+        self.processed = 0
+
+    # ── Signalement ──────────────────────────────────────────────────────
+
+    def notify(self, path: "str | Path") -> None:
+        """Fichier créé ou modifié : contrôle de stabilité repoussé de `debounce`."""
+        path = Path(path)
+        if path.parent not in self.directories or not self.accept(path):
+            return
+        now = time.monotonic()
+        with self._lock:
+            _, signature, since = self._pending.get(path, (now, None, now))
+            self._pending[path] = (now, signature, since)
+            self.events += 1
+        self._wake.set()
+
+    def poll(self) -> int:
+        """Parcourt les dossiers et signale leurs fichiers ; nombre de fichiers vus."""
+        seen = 0
+        for directory in self.directories:
+            try:
+                entries = list(os.scandir(directory))
+            except OSError as e:
+                logger.warning(f"[Watcher] Lecture de {directory} impossible: {e}")
+                continue
+            for entry in entries:
+                if not entry.is_file():
+                    continue
+                path = Path(entry.path)
+                if not self.accept(path):
+                    continue
+                seen += 1
+                with self._lock:
+                    if path not in self._pending:
+                        # Pas d'événement à attendre : seul le contrôle de taille compte
+                        now = time.monotonic()
+                        self._pending[path] = (now - self.debounce, None, now)
+        self.polls += 1
+        return seen
+
+    # ── Stabilité ────────────────────────────────────────────────────────
+
+    def collect_ready(self, now: Optional[float] = None) -> Tuple[List[Path], Optional[float]]:
+        """
+        Fichiers stables retirés de l'attente, et délai avant le prochain
+        contrôle utile (None si plus rien n'est en attente).
+        """
+        now = time.monotonic() if now is None else now
+        ready, wait = [], None
+        with self._lock:
+            for path, (last_event, signature, since) in list(self._pending.items()):
+                due = last_event + self.debounce
+                if now < due:
+                    wait = due - now if wait is None else min(wait, due - now)
+                    continue
+                try:
+                    stat = path.stat()
+                except OSError:
+                    del self._pending[path]  # déplacé ou supprimé entre-temps
+                    continue
+                current = (stat.st_size, stat.st_mtime_ns)
+                if current != signature or stat.st_size == 0:
+                    # Nouveau contrôle après `stable_seconds` sans changement
+                    self._pending[path] = (last_event, current, now)
+                    remaining = self.stable_seconds
+                elif now - since >= self.stable_seconds:
+                    del self._pending[path]
+                    ready.append(path)
+                    continue
+                else:
+                    remaining = since + self.stable_seconds - now
+                wait = remaining if wait is None else min(wait, remaining)
+        return sorted(ready), wait
+
+    @property
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._pending)
+
+    # ── Boucle ───────────────────────────────────────────────────────────
+
+    @property
+    def scan_interval(self) -> float:
+        """Secondes entre deux parcours : scrutation, ou reprise en mode événements."""
+        return self.poll_interval if self.mode == "poll" else self.sweep_interval
+
+    def _start_observer(self) -> bool:
+        if self.requested_mode == "poll":
+            return False
+        if not WATCHDOG_AVAILABLE:
+            logger.info("[Watcher] watchdog non installé : scrutation périodique")
+            return False
+        try:
+            observer = Observer()
+            handler = _EventHandler(self)
+            for directory in self.directories:
+                directory.mkdir(parents=True, exist_ok=True)
+                observer.schedule(handler, str(directory), recursive=False)
+            observer.start()
+        except OSError as e:
+            logger.warning(f"[Watcher] Événements indisponibles ({e}) : scrutation périodique")
+            return False
+        self._observer = observer
+        return True
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            logger.warning("[Watcher] Déjà démarré")
+            return
+        self._stop.clear()
+        self.mode = "events" if self._start_observer() else "poll"
+        # Fichiers déposés pendant l'arrêt de l'application
+        self.poll()
+        self._next_poll = time.monotonic() + self.scan_interval
+        self._thread = threading.Thread(target=self._run, name="ocr-watcher", daemon=True)
+        self._thread.start()
+        logger.info(
+            f"[Watcher] {', '.join(str(d) for d in self.directories)} surveillés "
+            f"({'événements' if self.mode == 'events' else f'scrutation toutes les {self.poll_interval:g}s'})"
+        )
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        self._wake.set()
+        if self._observer is not None:
+            try:
+                self._observer.stop()
+                self._observer.join(timeout=timeout)
+            except RuntimeError:
+                pass
+            self._observer = None
+        if self._thread:
+            self._thread.join(timeout=timeout)
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            now = time.monotonic()
+            if now >= self._next_poll:
+                self.poll()
+                self._next_poll = now + self.scan_interval
+            ready, wait = self.collect_ready()
+            if ready:
+                try:
+                    self.process(ready)
+                except Exception as e:
+                    logger.error(f"[Watcher] Erreur de traitement: {e}", exc_info=True)
+                self.processed += len(ready)
+                continue
+            until_poll = max(0.0, self._next_poll - time.monotonic())
+            wait = until_poll if wait is None else min(wait, until_poll)
+            self._wake.wait(wait)
+            self._wake.clear()
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "running": bool(self._thread and self._thread.is_alive()),
+            "mode": self.mode,
+            "directories": [str(d) for d in self.directories],
+            "poll_interval": self.poll_interval if self.mode == "poll" else None,
+            "sweep_interval": self.sweep_interval if self.mode == "events" else None,
+            "debounce": self.debounce,
+            "stable_seconds": self.stable_seconds,
+            "pending": self.pending,
+            "events": self.events,
+            "polls": self.polls,
+            "processed": self.processed,
+        }
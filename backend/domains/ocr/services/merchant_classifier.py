@@ -0,0 +1,302 @@
+"""
+Catégorisation locale des tickets, apprise sur l'historique des transactions.
+
+Chaque ticket passait par un appel Groq (centaines de millisecondes, "Autre"
+hors ligne) alors que des milliers de dépenses déjà catégorisées sont en base.
+Le classifieur bayésien naïf (core/local_classifier.py) apprend les
+descriptions des dépenses -> (catégorie, sous-catégorie) et répond en moins
+d'une milliseconde ; l'OCRService ne sollicite Groq que si la confiance est
+inférieure au seuil.
+
+Entraînement :
+- complet au premier usage, avec mesure sur un jeu de validation (une dépense
+  sur HOLDOUT_MODULO, par id) : précision, couverture au seuil, précision des
+  réponses retenues, latence médiane ; ces exemples sont ensuite appris aussi ;
+- incrémental ensuite, au plus toutes les REFRESH_INTERVAL secondes et en
+  arrière-plan : dépenses nouvelles ou modifiées depuis la dernière lecture
+  (une recatégorisation oublie l'ancien exemple avant d'apprendre le nouveau).
+  Les suppressions ne sont prises en compte qu'au prochain démarrage.
+
+Les workers du pool OCR n'entraînent pas leur propre copie : le processus
+principal entraîne le modèle et le leur transmet (`export_state` /
+`load_state`) ; chaque worker n'apprend ensuite que les nouvelles dépenses.
+
+Configuration (variables d'environnement) :
+- OCR_LOCAL_CLASSIFIER : "0" pour désactiver
+- OCR_LOCAL_MIN_CONFIDENCE : confiance minimale d'une réponse locale (défaut 0.85)
+"""
+
+import logging
+import os
+import pickle
+import statistics
+import threading
+import time
+from collections import Counter, defaultdict
+from typing import Any, Dict, FrozenSet, Optional, Tuple
+
+from backend.shared.database import stream_rows
+from ..core.local_classifier import Label, NaiveBayesClassifier, features
+
+logger = logging.getLogger(__name__)
+
+ENV_ENABLED = "OCR_LOCAL_CLASSIFIER"
+ENV_MIN_CONFIDENCE = "OCR_LOCAL_MIN_CONFIDENCE"
+DEFAULT_MIN_CONFIDENCE = 0.85
+REFRESH_INTERVAL = 60.0
+HOLDOUT_MODULO = 5
+
+# Catégories techniques (échecs, doublons) : pas des exemples à apprendre
+EXCLUDED_CATEGORIES = frozenset({"Autre", "Erreur", "Doublon"})
+
+_QUERY = """
+    SELECT id, categorie, sous_categorie, description, date_mise_a_jour
+    FROM transactions
+    WHERE type = 'depense' AND (id > ? OR date_mise_a_jour > ?)
+    ORDER BY id
+"""
+
+
+class MerchantClassifier:
+    """Modèle local synchronisé avec la table transactions."""
+
+    def __init__(
+        self,
+        db_path: Optional[str] = None,
+        min_confidence: float = DEFAULT_MIN_CONFIDENCE,
+        refresh_interval: float = REFRESH_INTERVAL,
+    ):
+        self.db_path = db_path
+        self.min_confidence = min_confidence
+        self.refresh_interval = refresh_interval
+        self.model = NaiveBayesClassifier()
+        self.metrics: Dict[str, Any] = {}
+        self.stats: Counter = Counter()
+        # id -> (label, caractéristiques, description) des exemples appris
+        self._examples: Dict[int, Tuple[Label, FrozenSet[int], str]] = {}
+        self._descriptions: Dict[Label, Counter] = defaultdict(Counter)
+        self._description_features: Dict[str, FrozenSet[int]] = {}
+        self._last_id = 0
+        self._last_update = ""
+        self._last_refresh = 0.0
+        self._trained = False
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+
+    # ── Synchronisation avec la base ─────────────────────────────────────
+
+    def _fetch(self):
+        for rows in stream_rows(_QUERY, (self._last_id, self._last_update), db_path=self.db_path):
+            for row in rows:
+                self._last_id = max(self._last_id, row["id"])
+                self._last_update = max(self._last_update, row["date_mise_a_jour"] or "")
+                yield row
+
+    def _apply(self, row) -> None:
+        """Apprend une dépense (après avoir oublié sa version précédente)."""
+        tx_id = row["id"]
+        with self._lock:
+            previous = self._examples.pop(tx_id, None)
+            if previous is not None:
+                label, feats, description = previous
+                self.model.forget(feats, label)
+                self._descriptions[label][description] -= 1
+
+            description = (row["description"] or "").strip()
+            if row["categorie"] in EXCLUDED_CATEGORIES or not description:
+                return
+            feats = features(description)
+            if not feats:
+                return
+            label = (row["categorie"], row["sous_categorie"] or None)
+            self.model.learn(feats, label)
+            self._descriptions[label][description] += 1
+            self._description_features.setdefault(description, feats)
+            self._examples[tx_id] = (label, feats, description)
+
+    def train(self) -> Dict[str, Any]:
+        """Entraînement complet, mesuré sur le jeu de validation."""
+        with self._refresh_lock:
+            if self._trained:
+                # Entraîné par un appel concurrent pendant l'attente du verrou
+                return self.metrics
+            t0 = time.perf_counter()
+            holdout = []
+            for row in self._fetch():
+                if row["id"] % HOLDOUT_MODULO == 0:
+                    holdout.append(row)
+                else:
+                    self._apply(row)
+            self.metrics = self._evaluate(holdout)
+            for row in holdout:
+                self._apply(row)
+            self.metrics.update(
+                examples=self.model.examples,
+                labels=len(self.model.labels),
+                vocabulary=self.model.vocabulary,
+                train_seconds=round(time.perf_counter() - t0, 3),
+            )
+            self._trained = True
+            self._last_refresh = time.monotonic()
+        logger.info(f"[Classifieur] Entraîné: {self.metrics}")
+        return self.metrics
+
+    def export_state(self) -> Optional[bytes]:
+        """Modèle entraîné sérialisé (pour les workers du pool), None avant entraînement."""
+        with self._refresh_lock, self._lock:
+            if not self._trained:
+                return None
+            return pickle.dumps((
+                self.model, self._examples, self._descriptions, self._description_features,
+                self._last_id, self._last_update, self.metrics,
+            ))
+
+    def load_state(self, state: bytes) -> None:
+        """Reprend un modèle exporté : pas d'entraînement, seulement les mises à jour suivantes."""
+        (model, examples, descriptions, description_features,
+         last_id, last_update, metrics) = pickle.loads(state)
+        with self._refresh_lock, self._lock:
+            self.model, self._examples = model, examples
+            self._descriptions, self._description_features = descriptions, description_features
+            self._last_id, self._last_update = last_id, last_update
+            self.metrics = metrics
+            self._trained = True
+            self._last_refresh = time.monotonic()
+
+    def _evaluate(self, holdout) -> Dict[str, Any]:
+        rows = [
+            r for r in holdout
+            if r["categorie"] not in EXCLUDED_CATEGORIES and (r["description"] or "").strip()
+        ]
+        if not rows:
+            return {"holdout": 0}
+        correct = confident = confident_correct = 0
+        latencies = []
+        for row in rows:
+            t = time.perf_counter()
+            result = self._predict_label(row["description"])
+            latencies.append(time.perf_counter() - t)
+            if result is None:
+                continue
+            label, confidence, _ = result
+            ok = label == (row["categorie"], row["sous_categorie"] or None)
+            correct += ok
+            if confidence >= self.min_confidence:
+                confident += 1
+                confident_correct += ok
+        n = len(rows)
+        return {
+            "holdout": n,
+            "accuracy": round(correct / n, 3),
+            "coverage": round(confident / n, 3),
+            "confident_accuracy": round(confident_correct / confident, 3) if confident else None,
+            "latency_us_p50": round(statistics.median(latencies) * 1e6, 1),
+        }
+
+    def refresh(self) -> int:
+        """Apprend les dépenses nouvelles ou modifiées ; retourne leur nombre."""
+        if not self._refresh_lock.acquire(blocking=False):
+            return 0  # déjà en cours
+        try:
+            count = 0
+            for row in self._fetch():
+                self._apply(row)
+                count += 1
+            self._last_refresh = time.monotonic()
+        finally:
+            self._refresh_lock.release()
+        if count:
+            logger.info(f"[Classifieur] {count} dépenses apprises")
+        return count
+
+    def refresh_if_due(self) -> None:
+        """Entraînement au premier appel, puis mise à jour en arrière-plan si due."""
+        if not self._trained:
+            try:
+                self.train()
+            except Exception as e:
+                # Base indisponible : nouvel essai au prochain intervalle
+                logger.warning(f"[Classifieur] Entraînement impossible: {e}")
+                self._trained = True
+                self._last_refresh = time.monotonic()
+            return
+        if time.monotonic() - self._last_refresh > self.refresh_interval:
+            self._last_refresh = time.monotonic()
+            threading.Thread(target=self._safe_refresh, daemon=True).start()
+
+    def _safe_refresh(self) -> None:
+        try:
+            self.refresh()
+        except Exception as e:
+            logger.warning(f"[Classifieur] Mise à jour impossible: {e}")
+
+    # ── Prédiction ───────────────────────────────────────────────────────
+
+    def _predict_label(self, text: str):
+        feats = features(text)
+        with self._lock:
+            return self.model.predict(feats)
+
+    def predict(self, text: str) -> Optional[Dict[str, Any]]:
+        """
+        {category, subcategory, description, confidence, source="local"}, ou
+        None si la confiance est sous le seuil (à confier au LLM).
+        """
+        self.refresh_if_due()
+        feats = features(text)
+        with self._lock:
+            result = self.model.predict(feats)
+            if result is None or result[1] < self.min_confidence:
+                self.stats["escalated"] += 1
+                return None
+            label, confidence, _ = result
+            description = self._describe(label, feats)
+        self.stats["local"] += 1
+        return {
+            "category": label[0],
+            "subcategory": label[1],
+            "description": description,
+            "confidence": round(confidence, 3),
+            "source": "local",
+        }
+
+    def _describe(self, label: Label, feats: FrozenSet[int]) -> str:
+        """Description connue de la classe partageant le plus de mots avec le ticket."""
+        best, best_key = "Achat", (0, 0)
+        for description, count in self._descriptions[label].items():
+            if count <= 0:
+                continue
+            key = (len(self._description_features[description] & feats), count)
+            if key > best_key and key[0] > 0:
+                best, best_key = description, key
+        return best
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "enabled": True,
+            "trained": self._trained,
+            "min_confidence": self.min_confidence,
+            "metrics": self.metrics,
+            "local_predictions": self.stats["local"],
+            "escalations": self.stats["escalated"],
+        }
+
+
+_classifier: Optional[MerchantClassifier] = None
+_classifier_lock = threading.Lock()
+
+
+def get_merchant_classifier() -> Optional[MerchantClassifier]:
+    """Classifieur partagé du processus, None si désactivé (OCR_LOCAL_CLASSIFIER=0)."""
+    global _classifier
+    if os.getenv(ENV_ENABLED, "1").strip().lower() in ("0", "off", "false"):
+        return None
+    if _classifier is None:
+        with _classifier_lock:
+            if _classifier is None:
+                try:
+                    min_confidence = float(os.getenv(ENV_MIN_CONFIDENCE, ""))
+                except ValueError:
+                    min_confidence = DEFAULT_MIN_CONFIDENCE
+                _classifier = MerchantClassifier(min_confidence=min_confidence)
+    return _classifier
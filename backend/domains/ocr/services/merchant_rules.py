@@ -0,0 +1,202 @@
+"""
+Règles commerçants : catégorie décidée par mots-clés, avant tout modèle.
+
+Une station-service ou un supermarché connu se reconnaît à son enseigne ou à
+un mot du ticket ("GAZOLE", "SP95"), et le prompt Groq le dit lui-même dans
+ses règles anti-biais : un appel LLM pour ces tickets est de la latence
+perdue. Les règles de merchant_rules.yaml sont compilées en un automate
+d'Aho-Corasick sur les mots (core/keyword_automaton.py) : une recherche est
+un seul passage sur le texte normalisé, quelques dizaines de microsecondes.
+
+Décision : règles trouvées dans le ticket, priorité la plus haute gardée
+(carburant avant supermarché) ; deux catégories différentes de même priorité
+divisent la confiance par deux (ticket ambigu -> LLM). Sous le seuil, le
+ticket passe au classifieur appris puis à Groq.
+
+Le fichier de règles et categories.yaml sont relus s'ils changent sur disque
+(un stat par appel) ; une règle dont la catégorie ou la sous-catégorie
+n'existe pas dans categories.yaml est ignorée.
+
+Configuration (variables d'environnement) :
+- OCR_MERCHANT_RULES : "0" pour désactiver
+- OCR_RULES_MIN_CONFIDENCE : confiance minimale d'une décision par règle (défaut 0.9)
+"""
+
+import logging
+import os
+import statistics
+import threading
+import time
+from collections import Counter, deque
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import yaml
+
+from backend.shared.utils.categories_loader import (
+    categories_fingerprint,
+    get_all_subcategories,
+    get_categories,
+)
+from ..core.groq_parser import normalize_ocr_text
+from ..core.keyword_automaton import KeywordAutomaton
+from ..core.parser import parse_merchant
+
+logger = logging.getLogger(__name__)
+
+ENV_ENABLED = "OCR_MERCHANT_RULES"
+ENV_MIN_CONFIDENCE = "OCR_RULES_MIN_CONFIDENCE"
+DEFAULT_MIN_CONFIDENCE = 0.9
+DEFAULT_RULES_PATH = Path(__file__).parent / "merchant_rules.yaml"
+CONFLICT_PENALTY = 0.5
+
+
+class MerchantRules:
+    """Règles de merchant_rules.yaml compilées en automate, rechargées à chaud."""
+
+    def __init__(
+        self,
+        rules_path: Optional[str] = None,
+        min_confidence: float = DEFAULT_MIN_CONFIDENCE,
+    ):
+        self.rules_path = Path(rules_path) if rules_path else DEFAULT_RULES_PATH
+        self.min_confidence = min_confidence
+        self.rules: List[Dict[str, Any]] = []
+        self.stats: Counter = Counter()
+        self._automaton = KeywordAutomaton()
+        self._signature: Optional[Tuple] = None
+        self._latencies: deque = deque(maxlen=500)
+        self._lock = threading.Lock()
+
+    # ── Chargement ───────────────────────────────────────────────────────
+
+    def _current_signature(self) -> Tuple:
+        try:
+            stat = self.rules_path.stat()
+            rules = (stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            rules = None
+        return rules, categories_fingerprint()
+
+    def reload_if_changed(self) -> None:
+        """Compile les règles au premier appel, puis si un des deux YAML a changé."""
+        signature = self._current_signature()
+        if signature == self._signature:
+            return
+        with self._lock:
+            if signature != self._signature:
+                self._load()
+                self._signature = signature
+
+    def _load(self) -> None:
+        try:
+            with open(self.rules_path, encoding="utf-8") as f:
+                data = yaml.safe_load(f) or {}
+        except FileNotFoundError:
+            logger.warning(f"[Règles] Fichier introuvable: {self.rules_path}")
+            data = {}
+        except yaml.YAMLError as e:
+            # Fichier en cours d'édition : on garde les règles précédentes
+            logger.error(f"[Règles] {self.rules_path} illisible: {e}")
+            return
+
+        categories = set(get_categories())
+        subcategories = get_all_subcategories()
+        rules, automaton = [], KeywordAutomaton()
+        for entry in data.get("rules") or []:
+            category, sub = entry.get("category"), entry.get("subcategory")
+            valid_subs = subcategories.get(category) or []
+            if category not in categories or (sub and valid_subs and sub not in valid_subs):
+                logger.warning(f"[Règles] Règle ignorée, hors categories.yaml: {category} > {sub}")
+                continue
+            index = len(rules)
+            rules.append({
+                "category": category,
+                "subcategory": sub or None,
+                "confidence": float(entry.get("confidence", DEFAULT_MIN_CONFIDENCE)),
+                "priority": int(entry.get("priority", 0)),
+            })
+            for merchant in entry.get("merchants") or []:
+                automaton.add(normalize_ocr_text(str(merchant)).split(), (index, True))
+            for keyword in entry.get("keywords") or []:
+                automaton.add(normalize_ocr_text(str(keyword)).split(), (index, False))
+        self.rules, self._automaton = rules, automaton.build()
+        logger.info(f"[Règles] {len(rules)} règles, {automaton.size} mots-clés")
+
+    # ── Décision ─────────────────────────────────────────────────────────
+
+    def match(self, text: str) -> Optional[Dict[str, Any]]:
+        """
+        Meilleure décision des règles, quelle que soit sa confiance :
+        {category, subcategory, description, confidence, source="rules"},
+        None si aucun mot-clé n'est trouvé.
+        """
+        self.reload_if_changed()
+        rules, automaton = self.rules, self._automaton
+        hits, merchant = set(), None
+        for line in normalize_ocr_text(text).splitlines():
+            words = line.split()
+            for start, end, (index, is_merchant) in automaton.find(words):
+                hits.add(index)
+                if is_merchant and merchant is None:
+                    merchant = " ".join(words[start:end]).upper()
+        if not hits:
+            return None
+
+        top = max(rules[i]["priority"] for i in hits)
+        candidates = [rules[i] for i in hits if rules[i]["priority"] == top]
+        best = max(candidates, key=lambda r: r["confidence"])
+        labels = {(r["category"], r["subcategory"]) for r in candidates}
+        confidence = best["confidence"] * (CONFLICT_PENALTY if len(labels) > 1 else 1.0)
+        return {
+            "category": best["category"],
+            "subcategory": best["subcategory"],
+            "description": merchant or parse_merchant(text) or "Achat",
+            "confidence": round(confidence, 3),
+            "source": "rules",
+        }
+
+    def predict(self, text: str) -> Optional[Dict[str, Any]]:
+        """Décision des règles si sa confiance atteint le seuil, sinon None (escalade)."""
+        t0 = time.perf_counter()
+        result = self.match(text)
+        self._latencies.append(time.perf_counter() - t0)
+        if result is None or result["confidence"] < self.min_confidence:
+            self.stats["escalated"] += 1
+            return None
+        self.stats["hits"] += 1
+        return result
+
+    def status(self) -> Dict[str, Any]:
+        latencies = list(self._latencies)
+        total = self.stats["hits"] + self.stats["escalated"]
+        return {
+            "enabled": True,
+            "rules": len(self.rules),
+            "keywords": self._automaton.size,
+            "min_confidence": self.min_confidence,
+            "hits": self.stats["hits"],
+            "escalations": self.stats["escalated"],
+            "hit_rate": round(self.stats["hits"] / total, 3) if total else None,
+            "latency_us_p50": round(statistics.median(latencies) * 1e6, 1) if latencies else None,
+        }
+
+
+_rules: Optional[MerchantRules] = None
+_rules_lock = threading.Lock()
+
+
+def get_merchant_rules() -> Optional[MerchantRules]:
+    """Règles partagées du processus, None si désactivées (OCR_MERCHANT_RULES=0)."""
+    global _rules
+    if os.getenv(ENV_ENABLED, "1").strip().lower() in ("0", "off", "false"):
+        return None
+    if _rules is None:
+        with _rules_lock:
+            if _rules is None:
+                try:
+                    min_confidence = float(os.getenv(ENV_MIN_CONFIDENCE, ""))
+                except ValueError:
+                    min_confidence = DEFAULT_MIN_CONFIDENCE
+                _rules = MerchantRules(min_confidence=min_confidence)
+    return _rules
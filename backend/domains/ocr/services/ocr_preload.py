@@ -0,0 +1,47 @@
+"""
+Préchargement OCR pour le mode de démarrage `forkserver` du pool de workers.
+
+Ce module est importé UNE fois par le processus forkserver (via
+`multiprocessing.set_forkserver_preload`), avant tout fork de worker :
+- import de RapidOCR / ONNX Runtime, des parsers et de Groq ;
+- construction du singleton `OCRService` (modèles ONNX chargés + warm-up).
+
+Chaque worker est ensuite forké depuis ce processus : les pages des modèles
+sont partagées en copy-on-write au lieu d'être rechargées par worker, et
+l'initializer du pool trouve le singleton déjà prêt.
+
+Sessions ONNX mono-thread : les threads d'un pool ORT ne survivent pas à un
+fork, une session créée avec des threads intra-op bloquerait dans le fils.
+Le parallélisme vient du nombre de workers.
+"""
+
+import gc
+import logging
+
+from ..core.rapidocr_engine import RapidOCREngine
+from . import ocr_service
+
+logger = logging.getLogger(__name__)
+
+
+def preload() -> None:
+    """Construit le singleton OCRService du forkserver (idempotent)."""
+    if ocr_service._instance is not None:
+        return
+    with ocr_service._lock:
+        if ocr_service._instance is None:
+            ocr_service._instance = ocr_service.OCRService(
+                ocr_engine=RapidOCREngine(intra_op_num_threads=1, inter_op_num_threads=1)
+            )
+    # Objets existants exclus du GC cyclique : le ramasse-miettes ne réécrit
+    # plus leurs en-têtes dans les workers, les pages restent partagées.
+    gc.freeze()
+    logger.info("[OCR preload] Modèles chargés dans le forkserver ✅")
+
+
+try:
+    preload()
+except Exception as e:
+    # Le forkserver doit démarrer même si le préchargement échoue :
+    # chaque worker chargera alors ses modèles dans l'initializer.
+    logger.error(f"[OCR preload] Échec du préchargement: {e}")
@@ -3,26 +3,37 @@
 Service unifié pour extraire données depuis Images (tickets) ou PDF (relevés)
 """
 
+import asyncio
+import hashlib
 import logging
 import multiprocessing
 import os
 import threading
 import time
-from concurrent.futures import ProcessPoolExecutor
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import date
 from pathlib import Path
+from typing import Union
 
 if __name__ == "__main__":
     multiprocessing.freeze_support()
 
 from backend.config.logging_config import log_error
+from .merchant_classifier import get_merchant_classifier
+from .merchant_rules import get_merchant_rules
 from .pattern_manager import PatternManager
-from ..core.rapidocr_engine import RapidOCREngine
+from ..core.extraction_cache import cached, engine_version
+from ..core.ocr_result import OCRResult
+from ..core.preprocessing import ImagePreprocessor, PreprocessConfig
+from ..core.receipt_extractor import extract_receipt
+from ..core.rapidocr_engine import ImageInput, RapidOCREngine, RapidOCREnginePool
 from ..core.groq_parser import GroqParser
 from ..core.hardware_utils import get_optimal_workers
+from ..core.resource_planner import get_resource_planner
 from ..core import pdf_engine as _pdf_module
 from backend.domains.transactions.model import Transaction
-from ..core.parser import parse_amount, parse_date, parse_pdf_revenue
+from ..core.parser import parse_pdf_revenue
 
 logger = logging.getLogger(__name__)
 
@@ -31,34 +42,75 @@
 
 SUPPORTED_IMAGES = {".jpg", ".jpeg", ".png", ".bmp", ".tiff", ".webp"}
 
+# Mode des lots de tickets : "process" (pool de workers, défaut) ou "thread"
+# (threads d'un seul processus partageant un cache de moteurs ONNX).
+ENV_BATCH_MODE = "OCR_BATCH_MODE"
+BATCH_MODES = ("process", "thread")
 
-def get_ocr_service() -> "OCRService":
-    """Retourne l'instance singleton d'OCRService (thread-safe)."""
+
+def get_ocr_service(intra_op_num_threads: int | None = None) -> "OCRService":
+    """
+    Retourne l'instance singleton d'OCRService (thread-safe).
+
+    `intra_op_num_threads` n'est utilisé qu'à la création (workers du pool,
+    dimensionnés par le planificateur de ressources).
+    """
     global _instance
     if _instance is None:
         with _lock:
             if _instance is None:
                 logger.info("[OCR] Création singleton OCRService...")
-                _instance = OCRService()
+                engine = (
+                    RapidOCREngine(intra_op_num_threads=intra_op_num_threads, inter_op_num_threads=1)
+                    if intra_op_num_threads
+                    else None
+                )
+                _instance = OCRService(ocr_engine=engine)
     return _instance
 
 
+# Ticket d'un lot : chemin sur disque, ou (nom, octets) reçus par upload
+BatchItem = Union[str, tuple[str, bytes]]
+
+
+def ticket_name(item: BatchItem) -> str:
+    """Nom de fichier d'un élément de lot."""
+    return item[0] if isinstance(item, tuple) else Path(item).name
+
+
+def ticket_image(item: BatchItem) -> ImageInput:
+    """Image à passer à l'OCR pour un élément de lot."""
+    return item[1] if isinstance(item, tuple) else item
+
+
 def _process_ticket_worker(
-    args: tuple[int, str],
-) -> tuple[int, str, "Transaction | None", str | None, float]:
-    """Worker pour ProcessPoolExecutor."""
-    idx, path = args
+    args: "tuple[int, BatchItem] | tuple[int, BatchItem, bool]",
+) -> tuple[int, str, "Transaction | None", str | None, float, str | None]:
+    """
+    Worker pour ProcessPoolExecutor : (idx, élément[, catégoriser]).
+
+    Sans catégorisation (lot classé ensuite en requêtes groupées), le texte OCR
+    est renvoyé en dernière position, sinon None.
+    """
+    idx, item, categorize = args if len(args) == 3 else (*args, True)
     t0 = time.time()
     try:
-        return (
-            idx,
-            Path(path).name,
-            get_ocr_service().process_ticket(path),
-            None,
-            time.time() - t0,
+        tx, result = get_ocr_service().process_ticket_result(
+            ticket_image(item), name=ticket_name(item), categorize=categorize
         )
+        text = None if categorize else result.text
+        return (idx, ticket_name(item), tx, None, time.time() - t0, text)
     except Exception as e:
-        return (idx, Path(path).name, None, str(e), time.time() - t0)
+        return (idx, ticket_name(item), None, str(e), time.time() - t0, None)
+
+
+def resolve_batch_mode(mode: str | None = None) -> str:
+    """Mode explicite, sinon OCR_BATCH_MODE, sinon "process"."""
+    mode = (mode or os.getenv(ENV_BATCH_MODE, "") or "process").strip().lower()
+    if mode not in BATCH_MODES:
+        logger.warning(f"[OCR] Mode de lot {mode!r} inconnu, repli sur process")
+        return "process"
+    return mode
 
 
 def _is_pdf(file_path: str) -> bool:
@@ -90,23 +142,46 @@ def _build_transaction(
     )
 
 
+def _with_semantic(tx: Transaction, semantic: dict) -> Transaction:
+    """Dépense lue sans catégorie (montant, date), complétée par la classification."""
+    return _build_transaction(
+        type_="depense",
+        category=semantic.get("category", "Autre"),
+        subcategory=semantic.get("subcategory") or "Autre",
+        amount=tx.montant,
+        tx_date=tx.date,
+        description=semantic.get("description", ""),
+        source="ocr",
+    )
+
+
 class OCRService:
     """Service unifié OCR: images (RapidOCR) + PDF (pdfminer)."""
 
-    def __init__(self):
+    def __init__(self, ocr_engine: "RapidOCREngine | None" = None):
         from dotenv import load_dotenv
         from backend.config.paths import ENV_PATH
 
         load_dotenv(ENV_PATH)
 
-        self.ocr_engine = RapidOCREngine()
+        self.ocr_engine = ocr_engine or RapidOCREngine()
+        self.preprocessor = ImagePreprocessor(PreprocessConfig.from_env())
+        # Version des résultats OCR en cache : moteur + configuration du prétraitement
+        preprocess_hash = hashlib.sha1(
+            self.preprocessor.config.model_dump_json().encode()
+        ).hexdigest()[:12]
+        self._ocr_cache_version = (
+            f"rapidocr-{engine_version('rapidocr_onnxruntime')}-pre-{preprocess_hash}"
+        )
         self.pattern_manager = PatternManager()
-        self._amount_patterns = self.pattern_manager.get_amount_patterns()
-        self._date_patterns = self.pattern_manager.get_date_patterns()
 
         groq_key = os.getenv("GROQ_API_KEY", "").strip()
         self.llm_parser = GroqParser()
         self.groq_available = bool(groq_key)
+        self._engine_pool: RapidOCREnginePool | None = None
+        self._engine_pool_lock = threading.Lock()
+        # Borne des threads du planificateur, fixée au premier lot (cf. _process_batch_threaded)
+        self._thread_workers_limit: int | None = None
         logger.info(
             f"OCRService: Groq IA {'activée' if self.groq_available else 'désactivée'} ✅"
         )
@@ -149,7 +224,12 @@ def _process_pdf(self, pdf_path: str) -> Transaction:
             raise ImportError("pdfminer.six requis pour les PDF")
 
         try:
-            text = _pdf_module.pdf_engine.extract_text_from_pdf(pdf_path)
+            text = cached(
+                pdf_path,
+                "pdf_text",
+                f"pdfminer-{engine_version('pdfminer.six')}",
+                lambda: _pdf_module.pdf_engine.extract_text_from_pdf(pdf_path),
+            )
         except Exception as e:
             raise ValueError(f"Extraction PDF échouée: {e}")
 
@@ -168,46 +248,328 @@ def _process_pdf(self, pdf_path: str) -> Transaction:
             source="pdf",
         )
 
-    def process_ticket(self, image_path: str) -> Transaction:
-        """Traite un ticket image."""
-        t0 = time.time()
-        logger.info(f"[OCR] Ticket: {Path(image_path).name}")
-
-        raw_text = self.ocr_engine.extract_text(image_path)
-        amount = parse_amount(raw_text, self._amount_patterns) or 0.0
-        tx_date = parse_date(raw_text, self._date_patterns)
+    def recognize(
+        self, image: ImageInput, ocr_engine: RapidOCREngine | None = None
+    ) -> OCRResult:
+        """
+        Prétraitement puis inférence OCR (lignes, boîtes, scores, temps par étape).
+
+        Fichiers et octets passent par le cache d'extraction : un contenu déjà
+        reconnu est relu depuis le cache (temps `cache` et `total` seuls).
+        """
+        if not isinstance(image, (str, Path, bytes)):
+            return self._infer(image, ocr_engine)
+
+        t0 = time.perf_counter()
+        data = image if isinstance(image, bytes) else Path(image).read_bytes()
+
+        def _load(payload: str) -> OCRResult:
+            result = OCRResult.model_validate_json(payload)
+            elapsed = time.perf_counter() - t0
+            result.timings = {"cache": elapsed, "total": elapsed}
+            return result
+
+        return cached(
+            data,
+            "ocr",
+            self._ocr_cache_version,
+            lambda: self._infer(data, ocr_engine),
+            dump=OCRResult.model_dump_json,
+            load=_load,
+        )
 
-        semantic = self.llm_parser.parse(raw_text)
+    def _infer(self, image: ImageInput, ocr_engine: RapidOCREngine | None) -> OCRResult:
+        prepared, timings = self.preprocessor.run(image)
+        result = (ocr_engine or self.ocr_engine).recognize(prepared)
+        result.timings.update(timings)
+        return result
+
+    def process_ticket(
+        self,
+        image: "ImageInput | OCRResult",
+        ocr_engine: RapidOCREngine | None = None,
+        name: str | None = None,
+    ) -> Transaction:
+        """
+        Traite un ticket image : chemin, octets d'un upload (décodés en mémoire),
+        tableau BGR, ou `OCRResult` déjà calculé (aucune nouvelle inférence).
+        `ocr_engine` : moteur emprunté en mode thread.
+        """
+        return self.process_ticket_result(image, ocr_engine, name)[0]
+
+    def process_ticket_result(
+        self,
+        image: "ImageInput | OCRResult",
+        ocr_engine: RapidOCREngine | None = None,
+        name: str | None = None,
+        categorize: bool = True,
+    ) -> tuple[Transaction, OCRResult]:
+        """
+        Comme `process_ticket`, retourne aussi le résultat OCR de l'unique inférence,
+        champs du ticket extraits (`result.receipt`).
+        `categorize=False` : catégorie laissée à "Autre", à compléter par
+        `categorize_transactions` (lots classés en requêtes groupées).
+        """
+        t0 = time.time()
+        if name is None and isinstance(image, (str, Path)):
+            name = Path(image).name
+        logger.info(f"[OCR] Ticket: {name or 'upload'}")
+
+        result = image if isinstance(image, OCRResult) else self.recognize(image, ocr_engine)
+        raw_text = result.text
+        fields = self.pattern_manager.scan(raw_text)
+        # Champs structurés lus sur les lignes et boîtes de la même inférence ;
+        # total et date en repli des patterns de ocr_patterns.yaml
+        t_receipt = time.perf_counter()
+        receipt = result.receipt = extract_receipt(result)
+        result.timings["receipt"] = time.perf_counter() - t_receipt
+        amount = fields["amount"] or (receipt.total.value if receipt.total else 0.0)
+        tx_date = fields["date"] or (receipt.date.value if receipt.date else date.today())
+
+        semantic = self._categorize(raw_text) if categorize else {}
         logger.info(
             f"[OCR] {amount}€ — {semantic.get('category')} — {time.time() - t0:.2f}s"
         )
 
-        return _build_transaction(
+        tx = _build_transaction(
             type_="depense",
             category=semantic.get("category", "Autre"),
             subcategory=semantic.get("subcategory") or "Autre",
             amount=amount,
-            tx_date=tx_date or date.today(),
-            description=semantic.get("description", ""),
+            tx_date=tx_date,
+            description=semantic.get("description") or fields["merchant"] or "",
             source="ocr",
         )
+        return tx, result
+
+    async def process_ticket_result_async(
+        self, image: "ImageInput | OCRResult", name: str | None = None
+    ) -> tuple[Transaction, OCRResult]:
+        """
+        `process_ticket_result` pour les endpoints async : OCR et classifieur
+        local dans un thread, appel Groq asynchrone (`aparse`, délais et
+        disjoncteur) ; la boucle d'événements n'est jamais bloquée.
+        """
+        tx, result = await asyncio.to_thread(
+            self.process_ticket_result, image, None, name, False
+        )
+        semantic = await asyncio.to_thread(self._categorize_local, result.text)
+        if semantic is None:
+            semantic = await self.llm_parser.aparse(result.text)
+        return _with_semantic(tx, semantic), result
+
+    def _categorize_local(self, text: str) -> dict | None:
+        """Règles commerçants, puis classifieur appris ; None : décision laissée au LLM."""
+        rules = get_merchant_rules()
+        semantic = rules.predict(text) if rules is not None else None
+        if semantic is None:
+            classifier = get_merchant_classifier()
+            semantic = classifier.predict(text) if classifier is not None else None
+        return semantic
+
+    def _categorize(self, text: str) -> dict:
+        """Règles et classifieur local, Groq si leur confiance est insuffisante."""
+        local = self._categorize_local(text)
+        return local if local is not None else self.llm_parser.parse(text)
+
+    def categorize_transactions(
+        self,
+        drafts: list[tuple["Transaction | None", str | None]],
+        report: dict | None = None,
+    ) -> list["Transaction | None"]:
+        """
+        Catégorise en une fois les transactions d'un lot lues sans catégorie
+        (couples transaction, texte OCR) : règles et classifieur local par
+        ticket, puis requêtes Groq groupées pour les autres.
+
+        `report`, s'il est fourni, reçoit le bilan du lot (`_batch_report`).
+        """
+        t0 = time.perf_counter()
+        semantics: list[dict | None] = [None] * len(drafts)
+        sources: Counter = Counter()
+        remaining = []
+        for i, (tx, text) in enumerate(drafts):
+            if tx is None or text is None:
+                continue
+            local = self._categorize_local(text)
+            if local is not None:
+                semantics[i] = local
+                sources[local.get("source", "local")] += 1
+            else:
+                remaining.append(i)
+        llm_seconds = 0.0
+        if remaining:
+            t_llm = time.perf_counter()
+            parsed = self.llm_parser.parse_batch([drafts[i][1] for i in remaining])
+            llm_seconds = time.perf_counter() - t_llm
+            sources["llm"] += len(remaining)
+            for i, semantic in zip(remaining, parsed):
+                semantics[i] = semantic
+
+        summary = self._batch_report(sources, llm_seconds, time.perf_counter() - t0)
+        if summary["tickets"]:
+            logger.info(f"[OCR] Catégorisation du lot: {summary}")
+        if report is not None:
+            report.update(summary)
+
+        return [
+            tx if tx is None or semantic is None else _with_semantic(tx, semantic)
+            for (tx, _), semantic in zip(drafts, semantics)
+        ]
+
+    def _batch_report(self, sources: Counter, llm_seconds: float, seconds: float) -> dict:
+        """
+        Tickets décidés par source (rules, local, llm), part décidée sans LLM,
+        et temps LLM économisé : tickets décidés localement × coût LLM par
+        ticket, mesuré sur le lot, à défaut latence médiane des appels Groq.
+        """
+        tickets = sum(sources.values())
+        skipped = tickets - sources["llm"]
+        if sources["llm"]:
+            per_ticket = llm_seconds / sources["llm"]
+        else:
+            per_ticket = self.llm_parser.resilience.metrics()["latency_p50_seconds"]
+        return {
+            "tickets": tickets,
+            "rules": sources["rules"],
+            "local": sources["local"],
+            "llm": sources["llm"],
+            "hit_rate": round(skipped / tickets, 3) if tickets else None,
+            "llm_seconds": round(llm_seconds, 3),
+            "llm_seconds_saved": round(per_ticket * skipped, 3) if per_ticket is not None else None,
+            "seconds": round(seconds, 3),
+        }
+
+    def _categorize_results(self, results: list[tuple], report: dict | None = None) -> list[tuple]:
+        """(nom, tx, erreur, durée, texte) -> (nom, tx catégorisée, erreur, durée)."""
+        txs = self.categorize_transactions(
+            [(tx, text) for _, tx, _, _, text in results], report
+        )
+        return [(name, tx, err, elapsed) for (name, _, err, elapsed, _), tx in zip(results, txs)]
+
+    @property
+    def batch_categorize(self) -> bool:
+        """Lots catégorisés en requêtes groupées après l'OCR (GROQ_BATCH_SIZE > 1)."""
+        return self.llm_parser.batch_size > 1
 
     def process_batch_tickets(
-        self, image_paths: list[str], max_workers: int = None
+        self,
+        image_paths: list[BatchItem],
+        max_workers: int = None,
+        mode: str = None,
+        report: dict | None = None,
     ) -> list[tuple]:
-        """Traite un lot de tickets en parallèle."""
+        """
+        Traite un lot de tickets en parallèle.
+
+        Chaque élément est un chemin ou un couple (nom, octets) issu d'un upload :
+        les octets sont transmis tels quels aux workers et décodés en mémoire.
+
+        Mode "process" : pool persistant (workers déjà chauffés) s'il est démarré,
+        sinon un ProcessPoolExecutor éphémère dimensionné pour le lot.
+        Mode "thread" : cf. `_process_batch_threaded`.
+
+        Si GROQ_BATCH_SIZE > 1, les workers ne font que l'OCR et les textes du
+        lot sont catégorisés ensuite ensemble (`categorize_transactions`), et
+        `report` reçoit le bilan de la catégorisation du lot.
+        """
         if not image_paths:
             return []
 
+        categorize = not self.batch_categorize
+        if resolve_batch_mode(mode) == "thread":
+            results = self._process_batch_threaded(image_paths, max_workers, categorize)
+        else:
+            results = self._process_batch_processes(image_paths, max_workers, categorize)
+        return results if categorize else self._categorize_results(results, report)
+
+    def _process_batch_processes(
+        self, image_paths: list[BatchItem], max_workers: int | None, categorize: bool
+    ) -> list[tuple]:
         start = time.time()
+        from .worker_pool import get_worker_pool
+
+        pool = get_worker_pool()
+        if pool is not None and max_workers is None:
+            results = pool.process_batch(image_paths, categorize=categorize)
+            logger.info(f"Batch (pool): {len(image_paths)} en {time.time() - start:.2f}s")
+            return results
+
         results = [None] * len(image_paths)
         workers = max_workers or get_optimal_workers(len(image_paths))
 
         with ProcessPoolExecutor(max_workers=workers) as executor:
-            for idx, fname, tx, err, elapsed in executor.map(
-                _process_ticket_worker, enumerate(image_paths)
+            for idx, fname, tx, err, elapsed, text in executor.map(
+                _process_ticket_worker,
+                [(i, item, categorize) for i, item in enumerate(image_paths)],
             ):
-                results[idx] = (fname, tx, err, elapsed)
+                row = (fname, tx, err, elapsed)
+                results[idx] = row if categorize else (*row, text)
 
         logger.info(f"Batch: {len(image_paths)} en {time.time() - start:.2f}s")
         return results
+
+    # ── Mode thread ───────────────────────────────────────────────────────
+
+    def _get_engine_pool(self, workers: int, intra: int) -> RapidOCREnginePool:
+        """Cache de moteurs pour `workers` threads, conservé entre les lots."""
+        with self._engine_pool_lock:
+            pool = self._engine_pool
+            if pool is None or pool.size != workers or pool.intra_op_num_threads != intra:
+                pool = self._engine_pool = RapidOCREnginePool(workers, intra)
+                logger.info(f"[OCR] Cache moteurs thread: {workers} × {intra} threads ONNX")
+            return pool
+
+    def _process_ticket_threaded(
+        self, engines: RapidOCREnginePool, item: BatchItem, categorize: bool = True
+    ) -> tuple:
+        t0 = time.time()
+        name = ticket_name(item)
+        try:
+            with engines.borrow() as engine:
+                tx, result = self.process_ticket_result(
+                    ticket_image(item), ocr_engine=engine, name=name, categorize=categorize
+                )
+            row = (name, tx, None, time.time() - t0)
+            return row if categorize else (*row, result.text)
+        except Exception as e:
+            row = (name, None, str(e), time.time() - t0)
+            return row if categorize else (*row, None)
+
+    def _process_batch_threaded(
+        self, image_paths: list[BatchItem], max_workers: int = None, categorize: bool = True
+    ) -> list[tuple]:
+        """
+        Traite un lot dans ce processus avec un pool de threads.
+
+        ONNX Runtime libère le GIL pendant l'inférence : les threads avancent en
+        parallèle sans dupliquer les modèles par processus ni payer le démarrage
+        des workers. Même format de sortie que le mode process (texte OCR en
+        cinquième position si `categorize=False`).
+        """
+        start = time.time()
+        # Cœurs répartis entre threads (workers × intra ≈ cœurs) : pas de
+        # workers × cpu threads ORT en concurrence sur la machine.
+        planner = get_resource_planner()
+        if max_workers:
+            workers, intra = max_workers, max(1, len(planner.cores) // max_workers)
+        else:
+            # Borne calculée une fois : recalculée sur la RAM libre à chaque lot,
+            # elle fluctuait et remettait à zéro l'ajustement du planificateur
+            if self._thread_workers_limit is None:
+                self._thread_workers_limit = get_optimal_workers(len(planner.cores), shared_models=True)
+            plan = planner.plan("thread", self._thread_workers_limit)
+            workers, intra = plan["workers"], plan["intra_op_threads"]
+        engines = self._get_engine_pool(workers, intra)
+
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ocr") as executor:
+            results = list(
+                executor.map(
+                    lambda p: self._process_ticket_threaded(engines, p, categorize), image_paths
+                )
+            )
+
+        if not max_workers:
+            planner.record("thread", workers, intra, len(image_paths), time.time() - start)
+        logger.info(f"Batch (threads): {len(image_paths)} en {time.time() - start:.2f}s")
+        return results
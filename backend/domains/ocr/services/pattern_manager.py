@@ -1,16 +1,22 @@
 """
-ger - Gestion des patterns regex
-Lecture simple des patterns depuis ocr_patterns.yaml
+PatternManager - Gestion des patterns regex
+Lecture des patterns depuis ocr_patterns.yaml, compilés une fois par champ
+(`PatternSet`) et rechargés si le fichier change sur disque (un stat par appel).
 """
 
 import logging
+import threading
 from pathlib import Path
-from typing import Dict, List
+from typing import Any, Dict, List, Optional, Tuple
 
 import yaml
 
+from ..core.parser import PatternSet, parse_amount, parse_date, parse_merchant
+
 logger = logging.getLogger(__name__)
 
+_NOT_LOADED = object()
+
 
 class PatternManager:
     """
@@ -20,7 +26,7 @@ class PatternManager:
     def __init__(self, patterns_path: str = None):
         """
         Initialise le gestionnaire de patterns
-        
+
         Args:
             patterns_path: Chemin vers ocr_patterns.yaml
         """
@@ -28,31 +34,78 @@ def __init__(self, patterns_path: str = None):
             patterns_path = Path(__file__).parent / "ocr_patterns.yaml"
 
         self.patterns_path = Path(patterns_path)
-        self.patterns = self._load_patterns()
+        self.patterns: Dict = {}
+        self._sets: Dict[str, PatternSet] = {}
+        self._signature: Any = _NOT_LOADED
+        self._lock = threading.Lock()
+        self.reloads = 0
+        self.reload_if_changed()
 
-    def _load_patterns(self) -> Dict:
-        """Charge les patterns depuis le fichier YAML"""
+    def _current_signature(self) -> Optional[Tuple[int, int]]:
+        try:
+            stat = self.patterns_path.stat()
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def reload_if_changed(self) -> bool:
+        """Recharge et recompile les patterns si le fichier a changé ; True si rechargés."""
+        signature = self._current_signature()
+        if signature == self._signature:
+            return False
+        with self._lock:
+            if signature == self._signature:
+                return False
+            patterns = self._load_patterns()
+            if patterns is None:
+                # YAML illisible (en cours d'édition) : patterns précédents conservés
+                self._signature = signature
+                return False
+            self.patterns = patterns
+            self._sets = {
+                field: PatternSet(values or [])
+                for field, values in patterns.items()
+                if isinstance(values, list)
+            }
+            self._signature = signature
+            self.reloads += 1
+        if self.reloads > 1:
+            logger.info(f"Patterns rechargés depuis {self.patterns_path}")
+        return True
+
+    def _load_patterns(self) -> Optional[Dict]:
+        """Charge les patterns depuis le fichier YAML (None si illisible)"""
         if not self.patterns_path.exists():
             logger.error(f"Fichier patterns introuvable: {self.patterns_path}")
             return {'amount': [], 'date': []}
 
-        with open(self.patterns_path, 'r', encoding='utf-8') as f:
-            data = yaml.safe_load(f) or {}
-            logger.info(f"Patterns chargés depuis {self.patterns_path}")
-            return data
+        try:
+            with open(self.patterns_path, 'r', encoding='utf-8') as f:
+                data = yaml.safe_load(f) or {}
+        except yaml.YAMLError as e:
+            logger.error(f"Fichier patterns illisible {self.patterns_path}: {e}")
+            return None
+        logger.info(f"Patterns chargés depuis {self.patterns_path}")
+        return data
 
     def get_patterns(self, field: str) -> List[str]:
         """
         Récupère les patterns pour un champ
-        
+
         Args:
             field: Nom du champ ('amount', 'date')
-            
+
         Returns:
             Liste de patterns regex
         """
+        self.reload_if_changed()
         return self.patterns.get(field, [])
 
+    def get_pattern_set(self, field: str) -> PatternSet:
+        """Patterns compilés d'un champ, dans leur ordre de priorité"""
+        self.reload_if_changed()
+        return self._sets.get(field) or PatternSet([])
+
     def get_amount_patterns(self) -> List[str]:
         """Récupère les patterns pour le montant"""
         return self.get_patterns('amount')
@@ -60,3 +113,17 @@ def get_amount_patterns(self) -> List[str]:
     def get_date_patterns(self) -> List[str]:
         """Récupère les patterns pour la date"""
         return self.get_patterns('date')
+
+    def scan(self, text: str) -> Dict[str, Any]:
+        """
+        Montant, date et commerçant candidats d'un ticket en un appel :
+        {"amount": float | None, "date": date | None, "merchant": str | None}.
+        """
+        self.reload_if_changed()
+        sets = self._sets
+        upper = text.upper()  # une fois pour le montant et le filtre des dates
+        return {
+            "amount": parse_amount(text, sets.get("amount") or PatternSet([]), upper=upper),
+            "date": parse_date(text, sets.get("date") or PatternSet([]), upper=upper),
+            "merchant": parse_merchant(text),
+        }
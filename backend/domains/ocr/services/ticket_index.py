@@ -0,0 +1,203 @@
+"""
+Index des empreintes perceptuelles des tickets archivés (détection de doublons).
+
+Un même ticket photographié deux fois, ou redéposé dans TO_SCAN_DIR sous un
+autre nom, relançait l'OCR et l'appel LLM et créait une transaction en double.
+Avant toute inférence, `check()` calcule l'empreinte dHash du ticket et la
+cherche parmi celles de tous les tickets archivés dans SORTED_DIR.
+
+Persistance : une ligne JSON par ticket (chemin relatif, taille, mtime,
+empreinte) dans TICKET_HASH_INDEX_PATH. Au démarrage, seuls les fichiers
+nouveaux ou modifiés sont hachés, en arrière-plan : l'index est utilisable
+pendant la synchronisation (les tickets pas encore hachés ne sont simplement
+pas encore détectés).
+
+Configuration (variables d'environnement) :
+- OCR_DUPLICATE_CHECK : "0" pour désactiver la détection
+- OCR_DUPLICATE_MAX_DISTANCE : distance de Hamming maximale, sur 256 bits,
+  pour considérer deux tickets comme doublons (défaut 10)
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional, Tuple, Union
+
+from pydantic import BaseModel
+
+from backend.config.paths import SORTED_DIR, TICKET_HASH_INDEX_PATH
+from ..core.perceptual_hash import HashIndex, fingerprint
+
+logger = logging.getLogger(__name__)
+
+ENV_CHECK = "OCR_DUPLICATE_CHECK"
+ENV_MAX_DISTANCE = "OCR_DUPLICATE_MAX_DISTANCE"
+DEFAULT_MAX_DISTANCE = 10
+
+SUPPORTED_IMAGES = {".jpg", ".jpeg", ".png", ".bmp", ".tiff", ".webp"}
+
+
+def _entry_line(rel: str, size: int, mtime: int, value: Optional[int]) -> str:
+    entry = {"path": rel, "size": size, "mtime": mtime,
+             "hash": None if value is None else format(value, "x")}
+    return json.dumps(entry) + "\n"
+
+
+class DuplicateMatch(BaseModel):
+    path: str
+    distance: int
+
+
+class TicketIndex:
+    """Empreintes des tickets archivés, synchronisées avec le dossier d'archive."""
+
+    def __init__(
+        self,
+        archive_dir: Union[str, Path] = SORTED_DIR,
+        index_path: Union[str, Path] = TICKET_HASH_INDEX_PATH,
+        max_distance: int = DEFAULT_MAX_DISTANCE,
+    ):
+        self.archive_dir = Path(archive_dir)
+        self.index_path = Path(index_path)
+        self.max_distance = max_distance
+        self.ready = threading.Event()
+        self._index = HashIndex()
+        # chemin relatif -> (taille, mtime_ns, empreinte) des fichiers indexés
+        self._files: Dict[str, Tuple[int, int, Optional[int]]] = {}
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def _relative(self, path: Union[str, Path]) -> str:
+        path = Path(path)
+        try:
+            return path.resolve().relative_to(self.archive_dir.resolve()).as_posix()
+        except ValueError:
+            return str(path.resolve())
+
+    def _record(self, rel: str, size: int, mtime: int, value: Optional[int], persist: bool) -> None:
+        with self._lock:
+            if rel in self._files:
+                return
+            self._files[rel] = (size, mtime, value)
+            if value is not None:
+                self._index.add(value, rel)
+            if persist:
+                with open(self.index_path, "a", encoding="utf-8") as f:
+                    f.write(_entry_line(rel, size, mtime, value))
+
+    def _load(self) -> Dict[str, dict]:
+        entries: Dict[str, dict] = {}
+        if not self.index_path.exists():
+            return entries
+        with open(self.index_path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                    entries[entry["path"]] = entry
+                except (ValueError, KeyError):
+                    continue  # ligne tronquée par un arrêt brutal
+        return entries
+
+    def sync(self) -> dict:
+        """
+        Recharge l'index persistant, hache les tickets nouveaux ou modifiés
+        et oublie ceux qui ont disparu de l'archive.
+        """
+        t0 = time.perf_counter()
+        known = self._load()
+        todo = []
+        for path in self.archive_dir.rglob("*"):
+            if path.suffix.lower() not in SUPPORTED_IMAGES or not path.is_file():
+                continue
+            stat = path.stat()
+            rel = path.relative_to(self.archive_dir).as_posix()
+            entry = known.pop(rel, None)
+            if entry and (entry["size"], entry["mtime"]) == (stat.st_size, stat.st_mtime_ns):
+                value = int(entry["hash"], 16) if entry["hash"] else None
+                self._record(rel, stat.st_size, stat.st_mtime_ns, value, persist=False)
+            else:
+                todo.append((path, rel, stat))
+
+        if known or todo:
+            # Compaction : entrées disparues ou périmées retirées du fichier
+            self._rewrite()
+        for path, rel, stat in todo:
+            try:
+                value = fingerprint(path)
+            except ValueError as e:
+                logger.warning(f"[Doublons] {rel}: {e}")
+                value = None
+            self._record(rel, stat.st_size, stat.st_mtime_ns, value, persist=True)
+
+        self.ready.set()
+        stats = {"tickets": len(self._files), "hashed": len(todo), "removed": len(known),
+                 "seconds": round(time.perf_counter() - t0, 2)}
+        logger.info(f"[Doublons] Index synchronisé: {stats}")
+        return stats
+
+    def _rewrite(self) -> None:
+        self.index_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.index_path.with_suffix(".tmp")
+        with self._lock:
+            with open(tmp, "w", encoding="utf-8") as f:
+                f.writelines(_entry_line(rel, *entry) for rel, entry in self._files.items())
+            os.replace(tmp, self.index_path)
+
+    def start(self) -> None:
+        """Synchronisation en arrière-plan (premier démarrage : archive entière à hacher)."""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self.sync, name="ticket-index", daemon=True)
+            self._thread.start()
+
+    def check(self, image) -> Tuple[Optional[int], Optional[DuplicateMatch]]:
+        """
+        Empreinte du ticket (None si illisible ou trop uniforme) et ticket
+        archivé le plus proche s'il est à moins de `max_distance`.
+        """
+        try:
+            value = fingerprint(image)
+        except ValueError:
+            return None, None  # l'OCR remontera l'erreur
+        if value is None:
+            return None, None
+        with self._lock:
+            hits = self._index.search(value, self.max_distance)
+        for rel, distance in hits:
+            path = self.archive_dir / rel
+            if path.exists():  # supprimé depuis : oublié à la prochaine synchronisation
+                return value, DuplicateMatch(path=str(path), distance=distance)
+        return value, None
+
+    def add(self, path: Union[str, Path], value: Optional[int] = None) -> None:
+        """Indexe un ticket qui vient d'être archivé (empreinte de `check` réutilisée)."""
+        path = Path(path)
+        stat = path.stat()
+        if value is None:
+            value = fingerprint(path)
+        self._record(self._relative(path), stat.st_size, stat.st_mtime_ns, value, persist=True)
+
+
+_index: Optional[TicketIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_ticket_index() -> Optional[TicketIndex]:
+    """Index partagé (synchronisation lancée au premier appel), None si désactivé."""
+    global _index
+    if os.getenv(ENV_CHECK, "1").strip().lower() in ("0", "off", "false"):
+        return None
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                max_distance = os.getenv(ENV_MAX_DISTANCE, "").strip()
+                _index = TicketIndex(
+                    max_distance=int(max_distance) if max_distance.isdigit() else DEFAULT_MAX_DISTANCE
+                )
+                _index.start()
+    return _index
@@ -0,0 +1,569 @@
+"""
+Pool de workers OCR persistant, partagé entre les lots.
+
+Avant : chaque appel à `process_batch_tickets` créait un `ProcessPoolExecutor`,
+et chaque worker reconstruisait un `OCRService` complet (modèles ONNX RapidOCR,
+patterns YAML, prompt Groq, warm-up) avant de traiter son premier ticket.
+
+Ici le pool est créé une fois au démarrage de l'API :
+- l'initializer construit l'`OCRService` du worker (une seule fois par processus) ;
+- des tâches de chauffe sont soumises dès `start()` pour que tous les workers
+  soient prêts avant le premier lot ;
+- les workers sont recyclés pour borner la croissance mémoire : après
+  `max_tasks_per_child × max_workers` tickets, la file du pool est retenue le
+  temps que l'ancienne génération termine ses tickets, puis une nouvelle
+  génération (chauffée) la remplace ;
+- `health()` expose l'état du pool (workers vivants, tâches en cours, file d'attente).
+
+Configuration (variables d'environnement) :
+- OCR_POOL_WORKERS : nombre de workers (0 = pool désactivé, défaut = get_optimal_workers)
+- OCR_POOL_MAX_TASKS_PER_CHILD : tickets traités avant recyclage d'un worker (défaut 100)
+- OCR_POOL_START_METHOD : auto (défaut), spawn ou forkserver
+
+Dimensionnement : workers × threads ONNX viennent du planificateur de
+ressources (core/resource_planner.py), qui répartit les cœurs, épingle
+optionnellement chaque worker (OCR_PIN_WORKERS=1) et ajuste le plan au débit
+mesuré ; un nouveau plan s'applique à la génération de workers suivante.
+Un `max_workers` explicite fige le nombre de workers. Un seul pilote du
+nombre de workers : dès que l'autoscaler le prend en main (`resize`), le
+planificateur n'y touche plus.
+
+Admission : les tickets passent par une file du pool, qui n'en confie pas plus
+de `max_workers` à la fois à l'exécuteur. Celui-ci est dimensionné à la borne
+haute (un worker par cœur) et ne lance ses workers qu'à la demande : un
+changement de taille s'applique aussitôt. Les workers en trop après un retrait
+(ou le rééquilibrage des threads ONNX) ne sont libérés qu'avec une nouvelle
+génération, créée quand le pool est inactif. Jamais deux générations chargées
+en même temps.
+
+Le classifieur local (merchant_classifier.py) est entraîné une fois dans le
+processus principal, en arrière-plan : `start()` n'attend pas l'entraînement.
+Son état sérialisé est mis en cache et transmis à chaque génération de
+workers, qui ne relisent pas tout l'historique ; la génération créée avant la
+fin de l'entraînement est remplacée dès que le pool est inactif.
+
+Mode forkserver (POSIX) : les modèles sont chargés une fois dans le processus
+forkserver (cf. ocr_preload.py) et partagés en copy-on-write par les workers,
+ce qui réduit la RAM par worker. `auto` le choisit dès qu'il est disponible,
+sinon spawn (Windows).
+"""
+
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import CancelledError, Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+from typing import Optional
+
+from ..core.extraction_cache import get_extraction_cache
+from .merchant_classifier import get_merchant_classifier
+from .merchant_rules import get_merchant_rules
+from ..core.hardware_utils import get_optimal_workers
+from ..core.resource_planner import get_resource_planner, pin_current_process, split_cpu_sets
+
+logger = logging.getLogger(__name__)
+
+ENV_WORKERS = "OCR_POOL_WORKERS"
+ENV_MAX_TASKS_PER_CHILD = "OCR_POOL_MAX_TASKS_PER_CHILD"
+ENV_START_METHOD = "OCR_POOL_START_METHOD"
+
+DEFAULT_MAX_TASKS_PER_CHILD = 100
+# NB: le recyclage est fait par génération de pool et non via
+# ProcessPoolExecutor(max_tasks_per_child=...) : absent en 3.10 et sujet à un
+# blocage en 3.11 quand un worker recyclé doit être remplacé.
+DEFAULT_START_METHOD = "auto"
+
+LATENCY_WINDOW = 100
+
+PRELOAD_MODULE = "backend.domains.ocr.services.ocr_preload"
+
+
+def resolve_start_method(method: Optional[str] = None) -> str:
+    """auto → forkserver si la plateforme le permet, sinon spawn."""
+    method = (method or os.getenv(ENV_START_METHOD, "") or DEFAULT_START_METHOD).strip().lower()
+    available = multiprocessing.get_all_start_methods()
+    if method == "auto":
+        return "forkserver" if "forkserver" in available else "spawn"
+    if method not in available:
+        logger.warning(f"[OCR pool] Mode {method!r} indisponible, repli sur spawn")
+        return "spawn"
+    return method
+
+
+def _init_worker(
+    intra_op_threads: Optional[int] = None,
+    cpu_sets: Optional[list[list[int]]] = None,
+    slot=None,
+    classifier_state: Optional[bytes] = None,
+) -> None:
+    """
+    Initializer : épingle le worker sur son jeu de cœurs (si demandé) puis
+    charge l'OCRService (modèles + warm-up) une fois par processus.
+    `classifier_state` : classifieur local entraîné par le processus principal.
+    """
+    if cpu_sets and slot is not None:
+        with slot.get_lock():
+            idx = slot.value
+            slot.value += 1
+        pin_current_process(cpu_sets[idx % len(cpu_sets)])
+
+    from .ocr_service import get_ocr_service
+
+    get_ocr_service(intra_op_num_threads=intra_op_threads)
+
+    # Connexion au cache d'extraction ouverte ici plutôt qu'au premier ticket
+    cache = get_extraction_cache()
+    if cache is not None:
+        try:
+            cache.connect()
+        except Exception as e:
+            logger.warning(f"[OCR Pool] Cache d'extraction indisponible: {e}")
+
+    # Règles compilées et classifieur local prêts avant le premier ticket du worker
+    rules = get_merchant_rules()
+    if rules is not None:
+        rules.reload_if_changed()
+    classifier = get_merchant_classifier()
+    if classifier is not None and classifier_state is not None:
+        classifier.load_state(classifier_state)
+
+
+def _warm_worker() -> int:
+    """Tâche de chauffe : force le démarrage (et donc l'initializer) d'un worker."""
+    return os.getpid()
+
+
+def _int_from_env(name: str, default: Optional[int]) -> Optional[int]:
+    value = os.getenv(name, "").strip()
+    if not value:
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        logger.warning(f"{name} invalide ({value!r}), valeur par défaut utilisée")
+        return default
+
+
+class OCRWorkerPool:
+    """ProcessPoolExecutor longue durée avec workers pré-chauffés et statistiques."""
+
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        max_tasks_per_child: Optional[int] = None,
+        start_method: Optional[str] = None,
+    ):
+        self.start_method = resolve_start_method(start_method)
+        self.planner = get_resource_planner()
+        # Plan ajusté au débit mesuré, sauf si le nombre de workers est imposé
+        self.auto_plan = max_workers is None
+        self._workers_limit = max_workers or get_optimal_workers(
+            len(self.planner.cores), shared_models=self.start_method == "forkserver"
+        )
+        self.max_workers = self._workers_limit
+        # Forkserver : sessions préchargées mono-thread (threads ORT perdus au fork)
+        self._max_intra = 1 if self.start_method == "forkserver" else None
+        self.intra_op_threads = 1
+        self.cpu_sets: list[list[int]] = []
+        self._apply_plan()
+        self.max_tasks_per_child = max_tasks_per_child or DEFAULT_MAX_TASKS_PER_CHILD
+
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._started_at: Optional[float] = None
+        self._in_flight = 0
+        # File du pool : tickets soumis pas encore confiés à l'exécuteur
+        self._backlog: deque[tuple[Future, tuple]] = deque()
+        # Tickets confiés à l'exécuteur et non terminés (au plus max_workers)
+        self._running = 0
+        # Taille de l'exécuteur et nombre de workers admis depuis sa création
+        self._capacity = 0
+        self._generation_peak = 0
+        # Nouvelle génération (taille, classifieur) à créer dès que le pool est inactif
+        self._resize_pending = False
+        # Classifieur local sérialisé, réutilisé par chaque génération
+        self._classifier_state: Optional[bytes] = None
+        self._classifier_thread: Optional[threading.Thread] = None
+        self._completed = 0
+        self._failed = 0
+        self._restarts = 0
+        self._recycles = 0
+        self._generation_tasks = 0
+        self._task_seconds = 0.0
+        # Durées des derniers tickets (autoscaler)
+        self._latencies: deque[float] = deque(maxlen=LATENCY_WINDOW)
+
+    # ── Plan de ressources ────────────────────────────────────────────────
+
+    def _apply_plan(self) -> None:
+        """Fixe workers / threads ONNX / jeux de cœurs pour la prochaine génération."""
+        if self.auto_plan:
+            plan = self.planner.plan("process", self._workers_limit, self._max_intra)
+            self.max_workers = plan["workers"]
+            self.intra_op_threads = plan["intra_op_threads"]
+            self.cpu_sets = plan["cpu_sets"]
+        else:
+            self.max_workers = self._workers_limit
+            self.intra_op_threads = self._max_intra or max(1, len(self.planner.cores) // self.max_workers)
+            self.cpu_sets = (
+                split_cpu_sets(self.planner.cores, self.max_workers, self.intra_op_threads)
+                if self.planner.pin_workers
+                else []
+            )
+
+    def _replan_if_needed(self) -> None:
+        """Le planificateur a changé de configuration : nouvelle génération dès que le pool est inactif."""
+        if not self.auto_plan:
+            return
+        plan = self.planner.plan("process", self._workers_limit, self._max_intra)
+        if (plan["workers"], plan["intra_op_threads"]) == (self.max_workers, self.intra_op_threads):
+            return
+        with self._lock:
+            self._resize_pending = True
+        self._recycle_if_needed()
+
+    def resize(self, workers: int) -> None:
+        """
+        Fixe le nombre de workers (autoscaler) ; le planificateur n'y touche plus.
+
+        Dans la capacité de l'exécuteur, la nouvelle limite s'applique
+        aussitôt à l'admission des tickets (les workers sont lancés à la
+        demande). Libérer les workers en trop, rééquilibrer les threads ONNX
+        ou dépasser la capacité demande une nouvelle génération, créée quand
+        le pool est inactif.
+        """
+        workers = max(1, workers)
+        with self._lock:
+            self.auto_plan = False
+            self._workers_limit = workers
+            if self._executor is None:
+                self._apply_plan()
+                return
+            if workers <= self._capacity:
+                self.max_workers = workers
+                self._generation_peak = max(self._generation_peak, workers)
+            intra = self._max_intra or max(1, len(self.planner.cores) // workers)
+            # Retour à la taille de la génération en cours : plus rien à appliquer
+            self._resize_pending = (workers, intra) != (self._generation_peak, self.intra_op_threads)
+        self._recycle_if_needed()
+        self._dispatch()
+
+    @property
+    def resize_pending(self) -> bool:
+        return self._resize_pending
+
+    def apply_pending_resize(self) -> None:
+        """Applique une taille en attente si le pool est inactif (appelé périodiquement)."""
+        self._recycle_if_needed()
+        self._dispatch()
+
+    # ── Classifieur local ─────────────────────────────────────────────────
+
+    def _export_classifier(self) -> None:
+        """Entraîne / met à jour le classifieur du processus principal et met son état en cache."""
+        classifier = get_merchant_classifier()
+        if classifier is None:
+            return
+        try:
+            classifier.refresh_if_due()  # entraînement complet au premier appel
+            state = classifier.export_state()
+        except Exception as e:
+            logger.warning(f"[OCR pool] Classifieur local non transmis aux workers: {e}")
+            return
+        if state is None:
+            return
+        with self._lock:
+            first = self._classifier_state is None
+            self._classifier_state = state
+            if first and self._executor is not None:
+                # Génération démarrée sans le classifieur : remplacée dès que le pool est inactif
+                self._resize_pending = True
+        if first:
+            self._recycle_if_needed()
+
+    def _refresh_classifier_state(self) -> None:
+        """Exporte le classifieur en arrière-plan (un seul export à la fois)."""
+        with self._lock:
+            if self._classifier_thread is not None and self._classifier_thread.is_alive():
+                return
+            self._classifier_thread = threading.Thread(
+                target=self._export_classifier, name="ocr-pool-classifier", daemon=True
+            )
+            self._classifier_thread.start()
+
+    # ── Cycle de vie ──────────────────────────────────────────────────────
+
+    def _capacity_bound(self) -> int:
+        """Taille de l'exécuteur : un worker par cœur (lancés à la demande)."""
+        return max(self.max_workers, len(self.planner.cores))
+
+    def _new_generation(self) -> ProcessPoolExecutor:
+        """Exécuteur neuf et compteurs de génération remis à zéro (verrou tenu)."""
+        executor = self._create_executor()
+        self._capacity = self._capacity_bound()
+        self._generation_peak = self.max_workers
+        self._generation_tasks = 0
+        self._resize_pending = False
+        return executor
+
+    def _create_executor(self) -> ProcessPoolExecutor:
+        context = multiprocessing.get_context(self.start_method)
+        if self.start_method == "forkserver":
+            # Pris en compte au démarrage du forkserver (premier pool créé)
+            context.set_forkserver_preload([PRELOAD_MODULE])
+        self._apply_plan()
+        return ProcessPoolExecutor(
+            max_workers=self._capacity_bound(),
+            mp_context=context,
+            initializer=_init_worker,
+            initargs=(self.intra_op_threads, self.cpu_sets, context.Value("i", 0), self._classifier_state),
+        )
+
+    def start(self, warm: bool = True) -> None:
+        """Crée le pool (non bloquant). `warm` lance le chargement des modèles dans chaque worker."""
+        with self._lock:
+            if self._executor is not None:
+                return
+            self._executor = self._new_generation()
+            self._started_at = time.time()
+        self._refresh_classifier_state()
+        logger.info(
+            f"[OCR pool] Démarré: {self.max_workers} workers × {self.intra_op_threads} threads ONNX "
+            f"({self.start_method}, recyclage après {self.max_tasks_per_child} tâches)"
+        )
+        if warm:
+            self.warm()
+
+    def warm(self) -> None:
+        """Soumet une tâche de chauffe par worker (sans attendre la fin)."""
+        executor = self._executor
+        if executor is None:
+            return
+        for _ in range(self.max_workers):
+            executor.submit(_warm_worker)
+
+    def stop(self, wait: bool = True) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+            backlog = list(self._backlog)
+            self._backlog.clear()
+        for future, _ in backlog:
+            future.cancel()
+        if executor is not None:
+            executor.shutdown(wait=wait, cancel_futures=True)
+            logger.info("[OCR pool] Arrêté")
+
+    def _restart(self, broken: ProcessPoolExecutor) -> None:
+        """Remplace un pool cassé (worker tué, OOM...) par un pool neuf."""
+        with self._lock:
+            if self._executor is not broken:
+                return  # déjà remplacé par un autre thread
+            self._executor = self._new_generation()
+            self._restarts += 1
+        broken.shutdown(wait=False, cancel_futures=True)
+        logger.warning("[OCR pool] Pool cassé, redémarré")
+        self.warm()
+        self._refresh_classifier_state()
+
+    def _recycle_if_needed(self, force: bool = False) -> None:
+        """
+        Nouvelle génération de workers quand l'ancienne a assez servi, quand
+        une nouvelle taille attend un pool inactif, ou si `force`. Jamais tant
+        que l'ancienne a des tickets en cours : `_dispatch` retient la file.
+        """
+        with self._lock:
+            if self._executor is None or self._running:
+                return
+            resize = self._resize_pending and self._in_flight == 0
+            if not (force or self._worn() or resize):
+                return
+            old, self._executor = self._executor, self._new_generation()
+            self._recycles += 1
+        old.shutdown(wait=False)
+        logger.info(f"[OCR pool] Workers recyclés (génération {self._recycles + 1})")
+        self.warm()
+        # État exporté pour la génération suivante (celle-ci a reçu le cache)
+        self._refresh_classifier_state()
+
+    @property
+    def running(self) -> bool:
+        return self._executor is not None
+
+    def _worn(self) -> bool:
+        return self._generation_tasks >= self.max_tasks_per_child * self.max_workers
+
+    # ── Soumission ────────────────────────────────────────────────────────
+
+    def submit_ticket(self, idx: int, path, categorize: bool = True) -> Future:
+        """Soumet un ticket ; le résultat a la forme de `_process_ticket_worker`."""
+        if self._executor is None:
+            raise RuntimeError("Pool OCR non démarré")
+        future: Future = Future()
+        future.add_done_callback(self._on_done)
+        with self._lock:
+            self._in_flight += 1
+            self._backlog.append((future, (idx, path, categorize)))
+        self._dispatch()
+        return future
+
+    def _dispatch(self) -> None:
+        """Confie les tickets de la file à l'exécuteur, au plus `max_workers` à la fois."""
+        from .ocr_service import _process_ticket_worker
+
+        while True:
+            self._recycle_if_needed()
+            with self._lock:
+                executor = self._executor
+                if executor is None or not self._backlog or self._running >= self.max_workers:
+                    return
+                if self._worn():
+                    return  # génération usée : remplacée dès son dernier ticket terminé
+                future, args = self._backlog.popleft()
+                if not future.set_running_or_notify_cancel():
+                    continue  # annulé dans la file
+                self._running += 1
+                self._generation_tasks += 1
+            try:
+                try:
+                    task = executor.submit(_process_ticket_worker, args)
+                except BrokenProcessPool:
+                    self._restart(executor)
+                    executor = self._executor
+                    task = executor.submit(_process_ticket_worker, args)
+            except Exception as e:
+                with self._lock:
+                    self._running -= 1
+                future.set_exception(e)
+                continue
+            task.add_done_callback(partial(self._relay, future, executor))
+
+    def _relay(self, future: Future, executor: ProcessPoolExecutor, task: Future) -> None:
+        """Fin d'un ticket dans l'exécuteur : résultat transmis, place libérée dans la file."""
+        with self._lock:
+            self._running -= 1
+        error = CancelledError("Pool OCR arrêté") if task.cancelled() else task.exception()
+        if error is None:
+            future.set_result(task.result())
+        else:
+            future.set_exception(error)
+        if isinstance(error, BrokenProcessPool):
+            # Génération qui a reçu le ticket (pas forcément la génération courante)
+            self._restart(executor)
+        self._dispatch()
+
+    def _on_done(self, future: Future) -> None:
+        with self._lock:
+            self._in_flight -= 1
+            if future.cancelled() or future.exception() is not None:
+                self._failed += 1
+                return
+            _, _, _, err, elapsed, _ = future.result()
+            if err:
+                self._failed += 1
+            else:
+                self._completed += 1
+            self._task_seconds += elapsed
+            self._latencies.append(elapsed)
+
+    def recent_latencies(self) -> list[float]:
+        """Durées (s) des derniers tickets traités, du plus ancien au plus récent."""
+        with self._lock:
+            return list(self._latencies)
+
+    def process_batch(self, image_paths: list, categorize: bool = True) -> list[tuple]:
+        """
+        Traite un lot (chemins ou couples (nom, octets)) ; même format de sortie que
+        `OCRService.process_batch_tickets`, plus le texte OCR si `categorize=False`.
+        """
+        from .ocr_service import ticket_name
+
+        workers, intra = self.max_workers, self.intra_op_threads
+        t0 = time.time()
+        futures = [self.submit_ticket(i, p, categorize) for i, p in enumerate(image_paths)]
+        results = []
+        for path, future in zip(image_paths, futures):
+            try:
+                _, fname, tx, err, elapsed, text = future.result()
+                row = (fname, tx, err, elapsed)
+            except (BrokenProcessPool, CancelledError) as e:
+                # Pool cassé : redémarré par `_relay`
+                row, text = (ticket_name(path), None, f"Worker OCR interrompu: {e}", 0.0), None
+            results.append(row if categorize else (*row, text))
+        if self.auto_plan:
+            self.planner.record("process", workers, intra, len(image_paths), time.time() - t0)
+            self._replan_if_needed()
+        return results
+
+    # ── Santé ─────────────────────────────────────────────────────────────
+
+    def health(self) -> dict:
+        executor = self._executor
+        processes = getattr(executor, "_processes", None) or {}
+        pids = sorted(pid for pid, proc in dict(processes).items() if proc.is_alive())
+        with self._lock:
+            in_flight = self._in_flight
+            # Tickets qu'aucun worker n'a encore pris
+            queue_depth = len(self._backlog)
+            done = self._completed + self._failed
+            return {
+                "status": "running" if executor is not None else "stopped",
+                "start_method": self.start_method,
+                "max_workers": self.max_workers,
+                "intra_op_threads": self.intra_op_threads,
+                "cpu_sets": self.cpu_sets,
+                "max_tasks_per_child": self.max_tasks_per_child,
+                "workers_alive": len(pids),
+                "worker_pids": pids,
+                "in_flight": in_flight,
+                "queue_depth": queue_depth,
+                "completed": self._completed,
+                "failed": self._failed,
+                "restarts": self._restarts,
+                "recycles": self._recycles,
+                "avg_task_seconds": round(self._task_seconds / done, 3) if done else None,
+                "uptime_seconds": round(time.time() - self._started_at, 1) if executor and self._started_at else None,
+            }
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Singleton (démarré / arrêté par le lifespan de l'API)
+# ─────────────────────────────────────────────────────────────────────────────
+
+_pool: Optional[OCRWorkerPool] = None
+_pool_lock = threading.Lock()
+
+
+def start_worker_pool(**kwargs) -> Optional[OCRWorkerPool]:
+    """Démarre le pool partagé (no-op si déjà démarré ou si OCR_POOL_WORKERS=0)."""
+    global _pool
+    workers = kwargs.pop("max_workers", None) or _int_from_env(ENV_WORKERS, None)
+    if workers == 0:
+        logger.info("[OCR pool] Désactivé (OCR_POOL_WORKERS=0)")
+        return None
+    kwargs.setdefault(
+        "max_tasks_per_child",
+        _int_from_env(ENV_MAX_TASKS_PER_CHILD, DEFAULT_MAX_TASKS_PER_CHILD),
+    )
+    with _pool_lock:
+        if _pool is None:
+            _pool = OCRWorkerPool(max_workers=workers, **kwargs)
+        _pool.start()
+        return _pool
+
+
+def get_worker_pool() -> Optional[OCRWorkerPool]:
+    """Pool partagé s'il est démarré, sinon None."""
+    pool = _pool
+    return pool if pool is not None and pool.running else None
+
+
+def stop_worker_pool(wait: bool = True) -> None:
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.stop(wait=wait)
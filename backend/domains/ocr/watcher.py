@@ -1,5 +1,9 @@
 """
-OCR Watcher - Surveillance du dossier TO_SCAN_DIR pour traitement automatique.
+OCR Watcher - Surveillance des dossiers TO_SCAN_DIR (tickets) et
+REVENUS_A_TRAITER (fiches de paie PDF) pour traitement automatique.
+
+Les fichiers déposés sont signalés par événements et traités une fois stables
+(services/folder_watcher.py), scrutation périodique en repli.
 """
 
 import logging
@@ -7,12 +11,23 @@
 import shutil
 import threading
 import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
 from pathlib import Path
-from typing import Optional
-
-from backend.config.paths import TO_SCAN_DIR, SORTED_DIR, REVENUS_TRAITES
+from typing import Dict, Iterator, List, Optional
+
+from backend.config.paths import (
+    DUPLICATES_DIR,
+    REVENUS_A_TRAITER,
+    REVENUS_TRAITES,
+    SORTED_DIR,
+    TO_SCAN_DIR,
+)
 from backend.domains.transactions.repository import transaction_repository
+from backend.domains.ocr.core.perceptual_hash import HashIndex
+from backend.domains.ocr.services.folder_watcher import FolderWatcher
 from backend.domains.ocr.services.ocr_service import get_ocr_service
+from backend.domains.ocr.services.ticket_index import DuplicateMatch, get_ticket_index
+from backend.domains.ocr.services.worker_pool import get_worker_pool
 from backend.domains.attachments.api import archive_file as _archive_file
 
 logger = logging.getLogger(__name__)
@@ -20,9 +35,24 @@
 SUPPORTED_IMAGES = {".jpg", ".jpeg", ".png", ".bmp", ".tiff", ".webp"}
 SUPPORTED_PDFS = {".pdf"}
 
-_processing = False
-_watcher_thread: Optional[threading.Thread] = None
-_stop_event = threading.Event()
+# Tickets d'un scan en cours d'OCR au plus (défaut : 2 par worker du pool)
+ENV_MAX_IN_FLIGHT = "OCR_WATCH_MAX_IN_FLIGHT"
+# Transactions insérées (et catégorisées par Groq) par lot
+ENV_INSERT_BATCH = "OCR_WATCH_INSERT_BATCH"
+DEFAULT_MAX_IN_FLIGHT = 8
+DEFAULT_INSERT_BATCH = 16
+
+_scan_lock = threading.Lock()
+_watcher: Optional[FolderWatcher] = None
+# Bilan du dernier scan (fichiers, erreurs, débit), cf. `_process_paths`
+last_scan_report: Optional[dict] = None
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return max(1, int(os.getenv(name, "")))
+    except ValueError:
+        return default
 
 
 def _is_valid_file(filename: str) -> Optional[str]:
@@ -35,6 +65,60 @@ def _is_valid_file(filename: str) -> Optional[str]:
     return None
 
 
+def _accepts(path: Path) -> bool:
+    """Fichier à traiter : PDF dans REVENUS_A_TRAITER, image ou PDF dans TO_SCAN_DIR."""
+    if path.name.startswith((".", "~$")):  # fichiers cachés et temporaires d'éditeurs
+        return False
+    file_type = _is_valid_file(path.name)
+    if path.parent == REVENUS_A_TRAITER:
+        return file_type == "pdf"
+    return file_type is not None
+
+
+def _check_duplicate(
+    file_path: str, seen: Optional[HashIndex] = None
+) -> tuple[bool, Optional[int]]:
+    """
+    Quasi-doublon d'un ticket archivé, ou d'un ticket du même scan (`seen`) ?
+    Il est alors déplacé dans DUPLICATES_DIR sans OCR. Retourne aussi
+    l'empreinte, réutilisée à l'indexation.
+    """
+    index = get_ticket_index()
+    if index is None:
+        return False, None
+    fingerprint, match = index.check(file_path)
+    if match is None and seen is not None and fingerprint is not None:
+        hits = seen.search(fingerprint, index.max_distance)
+        if hits:
+            match = DuplicateMatch(path=hits[0][0], distance=hits[0][1])
+        else:
+            seen.add(fingerprint, file_path)
+    if match is None:
+        return False, fingerprint
+
+    target = DUPLICATES_DIR / Path(file_path).name
+    counter = 1
+    while target.exists():
+        target = DUPLICATES_DIR / f"{Path(file_path).stem}_{counter}{Path(file_path).suffix}"
+        counter += 1
+    shutil.move(file_path, target)
+    logger.warning(
+        f"Doublon probable de {Path(match.path).name} (distance {match.distance}), "
+        f"non traité: {target}"
+    )
+    return True, fingerprint
+
+
+def _index_archived(archived_path: Optional[str], fingerprint: Optional[int]) -> None:
+    index = get_ticket_index()
+    if index is None or not archived_path:
+        return
+    try:
+        index.add(archived_path, fingerprint)
+    except (OSError, ValueError) as e:
+        logger.warning(f"Indexation du ticket {archived_path} impossible: {e}")
+
+
 def _process_file(file_path: str) -> bool:
     """
     Traite un fichier (ticket ou PDF de revenu).
@@ -49,17 +133,18 @@ def _process_file(file_path: str) -> bool:
         ocr_service = get_ocr_service()
 
         if file_type == "image":
+            is_duplicate, fingerprint = _check_duplicate(file_path)
+            if is_duplicate:
+                return False
+
             tx = ocr_service.process_ticket(file_path)
 
             transaction_repository.add(tx)
 
-            _archive_file(
-                file_path,
-                category=tx.categorie or "Autre",
-                sub_category=tx.sous_categorie,
-                target_base_dir=SORTED_DIR,
-                is_ticket=True,
+            archived = _archive_file(
+                file_path, transaction=tx, target_base_dir=SORTED_DIR, is_ticket=True
             )
+            _index_archived(archived, fingerprint)
             logger.info(f"Ticket traité et archivé: {tx.categorie}/{tx.sous_categorie}")
             return True
 
@@ -101,11 +186,7 @@ def _process_file(file_path: str) -> bool:
             transaction_repository.add(tx)
 
             _archive_file(
-                file_path,
-                category="Salaire",
-                sub_category="Mensuel",
-                target_base_dir=REVENUS_TRAITES,
-                is_ticket=False,
+                file_path, transaction=tx, target_base_dir=REVENUS_TRAITES, is_ticket=False
             )
             logger.info(f"PDF de paie traité et archivé: {net}€")
             return True
@@ -115,113 +196,253 @@ def _process_file(file_path: str) -> bool:
         return False
 
 
-def _scan_directory() -> list:
-    """Scan le répertoire TO_SCAN_DIR et traite les fichiers. Retourne la liste des résultats."""
-    global _processing
-
-    if _processing:
-        return []
+def _ocr_stream(
+    images: List[Path], pool, categorize: bool, max_in_flight: int, report: dict
+) -> Iterator[tuple]:
+    """
+    OCR des tickets, au plus `max_in_flight` à la fois : (rang, chemin,
+    empreinte, tx, erreur, durée, texte) dans l'ordre de fin. Les doublons sont
+    écartés juste avant soumission (pendant que les workers travaillent).
 
-    results = []
-    _processing = True
+    Pool persistant : file bornée, un ticket soumis dès qu'un autre se
+    termine. Pool arrêté : lots successifs de `max_in_flight` tickets.
+    """
+    seen = HashIndex()
+    candidates = iter(enumerate(images))
+
+    def _next() -> Optional[tuple]:
+        for idx, path in candidates:
+            try:
+                is_duplicate, fingerprint = _check_duplicate(str(path), seen)
+            except OSError as e:
+                logger.error(f"Lecture de {path.name} impossible: {e}")
+                report["errors"] += 1
+                continue
+            if is_duplicate:
+                report["duplicates"] += 1
+                continue
+            return idx, path, fingerprint
+        return None
+
+    if pool is None:
+        report["mode"] = "batch"
+        ocr = get_ocr_service()
+        while True:
+            chunk = []
+            while len(chunk) < max_in_flight:
+                item = _next()
+                if item is None:
+                    break
+                chunk.append(item)
+            if not chunk:
+                return
+            rows = ocr.process_batch_tickets([str(path) for _, path, _ in chunk])
+            for (idx, path, fingerprint), (_, tx, err, elapsed) in zip(chunk, rows):
+                yield idx, path, fingerprint, tx, err, elapsed, None
+
+    report["mode"] = "pool"
+    in_flight: Dict[Future, tuple] = {}
+
+    def _fill() -> None:
+        while len(in_flight) < max_in_flight:
+            item = _next()
+            if item is None:
+                return
+            in_flight[pool.submit_ticket(item[0], str(item[1]), categorize)] = item
+
+    _fill()
+    while in_flight:
+        done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+        for future in done:
+            idx, path, fingerprint = in_flight.pop(future)
+            try:
+                _, _, tx, err, elapsed, text = future.result()
+            except Exception as e:
+                tx, err, elapsed, text = None, f"Worker OCR interrompu: {e}", 0.0, None
+            yield idx, path, fingerprint, tx, err, elapsed, text
+        _fill()
+
+
+def _archive_ticket(path: Path, tx, fingerprint: Optional[int]) -> None:
+    archived = _archive_file(str(path), transaction=tx, target_base_dir=SORTED_DIR, is_ticket=True)
+    _index_archived(archived, fingerprint)
     try:
-        if not os.path.exists(TO_SCAN_DIR):
-            os.makedirs(TO_SCAN_DIR, exist_ok=True)
-            return []
-
-        files = [
-            f
-            for f in os.listdir(TO_SCAN_DIR)
-            if os.path.isfile(os.path.join(TO_SCAN_DIR, f))
-        ]
-
-        for filename in files:
-            file_path = os.path.join(TO_SCAN_DIR, filename)
-
-            if _is_valid_file(filename):
-                logger.info(f"Traitement du fichier: {filename}")
-
-                try:
-                    from backend.domains.ocr.models_api import OCRScanResponse
-                    from backend.domains.transactions.model import Transaction
-
-                    if file_type := _is_valid_file(filename):
-                        if file_type == "image":
-                            ocr_service = get_ocr_service()
-                            tx = ocr_service.process_ticket(file_path)
-                            transaction_repository.add(tx)
-
-                            _archive_file(
-                                file_path,
-                                category=tx.categorie or "Autre",
-                                sub_category=tx.sous_categorie,
-                                target_base_dir=SORTED_DIR,
-                                is_ticket=True,
-                            )
-                            results.append(
-                                OCRScanResponse(
-                                    transaction=tx, warnings=[], raw_ocr_text=""
-                                )
-                            )
-
-                            try:
-                                os.remove(file_path)
-                            except:
-                                pass
-                        elif file_type == "pdf":
-                            # For PDF, we just trigger the existing _process_file
-                            # but it's harder to get results back here.
-                            # For now, let's just use the legacy _process_file for PDFs
-                            if _process_file(file_path):
-                                os.remove(file_path)
-                except Exception as e:
-                    logger.error(f"Error in watcher processing {filename}: {e}")
+        os.remove(path)
+    except OSError:
+        pass
 
-    except Exception as e:
-        logger.error(f"Erreur scan directory: {e}")
-    finally:
-        _processing = False
 
-    return results
+def _process_tickets(images: List[Path], report: dict) -> List[tuple]:
+    """
+    Tickets en flux : OCR dans le pool (file bornée), catégorisation et
+    insertion par lots de `insert_batch` (une connexion, un commit, requêtes
+    Groq groupées), archivage dans un thread pendant l'OCR des suivants.
+    Retourne les couples (rang, transaction) des tickets traités.
+    """
+    ocr = get_ocr_service()
+    pool = get_worker_pool()
+    categorize = not ocr.batch_categorize
+    max_in_flight = _env_int(ENV_MAX_IN_FLIGHT, 2 * pool.max_workers if pool else DEFAULT_MAX_IN_FLIGHT)
+    insert_batch = _env_int(ENV_INSERT_BATCH, DEFAULT_INSERT_BATCH)
+    report["max_in_flight"] = max_in_flight
+
+    done: List[tuple] = []
+    batch: List[tuple] = []
+    archives: List[Future] = []
+
+    with ThreadPoolExecutor(max_workers=1, thread_name_prefix="ocr-archive") as archiver:
+
+        def _commit() -> None:
+            if not batch:
+                return
+            txs = [tx for _, _, _, tx, _ in batch]
+            if any(text is not None for *_, text in batch):
+                txs = ocr.categorize_transactions([(tx, text) for _, _, _, tx, text in batch])
+            ids = transaction_repository.add_many(txs)
+            for (idx, path, fingerprint, _, _), tx, tx_id in zip(batch, txs, ids):
+                if not tx_id:
+                    # Insertion refusée : ticket laissé dans le dossier de dépôt
+                    logger.error(f"Insertion impossible pour {path.name}, fichier conservé")
+                    report["errors"] += 1
+                    continue
+                report["inserted"] += 1
+                archives.append(archiver.submit(_archive_ticket, path, tx, fingerprint))
+                done.append((idx, tx))
+            batch.clear()
+
+        for idx, path, fingerprint, tx, err, elapsed, text in _ocr_stream(
+            images, pool, categorize, max_in_flight, report
+        ):
+            report["ocr_seconds"] += elapsed
+            if err or tx is None:
+                logger.error(f"Error in watcher processing {path.name}: {err}")
+                report["errors"] += 1
+                continue
+            batch.append((idx, path, fingerprint, tx, text))
+            if len(batch) >= insert_batch:
+                _commit()
+        _commit()
+
+    for future in archives:
+        if future.exception() is not None:
+            logger.error(f"Archivage impossible: {future.exception()}")
+    report["tickets"] += len(done)
+    return done
+
+
+def _process_paths(paths: List[Path]) -> list:
+    """
+    Traite les fichiers donnés (tickets en flux parallèle, PDF de revenus un
+    par un). Retourne les résultats des tickets ; bilan dans `last_scan_report`.
+    """
+    from backend.domains.ocr.models_api import OCRScanResponse
+
+    t0 = time.perf_counter()
+    report = {
+        "files": len(paths), "tickets": 0, "payslips": 0, "duplicates": 0, "errors": 0,
+        "inserted": 0, "ocr_seconds": 0.0, "mode": None, "max_in_flight": None,
+    }
+    images = [path for path in paths if _is_valid_file(path.name) == "image"]
+    done = []
+    if images:
+        try:
+            done = _process_tickets(images, report)
+        except Exception as e:
+            logger.error(f"Erreur du traitement des tickets: {e}", exc_info=True)
+            report["errors"] += 1
+
+    for path in paths:
+        if _is_valid_file(path.name) != "pdf":
+            continue
+        logger.info(f"Traitement du fichier: {path.name}")
+        try:
+            if _process_file(str(path)):
+                os.remove(path)
+                report["payslips"] += 1
+            else:
+                report["errors"] += 1
+        except Exception as e:
+            logger.error(f"Error in watcher processing {path.name}: {e}")
+            report["errors"] += 1
+
+    seconds = time.perf_counter() - t0
+    report["seconds"] = round(seconds, 3)
+    report["ocr_seconds"] = round(report["ocr_seconds"], 3)
+    processed = report["tickets"] + report["payslips"]
+    report["files_per_second"] = round(processed / seconds, 2) if processed and seconds else None
+    global last_scan_report
+    last_scan_report = report
+    if paths:
+        logger.info(f"[Watcher] Scan: {report}")
+    return [
+        OCRScanResponse(transaction=tx, warnings=[], raw_ocr_text="")
+        for _, tx in sorted(done, key=lambda row: row[0])
+    ]
+
+
+def _list_files() -> List[Path]:
+    files = []
+    for directory in (TO_SCAN_DIR, REVENUS_A_TRAITER):
+        directory.mkdir(parents=True, exist_ok=True)
+        files += sorted(
+            path for path in directory.iterdir() if path.is_file() and _accepts(path)
+        )
+    return files
 
 
-def _watcher_loop(interval: int = 60):
-    """Boucle de surveillance du répertoire."""
-    logger.info(f"Watcher démarré - Scan toutes les {interval}s")
+def _scan_directory() -> list:
+    """Scan TO_SCAN_DIR et REVENUS_A_TRAITER et traite les fichiers. Retourne la liste des résultats."""
+    if not _scan_lock.acquire(blocking=False):
+        return []
+    try:
+        return _process_paths(_list_files())
+    except Exception as e:
+        logger.error(f"Erreur scan directory: {e}")
+        return []
+    finally:
+        _scan_lock.release()
 
-    while not _stop_event.is_set():
-        _scan_directory()
-        _stop_event.wait(interval)
 
-    logger.info("Watcher arrêté")
+def _process_ready(paths: List[Path]) -> None:
+    """Fichiers signalés stables par le watcher (attend un scan manuel en cours)."""
+    with _scan_lock:
+        _process_paths([path for path in paths if path.exists()])
 
 
 def start_watcher(interval: int = 60):
-    """Démarre le watcher dans un thread de fond."""
-    global _watcher_thread, _stop_event
+    """
+    Démarre le watcher : événements du système de fichiers, sinon scrutation
+    toutes les `interval` secondes.
+    """
+    global _watcher
 
-    if _watcher_thread and _watcher_thread.is_alive():
+    if _watcher is not None and _watcher.status()["running"]:
         logger.warning("Watcher déjà en cours")
         return
 
-    _stop_event.clear()
-    _watcher_thread = threading.Thread(
-        target=_watcher_loop, args=(interval,), daemon=True
+    _watcher = FolderWatcher(
+        [TO_SCAN_DIR, REVENUS_A_TRAITER],
+        process=_process_ready,
+        accept=_accepts,
+        poll_interval=interval,
     )
-    _watcher_thread.start()
-    logger.info(f"Watcher démarré (interval: {interval}s)")
+    _watcher.start()
+    logger.info(f"Watcher démarré (mode: {_watcher.mode})")
 
 
 def stop_watcher():
     """Arrête le watcher."""
-    global _stop_event
-
-    _stop_event.set()
-    if _watcher_thread:
-        _watcher_thread.join(timeout=5)
+    if _watcher is not None:
+        _watcher.stop()
     logger.info("Watcher arrêté")
 
 
+def watcher_status() -> dict:
+    """État du watcher (mode, dossiers, fichiers en attente de stabilité, dernier scan)."""
+    status = _watcher.status() if _watcher is not None else {"running": False}
+    return {**status, "last_scan": last_scan_report}
+
+
 def trigger_scan() -> list:
     """Déclenche un scan manuel et retourne les résultats."""
     return _scan_directory()
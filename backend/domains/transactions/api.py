@@ -1,23 +1,96 @@
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
+from pydantic import TypeAdapter
 from typing import List, Optional
 import logging
+from datetime import date
 from backend.domains.transactions.model import Transaction
 from backend.domains.transactions.repository import TransactionRepository
+from backend.domains.transactions.duplicates import STATUT_IGNORE, duplicate_detector
+from backend.domains.transactions import export as tx_export
+from backend.shared.utils.json_response import model_json_response
+from .models_api import DuplicatePairResponse, DuplicateScanResponse
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api/transactions", tags=["transactions"])
 repo = TransactionRepository()
 
+TRANSACTION_LIST = TypeAdapter(List[Transaction])
+
 
 @router.get("/", response_model=List[Transaction])
 async def get_transactions():
     try:
-        return repo.get_all()
+        # Modèles déjà validés par le repository : sérialisation directe en bytes
+        return model_json_response(TRANSACTION_LIST, repo.get_all())
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/export")
+async def export_transactions(
+    format: str = "csv",
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    category: Optional[str] = None,
+    chunk_size: int = 1000,
+):
+    """Exporte les transactions filtrées en streaming (csv, ndjson ou parquet)."""
+    fmt = format.lower()
+    if fmt not in tx_export.EXPORT_FORMATS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Format non supporté. Acceptés: {', '.join(tx_export.EXPORT_FORMATS)}",
+        )
+    if fmt == "parquet" and not tx_export.PYARROW_AVAILABLE:
+        raise HTTPException(status_code=500, detail="pyarrow non installé: uv add pyarrow")
+
+    chunks = repo.iter_filtered_chunks(
+        start_date=start_date,
+        end_date=end_date,
+        category=category,
+        columns=tx_export.EXPORT_COLUMNS,
+        chunk_size=max(1, min(chunk_size, 10000)),
+    )
+    filename = f"transactions_{date.today().isoformat()}.{fmt}"
+    return StreamingResponse(
+        tx_export.iter_export(fmt, chunks),
+        media_type=tx_export.EXPORT_FORMATS[fmt],
+        headers={"Content-Disposition": f"attachment; filename={filename}"},
+    )
+
+
+@router.get("/duplicates", response_model=List[DuplicatePairResponse])
+async def get_duplicates():
+    """Liste les paires de transactions suspectées d'être des doublons."""
+    try:
+        return duplicate_detector.get_suspected()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/duplicates/scan", response_model=DuplicateScanResponse)
+async def scan_duplicates():
+    """Lance la détection de doublons sur tout l'historique."""
+    try:
+        created = duplicate_detector.scan_all()
+        return DuplicateScanResponse(
+            nouvelles_paires=created,
+            paires_suspectes=duplicate_detector.get_suspected(),
+        )
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.post("/duplicates/{pair_id}/ignore")
+async def ignore_duplicate(pair_id: int):
+    """Marque une paire comme faux positif (elle ne sera plus signalée)."""
+    if not duplicate_detector.set_status(pair_id, STATUT_IGNORE):
+        raise HTTPException(status_code=404, detail="Paire non trouvée")
+    return {"status": "success"}
+
+
 @router.post("/", response_model=int)
 async def add_transaction(transaction: Transaction, attachment: Optional[str] = None):
     try:
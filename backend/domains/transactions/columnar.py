@@ -0,0 +1,365 @@
+"""
+Snapshot colonnaire en mémoire de la table `transactions` (optionnel).
+
+Les calculs analytiques (répartition du dashboard, consommation des budgets,
+progression des objectifs, historique quotidien) relisent les lignes depuis
+SQLCipher puis parcourent des objets Python un par un. Ce module garde une
+copie colonnaire de la table :
+
+- `montant` (float64), `day` (jours depuis 1970-01-01, int32), `ids` (int64)
+- `type`, `categorie`, `sous_categorie` encodés par dictionnaire (int32, -1 = vide)
+
+Le snapshot est chargé une fois (une seule requête), puis tenu à jour par les
+chemins d'écriture de `TransactionRepository` (`upsert`/`remove`). Les écritures
+SQL brutes (échéances) appellent `invalidate()` : rechargement au prochain accès.
+
+Lecture : un masque n'est valable que pour l'état sur lequel il a été calculé
+(`remove` déplace des lignes, `load` remplace les colonnes). Les lectures
+prennent le verrou du snapshot ; un appelant qui combine `mask` et agrégats
+les enchaîne dans `with store.reading():`. Un masque périmé lève ValueError.
+
+Activation : variable d'environnement GESTIO_COLUMNAR_STORE=1. Désactivé, rien
+ne change (tout passe par SQL) et `get_store()` retourne None.
+"""
+
+import logging
+import os
+import threading
+from datetime import date
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from backend.shared.database import db_transaction
+
+logger = logging.getLogger(__name__)
+
+ENV_FLAG = "GESTIO_COLUMNAR_STORE"
+
+_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+_INITIAL_CAPACITY = 1024
+_NO_CODE = -1
+
+
+def is_enabled() -> bool:
+    """Le snapshot colonnaire est opt-in."""
+    return os.getenv(ENV_FLAG, "").strip().lower() in ("1", "true", "yes", "on")
+
+
+def to_day(value) -> int:
+    """date / 'YYYY-MM-DD[...]' → nombre de jours depuis l'epoch."""
+    if value is None:
+        raise ValueError("Date manquante")
+    if not isinstance(value, date):
+        value = date.fromisoformat(str(value)[:10])
+    return value.toordinal() - _EPOCH_ORDINAL
+
+
+def from_day(day: int) -> str:
+    """Nombre de jours depuis l'epoch → 'YYYY-MM-DD'."""
+    return date.fromordinal(int(day) + _EPOCH_ORDINAL).isoformat()
+
+
+class _Dictionary:
+    """Encodage par dictionnaire : chaîne ↔ code entier (ordre d'apparition)."""
+
+    def __init__(self):
+        self.values: List[str] = []
+        self.codes: Dict[str, int] = {}
+
+    def encode(self, value: Optional[str]) -> int:
+        if not value:
+            return _NO_CODE
+        code = self.codes.get(value)
+        if code is None:
+            code = len(self.values)
+            self.codes[value] = code
+            self.values.append(value)
+        return code
+
+    def lookup(self, value: str) -> int:
+        """Code existant, ou -2 (ne correspond à aucune ligne) si inconnu."""
+        return self.codes.get(value, -2)
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+
+class ColumnarTransactionStore:
+    """Colonnes NumPy + primitives vectorisées de filtre et de group-by."""
+
+    def __init__(self, db_path: Optional[str] = None):
+        self.db_path = db_path
+        self._lock = threading.RLock()
+        self._loaded = False
+        self._reset(_INITIAL_CAPACITY)
+
+    # ── Chargement / maintenance ──────────────────────────────────────────
+
+    def _reset(self, capacity: int) -> None:
+        self._n = 0
+        self._pos: Dict[int, int] = {}
+        self.types = _Dictionary()
+        self.categories = _Dictionary()
+        self.sous_categories = _Dictionary()
+        self.ids = np.empty(capacity, dtype=np.int64)
+        self.montant = np.empty(capacity, dtype=np.float64)
+        self.day = np.empty(capacity, dtype=np.int32)
+        self.type_code = np.empty(capacity, dtype=np.int32)
+        self.cat_code = np.empty(capacity, dtype=np.int32)
+        self.sub_code = np.empty(capacity, dtype=np.int32)
+
+    def load(self) -> None:
+        """(Re)charge le snapshot complet en une requête."""
+        with db_transaction(self.db_path) as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                "SELECT id, date, type, categorie, sous_categorie, montant FROM transactions"
+            )
+            rows = cursor.fetchall()
+
+        with self._lock:
+            self._reset(max(_INITIAL_CAPACITY, len(rows) * 2))
+            for row in rows:
+                self._append(row)
+            self._loaded = True
+        logger.info(f"Snapshot colonnaire chargé: {len(rows)} transactions")
+
+    def invalidate(self) -> None:
+        """Force un rechargement complet au prochain accès."""
+        with self._lock:
+            self._loaded = False
+
+    def ensure_loaded(self) -> None:
+        with self._lock:
+            if not self._loaded:
+                self.load()
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded
+
+    def __len__(self) -> int:
+        return self._n
+
+    def _grow(self) -> None:
+        capacity = max(_INITIAL_CAPACITY, len(self.ids) * 2)
+        for name in ("ids", "montant", "day", "type_code", "cat_code", "sub_code"):
+            old = getattr(self, name)
+            new = np.empty(capacity, dtype=old.dtype)
+            new[: self._n] = old[: self._n]
+            setattr(self, name, new)
+
+    def _write(self, i: int, row) -> None:
+        self.ids[i] = row["id"]
+        self.montant[i] = float(row["montant"] or 0.0)
+        self.day[i] = to_day(row["date"])
+        self.type_code[i] = self.types.encode(row["type"])
+        self.cat_code[i] = self.categories.encode(row["categorie"])
+        self.sub_code[i] = self.sous_categories.encode(row["sous_categorie"])
+
+    def _append(self, row) -> None:
+        if self._n == len(self.ids):
+            self._grow()
+        self._write(self._n, row)
+        self._pos[int(row["id"])] = self._n
+        self._n += 1
+
+    def upsert(self, row: dict) -> None:
+        """Insère ou remplace une transaction (dict avec id/date/type/categorie/...)."""
+        with self._lock:
+            if not self._loaded:
+                return
+            try:
+                i = self._pos.get(int(row["id"]))
+                if i is None:
+                    self._append(row)
+                else:
+                    self._write(i, row)
+            except (KeyError, TypeError, ValueError) as e:
+                logger.warning(f"Snapshot colonnaire invalidé (ligne inexploitable): {e}")
+                self._loaded = False
+
+    def remove(self, ids: Iterable[int]) -> None:
+        """Supprime des transactions (échange avec la dernière ligne, O(1) par id)."""
+        with self._lock:
+            if not self._loaded:
+                return
+            for tx_id in ids:
+                i = self._pos.pop(int(tx_id), None)
+                if i is None:
+                    continue
+                last = self._n - 1
+                if i != last:
+                    for col in (self.ids, self.montant, self.day, self.type_code, self.cat_code, self.sub_code):
+                        col[i] = col[last]
+                    self._pos[int(self.ids[i])] = i
+                self._n = last
+
+    # ── Primitives vectorisées ────────────────────────────────────────────
+
+    @contextmanager
+    def reading(self) -> Iterator["ColumnarTransactionStore"]:
+        """Verrouille le snapshot le temps d'enchaîner `mask` et des agrégats."""
+        with self._lock:
+            self.ensure_loaded()
+            yield self
+
+    def mask(
+        self,
+        start_date=None,
+        end_date=None,
+        end_inclusive: bool = True,
+        type: Optional[str] = None,
+        category: Optional[str] = None,
+    ) -> np.ndarray:
+        """Masque booléen des lignes correspondant aux filtres."""
+        with self.reading():
+            n = self._n
+            m = np.ones(n, dtype=bool)
+            if start_date:
+                m &= self.day[:n] >= to_day(start_date)
+            if end_date:
+                end = to_day(end_date)
+                m &= (self.day[:n] <= end) if end_inclusive else (self.day[:n] < end)
+            if type:
+                m &= self.type_code[:n] == self.types.lookup(type)
+            if category:
+                m &= self.cat_code[:n] == self.categories.lookup(category)
+            return m
+
+    def _select(self, mask: Optional[np.ndarray], *columns: np.ndarray) -> List[np.ndarray]:
+        """Copie des lignes sélectionnées (appelé verrou tenu)."""
+        n = self._n
+        if mask is not None and len(mask) != n:
+            raise ValueError("Masque calculé sur un état antérieur du snapshot")
+        return [col[:n][mask] if mask is not None else col[:n].copy() for col in columns]
+
+    def total(self, mask: Optional[np.ndarray] = None) -> float:
+        """Somme des montants des lignes sélectionnées."""
+        with self.reading():
+            (montant,) = self._select(mask, self.montant)
+        return float(montant.sum())
+
+    def sum_by(self, column: str, mask: Optional[np.ndarray] = None) -> Dict[str, float]:
+        """Group-by + somme sur `type`, `categorie` ou `sous_categorie`."""
+        with self.reading():
+            codes, dictionary = {
+                "type": (self.type_code, self.types),
+                "categorie": (self.cat_code, self.categories),
+                "sous_categorie": (self.sub_code, self.sous_categories),
+            }[column]
+            codes, weights = self._select(mask, codes, self.montant)
+            keep = codes >= 0
+            sums = np.bincount(codes[keep], weights=weights[keep], minlength=len(dictionary))
+            counts = np.bincount(codes[keep], minlength=len(dictionary))
+            return {dictionary.values[c]: float(sums[c]) for c in np.flatnonzero(counts)}
+
+    def aggregate_by_type(self, mask: Optional[np.ndarray] = None) -> Dict:
+        """Même structure que `dashboard_helpers.aggregate_by_type` (type → catégories → sous-catégories)."""
+        with self.reading():
+            t, c, s, w = self._select(mask, self.type_code, self.cat_code, self.sub_code, self.montant)
+            # Noms figés avec les codes : un rechargement recrée les dictionnaires
+            types = list(self.types.values)
+            categories = list(self.categories.values)
+            sous_categories = list(self.sous_categories.values)
+        data = {
+            "revenu": {"total": 0, "categories": {}, "subs": {}},
+            "depense": {"total": 0, "categories": {}, "subs": {}},
+        }
+        if not len(w):
+            return data
+
+        # Clé composite (type, catégorie, sous-catégorie) → une seule passe bincount
+        n_cat, n_sub = len(categories) + 1, len(sous_categories) + 1
+        keys = (t.astype(np.int64) * n_cat + (c + 1)) * n_sub + (s + 1)
+        uniq, inverse = np.unique(keys, return_inverse=True)
+        sums = np.bincount(inverse, weights=w)
+
+        for key, value in zip(uniq.tolist(), sums.tolist()):
+            rest, sub = divmod(key, n_sub)
+            type_code, cat = divmod(rest, n_cat)
+            t_type = types[type_code]
+            if t_type not in data:
+                continue
+            cat_name = categories[cat - 1] if cat else None
+            bucket = data[t_type]
+            bucket["total"] += value
+            bucket["categories"][cat_name] = bucket["categories"].get(cat_name, 0) + value
+            if sub:
+                subs = bucket["subs"].setdefault(cat_name, {})
+                sub_name = sous_categories[sub - 1]
+                subs[sub_name] = subs.get(sub_name, 0) + value
+        return data
+
+    def daily_history(self, mask: Optional[np.ndarray] = None) -> List[dict]:
+        """Même sortie que `dashboard_helpers.build_daily_history` (solde cumulé par jour)."""
+        with self.reading():
+            d, t, w = self._select(mask, self.day, self.type_code, self.montant)
+            revenu_code = self.types.lookup("revenu")
+        if not len(w):
+            return []
+
+        days, inverse = np.unique(d, return_inverse=True)
+        is_revenu = t == revenu_code
+        revenus = np.bincount(inverse, weights=np.where(is_revenu, w, 0.0), minlength=len(days))
+        depenses = np.bincount(inverse, weights=np.where(is_revenu, 0.0, w), minlength=len(days))
+        soldes = np.cumsum(revenus - depenses)
+
+        return [
+            {"date": from_day(day), "revenus": rev, "depenses": dep, "solde": round(solde, 2)}
+            for day, rev, dep, solde in zip(
+                days.tolist(), revenus.tolist(), depenses.tolist(), soldes.tolist()
+            )
+        ]
+
+    def totals_by_type(self, mask: Optional[np.ndarray] = None) -> Tuple[float, float]:
+        """(revenus, depenses) des lignes sélectionnées."""
+        sums = self.sum_by("type", mask)
+        return sums.get("revenu", 0.0), sums.get("depense", 0.0)
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Registre (un snapshot par base) + hooks appelés par les chemins d'écriture
+# ─────────────────────────────────────────────────────────────────────────────
+
+_stores: Dict[Optional[str], ColumnarTransactionStore] = {}
+_registry_lock = threading.Lock()
+
+
+def get_store(db_path: Optional[str] = None) -> Optional[ColumnarTransactionStore]:
+    """Snapshot de la base (chargé au premier appel), ou None si désactivé."""
+    if not is_enabled():
+        return None
+    with _registry_lock:
+        store = _stores.get(db_path)
+        if store is None:
+            store = _stores[db_path] = ColumnarTransactionStore(db_path)
+    try:
+        store.ensure_loaded()
+    except Exception as e:
+        logger.warning(f"Snapshot colonnaire indisponible, repli SQL: {e}")
+        return None
+    return store
+
+
+def notify_upsert(db_path: Optional[str], row: dict) -> None:
+    """Répercute un ajout / une mise à jour (no-op si aucun snapshot chargé)."""
+    store = _stores.get(db_path)
+    if store is not None:
+        store.upsert(row)
+
+
+def notify_delete(db_path: Optional[str], ids: Iterable[int]) -> None:
+    """Répercute une suppression (no-op si aucun snapshot chargé)."""
+    store = _stores.get(db_path)
+    if store is not None:
+        store.remove(ids)
+
+
+def invalidate(db_path: Optional[str] = None) -> None:
+    """À appeler après une écriture SQL brute sur `transactions`."""
+    store = _stores.get(db_path)
+    if store is not None:
+        store.invalidate()
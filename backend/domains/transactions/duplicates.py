@@ -0,0 +1,341 @@
+"""
+Détection des doublons probables (near-duplicates) de transactions.
+
+Un même achat peut entrer plusieurs fois : ticket OCR, saisie manuelle,
+transaction générée par une échéance... Le contrôle `external_id` de
+`TransactionRepository.add` ne couvre que les imports avec identifiant.
+
+Stratégie (pas de comparaison O(n²)) :
+- Blocage : seules les transactions de même type et de même montant (en centimes)
+  dans une fenêtre de ±DATE_WINDOW_DAYS jours sont comparées.
+- Score : proximité de date + similarité de description (trigrammes hachés,
+  indice de Jaccard) + égalité de catégorie.
+
+Deux modes :
+- Incrémental : `check_transaction()` à chaque insertion (lookup indexé montant/date).
+- Batch : `scan_all()` parcourt tout l'historique trié par montant/date en streaming
+  (fenêtre glissante par bloc, mémoire bornée).
+
+Les paires suspectes sont stockées dans la table `transaction_doublons`.
+"""
+
+import logging
+import unicodedata
+import zlib
+from collections import deque
+from datetime import date, datetime, timezone
+from typing import Dict, FrozenSet, Iterable, List, Optional
+
+from backend.shared.database import db_transaction
+
+logger = logging.getLogger(__name__)
+
+DATE_WINDOW_DAYS = 3
+SCORE_THRESHOLD = 0.6
+
+STATUT_SUSPECT = "suspect"
+STATUT_IGNORE = "ignore"
+
+# Poids du score (somme = 1)
+_W_DESCRIPTION = 0.5
+_W_DATE = 0.3
+_W_CATEGORIE = 0.2
+
+_CANDIDATE_COLUMNS = "id, type, montant, date, description, categorie, echeance_id"
+
+
+# ── Fonctions pures ──────────────────────────────────────────────────────────
+
+
+def amount_to_cents(montant: float) -> int:
+    """Convertit un montant en centimes entiers (clé de blocage)."""
+    return int(round(float(montant) * 100))
+
+
+def _normalize(text: Optional[str]) -> str:
+    if not text:
+        return ""
+    text = unicodedata.normalize("NFKD", text)
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    return " ".join("".join(c if c.isalnum() else " " for c in text.lower()).split())
+
+
+def description_fingerprint(text: Optional[str]) -> FrozenSet[int]:
+    """Ensemble des trigrammes de caractères (hachés crc32) de la description normalisée."""
+    norm = _normalize(text)
+    if not norm:
+        return frozenset()
+    padded = f"  {norm} "
+    return frozenset(
+        zlib.crc32(padded[i : i + 3].encode()) for i in range(len(padded) - 2)
+    )
+
+
+def description_similarity(a: FrozenSet[int], b: FrozenSet[int]) -> float:
+    """Indice de Jaccard entre deux empreintes (0.0 si l'une est vide)."""
+    if not a or not b:
+        return 0.0
+    inter = len(a & b)
+    return inter / (len(a) + len(b) - inter)
+
+
+def _day_number(value) -> int:
+    if isinstance(value, date):
+        return value.toordinal()
+    return date.fromisoformat(str(value)[:10]).toordinal()
+
+
+def score_pair(a: dict, b: dict, window_days: int = DATE_WINDOW_DAYS) -> float:
+    """
+    Score de similarité entre deux lignes candidates (même type, même montant).
+    Les lignes doivent contenir `day`, `fp` (empreinte) et `categorie`.
+    """
+    gap = abs(a["day"] - b["day"])
+    if gap > window_days:
+        return 0.0
+    date_score = 1.0 - gap / (window_days + 1)
+    desc_score = description_similarity(a["fp"], b["fp"])
+    cat_score = 1.0 if (a.get("categorie") or "") == (b.get("categorie") or "") else 0.0
+    return round(
+        _W_DESCRIPTION * desc_score + _W_DATE * date_score + _W_CATEGORIE * cat_score, 4
+    )
+
+
+def _prepare(row: dict) -> dict:
+    """Ajoute les clés calculées (centimes, jour, empreinte) à une ligne DB."""
+    row["cents"] = amount_to_cents(row["montant"])
+    row["day"] = _day_number(row["date"])
+    row["fp"] = description_fingerprint(row.get("description"))
+    return row
+
+
+def _is_candidate(a: dict, b: dict) -> bool:
+    """Deux occurrences d'une même échéance ne sont jamais des doublons."""
+    if a["id"] == b["id"] or a["type"] != b["type"] or a["cents"] != b["cents"]:
+        return False
+    if a.get("echeance_id") and a.get("echeance_id") == b.get("echeance_id"):
+        return False
+    return True
+
+
+# ── Détecteur ────────────────────────────────────────────────────────────────
+
+
+class DuplicateDetector:
+    """Détecte et enregistre les doublons probables dans `transaction_doublons`."""
+
+    def __init__(
+        self,
+        db_path: Optional[str] = None,
+        window_days: int = DATE_WINDOW_DAYS,
+        threshold: float = SCORE_THRESHOLD,
+    ):
+        self.db_path = db_path
+        self.window_days = window_days
+        self.threshold = threshold
+
+    # ── Incrémental ───────────────────────────────────────────────────────
+
+    def check_transaction(self, transaction_id: int, conn=None) -> List[dict]:
+        """
+        Compare une transaction (fraîchement insérée) à ses candidats du même bloc.
+        Utilise l'index (montant, date) : coût indépendant de la taille de l'historique.
+
+        Returns:
+            Liste des paires enregistrées {transaction_id, original_id, score}.
+        """
+        if conn is not None:
+            return self._check(conn, transaction_id)
+        with db_transaction(self.db_path) as c:
+            return self._check(c, transaction_id)
+
+    def _check(self, conn, transaction_id: int) -> List[dict]:
+        cursor = conn.cursor()
+        cursor.execute(
+            f"SELECT {_CANDIDATE_COLUMNS} FROM transactions WHERE id = ?",
+            (transaction_id,),
+        )
+        row = cursor.fetchone()
+        if not row:
+            return []
+        target = _prepare(dict(row))
+
+        day = target["day"]
+        cents = target["cents"]
+        cursor.execute(
+            f"""
+            SELECT {_CANDIDATE_COLUMNS} FROM transactions
+            WHERE montant BETWEEN ? AND ?
+              AND date >= ? AND date < ?
+              AND type = ? AND id != ?
+            """,
+            (
+                (cents - 0.5) / 100,
+                (cents + 0.5) / 100,
+                date.fromordinal(day - self.window_days).isoformat(),
+                # Borne haute exclusive au lendemain (les dates peuvent contenir une heure)
+                date.fromordinal(day + self.window_days + 1).isoformat(),
+                target["type"],
+                transaction_id,
+            ),
+        )
+
+        pairs = []
+        for cand in cursor.fetchall():
+            other = _prepare(dict(cand))
+            if not _is_candidate(target, other):
+                continue
+            score = score_pair(target, other, self.window_days)
+            if score >= self.threshold:
+                pairs.append(self._make_pair(target["id"], other["id"], score))
+
+        self._save_pairs(cursor, pairs)
+        if pairs:
+            logger.info(
+                f"Doublon(s) probable(s) pour la transaction {transaction_id}: "
+                f"{[p['original_id'] for p in pairs]}"
+            )
+        return pairs
+
+    # ── Batch ─────────────────────────────────────────────────────────────
+
+    def scan_all(self, chunk_size: int = 5000) -> int:
+        """
+        Analyse tout l'historique en une passe triée par (centimes, date).
+
+        Mémoire bornée : seules les lignes du bloc montant courant et de la fenêtre
+        de dates sont conservées.
+
+        Returns:
+            Nombre de nouvelles paires suspectes enregistrées.
+        """
+        created = 0
+        with db_transaction(self.db_path) as conn:
+            read_cursor = conn.cursor()
+            write_cursor = conn.cursor()
+            # Tri sur la clé de blocage elle-même : dates croissantes dans chaque
+            # bloc, même quand des montants voisins s'arrondissent au même centime
+            read_cursor.execute(
+                f"SELECT {_CANDIDATE_COLUMNS}, CAST(ROUND(montant * 100) AS INTEGER) AS bloc "
+                "FROM transactions ORDER BY bloc, date"
+            )
+
+            window: deque = deque()
+            pending: List[dict] = []
+            while True:
+                rows = read_cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                for raw in rows:
+                    row = _prepare(dict(raw))
+                    # Nouveau bloc montant ou sortie de la fenêtre de dates
+                    if window and window[-1]["bloc"] != row["bloc"]:
+                        window.clear()
+                    while window and row["day"] - window[0]["day"] > self.window_days:
+                        window.popleft()
+
+                    for other in window:
+                        if not _is_candidate(row, other):
+                            continue
+                        score = score_pair(row, other, self.window_days)
+                        if score >= self.threshold:
+                            pending.append(self._make_pair(row["id"], other["id"], score))
+                    window.append(row)
+
+                if pending:
+                    created += self._save_pairs(write_cursor, pending)
+                    pending = []
+
+        logger.info(f"Scan doublons terminé: {created} nouvelle(s) paire(s)")
+        return created
+
+    # ── Lecture / gestion ─────────────────────────────────────────────────
+
+    def get_suspected(self, statut: str = STATUT_SUSPECT) -> List[dict]:
+        """Paires suspectes avec les deux transactions (lignes brutes)."""
+        with db_transaction(self.db_path) as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                """
+                SELECT d.id AS pair_id, d.score, d.statut, d.date_detection,
+                       d.transaction_id, d.original_id
+                FROM transaction_doublons d
+                WHERE d.statut = ?
+                ORDER BY d.score DESC, d.id DESC
+                """,
+                (statut,),
+            )
+            pairs = [dict(r) for r in cursor.fetchall()]
+            if not pairs:
+                return []
+
+            ids = {p["transaction_id"] for p in pairs} | {p["original_id"] for p in pairs}
+            rows = self._fetch_transactions(cursor, ids)
+
+        return [
+            {
+                **p,
+                "transaction": rows.get(p["transaction_id"]),
+                "original": rows.get(p["original_id"]),
+            }
+            for p in pairs
+            if p["transaction_id"] in rows and p["original_id"] in rows
+        ]
+
+    def set_status(self, pair_id: int, statut: str) -> bool:
+        """Change le statut d'une paire (ex: 'ignore' = faux positif confirmé)."""
+        with db_transaction(self.db_path) as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                "UPDATE transaction_doublons SET statut = ? WHERE id = ?",
+                (statut, pair_id),
+            )
+            return cursor.rowcount > 0
+
+    # ── Helpers internes ──────────────────────────────────────────────────
+
+    @staticmethod
+    def _make_pair(id_a: int, id_b: int, score: float) -> dict:
+        # Paire canonique : la plus récente (id max) pointe vers l'originale (id min)
+        return {
+            "transaction_id": max(id_a, id_b),
+            "original_id": min(id_a, id_b),
+            "score": score,
+        }
+
+    @staticmethod
+    def _save_pairs(cursor, pairs: Iterable[dict]) -> int:
+        """INSERT OR IGNORE : une paire déjà connue (même ignorée) n'est jamais recréée."""
+        pairs = list(pairs)
+        if not pairs:
+            return 0
+        now = datetime.now(timezone.utc).isoformat()
+        before = cursor.connection.total_changes
+        cursor.executemany(
+            """
+            INSERT OR IGNORE INTO transaction_doublons
+            (transaction_id, original_id, score, statut, date_detection)
+            VALUES (?, ?, ?, ?, ?)
+            """,
+            [
+                (p["transaction_id"], p["original_id"], p["score"], STATUT_SUSPECT, now)
+                for p in pairs
+            ],
+        )
+        return cursor.connection.total_changes - before
+
+    @staticmethod
+    def _fetch_transactions(cursor, ids: Iterable[int]) -> Dict[int, dict]:
+        ids = list(ids)
+        result: Dict[int, dict] = {}
+        # Limite SQLite sur le nombre de paramètres : requêtes par paquets
+        for i in range(0, len(ids), 500):
+            chunk = ids[i : i + 500]
+            pl = ", ".join("?" * len(chunk))
+            cursor.execute(f"SELECT * FROM transactions WHERE id IN ({pl})", tuple(chunk))
+            for row in cursor.fetchall():
+                result[row["id"]] = dict(row)
+        return result
+
+
+duplicate_detector = DuplicateDetector()
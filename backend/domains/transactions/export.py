@@ -0,0 +1,153 @@
+"""
+Export des transactions - CSV, NDJSON et Parquet en streaming.
+
+Chaque format consomme les paquets de lignes de
+`TransactionRepository.iter_filtered_chunks()` et produit des `bytes` au fil
+de l'eau : la mémoire reste constante quelle que soit la taille de l'historique
+et le premier octet part avant la première lecture en base.
+
+Parquet (optionnel) : nécessite pyarrow, un row group est écrit par paquet.
+"""
+
+import csv
+import io
+import json
+import logging
+from typing import Dict, Iterable, Iterator, List
+
+logger = logging.getLogger(__name__)
+
+PYARROW_AVAILABLE = False
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    PYARROW_AVAILABLE = True
+except ImportError:
+    pa = None
+    pq = None
+
+EXPORT_COLUMNS: List[str] = [
+    "id",
+    "date",
+    "type",
+    "categorie",
+    "sous_categorie",
+    "description",
+    "montant",
+    "source",
+    "external_id",
+    "echeance_id",
+    "objectif_id",
+]
+
+EXPORT_FORMATS: Dict[str, str] = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+
+def iter_csv(chunks: Iterable[List[dict]]) -> Iterator[bytes]:
+    """CSV (séparateur ';', compatible Excel FR) : en-tête puis un bloc par paquet."""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(
+        buffer, fieldnames=EXPORT_COLUMNS, delimiter=";", extrasaction="ignore"
+    )
+    writer.writeheader()
+    # BOM UTF-8 pour l'ouverture directe dans Excel
+    yield ("﻿" + buffer.getvalue()).encode("utf-8")
+
+    for rows in chunks:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows(rows)
+        yield buffer.getvalue().encode("utf-8")
+
+
+def iter_ndjson(chunks: Iterable[List[dict]]) -> Iterator[bytes]:
+    """Un objet JSON par ligne."""
+    for rows in chunks:
+        yield "".join(
+            json.dumps({c: r.get(c) for c in EXPORT_COLUMNS}, ensure_ascii=False) + "\n"
+            for r in rows
+        ).encode("utf-8")
+
+
+class _DrainableSink(io.RawIOBase):
+    """Sortie en écriture seule que l'on vide après chaque row group."""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self._pos = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._chunks.append(data)
+        self._pos += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._pos
+
+    def drain(self) -> bytes:
+        out = b"".join(self._chunks)
+        self._chunks.clear()
+        return out
+
+
+def _parquet_schema():
+    return pa.schema(
+        [
+            ("id", pa.int64()),
+            ("date", pa.string()),
+            ("type", pa.dictionary(pa.int8(), pa.string())),
+            ("categorie", pa.dictionary(pa.int16(), pa.string())),
+            ("sous_categorie", pa.dictionary(pa.int16(), pa.string())),
+            ("description", pa.string()),
+            ("montant", pa.float64()),
+            ("source", pa.dictionary(pa.int8(), pa.string())),
+            ("external_id", pa.string()),
+            ("echeance_id", pa.int64()),
+            ("objectif_id", pa.int64()),
+        ]
+    )
+
+
+def iter_parquet(chunks: Iterable[List[dict]]) -> Iterator[bytes]:
+    """Parquet : un row group par paquet, octets émis dès que le row group est écrit."""
+    if not PYARROW_AVAILABLE:
+        raise ImportError("pyarrow requis pour l'export Parquet: uv add pyarrow")
+
+    schema = _parquet_schema()
+    sink = _DrainableSink()
+    writer = pq.ParquetWriter(sink, schema, compression="snappy")
+    try:
+        for rows in chunks:
+            if not rows:
+                continue
+            table = pa.Table.from_pydict(
+                {c: [r.get(c) for r in rows] for c in EXPORT_COLUMNS}, schema=schema
+            )
+            writer.write_table(table)
+            data = sink.drain()
+            if data:
+                yield data
+    finally:
+        writer.close()
+    yield sink.drain()
+
+
+def iter_export(fmt: str, chunks: Iterable[List[dict]]) -> Iterator[bytes]:
+    """Sélectionne l'encodeur du format demandé."""
+    if fmt == "csv":
+        return iter_csv(chunks)
+    if fmt == "ndjson":
+        return iter_ndjson(chunks)
+    if fmt == "parquet":
+        return iter_parquet(chunks)
+    raise ValueError(f"Format d'export inconnu: {fmt}")
@@ -0,0 +1,21 @@
+"""Transaction API Models - Pydantic models for transaction endpoints."""
+
+from typing import List, Optional
+
+from pydantic import BaseModel
+
+from backend.domains.transactions.model import Transaction
+
+
+class DuplicatePairResponse(BaseModel):
+    pair_id: int
+    score: float
+    statut: str
+    date_detection: Optional[str] = None
+    transaction: Transaction
+    original: Transaction
+
+
+class DuplicateScanResponse(BaseModel):
+    nouvelles_paires: int
+    paires_suspectes: List[DuplicatePairResponse] = []
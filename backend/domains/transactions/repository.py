@@ -4,22 +4,45 @@
 
 import logging
 from datetime import date, datetime, timezone
-from typing import List, Optional, Dict
+from typing import Dict, Iterator, List, Optional, Tuple
 
+import pandas as pd
 from sqlcipher3 import dbapi2 as sqlcipher
 
-from backend.shared.database import db_transaction
+from backend.shared.database import db_transaction, stream_rows
 from backend.shared.database.base_repository import BaseRepository
 from backend.domains.transactions.model import Transaction
+from backend.domains.transactions.duplicates import DuplicateDetector
+from backend.domains.transactions import columnar
 
 logger = logging.getLogger(__name__)
 
+# Colonnes (et dtypes) du chemin DataFrame, cf. TransactionService
+DATAFRAME_DTYPES: Dict[str, str] = {
+    "id": "int64",
+    "type": "category",
+    "categorie": "category",
+    "sous_categorie": "category",
+    "description": "object",
+    "montant": "float64",
+    "date": "datetime64[ns]",
+    "source": "category",
+    "external_id": "object",
+    "echeance_id": "Int64",
+    "compte_id": "Int64",
+    "objectif_id": "Int64",
+}
+
 
 class TransactionRepository(BaseRepository[Transaction]):
     """Repository pour gérer les transactions en base de données."""
     table_name = "transactions"
     model_class = Transaction
 
+    def __init__(self, db_path: Optional[str] = None, detect_duplicates: bool = True):
+        super().__init__(db_path)
+        self.duplicate_detector = DuplicateDetector(db_path) if detect_duplicates else None
+
     def _get_with_attachments_query(self) -> str:
         return """
             SELECT t.*, 
@@ -58,6 +81,17 @@ def _to_validated_db_dict(transaction) -> dict:
 
     def add(self, transaction, conn=None) -> Optional[int]:
         """Ajoute une transaction."""
+        new_id, row = self._insert(transaction, conn)
+        if new_id:
+            if conn is None:
+                columnar.notify_upsert(self.db_path, row)
+            else:
+                # Connexion de l'appelant : commit (ou rollback) hors de notre contrôle
+                columnar.invalidate(self.db_path)
+        return new_id
+
+    def _insert(self, transaction, conn=None) -> Tuple[Optional[int], Optional[dict]]:
+        """Insertion seule : (ID, ligne insérée) ou (None, None), snapshot non touché."""
         try:
             data = self._to_validated_db_dict(transaction)
 
@@ -70,7 +104,7 @@ def add(self, transaction, conn=None) -> Optional[int]:
                     )
                     if cursor.fetchone():
                         logger.info(f"Doublon ignoré: {data['external_id']}")
-                        return None
+                        return None, None
 
             now = datetime.now(timezone.utc).isoformat()
             data["date_mise_a_jour"] = now
@@ -108,15 +142,48 @@ def add(self, transaction, conn=None) -> Optional[int]:
                         conn=c,
                     )
 
+                if new_id:
+                    self._flag_duplicates(new_id, c)
+
             logger.info(f"Transaction ajoutée: ID {new_id}")
-            return new_id
+            return new_id, {**data, "id": new_id}
 
         except ValueError as e:
             logger.error(f"Validation échouée: {e}")
-            return None
+            return None, None
         except sqlcipher.Error as e:
             logger.error(f"Erreur SQL add: {e}")
-            return None
+            return None, None
+
+    def add_many(self, transactions: List) -> List[Optional[int]]:
+        """
+        Ajoute plusieurs transactions sur une seule connexion, en un commit
+        (ouverture SQLCipher et écriture disque payées une fois par lot).
+        Même traitement que `add` par transaction ; None pour une transaction
+        refusée (validation, external_id déjà présent).
+        """
+        if not transactions:
+            return []
+        try:
+            with self._get_conn() as c:
+                inserted = [self._insert(transaction, c) for transaction in transactions]
+        except sqlcipher.Error as e:
+            logger.error(f"Erreur SQL add_many: {e}")
+            return [None] * len(transactions)
+        # Lot commité : le snapshot colonnaire suit ligne à ligne, sans rechargement
+        for new_id, row in inserted:
+            if new_id:
+                columnar.notify_upsert(self.db_path, row)
+        return [new_id for new_id, _ in inserted]
+
+    def _flag_duplicates(self, new_id: int, conn) -> None:
+        """Détection incrémentale des doublons probables (n'empêche jamais l'insertion)."""
+        if not self.duplicate_detector:
+            return
+        try:
+            self.duplicate_detector.check_transaction(new_id, conn=conn)
+        except sqlcipher.Error as e:
+            logger.warning(f"Détection doublons ignorée pour ID {new_id}: {e}")
 
     def update(self, transaction: Dict) -> bool:
         """Met à jour une transaction existante."""
@@ -133,7 +200,10 @@ def update(self, transaction: Dict) -> bool:
             if "statut_synchro" not in data or not data["statut_synchro"]:
                 data["statut_synchro"] = "local"
 
-            return self.update_by_id(tx_id, data)
+            updated = self.update_by_id(tx_id, data)
+            if updated:
+                columnar.notify_upsert(self.db_path, {**data, "id": tx_id})
+            return updated
 
         except ValueError as e:
             logger.error(f"Validation échouée update: {e}")
@@ -173,14 +243,86 @@ def get_filtered(
             base_query=self._get_with_attachments_query(),
         )
 
+    def iter_filtered_chunks(
+        self,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        category: Optional[str] = None,
+        columns: Optional[List[str]] = None,
+        chunk_size: int = 1000,
+    ) -> Iterator[List[dict]]:
+        """
+        Mêmes filtres que get_filtered(), mais en streaming par paquets de lignes brutes
+        (aucun modèle Pydantic construit, mémoire constante).
+        """
+        where, params = self._filter_clause(start_date, end_date, category)
+        query = f"SELECT {', '.join(columns) if columns else '*'} FROM {self.table_name}{where}"
+        query += " ORDER BY date DESC, id DESC"
+
+        for rows in stream_rows(query, params, chunk_size, self.db_path):
+            yield [dict(r) for r in rows]
+
+    def get_dataframe(
+        self,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        category: Optional[str] = None,
+    ) -> pd.DataFrame:
+        """
+        Mêmes filtres que get_filtered(), chargés directement en colonnes typées
+        (aucun modèle Pydantic par ligne) : `category` pour les libellés répétés,
+        datetime64 pour `date`, float64 pour `montant`, Int64 pour les clés étrangères.
+        """
+        where, params = self._filter_clause(start_date, end_date, category)
+        query = (
+            f"SELECT {', '.join(DATAFRAME_DTYPES)} FROM {self.table_name}{where}"
+            " ORDER BY date DESC, id DESC"
+        )
+        with db_transaction(self.db_path) as conn:
+            cursor = conn.cursor()
+            cursor.execute(query, params)
+            rows = cursor.fetchall()
+
+        columns = list(zip(*rows)) if rows else [()] * len(DATAFRAME_DTYPES)
+        data = {}
+        for (name, dtype), values in zip(DATAFRAME_DTYPES.items(), columns):
+            if name == "date":
+                # Dates ISO ('YYYY-MM-DD', éventuellement suivies d'une heure)
+                data[name] = pd.to_datetime(pd.Series(values, dtype=object).str[:10], format="%Y-%m-%d")
+            else:
+                data[name] = pd.Series(values, dtype=dtype)
+        return pd.DataFrame(data)
+
+    @staticmethod
+    def _filter_clause(
+        start_date: Optional[date], end_date: Optional[date], category: Optional[str]
+    ) -> Tuple[str, tuple]:
+        conditions, params = [], []
+        if start_date:
+            conditions.append("date >= ?")
+            params.append(start_date.isoformat())
+        if end_date:
+            conditions.append("date <= ?")
+            params.append(end_date.isoformat())
+        if category:
+            conditions.append("categorie = ?")
+            params.append(category)
+        where = " WHERE " + " AND ".join(conditions) if conditions else ""
+        return where, tuple(params)
+
     def delete(self, transaction_id: int | List[int]) -> bool:
         """Supprime une ou plusieurs transactions."""
         if isinstance(transaction_id, int):
-            return super().delete(transaction_id)
+            deleted = super().delete(transaction_id)
+            ids = [transaction_id]
         else:
             if not transaction_id:
                 return True
-            return self.delete_many(transaction_id)
+            deleted = self.delete_many(transaction_id)
+            ids = transaction_id
+        if deleted:
+            columnar.notify_delete(self.db_path, ids)
+        return deleted
 
 
 transaction_repository = TransactionRepository()
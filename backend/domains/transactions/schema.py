@@ -44,6 +44,26 @@ def create_index_if_not_exists(
         pass
 
 
+def init_duplicates_table(cursor: sqlcipher.Cursor) -> None:
+    """Table des paires de doublons probables (voir duplicates.py)."""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS transaction_doublons (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            transaction_id INTEGER NOT NULL,
+            original_id INTEGER NOT NULL,
+            score REAL NOT NULL,
+            statut TEXT DEFAULT 'suspect',
+            date_detection TEXT,
+            UNIQUE (transaction_id, original_id),
+            FOREIGN KEY (transaction_id) REFERENCES transactions(id) ON DELETE CASCADE,
+            FOREIGN KEY (original_id) REFERENCES transactions(id) ON DELETE CASCADE
+        )
+    """)
+    create_index_if_not_exists(
+        cursor, "idx_transaction_doublons_statut", "transaction_doublons", "statut"
+    )
+
+
 def init_transaction_table(db_path: str = None) -> None:
     """Initialize or update the transactions table."""
     try:
@@ -124,6 +144,12 @@ def init_transaction_table(db_path: str = None) -> None:
             create_index_if_not_exists(
                 cursor, "idx_transactions_objectif_id", "transactions", "objectif_id"
             )
+            # Blocage (montant, date) pour la détection de doublons
+            create_index_if_not_exists(
+                cursor, "idx_transactions_montant_date", "transactions", "montant, date"
+            )
+
+            init_duplicates_table(cursor)
 
         logger.info("Transaction table initialized successfully")
     except sqlcipher.Error as e:
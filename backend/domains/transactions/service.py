@@ -34,8 +34,8 @@ def __init__(self):
     # ----------------------------------------------------------
 
     def get_all(self) -> pd.DataFrame:
-        """Récupère toutes les transactions (colonnes FR)."""
-        return self.repository.get_all
+        """Récupère toutes les transactions (colonnes FR, typées)."""
+        return self.repository.get_dataframe()
 
     def get_filtered(
         self,
@@ -47,9 +47,12 @@ def get_filtered(
         Récupère les transactions filtrées (colonnes FR).
 
         Colonnes retournées : id, type, categorie, sous_categorie, description,
-                              montant, date, source, external_id, echeance_id, compte_id
+                              montant, date, source, external_id, echeance_id,
+                              compte_id, objectif_id
+        Dtypes : `category` (type, categorie, sous_categorie, source),
+                 datetime64 (date), float64 (montant), Int64 (clés étrangères).
         """
-        return self.repository.get_filtered(
+        return self.repository.get_dataframe(
             start_date=start_date,
             end_date=end_date,
             category=category,
@@ -46,6 +46,23 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         logger.error(f"Erreur initialisation OCR au démarrage : {e}")
 
+    # Démarre le pool de workers OCR persistant (chauffe en arrière-plan)
+    try:
+        from backend.domains.ocr.services.autoscaler import start_autoscaler
+        from backend.domains.ocr.services.worker_pool import start_worker_pool
+
+        start_autoscaler(start_worker_pool())
+    except Exception as e:
+        logger.error(f"Erreur démarrage pool OCR : {e}")
+
+    # Index des tickets archivés (détection des doublons, synchronisé en arrière-plan)
+    try:
+        from backend.domains.ocr.services.ticket_index import get_ticket_index
+
+        get_ticket_index()
+    except Exception as e:
+        logger.error(f"Erreur démarrage index des tickets : {e}")
+
     # Démarre le watcher de fichiers
     try:
         from backend.domains.ocr.watcher import start_watcher
@@ -65,6 +82,15 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         logger.error(f"Erreur arrêt watcher : {e}")
 
+    try:
+        from backend.domains.ocr.services.autoscaler import stop_autoscaler
+        from backend.domains.ocr.services.worker_pool import stop_worker_pool
+
+        stop_autoscaler()
+        stop_worker_pool()
+    except Exception as e:
+        logger.error(f"Erreur arrêt pool OCR : {e}")
+
 
 app = FastAPI(title="Gestio API", version="4.0.0", lifespan=lifespan)
 
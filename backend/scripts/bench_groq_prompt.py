@@ -0,0 +1,175 @@
+"""
+Benchmark des formats de prompt Groq : jetons et latence par ticket.
+
+Usage:
+    python -m backend.scripts.bench_groq_prompt [--tickets 40] [--delay 0.15] [--prefill-ms-per-1k 40]
+
+Compare le prompt rédigé d'origine (GROQ_PROMPT=full) et le prompt compact à
+codes (défaut), en appels unitaires puis en requêtes groupées
+(GROQ_BATCH_SIZE), contre le serveur local compatible Groq
+(backend/scripts/groq_stub.py) : aucun appel réseau ni clé d'API.
+
+Le stub simule la latence du modèle : `--delay` fixe par requête plus
+`--prefill-ms-per-1k` par millier de jetons de prompt, et répond dans le
+format demandé (codes ou noms) la classification attendue de chaque ticket.
+Mesures par ticket : jetons de prompt et de réponse (estimation ~4
+caractères par jeton, comme `usage` du stub), latence, et exactitude du
+décodage des réponses.
+
+Sans sous-catégories dans categories.yaml (fichier absent : catégories de
+repli), une taxonomie d'exemple de taille réaliste est utilisée.
+"""
+
+import argparse
+import json
+import os
+import random
+import time
+
+from groq import Groq
+
+from backend.domains.ocr.core import groq_parser
+from backend.domains.ocr.core.groq_parser import GroqParser
+from backend.domains.ocr.core.groq_resilience import GroqResilience
+from backend.scripts.groq_stub import GroqStub, estimate_tokens
+
+_SAMPLE_TAXONOMY = {
+    "Alimentation": ["Supermarché", "Boulangerie", "Boucherie", "Marché", "Restaurant", "Fast-food"],
+    "Voiture": ["Essence", "Entretien", "Péage", "Parking", "Assurance", "Contrôle technique"],
+    "Logement": ["Loyer", "Électricité", "Gaz", "Eau", "Internet", "Travaux"],
+    "Loisirs": ["Cinéma", "Sport", "Voyages", "Livres", "Jeux", "Concerts"],
+    "Santé": ["Pharmacie", "Médecin", "Dentiste", "Opticien", "Mutuelle"],
+    "Shopping": ["Vêtements", "Chaussures", "Électronique", "Maison", "Cadeaux"],
+    "Services": ["Téléphone", "Banque", "Abonnements", "Poste", "Coiffeur"],
+    "Enfants": ["Crèche", "École", "Cantine", "Activités", "Jouets"],
+    "Animaux": ["Nourriture", "Vétérinaire", "Accessoires"],
+    "Épargne": ["Livret", "Assurance vie"],
+    "Salaire": [],
+    "Autre": [],
+}
+
+_MERCHANTS = [
+    ("CARREFOUR MARKET", "Alimentation", "Supermarché", ["LAIT DEMI ECREME", "PAIN COMPLET"]),
+    ("TOTAL ENERGIES", "Voiture", "Essence", ["GAZOLE POMPE 3", "LITRES 38,20"]),
+    ("PHARMACIE DU CENTRE", "Santé", "Pharmacie", ["DOLIPRANE 1000", "SERUM PHY"]),
+    ("APRR", "Voiture", "Péage", ["GARE DE VARENNES", "CLASSE 1"]),
+    ("DECATHLON", "Loisirs", "Sport", ["CHAUSSETTES RUN", "GOURDE 1L"]),
+    ("BOULANGERIE PAUL", "Alimentation", "Boulangerie", ["BAGUETTE TRADITION", "CROISSANT"]),
+]
+
+
+_CASHIERS = ["MARIE", "KEVIN", "SOPHIE", "NADIA", "THOMAS", "LUCAS", "EMMA", "HUGO", "LEA", "JULES"]
+
+
+def _tickets(count: int, rng: random.Random) -> list:
+    """Tickets synthétiques distincts (le cache et la fusion des textes identiques n'interviennent pas)."""
+    corpus = []
+    for n in range(count):
+        merchant, category, sub, items = rng.choice(_MERCHANTS)
+        lines = [merchant, f"CAISSE {n:05d} {_CASHIERS[n % 10]} {_CASHIERS[n // 10 % 10]}"]
+        lines.append(f"LE {rng.randint(1, 28):02d}/03/26 A 12:{n % 60:02d}")
+        lines += [f"{item} {rng.uniform(1, 60):.2f}" for item in items]
+        lines += [f"TOTAL TTC {rng.uniform(5, 90):.2f} EUR", "CARTE BANCAIRE SANS CONTACT"]
+        corpus.append(("\n".join(lines), (category, sub), merchant))
+    return corpus
+
+
+def _responder(parser: GroqParser, truth: dict):
+    """Réponse attendue de chaque ticket, en codes si le prompt en contient."""
+
+    def respond(messages):
+        system, user = messages[0]["content"], messages[-1]["content"]
+        compact = "Codes :" in system
+
+        def entry(text):
+            merchant = next(m for m in truth if m in text)
+            category, sub = truth[merchant]
+            if compact:
+                return {"c": parser._codes_by_label[(category, sub)], "d": merchant}
+            return {"c": category, "s": sub, "d": merchant}
+
+        if "### Ticket" in user:
+            blocks = user.split("### Ticket ")[1:]
+            return {"r": [{"i": int(b.split("\n")[0]), **entry(b)} for b in blocks]}
+        answer = entry(user)
+        if compact:
+            return answer
+        return {"category": answer["c"], "subcategory": answer["s"], "description": answer["d"]}
+
+    return respond
+
+
+def _run(stub: GroqStub, prompt_format: str, batch_size: int, corpus: list) -> dict:
+    os.environ[groq_parser.ENV_PROMPT] = prompt_format
+    os.environ[groq_parser.ENV_BATCH_SIZE] = str(batch_size)
+    parser = GroqParser(resilience=GroqResilience(timeout=30))
+    parser._client = Groq(api_key="stub", base_url=stub.url, max_retries=0)
+    stub.respond = _responder(parser, {m: label for _, label, m in corpus})
+    stub.requests.clear()
+
+    texts = [text for text, _, _ in corpus]
+    t0 = time.perf_counter()
+    if batch_size > 1:
+        results = parser.parse_batch(texts)
+    else:
+        results = [parser.parse(text) for text in texts]
+    elapsed = time.perf_counter() - t0
+
+    prompt_tokens = [
+        estimate_tokens("".join(m["content"] for m in r["messages"])) for r in stub.requests
+    ]
+    completion = [
+        estimate_tokens(json.dumps(stub.respond(r["messages"]), ensure_ascii=False))
+        for r in stub.requests
+    ]
+    correct = sum(
+        (r["category"], r["subcategory"]) == label for r, (_, label, _) in zip(results, corpus)
+    )
+    n = len(corpus)
+    return {
+        "system": estimate_tokens(parser.system_prompt),
+        "requests": len(stub.requests),
+        "prompt": sum(prompt_tokens) / n,
+        "completion": sum(completion) / n,
+        "latency": elapsed / n,
+        "accuracy": correct / n,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--tickets", type=int, default=40)
+    parser.add_argument("--batch-size", type=int, default=8)
+    parser.add_argument("--delay", type=float, default=0.15, help="latence fixe par requête (s)")
+    parser.add_argument("--prefill-ms-per-1k", type=float, default=40.0)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    os.environ[groq_parser.ENV_CACHE_TTL_DAYS] = "0"  # chaque ticket va jusqu'au stub
+    if not any(groq_parser.get_all_subcategories().values()):
+        print("categories.yaml sans sous-catégories : taxonomie d'exemple")
+        groq_parser.get_categories = lambda: list(_SAMPLE_TAXONOMY)
+        groq_parser.get_all_subcategories = lambda: _SAMPLE_TAXONOMY
+
+    corpus = _tickets(args.tickets, random.Random(args.seed))
+    print(
+        f"{args.tickets} tickets, stub : {args.delay * 1000:.0f} ms + "
+        f"{args.prefill_ms_per_1k:.0f} ms / 1k jetons de prompt"
+    )
+    print(
+        f"{'prompt':<10}{'mode':<10}{'système':>9}{'requêtes':>10}{'jetons/ticket':>15}"
+        f"{'réponse':>9}{'latence (ms)':>14}{'exact':>7}"
+    )
+    with GroqStub(delay=args.delay, prefill_ms_per_1k=args.prefill_ms_per_1k) as stub:
+        for prompt_format in ("full", "compact"):
+            for mode, batch_size in (("unitaire", 1), ("lot", args.batch_size)):
+                m = _run(stub, prompt_format, batch_size, corpus)
+                print(
+                    f"{prompt_format:<10}{mode:<10}{m['system']:>9}{m['requests']:>10}"
+                    f"{m['prompt']:>15.0f}{m['completion']:>9.0f}"
+                    f"{m['latency'] * 1000:>14.0f}{m['accuracy']:>7.0%}"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+"""
+Benchmark de la sérialisation des réponses JSON, par endpoint.
+
+Usage:
+    python -m backend.scripts.bench_json_responses [--rows 5000] [--repeat 20]
+
+Pour chaque gros endpoint (liste des transactions, calendrier des échéances,
+arbre du dashboard), une mini-app FastAPI expose le même payload synthétique
+deux fois : rendu par défaut de FastAPI (avant) et rendu rapide de
+shared/utils/json_response.py (après). Les temps incluent tout le pipeline
+de réponse (TestClient), sans accès base.
+"""
+
+import argparse
+import statistics
+import time
+from datetime import date, timedelta
+from typing import List
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from pydantic import TypeAdapter
+
+from backend.domains.transactions.model import Transaction
+from backend.shared.utils import json_response
+from backend.shared.utils.json_response import FastJSONResponse, model_json_response
+
+
+def _transactions(n: int) -> List[Transaction]:
+    start = date(2024, 1, 1)
+    return [
+        Transaction(
+            id=i,
+            type="revenu" if i % 10 == 0 else "depense",
+            categorie=f"Categorie {i % 12}",
+            sous_categorie=f"Sous {i % 5}",
+            montant=round(3.5 + i * 0.37, 2),
+            date=start + timedelta(days=i % 700),
+            description=f"Achat numero {i}",
+            source="manual",
+        )
+        for i in range(n)
+    ]
+
+
+def _calendar(n: int) -> List[dict]:
+    start = date(2024, 1, 1)
+    return [
+        {
+            "id": f"{i % 40}-{(start + timedelta(days=i)).isoformat()}",
+            "echeance_base_id": str(i % 40),
+            "nom": f"Echeance {i % 40}",
+            "categorie": "Logement",
+            "sous_categorie": "Loyer",
+            "date": (start + timedelta(days=i)).strftime("%d %b."),
+            "date_prevue": (start + timedelta(days=i)).isoformat(),
+            "montant": 650.0,
+            "type": "depense",
+            "statut": "pending",
+        }
+        for i in range(n)
+    ]
+
+
+def _dashboard(n: int) -> dict:
+    history = [
+        {"date": (date(2024, 1, 1) + timedelta(days=i)).isoformat(), "revenus": 10.0, "depenses": 7.5, "solde": i * 2.5}
+        for i in range(n)
+    ]
+    categories = [
+        {
+            "nom": f"Categorie {c}",
+            "valeur": 120.0,
+            "montant": 120.0,
+            "couleur": "#6b7280",
+            "icone": "help-circle",
+            "pourcentage": 8,
+            "enfants": [
+                {"nom": f"Sous {s}", "valeur": 24.0, "montant": 24.0, "couleur": "#6b7280", "pourcentage": 20}
+                for s in range(5)
+            ],
+        }
+        for c in range(12)
+    ]
+    return {
+        "total_revenus": 1000.0,
+        "total_depenses": 750.0,
+        "solde": 250.0,
+        "repartition_categories": [{"nom": "depense", "enfants": categories}],
+        "historique": history,
+    }
+
+
+def build_app(rows: int) -> FastAPI:
+    app = FastAPI()
+    txs = _transactions(rows)
+    calendar = _calendar(rows)
+    dashboard = _dashboard(rows)
+    adapter = TypeAdapter(List[Transaction])
+
+    @app.get("/transactions/default", response_model=List[Transaction])
+    def tx_default():
+        return txs
+
+    @app.get("/transactions/fast", response_model=List[Transaction])
+    def tx_fast():
+        return model_json_response(adapter, txs)
+
+    @app.get("/calendar/default")
+    def cal_default():
+        return calendar
+
+    @app.get("/calendar/fast")
+    def cal_fast():
+        return FastJSONResponse(calendar)
+
+    @app.get("/dashboard/default")
+    def dash_default():
+        return dashboard
+
+    @app.get("/dashboard/fast")
+    def dash_fast():
+        return FastJSONResponse(dashboard)
+
+    return app
+
+
+def _time(client: TestClient, url: str, repeat: int) -> float:
+    client.get(url)  # warm-up
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        client.get(url).content
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    client = TestClient(build_app(args.rows))
+    encoder = "orjson" if json_response.ORJSON_AVAILABLE else "pydantic_core"
+    print(f"{args.rows} lignes, médiane sur {args.repeat} requêtes (encodeur rapide: {encoder})")
+    print(f"{'endpoint':<15}{'défaut (ms)':>14}{'rapide (ms)':>14}{'gain':>8}")
+    for name in ("transactions", "calendar", "dashboard"):
+        before = _time(client, f"/{name}/default", args.repeat)
+        after = _time(client, f"/{name}/fast", args.repeat)
+        print(f"{name:<15}{before:>14.1f}{after:>14.1f}{before / after:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
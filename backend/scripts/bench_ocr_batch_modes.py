@@ -0,0 +1,126 @@
+"""
+Benchmark des modes de lot OCR : pool de processus vs threads.
+
+Usage:
+    python -m backend.scripts.bench_ocr_batch_modes [--workers 1,2,4] [--tickets 16]
+
+Pour chaque nombre de workers (borné par les cœurs de la machine) et chaque mode :
+- process : `OCRWorkerPool` (mode de démarrage auto : forkserver préchargé ou spawn)
+- thread  : `OCRService.process_batch_tickets(mode="thread")`, un processus,
+            cache de moteurs à cpu // workers threads ONNX chacun
+mesure le débit (tickets/s, lot traité après chauffe) et la mémoire totale
+(somme des PSS du processus principal, des workers et du forkserver).
+
+Chaque configuration tourne dans un sous-processus neuf pour que les modèles
+chargés par une mesure ne faussent pas la mémoire de la suivante.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import psutil
+from PIL import Image, ImageDraw
+
+_MB = 1024 * 1024
+
+
+def _tickets(folder: Path, count: int) -> list[str]:
+    paths = []
+    for i in range(count):
+        img = Image.new("RGB", (480, 200), color="white")
+        draw = ImageDraw.Draw(img)
+        draw.text((40, 40), f"SUPERMARCHE {i}", fill="black")
+        draw.text((40, 90), f"TOTAL : {10 + i * 1.5:.2f}", fill="black")
+        draw.text((40, 140), "Date: 15/01/2026", fill="black")
+        path = folder / f"ticket_{i}.png"
+        img.save(path)
+        paths.append(str(path))
+    return paths
+
+
+def _tree_pss() -> float:
+    """PSS cumulée du processus courant et de tous ses descendants (Mo)."""
+    me = psutil.Process()
+    total = 0.0
+    for proc in [me] + me.children(recursive=True):
+        try:
+            info = proc.memory_full_info()
+            total += getattr(info, "pss", info.uss)
+        except psutil.Error:
+            pass
+    return total / _MB
+
+
+def _run_one(mode: str, workers: int, tickets: list[str]) -> dict:
+    """Mesure une configuration (appelé dans le sous-processus)."""
+    if mode == "process":
+        from backend.domains.ocr.services.worker_pool import OCRWorkerPool
+
+        pool = OCRWorkerPool(max_workers=workers)
+        pool.start()
+        try:
+            pool.process_batch(tickets[:workers])  # chauffe : tous les workers prêts
+            t0 = time.perf_counter()
+            results = pool.process_batch(tickets)
+            elapsed = time.perf_counter() - t0
+            memory = _tree_pss()
+        finally:
+            pool.stop()
+    else:
+        from backend.domains.ocr.services.ocr_service import get_ocr_service
+
+        service = get_ocr_service()
+        service.process_batch_tickets(tickets[:workers], max_workers=workers, mode="thread")
+        t0 = time.perf_counter()
+        results = service.process_batch_tickets(tickets, max_workers=workers, mode="thread")
+        elapsed = time.perf_counter() - t0
+        memory = _tree_pss()
+
+    return {
+        "tickets_per_s": len(tickets) / elapsed,
+        "memory_mb": memory,
+        "errors": sum(1 for _, _, err, _ in results if err),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--workers", default="1,2,4")
+    parser.add_argument("--tickets", type=int, default=16)
+    parser.add_argument("--run", nargs=3, metavar=("MODE", "WORKERS", "DOSSIER"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run:
+        mode, workers, folder = args.run
+        tickets = sorted(str(p) for p in Path(folder).glob("ticket_*.png"))
+        print(json.dumps(_run_one(mode, int(workers), tickets)))
+        return
+
+    cpu = os.cpu_count() or 1
+    counts = sorted({min(int(w), cpu) for w in args.workers.split(",")})
+    with tempfile.TemporaryDirectory() as tmp:
+        _tickets(Path(tmp), args.tickets)
+        print(f"{args.tickets} tickets, {cpu} cœurs — débit après chauffe, mémoire PSS totale")
+        print(f"{'workers':>8}{'mode':>9}{'tickets/s':>11}{'Mo':>8}{'erreurs':>9}")
+        for workers in counts:
+            for mode in ("process", "thread"):
+                out = subprocess.run(
+                    [sys.executable, "-m", "backend.scripts.bench_ocr_batch_modes",
+                     "--run", mode, str(workers), tmp],
+                    capture_output=True, text=True, check=True,
+                )
+                res = json.loads(out.stdout.strip().splitlines()[-1])
+                print(
+                    f"{workers:>8}{mode:>9}{res['tickets_per_s']:>11.2f}"
+                    f"{res['memory_mb']:>8.0f}{res['errors']:>9}"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+"""
+Benchmark de l'extraction regex des tickets (montant, date) sur un grand corpus de textes.
+
+Usage:
+    python -m backend.scripts.bench_ocr_patterns [--tickets 5000] [--texts DOSSIER] [--seed 7]
+
+Corpus : tickets synthétiques (enseigne, adresse, 10 à 120 lignes d'articles,
+total sous l'une des formes de ocr_patterns.yaml, date sous plusieurs formes
+ou absente), ou textes OCR réels (`--texts` : fichiers .txt d'un dossier).
+
+Stratégies comparées sur les patterns de ocr_patterns.yaml :
+- boucle d'origine : `re.findall` / `re.finditer` pattern par pattern sur le
+  texte (patterns compilés par le cache interne de `re`) ;
+- alternative combinée : une regex unique (une branche par pattern, en
+  lookahead) désigne le pattern prioritaire qui correspond, relancé seul
+  ensuite pour garder la sémantique (dernière occurrence) ;
+- PatternSet : `PatternManager.scan`, patterns compilés une fois, écartés sans
+  parcours si un littéral obligatoire manque au texte (montant, date et
+  commerçant en un appel).
+Mesures : latence par ticket (médiane de `--repeat` passages) et résultats
+identiques à la boucle d'origine.
+"""
+
+import argparse
+import logging
+import random
+import re
+import statistics
+import time
+from datetime import datetime
+from pathlib import Path
+
+from backend.domains.ocr.services.pattern_manager import PatternManager
+
+_FLAGS = re.IGNORECASE | re.MULTILINE
+_MERCHANTS = ["CARREFOUR MARKET", "TOTAL ENERGIES", "PHARMACIE DU CENTRE", "DECATHLON", "BUREAU VALLEE"]
+_TOTALS = [
+    "TOTAL TTC {}", "NET A PAYER {}", "MONTANT : {}", "{} €", "CB {}", "Total 3 articles {}",
+    "NETAPAYERENEUROS\n{}", "MONTANT REEL {}", "SANS TOTAL LISIBLE",
+]
+_DATES = ["LE {d:02d}/03/2026 A 12:30", "{d:02d}-03-26", "DATE : 17y12/25", "LE 17y12/25", "SANS DATE"]
+
+
+def _ticket(rng: random.Random) -> str:
+    lines = [rng.choice(_MERCHANTS), "12 RUE DE LA PAIX 03200 VICHY", "TEL 04 70 00 00 00"]
+    lines += [
+        f"ARTICLE {i} REF {rng.randint(1, 999)} {rng.uniform(1, 50):.2f}"
+        for i in range(rng.randint(10, 120))
+    ]
+    total = f"{rng.uniform(5, 200):.2f}".replace(".", rng.choice([".", ","]))
+    lines.append(rng.choice(_TOTALS).format(total))
+    lines.append(rng.choice(_DATES).format(d=rng.randint(1, 28)))
+    lines.append("MERCI DE VOTRE VISITE")
+    return "\n".join(lines)
+
+
+def _to_amount(value) -> float:
+    return float(str(value).replace("O", "0").replace("o", "0").replace(",", ".").replace(" ", ""))
+
+
+def _to_date(match):
+    if len(match.groups()) >= 3:
+        value = f"{match.group(1)}/{match.group(2)}/{match.group(3)}"
+    else:
+        value = match.group(1)
+    value = value.replace("-", "/").replace(".", "/").replace(" ", "/")
+    for fmt in ("%d/%m/%Y", "%d/%m/%y"):
+        try:
+            return datetime.strptime(value, fmt).date()
+        except ValueError:
+            continue
+    return None
+
+
+def _legacy(text: str, amounts: list, dates: list):
+    """Boucle d'origine de parse_amount / parse_date (sans journalisation)."""
+    amount = found = None
+    upper = text.upper()
+    for pattern in amounts:
+        matches = re.findall(pattern, upper, _FLAGS)
+        if matches:
+            try:
+                amount = _to_amount(matches[-1])
+                break
+            except ValueError:
+                continue
+    for pattern in dates:
+        for match in re.finditer(pattern, text, _FLAGS):
+            found = _to_date(match)
+            if found:
+                break
+        if found:
+            break
+    return amount, found
+
+
+def _combined(patterns: list) -> "re.Pattern[str]":
+    branches = []
+    for i, pattern in enumerate(patterns):
+        body = re.sub(r"(?<!\\)\((?!\?)", "(?:", pattern)  # groupes rendus non capturants
+        branches.append(f"(?=(?P<p{i}>{body}))")
+    return re.compile("|".join(branches), _FLAGS)
+
+
+def _combined_scan(text: str, amounts: list, dates: list, gate_amount, gate_date):
+    """Pattern prioritaire désigné par l'alternative combinée, puis boucle d'origine à partir de lui."""
+    def first(gate, target):
+        best = None
+        for match in gate.finditer(target):
+            index = int(match.lastgroup[1:])
+            best = index if best is None else min(best, index)
+            if best == 0:
+                break
+        return best
+
+    upper = text.upper()
+    a, d = first(gate_amount, upper), first(gate_date, text)
+    amount = _legacy(text, amounts[a:], [])[0] if a is not None else None
+    found = _legacy(text, [], dates[d:])[1] if d is not None else None
+    return amount, found
+
+
+def _scan(manager: PatternManager, text: str):
+    fields = manager.scan(text)
+    return fields["amount"], fields["date"]
+
+
+def _measure(fn, corpus: list, repeat: int):
+    timings, results = [], None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        results = [fn(text) for text in corpus]
+        timings.append((time.perf_counter() - t0) / len(corpus))
+    return statistics.median(timings), results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--tickets", type=int, default=5000)
+    parser.add_argument("--texts", type=Path, help="dossier de textes OCR (.txt)")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)  # une ligne de journal par champ (trouvé ou non) sinon
+
+    if args.texts:
+        corpus = [p.read_text(encoding="utf-8") for p in sorted(args.texts.glob("*.txt"))]
+    else:
+        rng = random.Random(args.seed)
+        corpus = [_ticket(rng) for _ in range(args.tickets)]
+    manager = PatternManager()
+    amounts, dates = manager.get_amount_patterns(), manager.get_date_patterns()
+    gate_amount, gate_date = _combined(amounts), _combined(dates)
+    size = statistics.mean(len(t.splitlines()) for t in corpus)
+    print(f"{len(corpus)} tickets, {size:.0f} lignes en moyenne, "
+          f"{len(amounts)} patterns montant, {len(dates)} patterns date")
+
+    strategies = {
+        "boucle d'origine": lambda t: _legacy(t, amounts, dates),
+        "alternative combinée": lambda t: _combined_scan(t, amounts, dates, gate_amount, gate_date),
+        "PatternSet (scan)": lambda t: _scan(manager, t),
+    }
+    reference = None
+    print(f"{'stratégie':<24}{'µs/ticket':>11}{'gain':>8}{'identique':>11}")
+    for name, fn in strategies.items():
+        seconds, results = _measure(fn, corpus, args.repeat)
+        if reference is None:
+            reference = (seconds, results)
+        same = sum(r == ref for r, ref in zip(results, reference[1])) / len(corpus)
+        print(f"{name:<24}{seconds * 1e6:>11.1f}{reference[0] / seconds:>7.2f}x{same:>11.1%}")
+
+
+if __name__ == "__main__":
+    main()
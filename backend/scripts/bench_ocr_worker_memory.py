@@ -0,0 +1,93 @@
+"""
+Benchmark mémoire des workers OCR : spawn vs forkserver préchargé.
+
+Usage:
+    python -m backend.scripts.bench_ocr_worker_memory [--workers 2] [--tickets 8]
+
+Pour chaque mode de démarrage disponible, démarre un `OCRWorkerPool`, lui fait
+traiter un lot de tickets synthétiques (chaque worker a donc fait au moins une
+inférence), puis relève pour chaque processus worker :
+- RSS : mémoire résidente (compte les pages partagées dans chaque worker)
+- USS : mémoire propre au worker (ce qu'un worker de plus coûte réellement)
+- PSS : mémoire proportionnelle (pages partagées divisées entre processus)
+En forkserver, le processus forkserver (qui détient les modèles) est compté à part.
+"""
+
+import argparse
+import multiprocessing
+import tempfile
+from pathlib import Path
+
+import psutil
+from PIL import Image, ImageDraw
+
+from backend.domains.ocr.services.worker_pool import OCRWorkerPool
+
+_MB = 1024 * 1024
+
+
+def _tickets(folder: Path, count: int) -> list[str]:
+    paths = []
+    for i in range(count):
+        img = Image.new("RGB", (480, 200), color="white")
+        draw = ImageDraw.Draw(img)
+        draw.text((40, 40), f"SUPERMARCHE {i}", fill="black")
+        draw.text((40, 90), f"TOTAL : {10 + i * 1.5:.2f}", fill="black")
+        draw.text((40, 140), "Date: 15/01/2026", fill="black")
+        path = folder / f"ticket_{i}.png"
+        img.save(path)
+        paths.append(str(path))
+    return paths
+
+
+def _memory(pids: list[int]) -> list[dict]:
+    out = []
+    for pid in pids:
+        info = psutil.Process(pid).memory_full_info()
+        out.append({"rss": info.rss / _MB, "uss": info.uss / _MB, "pss": getattr(info, "pss", 0) / _MB})
+    return out
+
+
+def _forkserver_pids(worker_pids: list[int]) -> list[int]:
+    parents = {psutil.Process(pid).ppid() for pid in worker_pids}
+    return sorted(p for p in parents if p != psutil.Process().pid)
+
+
+def measure(method: str, workers: int, tickets: list[str]) -> None:
+    pool = OCRWorkerPool(max_workers=workers, start_method=method)
+    pool.start()
+    try:
+        results = pool.process_batch(tickets)
+        errors = [err for _, _, err, _ in results if err]
+        pids = pool.health()["worker_pids"]
+        mem = _memory(pids)
+        extra = _memory(_forkserver_pids(pids)) if method == "forkserver" else []
+    finally:
+        pool.stop()
+
+    n = len(mem) or 1
+    avg = {k: sum(m[k] for m in mem) / n for k in ("rss", "uss", "pss")}
+    total_pss = sum(m["pss"] for m in mem + extra)
+    print(
+        f"{method:<11}{len(mem):>8}{avg['rss']:>10.0f}{avg['uss']:>10.0f}{avg['pss']:>10.0f}"
+        f"{total_pss:>12.0f}{len(errors):>8}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--tickets", type=int, default=8)
+    args = parser.parse_args()
+
+    methods = [m for m in ("spawn", "forkserver") if m in multiprocessing.get_all_start_methods()]
+    with tempfile.TemporaryDirectory() as tmp:
+        tickets = _tickets(Path(tmp), args.tickets)
+        print(f"{args.workers} workers, {args.tickets} tickets — moyennes par worker en Mo")
+        print(f"{'mode':<11}{'workers':>8}{'RSS':>10}{'USS':>10}{'PSS':>10}{'PSS total':>12}{'erreurs':>8}")
+        for method in methods:
+            measure(method, args.workers, tickets)
+
+
+if __name__ == "__main__":
+    main()
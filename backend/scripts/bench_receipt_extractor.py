@@ -0,0 +1,116 @@
+"""
+Benchmark de l'extraction structurée des tickets (total, date, TVA, paiement, articles).
+
+Usage:
+    python -m backend.scripts.bench_receipt_extractor [--tickets 2000] [--repeat 3] [--seed 7]
+
+Corpus : tickets synthétiques au format RapidOCR (un fragment par libellé et
+un par prix, boîtes légèrement décalées en hauteur comme sur une photo),
+5 à 80 articles, remise, total sous plusieurs formes, paiement, ventilation
+TVA, date. Comparés au coût de l'inférence OCR (plusieurs centaines de
+millisecondes par ticket) :
+- `PatternManager.scan` : montant, date et commerçant (patterns YAML) ;
+- `extract_receipt` : tous les champs en un passage sur les lignes.
+Mesures : latence par ticket (médiane de `--repeat` passages) et part des
+tickets dont le total, la date et les articles sont retrouvés.
+"""
+
+import argparse
+import logging
+import random
+import statistics
+import time
+from datetime import date
+
+from backend.domains.ocr.core.ocr_result import OCRLine, OCRResult
+from backend.domains.ocr.core.receipt_extractor import extract_receipt
+from backend.domains.ocr.services.pattern_manager import PatternManager
+
+_MERCHANTS = ["CARREFOUR MARKET", "BOULANGERIE DUPONT", "PHARMACIE DU CENTRE", "DECATHLON"]
+_TOTALS = ["TOTAL TTC", "NET A PAYER", "MONTANT TTC", "A PAYER"]
+_PAYMENTS = ["CB", "CARTE BANCAIRE", "ESPECES", "TITRE RESTAURANT"]
+_PRODUCTS = ["LAIT DEMI ECREME", "PAIN COMPLET", "YAOURT NATURE", "CAFE MOULU", "POMMES GOLDEN", "SAVON"]
+
+
+def _fragment(text: str, x: float, y: float, rng: random.Random) -> OCRLine:
+    y += rng.uniform(-4, 4)
+    return OCRLine(text=text, box=[[x, y], [x + 9 * len(text), y], [x + 9 * len(text), y + 22], [x, y + 22]],
+                   score=rng.uniform(0.8, 0.99))
+
+
+def _ticket(rng: random.Random):
+    y, lines, items = 10.0, [], []
+
+    def row(*cells):
+        nonlocal y
+        for x, text in cells:
+            lines.append(_fragment(text, x, y, rng))
+        y += 32
+
+    row((60, rng.choice(_MERCHANTS)))
+    row((20, "12 RUE DE LA PAIX 03200 VICHY"))
+    day = date(2026, rng.randint(1, 12), rng.randint(1, 28))
+    row((20, f"LE {day:%d/%m/%Y} A 12:{rng.randint(10, 59)}"))
+    for i in range(rng.randint(5, 80)):
+        amount = round(rng.uniform(0.5, 30), 2)
+        if rng.random() < 0.2:
+            quantity = rng.randint(2, 6)
+            unit = round(amount / quantity, 2)
+            amount = round(unit * quantity, 2)
+            row((20, rng.choice(_PRODUCTS)))
+            row((40, f"{quantity} X {unit:.2f}".replace(".", ",")), (320, f"{amount:.2f}".replace(".", ",")))
+        else:
+            row((20, f"{rng.choice(_PRODUCTS)} {rng.randint(1, 999)}G"), (320, f"{amount:.2f}".replace(".", ",")))
+        items.append(amount)
+    row((20, "REMISE FIDELITE"), (320, "-1,00"))
+    items.append(-1.0)
+    total = round(sum(items), 2)
+    amount = f"{total:.2f}".replace(".", ",")
+    row((20, rng.choice(_TOTALS)), (320, amount))
+    row((20, rng.choice(_PAYMENTS)), (320, amount))
+    base = round(total / 1.055, 2)
+    row((20, "5,50%"), (160, f"{base:.2f}".replace(".", ",")),
+        (240, f"{total - base:.2f}".replace(".", ",")), (320, amount))
+    row((60, "MERCI DE VOTRE VISITE"))
+    return OCRResult(lines=lines), (total, day, len(items))
+
+
+def _measure(fn, corpus: list, repeat: int):
+    timings, results = [], None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        results = [fn(result) for result, _ in corpus]
+        timings.append((time.perf_counter() - t0) / len(corpus))
+    return statistics.median(timings), results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--tickets", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+
+    rng = random.Random(args.seed)
+    corpus = [_ticket(rng) for _ in range(args.tickets)]
+    manager = PatternManager()
+    size = statistics.mean(len(result.lines) for result, _ in corpus)
+    print(f"{len(corpus)} tickets, {size:.0f} fragments OCR en moyenne")
+
+    seconds, fields = _measure(lambda r: manager.scan(r.text), corpus, args.repeat)
+    found = sum(f["amount"] == truth[0] and f["date"] == truth[1] for f, (_, truth) in zip(fields, corpus))
+    print(f"{'PatternManager.scan':<22}{seconds * 1e6:>9.1f} µs/ticket  total+date {found / len(corpus):.1%}")
+
+    seconds, receipts = _measure(extract_receipt, corpus, args.repeat)
+    found = sum(
+        r.total is not None and r.total.value == truth[0] and r.date is not None and r.date.value == truth[1]
+        for r, (_, truth) in zip(receipts, corpus)
+    )
+    items = sum(len(r.items) == truth[2] for r, (_, truth) in zip(receipts, corpus))
+    print(f"{'extract_receipt':<22}{seconds * 1e6:>9.1f} µs/ticket  total+date {found / len(corpus):.1%}"
+          f"  articles {items / len(corpus):.1%}")
+
+
+if __name__ == "__main__":
+    main()
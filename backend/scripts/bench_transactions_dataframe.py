@@ -0,0 +1,97 @@
+"""
+Benchmark : chemin DataFrame typé vs liste de modèles Pydantic.
+
+Usage:
+    python -m backend.scripts.bench_transactions_dataframe [--rows 20000] [--repeat 5]
+
+Crée une base chiffrée temporaire, y insère N transactions synthétiques puis
+compare, pour la même requête filtrée :
+- modèles  : TransactionRepository.get_filtered() puis pd.DataFrame(model_dump())
+- dataframe: TransactionRepository.get_dataframe() (colonnes typées directement)
+et un agrégat (somme par catégorie) sur chacun des deux résultats.
+"""
+
+import argparse
+import statistics
+import tempfile
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+import pandas as pd
+
+from backend.domains.transactions.repository import TransactionRepository
+from backend.domains.transactions.schema import init_transaction_table
+from backend.domains.attachments.schema import init_attachments_table
+from backend.shared.database import db_transaction
+
+
+def _fill(db_path: str, rows: int) -> None:
+    start = date(2022, 1, 1)
+    data = [
+        (
+            "revenu" if i % 10 == 0 else "depense",
+            f"Categorie {i % 15}",
+            f"Sous {i % 4}",
+            f"Achat numero {i}",
+            round(2.5 + (i % 500) * 0.41, 2),
+            (start + timedelta(days=i % 1400)).isoformat(),
+            "manual",
+        )
+        for i in range(rows)
+    ]
+    with db_transaction(db_path) as conn:
+        conn.executemany(
+            "INSERT INTO transactions (type, categorie, sous_categorie, description, montant, date, source)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?)",
+            data,
+        )
+
+
+def _median_ms(fn, repeat: int):
+    result, samples = None, []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1000, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = str(Path(tmp) / "bench.db")
+        init_transaction_table(db_path=db_path)
+        init_attachments_table(db_path=db_path)
+        _fill(db_path, args.rows)
+        repo = TransactionRepository(db_path=db_path, detect_duplicates=False)
+        filters = {"start_date": date(2022, 6, 1), "end_date": date(2025, 6, 1)}
+
+        t_models, df_models = _median_ms(
+            lambda: pd.DataFrame([t.model_dump() for t in repo.get_filtered(**filters)]),
+            args.repeat,
+        )
+        t_df, df_typed = _median_ms(lambda: repo.get_dataframe(**filters), args.repeat)
+
+        t_agg_models, _ = _median_ms(
+            lambda: df_models.groupby("categorie")["montant"].sum(), args.repeat
+        )
+        t_agg_df, _ = _median_ms(
+            lambda: df_typed.groupby("categorie", observed=True)["montant"].sum(), args.repeat
+        )
+
+    mem_models = df_models.memory_usage(deep=True).sum() / 1e6
+    mem_df = df_typed.memory_usage(deep=True).sum() / 1e6
+    print(f"{len(df_typed)} lignes filtrées sur {args.rows}, médiane sur {args.repeat} essais")
+    print(f"{'':<22}{'modèles':>12}{'dataframe':>12}{'gain':>8}")
+    print(f"{'chargement (ms)':<22}{t_models:>12.1f}{t_df:>12.1f}{t_models / t_df:>7.1f}x")
+    print(f"{'somme/catégorie (ms)':<22}{t_agg_models:>12.2f}{t_agg_df:>12.2f}{t_agg_models / t_agg_df:>7.1f}x")
+    print(f"{'mémoire (Mo)':<22}{mem_models:>12.1f}{mem_df:>12.1f}{mem_models / mem_df:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+"""
+Serveur local compatible avec l'API chat de Groq, pour les tests et benchmarks.
+
+Usage:
+    python -m backend.scripts.groq_stub [--port 8765] [--delay 0.2] [--prefill-ms-per-1k 40]
+    GROQ_BASE_URL=http://127.0.0.1:8765 GROQ_API_KEY=stub uvicorn ...
+
+Répond à POST /openai/v1/chat/completions (le chemin appelé par les clients
+`Groq` et `AsyncGroq` pointés sur `base_url`) avec une classification JSON :
+unitaire, ou liste indexée {"r": [...]} si la requête contient des tickets
+"### Ticket <i>". Comportements réglables à chaud depuis un test :
+- `delay` : latence ajoutée à chaque réponse (secondes) ;
+- `prefill_ms_per_1k` : latence supplémentaire par millier de jetons de prompt
+  (coût de lecture du prompt par le modèle, pour les benchmarks) ;
+- `failures` : codes HTTP à renvoyer pour les prochaines requêtes (file) ;
+- `respond` : fonction (messages) -> contenu JSON à renvoyer.
+Les requêtes reçues sont conservées dans `requests` (`peak` : maximum de
+requêtes traitées simultanément), et chaque réponse porte une estimation des
+jetons (`usage.prompt_tokens`, ~4 caractères par jeton).
+"""
+
+import argparse
+import json
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional
+
+CHAT_PATH = "/openai/v1/chat/completions"
+
+
+def estimate_tokens(text: str) -> int:
+    """Ordre de grandeur du nombre de jetons (tokeniseurs BPE : ~4 caractères)."""
+    return max(1, len(text) // 4)
+
+
+def default_respond(messages: List[Dict[str, str]]) -> Dict[str, Any]:
+    """Tout ticket est un plein d'essence ; format suivant le prompt reçu."""
+    user = messages[-1]["content"]
+    if "### Ticket" in user:
+        count = user.count("### Ticket")
+        return {"r": [{"i": i, "c": "Voiture", "s": "Essence", "d": "STATION"} for i in range(count)]}
+    return {"category": "Voiture", "subcategory": "Essence", "description": "STATION"}
+
+
+class GroqStub:
+    """Serveur HTTP en arrière-plan (thread), utilisable comme gestionnaire de contexte."""
+
+    def __init__(self, port: int = 0, delay: float = 0.0, prefill_ms_per_1k: float = 0.0):
+        self.delay = delay
+        self.prefill_ms_per_1k = prefill_ms_per_1k
+        self.failures: deque = deque()
+        self.respond: Callable[[List[Dict[str, str]]], Dict[str, Any]] = default_respond
+        self.requests: List[Dict[str, Any]] = []
+        self.active = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), self._handler())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+                with stub._lock:
+                    stub.requests.append(body)
+                    status = stub.failures.popleft() if stub.failures else 200
+                    stub.active += 1
+                    stub.peak = max(stub.peak, stub.active)
+                try:
+                    self._reply(body, status)
+                finally:
+                    with stub._lock:
+                        stub.active -= 1
+
+            def _reply(self, body: Dict[str, Any], status: int) -> None:
+                messages = body.get("messages") or []
+                prompt = "".join(m["content"] for m in messages)
+                delay = stub.delay + estimate_tokens(prompt) * stub.prefill_ms_per_1k / 1e6
+                if delay:
+                    time.sleep(delay)
+                if self.path != CHAT_PATH:
+                    status = 404
+                if status != 200:
+                    payload = {"error": {"message": f"stub {status}", "type": "stub"}}
+                else:
+                    content = json.dumps(stub.respond(messages), ensure_ascii=False)
+                    payload = {
+                        "id": f"stub-{len(stub.requests)}",
+                        "object": "chat.completion",
+                        "created": int(time.time()),
+                        "model": body.get("model", "stub"),
+                        "choices": [{
+                            "index": 0,
+                            "message": {"role": "assistant", "content": content},
+                            "finish_reason": "stop",
+                        }],
+                        "usage": {
+                            "prompt_tokens": estimate_tokens(prompt),
+                            "completion_tokens": estimate_tokens(content),
+                            "total_tokens": estimate_tokens(prompt) + estimate_tokens(content),
+                        },
+                    }
+                data = json.dumps(payload).encode()
+                try:
+                    self.send_response(status)
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("Content-Length", str(len(data)))
+                    self.end_headers()
+                    self.wfile.write(data)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass  # client parti (délai dépassé)
+
+        return Handler
+
+    def start(self) -> "GroqStub":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "GroqStub":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--delay", type=float, default=0.0)
+    parser.add_argument("--prefill-ms-per-1k", type=float, default=0.0)
+    args = parser.parse_args()
+
+    stub = GroqStub(port=args.port, delay=args.delay, prefill_ms_per_1k=args.prefill_ms_per_1k)
+    print(f"Stub Groq sur {stub.url} (Ctrl+C pour arrêter)")
+    try:
+        stub._server.serve_forever()
+    except KeyboardInterrupt:
+        stub.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -6,6 +6,7 @@
     execute_all,
     execute_write,
     execute_many,
+    stream_rows,
 )
 from .base_repository import BaseRepository
 
@@ -17,5 +18,6 @@
     "execute_all",
     "execute_write",
     "execute_many",
+    "stream_rows",
     "BaseRepository",
 ]
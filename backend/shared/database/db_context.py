@@ -3,8 +3,10 @@
 """
 
 import logging
+import queue
+import threading
 from contextlib import contextmanager
-from typing import Generator, Optional
+from typing import Generator, Iterator, List, Optional
 
 from sqlcipher3 import dbapi2 as sqlcipher
 
@@ -111,3 +113,65 @@ def execute_many(
         cursor = conn.cursor()
         cursor.executemany(query, params_list)
         return cursor.rowcount
+
+
+_STREAM_END = object()
+
+
+def stream_rows(
+    query: str,
+    params: tuple = (),
+    chunk_size: int = 1000,
+    db_path: Optional[str] = None,
+    max_pending_chunks: int = 2,
+) -> Iterator[List[sqlcipher.Row]]:
+    """
+    Itère sur le résultat d'une requête SELECT par paquets de `chunk_size` lignes.
+
+    Un thread dédié possède la connexion et le curseur (`fetchmany`) : le
+    générateur peut donc être consommé depuis n'importe quel thread (ex:
+    StreamingResponse de FastAPI). La file bornée limite la mémoire à
+    `max_pending_chunks` paquets, quelle que soit la taille du résultat.
+
+    Usage:
+        for rows in stream_rows("SELECT * FROM transactions", chunk_size=500):
+            ...
+    """
+    buffer: queue.Queue = queue.Queue(maxsize=max_pending_chunks)
+    stop = threading.Event()
+
+    def _put(item) -> bool:
+        while not stop.is_set():
+            try:
+                buffer.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _produce() -> None:
+        try:
+            with db_transaction(db_path) as conn:
+                cursor = conn.cursor()
+                cursor.execute(query, params)
+                while not stop.is_set():
+                    rows = cursor.fetchmany(chunk_size)
+                    if not rows or not _put(rows):
+                        break
+            _put(_STREAM_END)
+        except Exception as e:
+            _put(e)
+
+    producer = threading.Thread(target=_produce, name="db-stream", daemon=True)
+    producer.start()
+    try:
+        while True:
+            item = buffer.get()
+            if item is _STREAM_END:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        # Consommateur arrêté (fin, erreur ou client déconnecté) : libérer le producteur
+        stop.set()
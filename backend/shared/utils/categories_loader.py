@@ -3,9 +3,10 @@
 Fallback automatique sur les constantes si le fichier est absent ou corrompu.
 """
 
+import hashlib
 import logging
 from pathlib import Path
-from typing import List, Dict
+from typing import List, Dict, Optional, Tuple
 
 import yaml
 
@@ -18,6 +19,9 @@
 # Cache en mémoire — chargé une seule fois au démarrage
 _cache: Dict | None = None
 
+# Signature du fichier (mtime_ns, taille) et empreinte de son contenu
+_fingerprint: Optional[Tuple[Tuple[int, int], str]] = None
+
 
 def _load() -> Dict:
     """Charge et met en cache le YAML."""
@@ -46,6 +50,27 @@ def _load() -> Dict:
         return _cache
 
 
+def categories_fingerprint() -> str:
+    """
+    Empreinte courte du contenu de categories.yaml (versionne ce qui en dérive :
+    prompt LLM, réponses en cache). Un simple stat par appel ; si le fichier a
+    changé sur disque, le cache en mémoire est invalidé.
+    """
+    global _cache, _fingerprint
+    try:
+        stat = _YAML_PATH.stat()
+    except OSError:
+        return "absent"
+    signature = (stat.st_mtime_ns, stat.st_size)
+    if _fingerprint is None or _fingerprint[0] != signature:
+        digest = hashlib.sha256(_YAML_PATH.read_bytes()).hexdigest()[:16]
+        if _fingerprint is not None and _fingerprint[1] != digest:
+            _cache = None
+            logger.info("categories.yaml modifié sur disque : rechargement.")
+        _fingerprint = (signature, digest)
+    return _fingerprint[1]
+
+
 def get_categories() -> List[str]:
     """Retourne la liste ordonnée des noms de catégories."""
     data = _load()
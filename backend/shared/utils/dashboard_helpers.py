@@ -1,7 +1,7 @@
 """Dashboard helpers - Fonctions utilitaires pour le dashboard."""
 
 from datetime import date
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Tuple
 
 from backend.shared.database import db_transaction
 from backend.domains.echeance.model import Echeance
@@ -161,8 +161,17 @@ def build_budget_summary() -> dict:
         return {"total_budget_prevu": 0, "total_consomme": 0, "repartition_budget": []}
 
     start, end = get_month_range()
+    from backend.domains.transactions import columnar
     from backend.domains.transactions.repository import transaction_repository
-    
+
+    store = columnar.get_store(transaction_repository.db_path)
+    if store is not None:
+        with store.reading():
+            expenses = store.sum_by(
+                "categorie", store.mask(start, end, end_inclusive=False, type="depense")
+            )
+        return _budget_summary(cats, expenses)
+
     results = transaction_repository.get_time_filtered(
         start_date=start,
         end_date=end,
@@ -174,7 +183,10 @@ def build_budget_summary() -> dict:
         raw=True
     )
     expenses = {r["categorie"]: r["total"] for r in results} if results else {}
+    return _budget_summary(cats, expenses)
 
+
+def _budget_summary(cats: Dict[str, float], expenses: Dict[str, float]) -> dict:
     total_prev = sum(cats.values())
     total_cons = sum(expenses.get(c, 0) for c in cats)
     return {
@@ -187,6 +199,33 @@ def build_budget_summary() -> dict:
     }
 
 
+def summarize_transactions(
+    repo,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    category: Optional[str] = None,
+) -> Tuple[float, float, List[dict], Dict]:
+    """
+    (revenus, depenses, historique quotidien, agrégat par type) sur la période.
+
+    Répond depuis le snapshot colonnaire s'il est activé (GESTIO_COLUMNAR_STORE),
+    sinon relit les transactions en base.
+    """
+    from backend.domains.transactions import columnar
+
+    store = columnar.get_store(repo.db_path)
+    if store is not None:
+        with store.reading():
+            mask = store.mask(start_date, end_date, category=category)
+            revenus, depenses = store.totals_by_type(mask)
+            return revenus, depenses, store.daily_history(mask), store.aggregate_by_type(mask)
+
+    txs = repo.get_filtered(start_date=start_date, end_date=end_date, category=category)
+    revenus = sum(t.montant for t in txs if t.type == "revenu")
+    depenses = sum(t.montant for t in txs if t.type == "depense")
+    return revenus, depenses, build_daily_history(txs), aggregate_by_type(txs)
+
+
 def build_daily_history(transactions: List) -> List[dict]:
     """Construit l'historique quotidien pour le graphique de solde."""
     daily: Dict[str, Dict[str, float]] = {}
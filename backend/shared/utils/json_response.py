@@ -0,0 +1,66 @@
+"""
+Réponses JSON rapides pour les gros payloads.
+
+Par défaut, FastAPI passe les endpoints sans `response_model` par
+`jsonable_encoder` (arbre de dicts intermédiaire parcouru en Python) puis
+`json.dumps`. Pour les endpoints avec `response_model`, il revalide la valeur
+retournée avant de la sérialiser.
+
+- `FastJSONResponse` : sérialise directement en bytes (orjson si installé,
+  sinon `pydantic_core.to_json`). L'endpoint doit la retourner lui-même :
+  avec `response_class=` seul, FastAPI appelle encore `jsonable_encoder`.
+- `model_json_response()` : sérialise une liste de modèles déjà validés avec un
+  `TypeAdapter` (cœur Rust de Pydantic), sans revalidation ni dict intermédiaire.
+  Le `response_model` de la route reste déclaré pour la doc OpenAPI.
+
+orjson (optionnel) : uv add orjson
+"""
+
+import logging
+from typing import Any
+
+import pydantic_core
+from fastapi.responses import JSONResponse, Response
+from pydantic import BaseModel, TypeAdapter
+
+logger = logging.getLogger(__name__)
+
+ORJSON_AVAILABLE = False
+
+try:
+    import orjson
+
+    ORJSON_AVAILABLE = True
+    _ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+except ImportError:
+    orjson = None
+
+
+def _orjson_default(obj: Any) -> Any:
+    """Types non gérés nativement par orjson (modèles Pydantic, Decimal, Path...)."""
+    if isinstance(obj, BaseModel):
+        return obj.model_dump(mode="json")
+    return pydantic_core.to_jsonable_python(obj)
+
+
+def dumps(content: Any) -> bytes:
+    """Sérialise en JSON (bytes UTF-8) sans passer par jsonable_encoder."""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(content, default=_orjson_default, option=_ORJSON_OPTIONS)
+    return pydantic_core.to_json(content)
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse dont le rendu évite l'arbre de dicts intermédiaire."""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def model_json_response(adapter: TypeAdapter, content: Any, status_code: int = 200) -> Response:
+    """Réponse pour des modèles déjà validés (ex: `TypeAdapter(List[Transaction])`)."""
+    return Response(
+        content=adapter.dump_json(content),
+        media_type="application/json",
+        status_code=status_code,
+    )
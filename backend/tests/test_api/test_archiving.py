@@ -11,6 +11,7 @@
 from backend.domains.attachments.api import (
     archive_file as _archive_file,
 )
+from backend.domains.attachments.service import archive_bytes
 from backend.domains.transactions.model import Transaction
 
 
@@ -156,6 +157,23 @@ def test_archive_income_pdf(self, temp_dir):
         assert "Épargne" in result
         assert "Salaire" in result
 
+    def test_archive_bytes_ecrit_une_fois_sans_ecraser(self, temp_dir):
+        """Upload archivé directement depuis la mémoire, suffixe si le nom existe."""
+        tx = Transaction(
+            type="Dépense",
+            categorie="Alimentation",
+            sous_categorie="Supermarché",
+            montant=0.0,
+            date="2026-01-15",
+        )
+        first = archive_bytes(b"data1", "ticket.jpg", transaction=tx, target_base_dir=temp_dir)
+        second = archive_bytes(b"data2", "ticket.jpg", transaction=tx, target_base_dir=temp_dir)
+
+        assert os.path.basename(first) == "ticket.jpg"
+        assert os.path.basename(second) == "ticket_1.jpg"
+        assert Path(first).read_bytes() == b"data1"
+        assert Path(second).read_bytes() == b"data2"
+
 
 class TestArchiveTicketFile:
     """Tests de la fonction _archive_file pour les tickets."""
@@ -8,10 +8,12 @@
 import logging
 from pathlib import Path
 
+import numpy as np
 import pytest
 from fastapi.testclient import TestClient
 from PIL import Image, ImageDraw
 
+from backend.domains.ocr.services import ticket_index
 from backend.domains.transactions.schema import init_transaction_table
 from backend.main import app
 
@@ -41,6 +43,12 @@ def create_ticket_image(
     return buffer
 
 
+@pytest.fixture(autouse=True)
+def _sans_detection_doublons(monkeypatch):
+    """Les tickets de test, identiques d'une exécution à l'autre, sont déjà archivés."""
+    monkeypatch.setenv(ticket_index.ENV_CHECK, "0")
+
+
 class TestOCREndpoint:
     """Tests de l'endpoint /api/ocr/scan."""
 
@@ -128,6 +136,107 @@ def test_scan_response_structure(self):
         assert "description" in transaction
         assert "sous_categorie" in transaction
         assert "source" in transaction
+        # Résultat OCR structuré de l'unique inférence
+        assert data["ocr_lines"] and {"text", "box", "score"} <= set(data["ocr_lines"][0])
+        assert 0 < data["ocr_confidence"] <= 1
+        assert "total" in data["ocr_timings"]
+
+    def test_scan_sans_fichier_temporaire(self, tmp_path, monkeypatch):
+        """L'upload est décodé en mémoire : seul le fichier d'archive est écrit."""
+        monkeypatch.chdir(tmp_path)
+        buffer = create_ticket_image(text_lines=["TOTAL : 18.40", "Date: 02/03/2026"], format="PNG")
+        content = buffer.getvalue()
+
+        response = client.post(
+            "/api/ocr/scan", files={"file": ("memoire.png", content, "image/png")}
+        )
+
+        assert response.status_code == 200
+        assert list(tmp_path.iterdir()) == []
+        archived = Path(response.json()["archived_path"])
+        assert archived.read_bytes() == content
+        archived.unlink()
+
+    def test_scan_batch_en_memoire(self, tmp_path, monkeypatch):
+        """Lot traité depuis les octets uploadés, sans fichier temporaire."""
+        monkeypatch.chdir(tmp_path)
+        files = [
+            ("files", (f"lot_{i}.jpg", create_ticket_image(text_lines=[f"TOTAL : {i + 3}.20"]), "image/jpeg"))
+            for i in range(2)
+        ] + [("files", ("ignore.txt", b"texte", "text/plain"))]
+
+        response = client.post("/api/ocr/scan-batch", files=files)
+
+        assert response.status_code == 200
+        results = response.json()["results"]
+        assert len(results) == 2
+        assert all(r["transaction"]["montant"] > 0 for r in results)
+        assert list(tmp_path.iterdir()) == []
+
+    def test_scan_doublon_refuse_avant_ocr(self, tmp_path, monkeypatch):
+        """Un ticket déjà archivé est refusé (409) sans inférence, sauf avec force=true."""
+        monkeypatch.delenv(ticket_index.ENV_CHECK)
+        index = ticket_index.TicketIndex(tmp_path / "archive", tmp_path / "index.jsonl")
+        monkeypatch.setattr(ticket_index, "_index", index)
+
+        blobs = np.random.default_rng(7).integers(0, 255, (24, 32), dtype=np.uint8)
+        photo = Image.fromarray(blobs).resize((640, 480), Image.BICUBIC).convert("RGB")
+        original, copy = io.BytesIO(), io.BytesIO()
+        photo.save(original, format="JPEG", quality=90)
+        photo.resize((320, 240)).save(copy, format="JPEG", quality=60)
+
+        first = client.post("/api/ocr/scan", files={"file": ("photo.jpg", original.getvalue(), "image/jpeg")})
+        assert first.status_code == 200
+        archived = [Path(first.json()["archived_path"])]
+        assert len(index) == 1
+
+        from backend.domains.ocr.services.ocr_service import get_ocr_service
+
+        with monkeypatch.context() as m:
+            m.setattr(get_ocr_service(), "process_ticket_result", lambda *a, **k: 1 / 0)
+            again = client.post("/api/ocr/scan", files={"file": ("renvoi.jpg", copy.getvalue(), "image/jpeg")})
+        assert again.status_code == 409
+        assert "photo" in again.json()["detail"]
+
+        forced = client.post(
+            "/api/ocr/scan?force=true", files={"file": ("renvoi.jpg", copy.getvalue(), "image/jpeg")}
+        )
+        assert forced.status_code == 200
+        archived.append(Path(forced.json()["archived_path"]))
+        for path in archived:
+            path.unlink()
+
+    def test_scan_batch_doublons_a_leur_rang(self, tmp_path, monkeypatch):
+        """Les doublons écartés restent à leur place dans les résultats du lot."""
+        monkeypatch.delenv(ticket_index.ENV_CHECK)
+        monkeypatch.chdir(tmp_path)
+        index = ticket_index.TicketIndex(tmp_path / "archive", tmp_path / "index.jsonl")
+        monkeypatch.setattr(ticket_index, "_index", index)
+
+        blobs = np.random.default_rng(11).integers(0, 255, (24, 32), dtype=np.uint8)
+        photo = Image.fromarray(blobs).resize((640, 480), Image.BICUBIC).convert("RGB")
+        original, copy = io.BytesIO(), io.BytesIO()
+        photo.save(original, format="JPEG", quality=90)
+        photo.resize((320, 240)).save(copy, format="JPEG", quality=60)
+        files = [
+            ("files", ("premier.jpg", original.getvalue(), "image/jpeg")),
+            ("files", ("lot.jpg", create_ticket_image(text_lines=["TOTAL : 7.30"]).getvalue(), "image/jpeg")),
+            ("files", ("copie.jpg", copy.getvalue(), "image/jpeg")),
+            ("files", ("dernier.jpg", create_ticket_image(text_lines=["TOTAL : 9.10"]).getvalue(), "image/jpeg")),
+        ]
+
+        response = client.post("/api/ocr/scan-batch", files=files)
+
+        assert response.status_code == 200
+        results = response.json()["results"]
+        assert [r["transaction"]["categorie"] == "Doublon" for r in results] == [False, False, True, False]
+        assert "copie.jpg" in results[2]["transaction"]["description"]
+
+    def test_scan_batch_sans_fichier_valide(self):
+        response = client.post(
+            "/api/ocr/scan-batch", files=[("files", ("a.txt", b"x", "text/plain"))]
+        )
+        assert response.status_code == 400
 
 
 class TestTransactionsEndpoint:
@@ -0,0 +1,104 @@
+"""
+Tests de l'autoscaler du pool OCR (services/autoscaler.py).
+Pool non démarré : seules les décisions et leur application sont testées.
+"""
+
+import json
+from pathlib import Path
+
+import pytest
+
+from backend.domains.ocr.services import autoscaler as autoscaler_module
+from backend.domains.ocr.services.autoscaler import OCRAutoscaler
+from backend.domains.ocr.services.worker_pool import OCRWorkerPool
+
+
+def _sample(**overrides) -> dict:
+    sample = {
+        "workers": 2,
+        "in_flight": 2,
+        "queue_depth": 0,
+        "median_latency_s": 1.0,
+        "workers_rss_mb": 600.0,
+        "worker_rss_mb": 300.0,
+        "memory_percent": 40.0,
+        "available_mb": 4000.0,
+    }
+    sample.update(overrides)
+    return sample
+
+
+@pytest.fixture
+def scaler(tmp_path: Path) -> OCRAutoscaler:
+    pool = OCRWorkerPool(max_workers=2, start_method="spawn")
+    return OCRAutoscaler(
+        pool, min_workers=1, max_workers=4, interval=1, memory_high_percent=85,
+        log_path=tmp_path / "decisions.jsonl",
+    )
+
+
+@pytest.mark.unit
+def test_decisions(scaler: OCRAutoscaler):
+    assert scaler.decide(_sample(queue_depth=3)) == (3, "queue")
+    assert scaler.decide(_sample(queue_depth=3, memory_percent=80)) == (2, "memory-headroom")
+    assert scaler.decide(_sample(queue_depth=3, available_mb=500)) == (2, "memory-headroom")
+    assert scaler.decide(_sample(memory_percent=90)) == (1, "memory")
+    assert scaler.decide(_sample(workers=4, queue_depth=9)) == (4, "steady")
+    # Retrait pas encore appliqué par le pool : pas de nouvelle décision
+    assert scaler.decide(_sample(memory_percent=90, resize_pending=True)) == (2, "pending")
+
+
+@pytest.mark.unit
+def test_latence_degradee_bloque_la_croissance(scaler: OCRAutoscaler, monkeypatch):
+    monkeypatch.setattr(scaler, "sample", lambda: _sample(queue_depth=4, median_latency_s=1.0))
+    assert scaler.step()["action"] == "grow"
+    scaler._cooldown = 0
+    assert scaler.decide(_sample(workers=3, queue_depth=4, median_latency_s=2.0)) == (3, "latency")
+
+
+@pytest.mark.unit
+def test_inactivite_retire_un_worker(scaler: OCRAutoscaler):
+    idle = _sample(in_flight=0)
+    for _ in range(autoscaler_module._IDLE_ROUNDS - 1):
+        assert scaler.decide(idle) == (2, "steady")
+    assert scaler.decide(idle) == (1, "idle")
+
+
+@pytest.mark.unit
+def test_step_applique_et_journalise(scaler: OCRAutoscaler, monkeypatch):
+    monkeypatch.setattr(scaler, "sample", lambda: _sample(workers=scaler.pool.max_workers, queue_depth=5))
+    decision = scaler.step()
+    assert (decision["action"], decision["from_workers"], decision["to_workers"]) == ("grow", 2, 3)
+    assert scaler.pool.max_workers == 3
+
+    # Période de stabilisation : pas de nouveau changement, rien de journalisé
+    assert scaler.step()["reason"] == "cooldown"
+    assert len(scaler.decisions) == 1
+    lines = scaler.log_path.read_text(encoding="utf-8").splitlines()
+    assert [json.loads(line)["to_workers"] for line in lines] == [3]
+
+    # La pression mémoire passe outre la stabilisation
+    monkeypatch.setattr(scaler, "sample", lambda: _sample(workers=scaler.pool.max_workers, memory_percent=95))
+    assert scaler.step()["action"] == "shrink"
+    assert scaler.pool.max_workers == 2
+
+
+@pytest.mark.unit
+def test_autoscaler_seul_pilote_des_workers(tmp_path: Path):
+    pool = OCRWorkerPool(start_method="spawn")
+    assert pool.auto_plan
+    scaler = OCRAutoscaler(pool, min_workers=1, max_workers=4, interval=60, log_path=None)
+    scaler.start()
+    try:
+        # Le planificateur ne change plus le nombre de workers
+        assert not pool.auto_plan
+    finally:
+        scaler.stop()
+
+
+@pytest.mark.unit
+def test_start_autoscaler_sans_pool_ou_desactive(monkeypatch):
+    assert autoscaler_module.start_autoscaler(None) is None
+    monkeypatch.setenv(autoscaler_module.ENV_ENABLED, "0")
+    assert autoscaler_module.start_autoscaler(OCRWorkerPool(max_workers=1)) is None
+    assert autoscaler_module.get_autoscaler() is None
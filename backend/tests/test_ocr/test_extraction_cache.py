@@ -0,0 +1,141 @@
+"""
+Tests du cache persistant des résultats d'extraction (core/extraction_cache.py).
+"""
+
+from pathlib import Path
+
+import pytest
+from PIL import Image, ImageDraw
+
+from backend.domains.ocr.core import extraction_cache
+from backend.domains.ocr.core.extraction_cache import ExtractionCache
+
+
+@pytest.fixture
+def cache(tmp_path: Path) -> ExtractionCache:
+    return ExtractionCache(tmp_path / "cache.db", max_bytes=1024 * 1024)
+
+
+@pytest.mark.unit
+def test_cle_depend_du_contenu_et_de_la_version():
+    key = ExtractionCache.make_key(b"ticket", "ocr", "v1")
+    assert key == ExtractionCache.make_key(b"ticket", "ocr", "v1")
+    assert key != ExtractionCache.make_key(b"ticket", "ocr", "v2")
+    assert key != ExtractionCache.make_key(b"ticket", "pdf_text", "v1")
+    assert key != ExtractionCache.make_key(b"ticket2", "ocr", "v1")
+
+
+@pytest.mark.unit
+def test_calcul_unique_par_contenu(cache: ExtractionCache):
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return "TOTAL 12.00"
+
+    for _ in range(3):
+        assert cache.get_or_compute(b"pdf", "pdf_text", "v1", compute, str, str) == "TOTAL 12.00"
+    assert len(calls) == 1
+    assert cache.stats()["hits"] == 2
+
+
+@pytest.mark.unit
+def test_erreur_de_calcul_non_stockee(cache: ExtractionCache):
+    def fail():
+        raise ValueError("PDF corrompu")
+
+    with pytest.raises(ValueError):
+        cache.get_or_compute(b"pdf", "pdf_text", "v1", fail, str, str)
+    assert cache.stats()["entries"] == 0
+
+
+@pytest.mark.unit
+def test_eviction_lru(tmp_path: Path):
+    cache = ExtractionCache(tmp_path / "cache.db", max_bytes=250, touch_interval=0)
+    for name in ("a", "b", "c"):
+        cache.put(name, "ocr", name * 80)
+    cache.get("a")  # "a" redevient la plus récente
+    cache.put("d", "ocr", "d" * 80)
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("d") is not None
+    assert cache.stats()["bytes"] <= 250
+
+
+@pytest.mark.unit
+def test_lecture_sans_ecriture_et_taille_tenue_a_jour(tmp_path: Path):
+    cache = ExtractionCache(tmp_path / "cache.db", max_bytes=250)
+    conn = cache.connect()
+
+    def last_access(key):
+        return conn.execute("SELECT last_access FROM extraction_cache WHERE key = ?", (key,)).fetchone()[0]
+
+    cache.put("a", "ocr", "a" * 80)
+    before = last_access("a")
+    assert cache.get("a") is not None
+    # Accès récent : date non réécrite (pas de transaction d'écriture)
+    assert last_access("a") == before
+
+    cache.put("a", "ocr", "a" * 50)  # remplacement : ancienne taille déduite
+    cache.put("b", "ocr", "b" * 80)
+    assert cache.stats()["bytes"] == 130
+    cache.put("c", "ocr", "c" * 150)  # 280 > 250 : éviction de "a" puis "b"
+    total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM extraction_cache").fetchone()[0]
+    assert cache.stats()["bytes"] == total <= 250
+    cache.clear()
+    assert cache.stats()["bytes"] == 0
+
+
+@pytest.mark.unit
+def test_cache_desactive(monkeypatch):
+    monkeypatch.setenv(extraction_cache.ENV_CACHE, "0")
+    assert extraction_cache.get_extraction_cache() is None
+    assert extraction_cache.cached(b"x", "ocr", "v1", lambda: "calculé") == "calculé"
+
+
+@pytest.mark.ocr
+def test_ticket_deja_reconnu_relu_depuis_le_cache(
+    cache: ExtractionCache, tmp_path: Path, monkeypatch
+):
+    from backend.domains.ocr.services.ocr_service import get_ocr_service
+
+    monkeypatch.setattr(extraction_cache, "_cache", cache)
+    path = tmp_path / "t.png"
+    img = Image.new("RGB", (400, 150), color="white")
+    ImageDraw.Draw(img).text((50, 30), "TOTAL : 23.40", fill="black")
+    img.save(str(path))
+
+    service = get_ocr_service()
+    first = service.recognize(str(path))
+
+    def _no_inference(*args, **kwargs):
+        raise AssertionError("inférence relancée")
+
+    monkeypatch.setattr(service, "_infer", _no_inference)
+    # Même contenu sous un autre nom (ré-upload) : lecture du cache
+    again = service.recognize(path.read_bytes())
+    assert again.text == first.text
+    assert [line.box for line in again.lines] == [line.box for line in first.lines]
+    assert set(again.timings) == {"cache", "total"}
+
+
+@pytest.mark.unit
+def test_ouverture_concurrente_de_la_base(tmp_path: Path):
+    import threading
+
+    errors = []
+    barrier = threading.Barrier(8)
+
+    def _open():
+        barrier.wait()
+        try:
+            ExtractionCache(tmp_path / "cache.db", max_bytes=1000).connect()
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=_open) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert errors == []
@@ -0,0 +1,235 @@
+"""
+Tests de la surveillance des dossiers de dépôt (services/folder_watcher.py, watcher.py).
+"""
+
+import os
+import threading
+import time
+
+import pytest
+
+from backend.domains.ocr.services.folder_watcher import FolderWatcher
+
+
+def _watcher(tmp_path, **kwargs) -> FolderWatcher:
+    defaults = dict(mode="poll", poll_interval=60, debounce=1.0, stable_seconds=2.0)
+    defaults.update(kwargs)
+    return FolderWatcher([tmp_path], process=lambda paths: None, **defaults)
+
+
+@pytest.mark.unit
+def test_fichier_lu_une_fois_stable(tmp_path):
+    watcher = _watcher(tmp_path)
+    photo = tmp_path / "ticket.jpg"
+    photo.write_bytes(b"x" * 100)
+
+    watcher.notify(photo)
+    watcher.notify(tmp_path / "ailleurs" / "autre.jpg")  # hors des dossiers surveillés
+    t0 = time.monotonic()
+    # Événements récents : attente du délai anti-rebond
+    ready, wait = watcher.collect_ready(t0)
+    assert ready == [] and 0 < wait <= 1.0
+
+    # Première mesure de taille, puis la copie continue
+    assert watcher.collect_ready(t0 + 1.5) == ([], 2.0)
+    photo.write_bytes(b"x" * 200)
+    assert watcher.collect_ready(t0 + 3.6)[0] == []
+
+    # Taille inchangée pendant stable_seconds : prêt, retiré de l'attente
+    assert watcher.collect_ready(t0 + 4.0)[0] == []
+    assert watcher.collect_ready(t0 + 5.7) == ([photo], None)
+    assert watcher.pending == 0
+
+    # Fichier disparu avant d'être stable : oublié
+    watcher.notify(photo)
+    photo.unlink()
+    assert watcher.collect_ready(t0 + 10) == ([], None) and watcher.pending == 0
+
+
+@pytest.mark.unit
+def test_scrutation_en_repli(tmp_path):
+    processed, done = [], threading.Event()
+
+    def _process(paths):
+        processed.extend((p.name, p.stat().st_size) for p in paths)
+        done.set()
+
+    (tmp_path / "deja_la.png").write_bytes(b"x" * 10)
+    (tmp_path / "notes.txt").write_text("ignoré")
+    watcher = FolderWatcher(
+        [tmp_path],
+        process=_process,
+        accept=lambda path: path.suffix == ".png",
+        mode="poll",
+        poll_interval=0.05,
+        debounce=0.0,
+        stable_seconds=0.3,
+    )
+    watcher.start()
+    try:
+        assert watcher.mode == "poll"
+        assert done.wait(5)
+        assert processed == [("deja_la.png", 10)]
+        (tmp_path / "deja_la.png").unlink()
+
+        # Photo copiée en plusieurs fois : traitée une seule fois, complète
+        done.clear()
+        photo = tmp_path / "nouveau.png"
+        with open(photo, "wb") as f:
+            for _ in range(4):
+                f.write(b"x" * 1000)
+                f.flush()
+                time.sleep(0.1)
+        assert done.wait(5)
+        assert processed[1:] == [("nouveau.png", 4000)]
+        assert watcher.status()["polls"] > 1
+    finally:
+        watcher.stop()
+    assert not watcher.status()["running"]
+
+
+@pytest.mark.unit
+def test_evenements_sans_scrutation(tmp_path):
+    pytest.importorskip("watchdog")
+    processed, done = [], threading.Event()
+
+    def _process(paths):
+        processed.extend(p.name for p in paths)
+        done.set()
+
+    watcher = FolderWatcher(
+        [tmp_path], process=_process, mode="events", poll_interval=3600,
+        debounce=0.05, stable_seconds=0.1,
+    )
+    watcher.start()
+    try:
+        assert watcher.mode == "events"
+        (tmp_path / "ticket.jpg").write_bytes(b"x" * 10)
+        assert done.wait(5)
+        assert processed == ["ticket.jpg"]
+        assert watcher.status()["polls"] == 1  # parcours initial seulement
+    finally:
+        watcher.stop()
+
+
+@pytest.mark.unit
+def test_evenements_reprise_des_fichiers_en_echec(tmp_path, monkeypatch):
+    """Mode événements : un ticket resté après un échec est repris par le parcours espacé."""
+    attempts, done = [], threading.Event()
+
+    def _process(paths):
+        attempts.extend(p.name for p in paths)
+        if len(attempts) == 1:
+            raise RuntimeError("OCR en échec")
+        done.set()
+
+    (tmp_path / "ticket.jpg").write_bytes(b"x" * 10)
+    watcher = FolderWatcher(
+        [tmp_path], process=_process, mode="events", sweep_interval=0.1,
+        debounce=0.0, stable_seconds=0.05,
+    )
+    # Observateur factice : aucun événement, seul le parcours signale le fichier
+    monkeypatch.setattr(watcher, "_start_observer", lambda: True)
+    watcher.start()
+    try:
+        assert done.wait(5)
+        assert attempts == ["ticket.jpg", "ticket.jpg"]
+        assert watcher.status()["sweep_interval"] == 0.1
+    finally:
+        watcher.stop()
+
+
+@pytest.mark.unit
+def test_dossiers_du_watcher_ocr():
+    from backend.config.paths import REVENUS_A_TRAITER, TO_SCAN_DIR
+    from backend.domains.ocr.watcher import _accepts
+
+    assert _accepts(TO_SCAN_DIR / "ticket.jpg")
+    assert _accepts(TO_SCAN_DIR / "fiche.pdf")
+    assert _accepts(REVENUS_A_TRAITER / "fiche.pdf")
+    assert not _accepts(REVENUS_A_TRAITER / "photo.jpg")
+    assert not _accepts(TO_SCAN_DIR / ".ticket.jpg.swp")
+    assert not _accepts(TO_SCAN_DIR / "~$ticket.jpg")
+
+
+@pytest.mark.unit
+def test_scan_en_flux_borne(tmp_path, monkeypatch):
+    from concurrent.futures import ThreadPoolExecutor
+    from datetime import date
+
+    from backend.domains.ocr import watcher
+    from backend.domains.transactions.model import Transaction
+
+    active, peak, lock = [0], [0], threading.Lock()
+
+    class _Pool:
+        max_workers = 2
+
+        def __init__(self):
+            self.executor = ThreadPoolExecutor(max_workers=8)
+
+        def _ocr(self, idx, path, categorize):
+            with lock:
+                active[0] += 1
+                peak[0] = max(peak[0], active[0])
+            time.sleep(0.02)
+            with lock:
+                active[0] -= 1
+            if "illisible" in path:
+                return idx, path, None, "OCR échoué", 0.02, None
+            tx = Transaction(type="depense", categorie="Autre", montant=idx + 1.0, date=date(2026, 3, 1))
+            return idx, path, tx, None, 0.02, f"TICKET {idx}"
+
+        def submit_ticket(self, idx, path, categorize=True):
+            assert categorize is False  # catégorisation groupée à l'insertion
+            return self.executor.submit(self._ocr, idx, path, categorize)
+
+    class _Service:
+        batch_categorize = True
+
+        def categorize_transactions(self, drafts, report=None):
+            return [tx.model_copy(update={"categorie": "Alimentation"}) for tx, _ in drafts]
+
+    batches, archived = [], []
+
+    class _Repository:
+        def add_many(self, txs):
+            batches.append([tx.categorie for tx in txs])
+            # Insertion refusée pour le ticket 7
+            return [None if tx.montant == 8.0 else i for i, tx in enumerate(txs, 1)]
+
+    def _archive(path, transaction=None, target_base_dir=None, is_ticket=True):
+        archived.append(os.path.basename(path))
+        return None
+
+    pool = _Pool()
+    monkeypatch.setattr(watcher, "get_worker_pool", lambda: pool)
+    monkeypatch.setattr(watcher, "get_ocr_service", lambda: _Service())
+    monkeypatch.setattr(watcher, "get_ticket_index", lambda: None)
+    monkeypatch.setattr(watcher, "transaction_repository", _Repository())
+    monkeypatch.setattr(watcher, "_archive_file", _archive)
+    monkeypatch.setenv(watcher.ENV_INSERT_BATCH, "4")
+
+    paths = []
+    for i in range(10):
+        path = tmp_path / (f"ticket_{i:02d}.jpg" if i != 3 else "illisible.jpg")
+        path.write_bytes(b"x")
+        paths.append(path)
+    try:
+        results = watcher._process_paths(paths)
+    finally:
+        pool.executor.shutdown()
+
+    assert [r.transaction.montant for r in results] == [i + 1.0 for i in range(10) if i not in (3, 7)]
+    assert 2 <= peak[0] <= 4  # en parallèle, 2 par worker du pool au plus
+    assert [len(b) for b in batches] == [4, 4, 1]
+    assert {c for b in batches for c in b} == {"Alimentation"}
+    kept = ["illisible.jpg", "ticket_07.jpg"]
+    assert sorted(archived) == sorted(p.name for p in paths if p.name not in kept)
+    # Fichiers en erreur (OCR, insertion) laissés en place, les autres archivés puis retirés
+    assert sorted(p.name for p in tmp_path.iterdir()) == kept
+
+    report = watcher.watcher_status()["last_scan"]
+    assert (report["files"], report["tickets"], report["errors"], report["inserted"]) == (10, 8, 2, 8)
+    assert report["mode"] == "pool" and report["max_in_flight"] == 4
+    assert report["files_per_second"] > 0
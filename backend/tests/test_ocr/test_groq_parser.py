@@ -7,7 +7,10 @@
 load_dotenv(ENV_PATH)
 
 from backend.domains.ocr.core.groq_parser import GroqParser
+from backend.domains.ocr.core.groq_resilience import GroqResilience
+import json
 import textwrap
+from types import SimpleNamespace
 
 
 @pytest.mark.unit
@@ -75,3 +78,244 @@ def test_fallback_sans_texte(self, groq_parser):
         result = groq_parser.parse("")
         assert result.get("category") == "Autre"
         assert result.get("description") == "Transaction sans catégorie"
+
+
+# ── Cache des classifications ────────────────────────────────────────────────
+
+_SLIP = """CARTE BANCAIRE
+SANS CONTACT
+LE {day}/02/26 A 17:47:12
+AUTO BILAN TECHNIC
+CUSSET
+NO AUTO: {auto}
+MONTANT:
+{amount} EUR"""
+
+
+@pytest.fixture
+def cached_parser(tmp_path, monkeypatch):
+    """Parser sans réseau : `_classify` compté, cache chiffré dans tmp_path."""
+    from backend.domains.ocr.core import extraction_cache
+
+    monkeypatch.setattr(
+        extraction_cache, "_cache",
+        extraction_cache.ExtractionCache(tmp_path / "cache.db", max_bytes=1024 * 1024),
+    )
+    monkeypatch.delenv("GROQ_CACHE_TTL_DAYS", raising=False)
+    parser = GroqParser()
+    parser._client = object()
+    parser.calls = []
+
+    def _classify(text):
+        parser.calls.append(text)
+        return {"category": "Voiture", "subcategory": "Entretien", "description": "AUTO BILAN"}
+
+    monkeypatch.setattr(parser, "_classify", _classify)
+    return parser
+
+
+@pytest.mark.unit
+def test_normalisation_ignore_les_chiffres():
+    from backend.domains.ocr.core.groq_parser import normalize_ocr_text
+
+    a = normalize_ocr_text(_SLIP.format(day=18, auto="624567", amount="20,00"))
+    b = normalize_ocr_text(_SLIP.format(day=3, auto="A1B2C3D4", amount="55,10"))
+    assert a == b
+    assert "auto bilan technic" in a
+    # Codes carburant conservés : ils décident de la catégorie
+    assert normalize_ocr_text("Pompe 3 SP95 42,10") == "pompe sp95"
+
+
+@pytest.mark.unit
+def test_commercant_recurrent_sans_appel(cached_parser):
+    first = cached_parser.parse(_SLIP.format(day=18, auto="624567", amount="20,00"))
+    again = cached_parser.parse(_SLIP.format(day=3, auto="998877", amount="55,10"))
+    assert again == first
+    assert len(cached_parser.calls) == 1
+
+    # Nouveau processus (mémoire vide) : réponse relue dans le cache chiffré
+    fresh = GroqParser()
+    fresh._client = None
+    assert fresh.parse(_SLIP.format(day=9, auto="1", amount="9,99")) == first
+
+
+@pytest.mark.unit
+def test_cache_invalide_si_categories_modifiees(cached_parser, monkeypatch):
+    from backend.domains.ocr.core import groq_parser
+
+    text = _SLIP.format(day=18, auto="624567", amount="20,00")
+    cached_parser.parse(text)
+    version = cached_parser.cache_version
+    monkeypatch.setattr(groq_parser, "categories_fingerprint", lambda: "modifie")
+    monkeypatch.setattr(groq_parser, "get_categories", lambda: ["Voiture", "Autre", "Nouvelle"])
+
+    cached_parser.parse(text)
+    assert cached_parser.cache_version != version
+    assert len(cached_parser.calls) == 2
+
+
+@pytest.mark.unit
+def test_echec_non_mis_en_cache(cached_parser, monkeypatch):
+    text = _SLIP.format(day=18, auto="624567", amount="20,00")
+    with monkeypatch.context() as m:
+        m.setattr(cached_parser, "_classify", lambda text: None)
+        assert cached_parser.parse(text) == cached_parser._fallback()
+    cached_parser.parse(text)
+    assert len(cached_parser.calls) == 1
+
+
+@pytest.mark.unit
+def test_duree_de_vie(tmp_path):
+    from backend.domains.ocr.core.extraction_cache import ExtractionCache
+
+    cache = ExtractionCache(tmp_path / "cache.db", max_bytes=1024 * 1024)
+    cache.put("cle", "llm", "{}")
+    assert cache.get("cle", max_age=3600) == "{}"
+    assert cache.get("cle", max_age=-1) is None
+    assert cache.get("cle") is None  # entrée expirée supprimée
+
+
+# ── Classification par lots ──────────────────────────────────────────────────
+
+
+class _FakeGroq:
+    """Client Groq local : une entrée par ticket sauf ceux marqués OUBLIE."""
+
+    def __init__(self):
+        self.requests = []
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, messages, **kwargs):
+        user = messages[1]["content"]
+        self.requests.append(user)
+        if "### Ticket" not in user:
+            content = {"category": "Voiture", "subcategory": "essence", "description": "SEUL"}
+        else:
+            tickets = user.split("### Ticket ")[1:]
+            content = {"r": [
+                {"i": int(t.split("\n")[0]), "c": "Voiture", "s": "Gazole", "d": "LOT"}
+                for t in tickets if "OUBLIE" not in t
+            ] + [{"i": 99, "c": "Voiture"}, "invalide"]}
+        message = SimpleNamespace(content=json.dumps(content))
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+
+@pytest.fixture
+def batch_parser(tmp_path, monkeypatch):
+    from backend.domains.ocr.core import extraction_cache, groq_parser
+
+    monkeypatch.setattr(
+        extraction_cache, "_cache",
+        extraction_cache.ExtractionCache(tmp_path / "cache.db", max_bytes=1024 * 1024),
+    )
+    monkeypatch.setenv(groq_parser.ENV_BATCH_SIZE, "3")
+    monkeypatch.setattr(groq_parser, "get_categories", lambda: ["Voiture", "Autre"])
+    monkeypatch.setattr(
+        groq_parser, "get_all_subcategories", lambda: {"Voiture": ["Essence", "Entretien"]}
+    )
+    # Politique propre : le disjoncteur du processus peut avoir été ouvert
+    # par d'autres tests (clé de test invalide)
+    parser = GroqParser(resilience=GroqResilience())
+    parser._client = _FakeGroq()
+    return parser
+
+
+@pytest.mark.unit
+def test_lot_requetes_groupees_et_repli_par_ticket(batch_parser):
+    texts = [f"STATION NUMERO {name}\nGAZOLE 42,10" for name in ("UN", "DEUX", "TROIS", "QUATRE")]
+    texts.insert(2, "STATION OUBLIE\nGAZOLE 42,10")
+    texts.append(texts[0].replace("42,10", "18,00"))  # même ticket au montant près
+    texts.append("court")
+
+    results = batch_parser.parse_batch(texts)
+
+    requests = batch_parser._client.requests
+    # 5 textes distincts : lots de 3 et 2, l'oublié du premier lot reclassé seul
+    assert [r.count("### Ticket") for r in requests] == [3, 0, 2]
+    assert "STATION OUBLIE" in requests[1]
+    assert [r["description"] for r in results[:6]] == ["LOT", "LOT", "SEUL", "LOT", "LOT", "LOT"]
+    # Réponses validées comme en unitaire (sous-catégorie ramenée à la liste)
+    assert {r["subcategory"] for r in results[:6]} == {"Essence"}
+    assert results[6] == batch_parser._fallback()
+
+    # Rejoué : tout vient du cache
+    assert batch_parser.parse_batch(texts) == results
+    assert len(requests) == 3
+
+
+@pytest.mark.unit
+def test_lot_en_echec_retombe_sur_autre(batch_parser, monkeypatch):
+    def _panne(*args, **kwargs):
+        raise ConnectionError("réseau coupé")
+
+    monkeypatch.setattr(batch_parser._client.chat.completions, "create", _panne)
+    results = batch_parser.parse_batch(["STATION UN\nGAZOLE", "STATION DEUX\nGAZOLE"])
+    assert results == [batch_parser._fallback()] * 2
+
+
+# ── Prompt compact ───────────────────────────────────────────────────────────
+
+
+@pytest.fixture
+def taxonomy(monkeypatch):
+    from backend.domains.ocr.core import groq_parser
+
+    subcategories = {
+        "Alimentation": ["Supermarché", "Restaurant"],
+        "Voiture": ["Essence", "Entretien", "Péage"],
+    }
+    monkeypatch.setattr(groq_parser, "get_categories", lambda: ["Alimentation", "Voiture", "Autre"])
+    monkeypatch.setattr(groq_parser, "get_all_subcategories", lambda: subcategories)
+    return subcategories
+
+
+@pytest.mark.unit
+def test_table_de_codes():
+    from backend.domains.ocr.core.groq_parser import build_code_table
+
+    categories = [f"Cat{i}" for i in range(28)]
+    table = build_code_table(categories, {"Cat1": ["Essence", "Péage"]})
+    assert table["B"] == ("Cat1", None)
+    assert table["B2"] == ("Cat1", "Péage")
+    assert table["AB"] == ("Cat27", None)
+    assert len(table) == 30
+
+
+@pytest.mark.unit
+def test_prompt_compact_et_decodage(taxonomy, monkeypatch):
+    from backend.domains.ocr.core import groq_parser
+
+    compact = GroqParser()
+    monkeypatch.setenv(groq_parser.ENV_PROMPT, "full")
+    full = GroqParser()
+
+    assert compact.prompt_format == "compact" and full.prompt_format == "full"
+    assert len(compact.system_prompt) < len(full.system_prompt) / 2
+    assert "B1, même dans un supermarché" in compact.system_prompt
+    assert "A Alimentation : A1 Supermarché, A2 Restaurant" in compact.system_prompt
+    # Formats différents : réponses en cache distinctes
+    assert compact.cache_version != full.cache_version
+
+    assert compact._read_answer('{"c": "b3", "d": "APRR"}') == {
+        "category": "Voiture", "subcategory": "Péage", "description": "APRR",
+    }
+    # Code de catégorie seule : première sous-catégorie ; nom en clair accepté
+    assert compact._read_answer('{"c": "A"}')["subcategory"] == "Supermarché"
+    assert compact._read_answer('{"c": "Voiture", "s": "gazole"}')["subcategory"] == "Essence"
+    assert compact._read_answer('{"c": "Z9", "d": "X"}')["category"] == "Autre"
+    with pytest.raises(ValueError):
+        compact._read_answer('{"c": null}')
+
+
+@pytest.mark.unit
+def test_table_versionnee_avec_le_yaml(taxonomy, monkeypatch):
+    from backend.domains.ocr.core import groq_parser
+
+    parser = GroqParser()
+    version, cache_version = parser.code_version, parser.cache_version
+    taxonomy["Voiture"].insert(0, "Parking")
+    monkeypatch.setattr(groq_parser, "categories_fingerprint", lambda: "modifie")
+    parser.parse_batch(["court"])  # texte trop court : aucun appel, prompt reconstruit
+
+    assert parser.codes["B1"] == ("Voiture", "Parking")
+    assert parser.code_version != version and parser.cache_version != cache_version
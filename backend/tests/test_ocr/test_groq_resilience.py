@@ -0,0 +1,185 @@
+"""
+Tests de la politique d'appel Groq (core/groq_resilience.py) contre un
+serveur local compatible (backend/scripts/groq_stub.py).
+"""
+
+import asyncio
+import time
+
+import pytest
+from groq import AsyncGroq, Groq
+
+from backend.domains.ocr.core.groq_parser import GroqParser
+from backend.domains.ocr.core.groq_resilience import (
+    CLOSED,
+    HALF_OPEN,
+    OPEN,
+    TIMEOUT_ERRORS,
+    CircuitBreaker,
+    GroqResilience,
+    is_transient,
+)
+from backend.scripts.groq_stub import GroqStub
+
+TICKET = "STATION TOTAL VICHY\nGAZOLE 42,10 EUR\nPOMPE 3"
+
+
+@pytest.fixture
+def stub():
+    with GroqStub() as server:
+        yield server
+
+
+def _parser(stub: GroqStub, monkeypatch, **policy) -> GroqParser:
+    """Parser branché sur le stub, sans cache, avec sa propre politique d'appel."""
+    monkeypatch.setenv("GROQ_CACHE_TTL_DAYS", "0")
+    policy.setdefault("backoff_base", 0.01)
+    parser = GroqParser(resilience=GroqResilience(**policy))
+    parser._client = Groq(api_key="stub", base_url=stub.url, max_retries=0)
+    parser._async_client = AsyncGroq(api_key="stub", base_url=stub.url, max_retries=0)
+    return parser
+
+
+@pytest.mark.unit
+def test_disjoncteur_cycle():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.05)
+    breaker.record_failure()
+    assert breaker.state == CLOSED and breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == OPEN and not breaker.allow()
+
+    time.sleep(0.06)
+    assert breaker.state == HALF_OPEN
+    assert breaker.allow()
+    assert not breaker.allow()  # un seul appel d'essai
+    breaker.record_failure()
+    assert breaker.state == OPEN and breaker.opened == 2
+
+    time.sleep(0.06)
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CLOSED and breaker.snapshot()["consecutive_failures"] == 0
+
+
+@pytest.mark.unit
+def test_appel_essai_annule_libere_le_demi_ouvert():
+    """Annulation ou interruption pendant l'appel d'essai : un autre essai reste possible."""
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+    policy = GroqResilience(breaker=breaker)
+
+    async def cancelled():
+        raise asyncio.CancelledError()
+
+    def interrupted(timeout):
+        raise KeyboardInterrupt()
+
+    breaker.record_failure()
+    time.sleep(0.06)
+    with pytest.raises(asyncio.CancelledError):
+        asyncio.run(policy.acall(cancelled))
+    assert breaker.state == HALF_OPEN
+    with pytest.raises(KeyboardInterrupt):
+        policy.call(interrupted)
+    assert policy.call(lambda timeout: "ok") == "ok"
+    assert breaker.state == CLOSED
+    assert policy.metrics()["in_flight"] == 0
+
+
+@pytest.mark.unit
+def test_delais_asyncio_reconnus():
+    """asyncio.TimeoutError (distinct de TimeoutError en 3.10) : reprise et compteur."""
+    assert is_transient(asyncio.TimeoutError())
+    policy = GroqResilience(timeout=0.05, max_retries=1, backoff_base=0.001)
+
+    async def slow():
+        await asyncio.sleep(1)
+
+    with pytest.raises(TIMEOUT_ERRORS):
+        asyncio.run(policy.acall(slow))
+    metrics = policy.metrics()
+    assert (metrics["timeouts"], metrics["retries"], metrics["failures"]) == (2, 1, 1)
+
+
+@pytest.mark.unit
+def test_saturation_locale_sans_ouvrir_le_disjoncteur():
+    """Trop d'appels simultanés dans le processus : Groq n'est pas en cause."""
+    import threading
+
+    policy = GroqResilience(
+        timeout=0.05, max_in_flight=1, breaker=CircuitBreaker(failure_threshold=1)
+    )
+    release = threading.Event()
+    busy = threading.Thread(target=policy.call, args=(lambda timeout: release.wait(2),))
+    busy.start()
+    try:
+        time.sleep(0.02)
+        with pytest.raises(TimeoutError):
+            policy.call(lambda timeout: "ok")
+    finally:
+        release.set()
+        busy.join()
+    metrics = policy.metrics()
+    assert metrics["saturated"] == 1
+    assert metrics["breaker"]["state"] == CLOSED
+    assert metrics["breaker"]["consecutive_failures"] == 0
+
+
+@pytest.mark.unit
+def test_gigue_bornee():
+    policy = GroqResilience(backoff_base=0.1, backoff_max=0.3)
+    delays = [policy.backoff(attempt) for attempt in range(6) for _ in range(50)]
+    assert all(0 <= d <= 0.3 for d in delays)
+    assert len({round(d, 6) for d in delays}) > 100
+
+
+@pytest.mark.ocr
+def test_reprise_apres_erreur_transitoire(stub, monkeypatch):
+    parser = _parser(stub, monkeypatch, max_retries=2)
+    stub.failures.extend([503, 429])
+
+    assert parser.parse(TICKET)["category"] == "Voiture"
+    assert len(stub.requests) == 3
+    metrics = parser.resilience.metrics()
+    assert (metrics["retries"], metrics["successes"], metrics["failures"]) == (2, 1, 0)
+
+    # Erreur définitive : pas de reprise, valeur par défaut
+    stub.failures.append(400)
+    assert parser.parse(TICKET + "\nBIS") == parser._fallback()
+    assert len(stub.requests) == 4
+
+
+@pytest.mark.ocr
+def test_async_delai_puis_disjoncteur(stub, monkeypatch):
+    stub.delay = 0.5
+    parser = _parser(
+        stub, monkeypatch, timeout=0.1, max_retries=1,
+        breaker=CircuitBreaker(failure_threshold=2, reset_timeout=60),
+    )
+
+    async def scan():
+        t0 = time.perf_counter()
+        results = [await parser.aparse(f"{TICKET}\nTICKET {n}") for n in "ABC"]
+        return results, time.perf_counter() - t0
+
+    results, elapsed = asyncio.run(scan())
+    assert results == [parser._fallback()] * 3
+    # 2 tickets x 2 tentatives au délai de 0,1 s ; le 3e refusé sans requête
+    assert elapsed < 1.0
+    assert len(stub.requests) == 4
+    metrics = parser.resilience.metrics()
+    assert metrics["breaker"]["state"] == OPEN
+    assert (metrics["timeouts"], metrics["short_circuited"]) == (4, 1)
+
+
+@pytest.mark.ocr
+def test_async_concurrence_bornee(stub, monkeypatch):
+    stub.delay = 0.1
+    parser = _parser(stub, monkeypatch, max_in_flight=2)
+
+    async def scan():
+        return await asyncio.gather(*(parser.aparse(f"{TICKET}\nTICKET {n}") for n in range(6)))
+
+    results = asyncio.run(scan())
+    assert all(r["category"] == "Voiture" for r in results)
+    assert stub.peak == 2
+    assert parser.resilience.metrics()["in_flight"] == 0
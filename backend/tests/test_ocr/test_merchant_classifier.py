@@ -0,0 +1,147 @@
+"""
+Tests du classifieur local (core/local_classifier.py, services/merchant_classifier.py).
+"""
+
+from datetime import date
+
+import pytest
+
+from backend.domains.ocr.core.local_classifier import NaiveBayesClassifier, features
+from backend.domains.ocr.services.merchant_classifier import MerchantClassifier
+from backend.domains.transactions.model import Transaction
+from backend.domains.transactions.repository import TransactionRepository
+
+HISTORIQUE = [
+    ("Alimentation", "Supermarché", "Courses Carrefour Market"),
+    ("Alimentation", "Supermarché", "Courses Leclerc"),
+    ("Transport", "Carburant", "Plein Total Energies station"),
+    ("Transport", "Carburant", "Carburant Esso autoroute"),
+    ("Loisirs", "Restaurant", "Restaurant Pizzeria Napoli"),
+    ("Santé", "Pharmacie", "Pharmacie du Centre"),
+]
+
+TICKET_CARREFOUR = """
+CARREFOUR MARKET
+VICHY
+LAIT DEMI ECREME 1.15
+PAIN COMPLET 2.30
+TOTAL TTC 3.45
+CARTE BANCAIRE
+"""
+
+
+def _depense(categorie: str, sous_categorie: str, description: str) -> Transaction:
+    return Transaction(
+        type="depense",
+        categorie=categorie,
+        sous_categorie=sous_categorie,
+        description=description,
+        montant=10.0,
+        date=date(2026, 1, 15),
+        source="ocr",
+    )
+
+
+@pytest.fixture
+def historique(db_path: str) -> TransactionRepository:
+    repo = TransactionRepository(db_path=db_path)
+    for _ in range(5):
+        for row in HISTORIQUE:
+            repo.add(_depense(*row))
+    return repo
+
+
+@pytest.mark.unit
+def test_features_ignorent_nombres_et_vocabulaire_commun():
+    assert features("TOTAL TTC 12.50\nCARTE BANCAIRE") == frozenset()
+    assert features("Carrefour Market") == features("CARREFOUR  market 42,10")
+
+
+@pytest.mark.unit
+def test_bayes_apprend_et_oublie():
+    model = NaiveBayesClassifier()
+    carrefour, esso = features("Courses Carrefour"), features("Plein Esso")
+    model.learn(carrefour, ("Alimentation", "Supermarché"))
+    model.learn(esso, ("Transport", "Carburant"))
+
+    label, confidence, known = model.predict(features("CARREFOUR CITY"))
+    assert label == ("Alimentation", "Supermarché") and known == 1
+    assert confidence > 0.5
+    assert model.predict(features("inconnu ailleurs")) is None
+
+    model.forget(carrefour, ("Alimentation", "Supermarché"))
+    assert model.labels == [("Transport", "Carburant")]
+    assert model.predict(features("CARREFOUR CITY")) is None
+
+
+@pytest.mark.unit
+def test_classifieur_entraine_sur_historique(historique):
+    classifier = MerchantClassifier(historique.db_path, min_confidence=0.8)
+    metrics = classifier.train()
+    assert metrics["holdout"] == 6
+    assert metrics["accuracy"] == 1.0
+    assert metrics["examples"] == 30
+
+    result = classifier.predict(TICKET_CARREFOUR)
+    assert result["category"] == "Alimentation"
+    assert result["subcategory"] == "Supermarché"
+    assert result["description"] == "Courses Carrefour Market"
+    assert result["source"] == "local" and result["confidence"] >= 0.8
+
+    # Aucun mot connu : décision laissée au LLM
+    assert classifier.predict("BRICO DEPOT\nVIS INOX 4.20") is None
+    assert classifier.status()["escalations"] == 1
+
+
+@pytest.mark.unit
+def test_classifieur_incremental(historique):
+    classifier = MerchantClassifier(historique.db_path, min_confidence=0.75)
+    classifier.train()
+    assert classifier.predict("BRICO DEPOT\nVIS INOX") is None
+
+    for _ in range(3):
+        historique.add(_depense("Maison", "Bricolage", "Brico Depot"))
+    assert classifier.refresh() == 3
+    assert classifier.predict("BRICO DEPOT\nVIS INOX")["category"] == "Maison"
+
+    # Recatégorisation : l'ancien exemple est oublié
+    leclerc = [t for t in historique.get_all() if t.description == "Courses Leclerc"]
+    for tx in leclerc:
+        historique.update(
+            {**tx.model_dump(), "categorie": "Maison", "sous_categorie": "Bricolage"}
+        )
+    assert classifier.refresh() == len(leclerc)
+    assert classifier.predict("E.LECLERC\nVIS INOX")["category"] == "Maison"
+    assert classifier.refresh() == 0
+
+
+@pytest.mark.unit
+def test_premier_entrainement_unique_en_concurrence(historique):
+    """Appels simultanés au premier usage : un seul entraînement, mesures conservées."""
+    import threading
+
+    classifier = MerchantClassifier(historique.db_path)
+    threads = [threading.Thread(target=classifier.refresh_if_due) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert classifier.metrics["holdout"] == 6
+    assert classifier.metrics["examples"] == 30
+
+
+@pytest.mark.unit
+def test_modele_transmis_sans_reentrainement(historique):
+    """État exporté par le processus principal, repris tel quel par un worker."""
+    assert MerchantClassifier(historique.db_path).export_state() is None
+    parent = MerchantClassifier(historique.db_path, min_confidence=0.8)
+    parent.train()
+
+    worker = MerchantClassifier(historique.db_path, min_confidence=0.8)
+    worker.load_state(parent.export_state())
+    assert worker.status()["trained"] and worker.metrics == parent.metrics
+    assert worker.predict(TICKET_CARREFOUR) == parent.predict(TICKET_CARREFOUR)
+    # Historique déjà appris : seules les nouvelles dépenses sont lues
+    assert worker.refresh() == 0
+    historique.add(_depense("Maison", "Bricolage", "Brico Depot"))
+    assert worker.refresh() == 1
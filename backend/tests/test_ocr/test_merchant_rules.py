@@ -0,0 +1,151 @@
+"""
+Tests des règles commerçants (core/keyword_automaton.py, services/merchant_rules.py).
+"""
+
+import os
+from datetime import date
+
+import pytest
+
+from backend.domains.ocr.core.keyword_automaton import KeywordAutomaton
+from backend.domains.ocr.services import merchant_classifier
+from backend.domains.ocr.services.merchant_rules import MerchantRules
+from backend.domains.transactions.model import Transaction
+
+TICKET_CARREFOUR = """
+CARREFOUR MARKET
+VICHY
+LAIT DEMI ECREME 1.15
+PAIN COMPLET 2.30
+TOTAL TTC 3.45
+"""
+
+TICKET_CARBURANT_SUPERMARCHE = """
+E.LECLERC
+STATION SERVICE
+GAZOLE POMPE 3 42,10
+TOTAL TTC 42,10 EUR
+"""
+
+RULES_YAML = """
+rules:
+  - category: Voiture
+    subcategory: Essence
+    confidence: 0.97
+    priority: 2
+    merchants: [esso]
+    keywords: [gazole]
+  - category: Alimentation
+    subcategory: Supermarché
+    confidence: 0.93
+    priority: 1
+    merchants: [carrefour, e leclerc]
+  - category: Santé
+    subcategory: Pharmacie
+    confidence: 0.95
+    priority: 1
+    merchants: [pharmacie]
+  - category: Inexistante
+    merchants: [ailleurs]
+"""
+
+
+@pytest.fixture
+def rules(tmp_path) -> MerchantRules:
+    path = tmp_path / "merchant_rules.yaml"
+    path.write_text(RULES_YAML, encoding="utf-8")
+    return MerchantRules(str(path))
+
+
+@pytest.mark.unit
+def test_automate_mots_entiers():
+    automaton = KeywordAutomaton()
+    for keyword in ("carrefour", "carrefour market", "market", "super u"):
+        automaton.add(keyword.split(), keyword)
+    automaton.build()
+
+    words = "carrefour market super u supermarket".split()
+    found = [(start, end, value) for start, end, value in automaton.find(words)]
+    assert found == [
+        (0, 1, "carrefour"),
+        (0, 2, "carrefour market"),
+        (1, 2, "market"),
+        (2, 4, "super u"),
+    ]
+    assert list(automaton.find("supermarket superu".split())) == []
+
+
+@pytest.mark.unit
+def test_regles_priorite_et_conflit(rules):
+    result = rules.predict(TICKET_CARREFOUR)
+    assert (result["category"], result["subcategory"]) == ("Alimentation", "Supermarché")
+    assert result["description"] == "CARREFOUR" and result["source"] == "rules"
+
+    # Carburant dans un supermarché : la règle prioritaire l'emporte
+    result = rules.predict(TICKET_CARBURANT_SUPERMARCHE)
+    assert (result["category"], result["subcategory"]) == ("Voiture", "Essence")
+    assert result["description"] == "E LECLERC"
+
+    # Deux catégories de même priorité : confiance divisée, décision au LLM
+    ambiguous = "PHARMACIE DU CENTRE\nCC CARREFOUR"
+    assert rules.match(ambiguous)["confidence"] < rules.min_confidence
+    assert rules.predict(ambiguous) is None
+    assert rules.predict("BRICO DEPOT\nVIS INOX") is None
+
+    # Catégorie absente de categories.yaml : règle ignorée
+    assert len(rules.rules) == 3 and rules.match("AILLEURS") is None
+    status = rules.status()
+    assert (status["hits"], status["escalations"], status["hit_rate"]) == (2, 2, 0.5)
+
+
+@pytest.mark.unit
+def test_regles_livrees_sans_mot_ambigu():
+    """"area" seul (aire de jeux...) n'est pas un péage."""
+    rules = MerchantRules()
+    result = rules.predict("PARC AREA DE JEUX\nENTREE ENFANT 8.00")
+    assert result is None or result["subcategory"] != "Péage"
+
+
+@pytest.mark.unit
+def test_regles_rechargees_a_chaud(rules):
+    assert rules.predict("BRICO DEPOT") is None
+
+    text = rules.rules_path.read_text(encoding="utf-8")
+    rules.rules_path.write_text(
+        text.replace("merchants: [pharmacie]", "merchants: [pharmacie, brico depot]"),
+        encoding="utf-8",
+    )
+    stat = rules.rules_path.stat()
+    os.utime(rules.rules_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+    assert rules.predict("BRICO DEPOT")["category"] == "Santé"
+
+
+@pytest.mark.unit
+def test_lot_sans_llm_pour_les_regles(rules, monkeypatch):
+    from backend.domains.ocr.services import merchant_rules
+    from backend.domains.ocr.services.ocr_service import get_ocr_service
+
+    service = get_ocr_service()
+    monkeypatch.setattr(merchant_rules, "_rules", rules)
+    monkeypatch.setenv(merchant_classifier.ENV_ENABLED, "0")
+    calls = []
+
+    def _parse_batch(texts):
+        calls.append(texts)
+        return [{"category": "Shopping", "subcategory": None, "description": "LLM"}] * len(texts)
+
+    monkeypatch.setattr(service.llm_parser, "parse_batch", _parse_batch)
+
+    draft = Transaction(
+        type="depense", categorie="Autre", montant=12.0, date=date(2026, 3, 1), source="ocr"
+    )
+    texts = [TICKET_CARREFOUR, TICKET_CARBURANT_SUPERMARCHE, "BRICO DEPOT\nVIS INOX"]
+    report = {}
+    txs = service.categorize_transactions([(draft, t) for t in texts], report)
+
+    assert calls == [["BRICO DEPOT\nVIS INOX"]]
+    assert [tx.categorie for tx in txs] == ["Alimentation", "Voiture", "Shopping"]
+    assert (report["tickets"], report["rules"], report["llm"]) == (3, 2, 1)
+    assert report["hit_rate"] == 0.667
+    assert report["llm_seconds_saved"] == pytest.approx(2 * report["llm_seconds"], abs=1e-3)
@@ -237,3 +237,85 @@ def test_optimal_workers_process_extraction(self, ticket_images_batch: list[str]
         assert len(results) == len(ticket_images_batch)
         for wid, lines, _ in results:
             assert len(lines) >= 1
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Tests : mode de lot "thread" d'OCRService
+# ─────────────────────────────────────────────────────────────────────────────
+
+@pytest.mark.ocr
+class TestThreadBatchMode:
+    """Lot traité par threads dans un seul processus, moteurs ONNX réutilisés."""
+
+    def test_batch_thread_mode(self, ticket_images_batch: list[str]) -> None:
+        from backend.domains.ocr.services.ocr_service import get_ocr_service
+        from backend.domains.ocr.core.resource_planner import get_resource_planner
+
+        service = get_ocr_service()
+        paths = ticket_images_batch[:4]
+        first = service.process_batch_tickets(paths, max_workers=2, mode="thread")
+        engines = service._engine_pool
+        second = service.process_batch_tickets(paths, max_workers=2, mode="thread")
+
+        assert [r[0] for r in first] == [Path(p).name for p in paths]
+        assert all(err is None and tx is not None for _, tx, err, _ in first + second)
+        # Cache conservé entre lots, au plus un moteur par thread
+        assert service._engine_pool is engines
+        assert 1 <= engines.created <= 2
+        assert engines.intra_op_num_threads == max(1, len(get_resource_planner().cores) // 2)
+
+    def test_plan_thread_conserve_entre_lots(self, ticket_images_batch: list[str], monkeypatch) -> None:
+        """Borne du planificateur fixée au premier lot : la RAM libre qui varie ne le réinitialise pas."""
+        from backend.domains.ocr.core.resource_planner import OCRResourcePlanner
+        from backend.domains.ocr.services import ocr_service
+
+        service = ocr_service.get_ocr_service()
+        planner = OCRResourcePlanner(cores=[0, 1], pin_workers=False, min_samples=2)
+        bounds = iter([2, 1, 2, 1])
+        monkeypatch.setattr(ocr_service, "get_resource_planner", lambda: planner)
+        monkeypatch.setattr(ocr_service, "get_optimal_workers", lambda *a, **k: next(bounds))
+        monkeypatch.setattr(service, "_thread_workers_limit", None)
+
+        for _ in range(2):
+            service.process_batch_tickets(ticket_images_batch[:2], mode="thread")
+        # Deux mesures de la même configuration : l'exploration a commencé
+        assert planner.plan("thread", 2)["state"] == "exploring"
+
+    def test_batch_categorise_en_une_fois(self, ticket_images_batch: list[str], monkeypatch) -> None:
+        from backend.domains.ocr.services import merchant_classifier, merchant_rules
+        from backend.domains.ocr.services.ocr_service import get_ocr_service
+
+        service = get_ocr_service()
+        monkeypatch.setenv(merchant_classifier.ENV_ENABLED, "0")
+        monkeypatch.setenv(merchant_rules.ENV_ENABLED, "0")
+        monkeypatch.setattr(service.llm_parser, "batch_size", 8)
+        calls = []
+
+        def _parse_batch(texts):
+            calls.append(texts)
+            return [{"category": "Voiture", "subcategory": "Essence", "description": "LOT"}] * len(texts)
+
+        monkeypatch.setattr(service.llm_parser, "parse_batch", _parse_batch)
+        monkeypatch.setattr(service.llm_parser, "parse", lambda text: pytest.fail("appel unitaire"))
+
+        paths = ticket_images_batch[:3]
+        report = {}
+        results = service.process_batch_tickets(paths, max_workers=2, mode="thread", report=report)
+
+        assert len(calls) == 1 and len(calls[0]) == 3
+        assert (report["tickets"], report["llm"], report["hit_rate"]) == (3, 3, 0.0)
+        assert [r[0] for r in results] == [Path(p).name for p in paths]
+        assert all(len(r) == 4 for r in results)
+        assert {(tx.categorie, tx.description) for _, tx, _, _ in results} == {("Voiture", "LOT")}
+
+
+@pytest.mark.unit
+def test_resolve_batch_mode(monkeypatch) -> None:
+    from backend.domains.ocr.services.ocr_service import ENV_BATCH_MODE, resolve_batch_mode
+
+    monkeypatch.delenv(ENV_BATCH_MODE, raising=False)
+    assert resolve_batch_mode() == "process"
+    monkeypatch.setenv(ENV_BATCH_MODE, "thread")
+    assert resolve_batch_mode() == "thread"
+    assert resolve_batch_mode("process") == "process"
+    assert resolve_batch_mode("gpu") == "process"
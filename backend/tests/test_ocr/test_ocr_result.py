@@ -0,0 +1,80 @@
+"""
+Tests du résultat OCR structuré (core/ocr_result.py) et de l'inférence unique.
+"""
+
+from pathlib import Path
+
+import pytest
+from PIL import Image, ImageDraw
+
+from backend.domains.ocr.core.ocr_result import OCRLine, OCRResult
+from backend.domains.ocr.models_api import OCRScanResponse
+from backend.domains.transactions.model import Transaction
+
+
+def _ticket(path: Path) -> str:
+    img = Image.new("RGB", (400, 150), color="white")
+    draw = ImageDraw.Draw(img)
+    draw.text((50, 30), "TOTAL : 23.40", fill="black")
+    draw.text((50, 80), "Date: 15/01/2026", fill="black")
+    img.save(str(path))
+    return str(path)
+
+
+def _line(text: str, score: float, y: float = 0.0) -> OCRLine:
+    return OCRLine(text=text, box=[[10, y], [90, y], [90, y + 12], [10, y + 12]], score=score)
+
+
+@pytest.mark.unit
+def test_result_proprietes():
+    result = OCRResult(lines=[_line("TOTAL 12.00", 0.9, 40), _line("~~#", 0.3, 60)])
+    assert result.text == "TOTAL 12.00\n~~#"
+    assert result.mean_score == pytest.approx(0.6)
+    assert result.text_above(0.5) == "TOTAL 12.00"
+    assert [line.text for line in result.low_confidence_lines(0.5)] == ["~~#"]
+    assert (result.lines[0].top, result.lines[0].left) == (40, 10)
+    assert OCRResult().mean_score is None
+
+
+@pytest.mark.unit
+def test_reponse_signale_confiance_basse():
+    tx = Transaction(type="depense", categorie="Alimentation", sous_categorie="Supermarché",
+                     montant=10.0, date="2026-01-15")
+    low = OCRScanResponse(transaction=tx, ocr_confidence=0.42)
+    high = OCRScanResponse(transaction=tx, ocr_confidence=0.95)
+    assert any("peu lisible" in w for w in low.warnings)
+    assert not any("peu lisible" in w for w in high.warnings)
+
+
+@pytest.mark.ocr
+def test_recognize_lignes_boites_scores(tmp_path: Path):
+    from backend.domains.ocr.services.ocr_service import get_ocr_service
+
+    path = _ticket(tmp_path / "t.png")
+    engine = get_ocr_service().ocr_engine
+    result = engine.recognize(path)
+
+    assert (result.width, result.height) == (400, 150)
+    assert result.lines and "TOTAL" in result.text
+    assert all(len(line.box) == 4 and 0.0 < line.score <= 1.0 for line in result.lines)
+    assert {"det", "rec", "total"} <= set(result.timings)
+    # Octets encodés : même texte, décodage mesuré
+    from_bytes = engine.recognize(Path(path).read_bytes())
+    assert from_bytes.text == result.text
+    assert "decode" in from_bytes.timings
+
+
+@pytest.mark.ocr
+def test_process_ticket_reutilise_le_resultat(tmp_path: Path, monkeypatch):
+    from backend.domains.ocr.services.ocr_service import get_ocr_service
+
+    service = get_ocr_service()
+    result = service.recognize(_ticket(tmp_path / "t.png"))
+
+    def _no_inference(*args, **kwargs):
+        raise AssertionError("inférence relancée")
+
+    monkeypatch.setattr(service, "recognize", _no_inference)
+    tx, same = service.process_ticket_result(result)
+    assert same is result
+    assert tx.montant == pytest.approx(23.40)
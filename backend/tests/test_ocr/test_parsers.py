@@ -3,10 +3,19 @@
 Tests purement unitaires : aucune DB, aucun fichier image, aucun modèle chargé.
 """
 
-import pytest
+import os
 from datetime import date
 
-from backend.domains.ocr.core.parser import parse_amount, parse_date
+import pytest
+
+from backend.domains.ocr.core.parser import (
+    PatternSet,
+    parse_amount,
+    parse_date,
+    parse_merchant,
+    required_literals,
+)
+from backend.domains.ocr.services.pattern_manager import PatternManager
 from backend.domains.ocr.core.hardware_utils import get_optimal_workers, get_cpu_info
 
 
@@ -99,6 +108,94 @@ def test_texte_vide_retourne_none(self):
 
 
 
+# ─────────────────────────────────────────────────────────────────────────────
+# Tests PatternSet / PatternManager
+# ─────────────────────────────────────────────────────────────────────────────
+
+@pytest.mark.unit
+@pytest.mark.ocr
+class TestPatternSet:
+
+    def test_litteraux_obligatoires(self):
+        """Mot de tête (sans lettre optionnelle) et mot de fin ; rien si alternative."""
+        assert required_literals(r"TOTAL\s*:?\s*(\d+[.,]\d{2})") == ("TOTAL",)
+        assert required_literals(r"(\d+[.,]\d{2})\s*€") == ("€",)
+        assert required_literals(r"Tota[l7]\s+TTC\s+EUR") == ("Tota", "EUR")
+        assert required_literals(r"TOTALE?\s*(\d+)") == ("TOTAL",)
+        assert required_literals(r"(\d+)\s") == ()
+        assert required_literals(r"TOTAL|MONTANT") == ()
+        # "(" ou "|" dans une classe n'ouvrent ni groupe ni alternative
+        assert required_literals(r"TOTAL[(:]?|MONTANT") == ()
+        assert required_literals(r"TOTAL[|(]\s*EUR") == ("TOTAL", "EUR")
+        assert required_literals(r"TOTAL[]|]?|MONTANT") == ()
+
+    def test_patterns_ecartes_sans_litteral(self):
+        """Un pattern dont le littéral manque n'est pas essayé ; ordre de priorité conservé."""
+        patterns = PatternSet(AMOUNT_PATTERNS + ["(invalide"])
+        assert len(patterns) == len(AMOUNT_PATTERNS)
+        tried = [p for p, _ in patterns.candidates("Sous-total 10.00\n25.00 €")]
+        assert tried == [AMOUNT_PATTERNS[0], AMOUNT_PATTERNS[2]]  # ni MONTANT ni EUR
+
+    def test_texte_mis_en_majuscules_une_fois(self, monkeypatch):
+        """scan() : un seul upper() pour le montant, la date et le filtre des patterns."""
+        calls = []
+
+        class _Text(str):
+            def upper(self):
+                calls.append(1)
+                return str.upper(self)
+
+        manager = PatternManager()
+        result = manager.scan(_Text("Carrefour\nDate: 15/01/2026\nTOTAL : 42,50"))
+        assert result["amount"] == 42.5
+        assert calls == [1]
+
+    def test_memes_resultats_que_la_liste(self):
+        """PatternSet et liste de patterns donnent le même résultat."""
+        texts = ["TOTAL : 42.50", "MONTANT : 12,99", "25.00 €", "Sous-total 10.00\nTOTAL 55.00", ""]
+        compiled = PatternSet(AMOUNT_PATTERNS)
+        for text in texts:
+            assert parse_amount(text, compiled) == parse_amount(text, AMOUNT_PATTERNS)
+
+    def test_commercant_en_tete(self):
+        assert parse_merchant("\n  Carrefour   Market \nTOTAL 12.00") == "CARREFOUR MARKET"
+        assert parse_merchant("12/03/26\n42.10") is None
+
+
+@pytest.mark.unit
+@pytest.mark.ocr
+class TestPatternManager:
+
+    def test_scan_et_rechargement_a_chaud(self, tmp_path):
+        """Montant, date et commerçant en un appel ; YAML modifié -> patterns recompilés."""
+        path = tmp_path / "ocr_patterns.yaml"
+        path.write_text(
+            "amount:\n  - 'TOTAL\\s*:?\\s*(\\d+[.,]\\d{2})'\n"
+            "date:\n  - '(\\d{2})[/.-](\\d{2})[/.-](\\d{4})'\n",
+            encoding="utf-8",
+        )
+        manager = PatternManager(str(path))
+        text = "DECATHLON\nLE 15/01/2026\nA PAYER 19,99"
+        assert manager.scan(text) == {
+            "amount": None, "date": date(2026, 1, 15), "merchant": "DECATHLON"
+        }
+
+        path.write_text(
+            path.read_text(encoding="utf-8").replace(
+                "amount:\n", "amount:\n  - 'A PAYER\\s*(\\d+[.,]\\d{2})'\n"
+            ),
+            encoding="utf-8",
+        )
+        stat = path.stat()
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+        assert manager.scan(text)["amount"] == pytest.approx(19.99)
+        assert manager.reloads == 2
+
+        # YAML invalide (édition en cours) : patterns précédents conservés
+        path.write_text("amount: [", encoding="utf-8")
+        assert manager.scan(text)["amount"] == pytest.approx(19.99)
+
+
 # ─────────────────────────────────────────────────────────────────────────────
 # Tests get_optimal_workers (Pilier 1)
 # ─────────────────────────────────────────────────────────────────────────────
@@ -0,0 +1,104 @@
+"""
+Tests du prétraitement d'image avant RapidOCR (core/preprocessing.py).
+"""
+
+import io
+
+import numpy as np
+import pytest
+from PIL import Image, ImageDraw, ImageFont
+
+from backend.domains.ocr.core import preprocessing
+from backend.domains.ocr.core.preprocessing import (
+    ImagePreprocessor,
+    PreprocessConfig,
+    estimate_skew,
+)
+
+
+def _receipt(angle: float = 0.0) -> Image.Image:
+    font = ImageFont.load_default(size=28)
+    paper = Image.new("L", (500, 420), color=240)
+    draw = ImageDraw.Draw(paper)
+    for i in range(6):
+        draw.text((30, 30 + 60 * i), f"ARTICLE NUMERO {i}   {i + 1}.50", fill=20, font=font)
+    return paper.rotate(angle, expand=True, fillcolor=240, resample=Image.BICUBIC)
+
+
+def _photo_jpeg(size=(1400, 1100)) -> bytes:
+    """Ticket clair au centre d'une photo sombre."""
+    photo = Image.new("L", size, color=70)
+    receipt = _receipt()
+    photo.paste(receipt, ((size[0] - receipt.width) // 2, (size[1] - receipt.height) // 2))
+    buffer = io.BytesIO()
+    photo.convert("RGB").save(buffer, format="JPEG", quality=90)
+    return buffer.getvalue()
+
+
+@pytest.mark.unit
+def test_desactive_rend_l_image_intacte():
+    pre = ImagePreprocessor(PreprocessConfig(stages=[]))
+    assert pre.run("ticket.jpg") == ("ticket.jpg", {})
+
+
+@pytest.mark.unit
+def test_draft_gris_et_reduction():
+    pre = ImagePreprocessor(PreprocessConfig(stages=["resize", "grayscale"], max_side=800))
+    img, timings = pre.run(_photo_jpeg())
+    assert img.ndim == 2
+    assert max(img.shape) == 800
+    assert {"pre_load", "pre_resize", "pre_total"} <= set(timings)
+
+
+@pytest.mark.unit
+def test_recadrage_sur_le_ticket():
+    pre = ImagePreprocessor(PreprocessConfig(stages=["grayscale", "crop"]))
+    img, timings = pre.run(_photo_jpeg())
+    h, w = img.shape
+    # Ticket 500x420 + marges, au lieu de la photo 1400x1100
+    assert 500 <= w < 700 and 420 <= h < 600
+    assert "pre_crop" in timings
+
+
+@pytest.mark.unit
+def test_pas_de_recadrage_si_le_ticket_remplit_l_image():
+    gray = np.asarray(_receipt())
+    pre = ImagePreprocessor(PreprocessConfig(stages=["crop"]))
+    img, _ = pre.run(gray)
+    assert img.shape == gray.shape
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize("angle", [-6.0, 4.0])
+def test_estimation_inclinaison(angle: float):
+    gray = np.asarray(_receipt(angle))
+    # Rotation inverse à appliquer : -angle (à la précision de la recherche fine)
+    assert estimate_skew(gray) == pytest.approx(-angle, abs=0.6)
+
+
+@pytest.mark.unit
+def test_config_depuis_env(monkeypatch):
+    monkeypatch.setenv(preprocessing.ENV_STAGES, "crop, resize,inconnu")
+    monkeypatch.setenv(preprocessing.ENV_MAX_SIDE, "1200")
+    config = PreprocessConfig.from_env()
+    assert config.stages == ["resize", "crop"]
+    assert config.max_side == 1200
+
+    # Taille nulle ou invalide : valeur par défaut conservée
+    for invalid in ("0", "-5", "grand"):
+        monkeypatch.setenv(preprocessing.ENV_MAX_SIDE, invalid)
+        assert PreprocessConfig.from_env().max_side == PreprocessConfig().max_side
+    monkeypatch.delenv(preprocessing.ENV_MAX_SIDE)
+
+    monkeypatch.setenv(preprocessing.ENV_STAGES, "0")
+    assert PreprocessConfig.from_env().stages == []
+
+    monkeypatch.delenv(preprocessing.ENV_STAGES)
+    assert PreprocessConfig.from_env().stages == list(preprocessing.DEFAULT_STAGES)
+
+
+@pytest.mark.unit
+def test_image_illisible():
+    pre = ImagePreprocessor()
+    with pytest.raises(ValueError, match="illisible"):
+        pre.run(b"pas une image")
@@ -0,0 +1,95 @@
+"""
+Tests de l'extraction structurée des tickets (core/receipt_extractor.py).
+"""
+
+from datetime import date
+
+import pytest
+
+from backend.domains.ocr.core.ocr_result import OCRLine, OCRResult
+from backend.domains.ocr.core.receipt_extractor import extract_receipt, group_rows
+
+TICKET = """CARREFOUR MARKET
+12 RUE DE LA PAIX 03200 VICHY
+TEL 04 70 00 00 00
+LE 14/03/2026 A 12:30
+LAIT DEMI ECREME 1,15 A
+YAOURT NATURE
+3 X 0,90 2,70
+CARTE FIDELITE 0012345
+REMISE FIDELITE -0,50
+SOUS TOTAL 3,35
+TOTAL TTC 3,35
+CB 3,35
+TAUX HT TVA TTC
+5,50% 3,18 0,17 3,35
+MERCI DE VOTRE VISITE"""
+
+
+def _fragment(text: str, x: float, y: float, score: float = 0.9) -> OCRLine:
+    return OCRLine(text=text, box=[[x, y], [x + 120, y], [x + 120, y + 20], [x, y + 20]], score=score)
+
+
+@pytest.mark.unit
+def test_champs_du_ticket():
+    receipt = extract_receipt(TICKET)
+
+    assert receipt.merchant.value == "CARREFOUR MARKET"
+    assert receipt.date.value == date(2026, 3, 14)
+    assert receipt.total.value == 3.35
+    assert receipt.payment_method.value == "carte"
+    assert [(i.label, i.amount, i.quantity, i.unit_price) for i in receipt.items] == [
+        ("LAIT DEMI ECREME", 1.15, None, None),
+        ("YAOURT NATURE", 2.70, 3.0, 0.90),
+        ("REMISE FIDELITE", -0.50, None, None),
+    ]
+    [vat] = receipt.vat
+    assert (vat.rate, vat.base, vat.vat, vat.total) == (5.5, 3.18, 0.17, 3.35)
+
+    # Articles, paiement et TVA recoupent le total : confiances renforcées
+    assert receipt.total.confidence > 0.99
+    assert all(item.confidence > 0.9 for item in receipt.items)
+
+
+@pytest.mark.unit
+def test_lignes_regroupees_par_boites():
+    # Libellé et prix : deux détections à la même hauteur, prix légèrement décalé
+    lines = [
+        _fragment("BOULANGERIE DUPONT", 40, 10),
+        _fragment("BAGUETTE", 10, 60),
+        _fragment("1,20", 300, 63),
+        _fragment("CROISSANT", 10, 90),
+        _fragment("0,95", 300, 88),
+        _fragment("NET A PAYER EN EUROS", 10, 130, score=0.8),
+        _fragment("2,15", 10, 160),
+        _fragment("ESPECES", 10, 190),
+    ]
+    result = OCRResult(lines=lines)
+    assert [text for text, _ in group_rows(result.lines)][1:3] == ["BAGUETTE 1,20", "CROISSANT 0,95"]
+
+    receipt = extract_receipt(result)
+    assert [(i.label, i.amount) for i in receipt.items] == [("BAGUETTE", 1.20), ("CROISSANT", 0.95)]
+    assert receipt.total.value == 2.15
+    assert receipt.total.confidence == pytest.approx(1 - (1 - 0.8) / 2)
+    assert receipt.payment_method.value == "especes"
+    assert receipt.date is None and receipt.vat == []
+
+
+@pytest.mark.unit
+def test_total_repli_du_service():
+    from backend.domains.ocr.services.ocr_service import get_ocr_service
+
+    # Aucun pattern de ocr_patterns.yaml ne lit "A PAYER" : total du ticket structuré
+    result = OCRResult(lines=[
+        _fragment("PHARMACIE DU CENTRE", 10, 10),
+        _fragment("DOLIPRANE 2,18", 10, 50),
+        _fragment("A PAYER 2,18", 10, 90),
+        _fragment("02/01/26", 10, 130),
+    ])
+    service = get_ocr_service()
+    assert service.pattern_manager.scan(result.text)["amount"] is None
+
+    tx, result = service.process_ticket_result(result, categorize=False)
+    assert (tx.montant, tx.date) == (2.18, date(2026, 1, 2))
+    assert result.receipt.items[0].label == "DOLIPRANE"
+    assert result.receipt.merchant.value == "PHARMACIE DU CENTRE"
@@ -0,0 +1,87 @@
+"""
+Tests du planificateur de ressources OCR (core/resource_planner.py).
+"""
+
+import pytest
+
+from backend.domains.ocr.core.resource_planner import OCRResourcePlanner, split_cpu_sets
+
+
+@pytest.fixture
+def planner() -> OCRResourcePlanner:
+    return OCRResourcePlanner(cores=list(range(8)), pin_workers=False, min_samples=2)
+
+
+@pytest.mark.unit
+def test_plan_initial_couvre_les_coeurs(planner: OCRResourcePlanner):
+    plan = planner.plan("process", max_workers=4)
+    assert (plan["workers"], plan["intra_op_threads"], plan["inter_op_threads"]) == (4, 2, 1)
+    assert plan["state"] == "initial"
+    assert plan["workers"] * plan["intra_op_threads"] <= plan["cores"]
+
+
+@pytest.mark.unit
+def test_plan_forkserver_mono_thread(planner: OCRResourcePlanner):
+    plan = planner.plan("process", max_workers=6, max_intra=1)
+    assert (plan["workers"], plan["intra_op_threads"]) == (6, 1)
+
+
+@pytest.mark.unit
+def test_ajustement_au_debit_mesure(planner: OCRResourcePlanner):
+    planner.plan("thread", max_workers=4)
+    # 4×2 : 4 tickets/s → exploration du voisin 3×2
+    for _ in range(2):
+        planner.record("thread", 4, 2, tickets=8, seconds=2.0)
+    plan = planner.plan("thread", max_workers=4)
+    assert (plan["workers"], plan["intra_op_threads"], plan["state"]) == (3, 2, "exploring")
+
+    # 3×2 plus rapide : ses voisins (2×4 non mesuré) sont explorés à leur tour
+    for _ in range(2):
+        planner.record("thread", 3, 2, tickets=8, seconds=1.0)
+    assert planner.plan("thread", max_workers=4)["workers"] == 2
+
+    # 2×4 puis 1×8 plus lents : retour sur la meilleure configuration mesurée, puis stable
+    for _ in range(2):
+        planner.record("thread", 2, 4, tickets=8, seconds=4.0)
+    assert planner.plan("thread", max_workers=4)["workers"] == 1
+    for _ in range(2):
+        planner.record("thread", 1, 8, tickets=8, seconds=4.0)
+    assert planner.plan("thread", max_workers=4)["workers"] == 3
+    for _ in range(2):
+        planner.record("thread", 3, 2, tickets=8, seconds=1.0)
+    plan = planner.plan("thread", max_workers=4)
+    assert (plan["workers"], plan["state"]) == (3, "settled")
+    assert plan["tickets_per_second"] == pytest.approx(8.0)
+    assert set(plan["measured"]) == {"1x8", "2x4", "3x2", "4x2"}
+
+
+@pytest.mark.unit
+def test_lot_trop_petit_ignore(planner: OCRResourcePlanner):
+    planner.plan("process", max_workers=4)
+    for _ in range(5):
+        planner.record("process", 4, 2, tickets=1, seconds=0.5)
+    plan = planner.plan("process", max_workers=4)
+    assert plan["state"] == "initial" and plan["measured"] == {}
+
+
+@pytest.mark.unit
+def test_cpu_sets_epingles():
+    assert split_cpu_sets([0, 1, 2, 3], workers=2, per_worker=2) == [[0, 1], [2, 3]]
+    assert split_cpu_sets([0, 1], workers=3, per_worker=1) == [[0], [1], [0]]
+
+    planner = OCRResourcePlanner(cores=[0, 1, 2, 3], pin_workers=True)
+    if planner.pin_workers:  # sched_setaffinity indisponible hors Linux
+        assert planner.plan("process", max_workers=2)["cpu_sets"] == [[0, 1], [2, 3]]
+        assert planner.plan("thread", max_workers=2)["cpu_sets"] == []
+
+
+@pytest.mark.unit
+def test_endpoint_plan():
+    from fastapi.testclient import TestClient
+    from backend.main import app
+
+    response = TestClient(app).get("/api/ocr/plan")
+    assert response.status_code == 200
+    body = response.json()
+    assert body["cores"] >= 1
+    assert isinstance(body["plans"], list)
@@ -0,0 +1,97 @@
+"""
+Tests de la détection des tickets en double (core/perceptual_hash.py,
+services/ticket_index.py).
+"""
+
+import io
+from pathlib import Path
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from backend.domains.ocr.core.perceptual_hash import HashIndex, fingerprint, hamming
+from backend.domains.ocr.services.ticket_index import TicketIndex
+
+
+def _photo(seed: int, size=(640, 480), quality: int = 90) -> bytes:
+    """Photo texturée (taches floues) : empreinte propre à chaque graine."""
+    blobs = np.random.default_rng(seed).integers(0, 255, (24, 32), dtype=np.uint8)
+    img = Image.fromarray(blobs).resize(size, Image.BICUBIC).convert("RGB")
+    buffer = io.BytesIO()
+    img.save(buffer, format="JPEG", quality=quality)
+    return buffer.getvalue()
+
+
+def _copy(data: bytes, scale: float = 0.5, quality: int = 60) -> bytes:
+    """Même photo réduite et réencodée (renvoi, messagerie)."""
+    img = Image.open(io.BytesIO(data))
+    img = img.resize((int(img.width * scale), int(img.height * scale)))
+    buffer = io.BytesIO()
+    img.save(buffer, format="JPEG", quality=quality)
+    return buffer.getvalue()
+
+
+@pytest.mark.unit
+def test_empreinte_stable_et_discriminante():
+    original = fingerprint(_photo(1))
+    assert hamming(original, fingerprint(_copy(_photo(1)))) <= 4
+    assert hamming(original, fingerprint(_photo(2))) > 60
+
+
+@pytest.mark.unit
+def test_image_uniforme_non_comparee():
+    buffer = io.BytesIO()
+    Image.new("RGB", (400, 200), "white").save(buffer, format="PNG")
+    assert fingerprint(buffer.getvalue()) is None
+
+
+@pytest.mark.unit
+def test_image_illisible():
+    with pytest.raises(ValueError, match="illisible"):
+        fingerprint(b"pas une image")
+
+
+@pytest.mark.unit
+def test_hash_index_recherche_triee():
+    rng = np.random.default_rng(0)
+    index = HashIndex(bits=256)
+    base = fingerprint(_photo(3))
+    for i in range(2000):  # au-delà de la capacité initiale
+        index.add(int.from_bytes(rng.bytes(32), "big"), f"aleatoire_{i}")
+    index.add(base ^ 0b111, "proche")
+    index.add(base, "identique")
+    assert index.search(base, 5) == [("identique", 0), ("proche", 3)]
+    assert len(index) == 2002
+
+
+@pytest.mark.unit
+def test_index_persistant_et_synchronise(tmp_path: Path):
+    archive = tmp_path / "tickets" / "Alimentation" / "Supermarché"
+    archive.mkdir(parents=True)
+    (archive / "a.jpg").write_bytes(_photo(10))
+    (archive / "b.jpg").write_bytes(_photo(11))
+    index_path = tmp_path / "index.jsonl"
+
+    index = TicketIndex(tmp_path / "tickets", index_path)
+    assert index.sync()["hashed"] == 2
+
+    _, match = index.check(_copy(_photo(10)))
+    assert match is not None and Path(match.path).name == "a.jpg"
+    fingerprint_new, no_match = index.check(_photo(12))
+    assert no_match is None
+
+    # Nouveau ticket archivé : indexé avec l'empreinte déjà calculée
+    (archive / "c.jpg").write_bytes(_photo(12))
+    index.add(archive / "c.jpg", fingerprint_new)
+    assert index.check(_photo(12))[1] is not None
+
+    # Redémarrage : rien à rehacher ; ticket supprimé oublié
+    (archive / "b.jpg").unlink()
+    stats = TicketIndex(tmp_path / "tickets", index_path).sync()
+    assert (stats["tickets"], stats["hashed"], stats["removed"]) == (2, 0, 1)
+    restarted = TicketIndex(tmp_path / "tickets", index_path)
+    stats = restarted.sync()
+    assert (stats["tickets"], stats["hashed"], stats["removed"]) == (2, 0, 0)
+    assert restarted.check(_photo(11))[1] is None
+    assert restarted.check(_photo(12))[1] is not None
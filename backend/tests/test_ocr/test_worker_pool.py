@@ -0,0 +1,260 @@
+"""
+Tests du pool de workers OCR persistant (services/worker_pool.py).
+Workers réels (spawn + RapidOCR) : un seul worker pour rester rapide.
+"""
+
+import multiprocessing
+import os
+from concurrent.futures import Future
+from pathlib import Path
+
+import psutil
+import pytest
+from PIL import Image, ImageDraw
+
+from backend.domains.ocr.services import worker_pool
+from backend.domains.ocr.services.worker_pool import OCRWorkerPool
+
+
+def _ticket(path: Path, total: float) -> str:
+    img = Image.new("RGB", (400, 150), color="white")
+    draw = ImageDraw.Draw(img)
+    draw.text((50, 30), f"TOTAL : {total:.2f}", fill="black")
+    draw.text((50, 80), "Date: 15/01/2026", fill="black")
+    img.save(str(path))
+    return str(path)
+
+
+@pytest.fixture(autouse=True)
+def _sans_classifieur_local(monkeypatch):
+    """Pas de génération de remplacement à l'arrivée du classifieur (entraîné en arrière-plan)."""
+    monkeypatch.setenv("OCR_LOCAL_CLASSIFIER", "0")
+
+
+@pytest.fixture
+def pool():
+    p = OCRWorkerPool(max_workers=1, max_tasks_per_child=3, start_method="spawn")
+    p.start()
+    yield p
+    p.stop()
+
+
+@pytest.mark.ocr
+def test_pool_reutilise_entre_lots_et_recycle(pool: OCRWorkerPool, tmp_path: Path):
+    first = pool.process_batch([_ticket(tmp_path / "a.png", 12.5)])
+    second = pool.process_batch(
+        [_ticket(tmp_path / f"b{i}.png", 10.0 + i) for i in range(3)]
+    )
+
+    assert [r[0] for r in first] == ["a.png"]
+    assert [r[0] for r in second] == ["b0.png", "b1.png", "b2.png"]
+    assert all(err is None for _, _, err, _ in first + second)
+
+    health = pool.health()
+    assert health["status"] == "running"
+    assert health["completed"] == 4
+    assert health["failed"] == 0
+    assert health["in_flight"] == 0
+    # 4 tickets pour 3 tâches max par worker → une génération recyclée
+    assert health["recycles"] == 1
+
+
+@pytest.mark.unit
+def test_pool_casse_apres_recyclage_en_cours_de_lot(monkeypatch):
+    """La génération qui a reçu le ticket est redémarrée, pas celle du début du lot."""
+    from concurrent.futures.process import BrokenProcessPool
+
+    class _Executor:
+        def __init__(self, broken):
+            self.broken = broken
+
+        def submit(self, fn, args):
+            future = Future()
+            if self.broken:
+                future.set_exception(BrokenProcessPool("worker tué"))
+            else:
+                idx, path, _ = args
+                future.set_result((idx, os.path.basename(path), None, None, 0.01, None))
+            return future
+
+        def shutdown(self, wait=True, cancel_futures=False):
+            pass
+
+    # Génération 1 saine, génération 2 (après recyclage) cassée, puis saine
+    generations = iter([False, True, False])
+    pool = OCRWorkerPool(max_workers=1, max_tasks_per_child=1, start_method="spawn")
+    monkeypatch.setattr(pool, "_create_executor", lambda: _Executor(next(generations)))
+    monkeypatch.setattr(pool, "warm", lambda: None)
+    pool.start()
+
+    results = pool.process_batch(["a.png", "b.png"])
+    assert results[0][2] is None and "interrompu" in results[1][2]
+    health = pool.health()
+    assert (health["recycles"], health["restarts"]) == (1, 1)
+    assert not pool._executor.broken
+
+
+class _ManualExecutor:
+    """Exécuteur factice : les tickets restent en cours jusqu'à `finish`."""
+
+    def __init__(self):
+        self.futures = []
+
+    def submit(self, fn, args):
+        self.futures.append(Future())
+        self.futures[-1].set_running_or_notify_cancel()
+        return self.futures[-1]
+
+    def finish(self):
+        for future in list(self.futures):
+            if not future.done():
+                future.set_result((0, "t.png", None, None, 0.01, None))
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        pass
+
+
+@pytest.mark.unit
+def test_resize_sans_seconde_generation_chargee(monkeypatch):
+    """Taille appliquée à l'admission, workers en trop libérés quand le pool est inactif."""
+    pool = OCRWorkerPool(max_workers=2, start_method="forkserver")
+    monkeypatch.setattr(pool, "_capacity_bound", lambda: 4)
+    monkeypatch.setattr(pool, "_create_executor", lambda: (pool._apply_plan(), _ManualExecutor())[1])
+    monkeypatch.setattr(pool, "warm", lambda: None)
+    pool.start()
+    executor = pool._executor
+    for i in range(5):
+        pool.submit_ticket(i, f"{i}.png")
+    # Au plus max_workers tickets confiés à l'exécuteur, le reste dans la file
+    assert len(executor.futures) == 2 and pool.health()["queue_depth"] == 3
+
+    pool.resize(3)
+    assert pool._executor is executor and not pool.resize_pending
+    assert len(executor.futures) == 3 and pool.health()["queue_depth"] == 2
+    assert not pool.auto_plan and pool.health()["max_workers"] == 3
+
+    # Retrait pendant le traitement : admission réduite, génération gardée
+    pool.resize(1)
+    pool.apply_pending_resize()
+    assert pool._executor is executor and pool.resize_pending
+    executor.finish()
+    # Un seul ticket admis à la fois dans la génération en cours
+    assert len(executor.futures) == 4
+    executor.finish()
+    assert len(executor.futures) == 5
+    executor.finish()
+    health = pool.health()
+    assert pool._executor is not executor and not pool.resize_pending
+    assert (health["max_workers"], health["recycles"], health["queue_depth"]) == (1, 1, 0)
+
+
+@pytest.mark.unit
+def test_recyclage_sans_chevauchement_des_generations(monkeypatch):
+    """Génération usée : la file attend la fin de ses tickets avant la suivante."""
+    pool = OCRWorkerPool(max_workers=2, max_tasks_per_child=1, start_method="spawn")
+    generations = []
+    monkeypatch.setattr(
+        pool, "_create_executor", lambda: generations.append(_ManualExecutor()) or generations[-1]
+    )
+    monkeypatch.setattr(pool, "warm", lambda: None)
+    pool.start()
+    futures = [pool.submit_ticket(i, f"{i}.png") for i in range(3)]
+    assert [len(g.futures) for g in generations] == [2]
+
+    generations[0].futures[0].set_result((0, "0.png", None, None, 0.01, None))
+    # Un ticket encore en cours dans la génération usée : pas de nouvelle génération
+    assert len(generations) == 1 and pool.health()["queue_depth"] == 1
+    generations[0].finish()
+    assert [len(g.futures) for g in generations] == [2, 1]
+    generations[1].finish()
+    assert all(f.done() for f in futures) and pool.health()["recycles"] == 1
+
+
+@pytest.mark.unit
+def test_classifieur_entraine_sans_bloquer_le_demarrage(monkeypatch):
+    """start() n'attend pas l'entraînement ; l'état exporté une fois sert aux générations suivantes."""
+    import threading
+
+    release = threading.Event()
+
+    class _Classifier:
+        exports = 0
+
+        def refresh_if_due(self):
+            release.wait(5)
+
+        def export_state(self):
+            self.exports += 1
+            return b"etat"
+
+    class _Executor:
+        def __init__(self, initargs):
+            self.state = initargs[-1]
+
+        def submit(self, fn, *args):
+            pass
+
+        def shutdown(self, wait=True, cancel_futures=False):
+            pass
+
+    classifier = _Classifier()
+    monkeypatch.setattr(worker_pool, "get_merchant_classifier", lambda: classifier)
+    monkeypatch.setattr(
+        worker_pool, "ProcessPoolExecutor", lambda initargs, **kwargs: _Executor(initargs)
+    )
+    pool = OCRWorkerPool(max_workers=1, start_method="spawn")
+    pool.start()
+    # Démarré pendant l'entraînement, sans le classifieur
+    first = pool._executor
+    assert first.state is None
+
+    release.set()
+    pool._classifier_thread.join(5)
+    # Pool inactif : génération remplacée, avec l'état en cache
+    assert pool._executor is not first and pool._executor.state == b"etat"
+    pool._classifier_thread.join(5)
+    exports = classifier.exports
+    with pool._lock:
+        executor = pool._create_executor()
+    assert executor.state == b"etat" and classifier.exports == exports
+    pool.stop()
+
+
+@pytest.mark.unit
+def test_pool_desactive_par_env(monkeypatch):
+    monkeypatch.setenv(worker_pool.ENV_WORKERS, "0")
+    assert worker_pool.start_worker_pool() is None
+    assert worker_pool.get_worker_pool() is None
+
+
+@pytest.mark.unit
+def test_health_pool_arrete():
+    health = OCRWorkerPool(max_workers=2).health()
+    assert health["status"] == "stopped"
+    assert health["workers_alive"] == 0
+
+
+@pytest.mark.ocr
+@pytest.mark.skipif(
+    "forkserver" not in multiprocessing.get_all_start_methods(), reason="forkserver indisponible"
+)
+def test_forkserver_workers_forkes_depuis_le_preload(tmp_path: Path):
+    pool = OCRWorkerPool(max_workers=1, start_method="forkserver")
+    pool.start()
+    try:
+        (fname, tx, err, _), = pool.process_batch([_ticket(tmp_path / "f.png", 9.9)])
+        assert err is None and fname == "f.png"
+        pid = pool.health()["worker_pids"][0]
+        # Parent = processus forkserver (qui a chargé les modèles), pas le test
+        assert psutil.Process(pid).ppid() != os.getpid()
+    finally:
+        pool.stop()
+
+
+@pytest.mark.unit
+def test_resolve_start_method(monkeypatch):
+    monkeypatch.delenv(worker_pool.ENV_START_METHOD, raising=False)
+    expected = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+    assert worker_pool.resolve_start_method() == expected
+    assert worker_pool.resolve_start_method("spawn") == "spawn"
+    assert worker_pool.resolve_start_method("inexistant") == "spawn"
@@ -0,0 +1,55 @@
+"""
+Tests de la sérialisation JSON rapide (shared/utils/json_response.py).
+Le rendu doit être identique à celui de jsonable_encoder + json.dumps.
+"""
+
+import json
+from datetime import date
+from typing import List
+
+import pytest
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+
+from backend.domains.transactions.model import Transaction
+from backend.shared.utils import json_response
+from backend.shared.utils.json_response import FastJSONResponse, model_json_response
+
+
+def _transactions(n: int = 3) -> List[Transaction]:
+    return [
+        Transaction(
+            id=i,
+            type="depense",
+            categorie="Alimentation",
+            montant=10.5 + i,
+            date=date(2026, 1, 1 + i),
+            description=f"Achat {i}",
+        )
+        for i in range(n)
+    ]
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize("orjson_enabled", [True, False])
+def test_fast_json_response_equivalent(monkeypatch, orjson_enabled: bool):
+    if orjson_enabled and not json_response.ORJSON_AVAILABLE:
+        pytest.skip("orjson non installé")
+    monkeypatch.setattr(json_response, "ORJSON_AVAILABLE", orjson_enabled)
+
+    payload = {
+        "total": 42.5,
+        "historique": [{"date": date(2026, 1, 2), "solde": -3.0}],
+        "transactions": _transactions(),
+        "vide": None,
+    }
+    body = FastJSONResponse(payload).body
+    assert json.loads(body) == jsonable_encoder(payload)
+
+
+@pytest.mark.unit
+def test_model_json_response_sans_revalidation():
+    txs = _transactions()
+    response = model_json_response(TypeAdapter(List[Transaction]), txs)
+    assert response.media_type == "application/json"
+    assert json.loads(response.body) == jsonable_encoder(txs)
@@ -0,0 +1,139 @@
+"""
+Tests du snapshot colonnaire (columnar.py) : équivalence avec le chemin SQL
+des helpers du dashboard et maintenance incrémentale depuis le repository.
+"""
+
+from datetime import date
+
+import pytest
+
+from backend.domains.transactions import columnar
+from backend.domains.transactions.model import Transaction
+from backend.domains.transactions.repository import TransactionRepository
+from backend.shared.utils.dashboard_helpers import (
+    aggregate_by_type,
+    build_daily_history,
+    summarize_transactions,
+)
+
+
+def _tx(type_: str, categorie: str, montant: float, jour: int, sous_categorie=None) -> Transaction:
+    return Transaction(
+        type=type_,
+        categorie=categorie,
+        sous_categorie=sous_categorie,
+        montant=montant,
+        date=date(2026, 4, jour),
+        description=f"{categorie} {jour}",
+        source="manual",
+    )
+
+
+@pytest.fixture
+def store_repo(db_path: str, monkeypatch) -> TransactionRepository:
+    monkeypatch.setenv(columnar.ENV_FLAG, "1")
+    repo = TransactionRepository(db_path=db_path, detect_duplicates=False)
+    repo.add(_tx("revenu", "Salaire", 2000.0, 1))
+    repo.add(_tx("depense", "Alimentation", 42.5, 2, "Supermarché"))
+    repo.add(_tx("depense", "Alimentation", 7.5, 2, "Boulangerie"))
+    repo.add(_tx("depense", "Transport", 60.0, 5))
+    yield repo
+    columnar._stores.pop(db_path, None)
+
+
+@pytest.mark.unit
+def test_desactive_par_defaut(db_path: str, monkeypatch):
+    monkeypatch.delenv(columnar.ENV_FLAG, raising=False)
+    assert columnar.get_store(db_path) is None
+
+
+@pytest.mark.integration
+def test_agregats_identiques_au_chemin_sql(store_repo: TransactionRepository, db_path: str):
+    store = columnar.get_store(db_path)
+    mask = store.mask(date(2026, 4, 2), date(2026, 4, 30))
+    txs = store_repo.get_filtered(start_date=date(2026, 4, 2), end_date=date(2026, 4, 30))
+
+    assert store.aggregate_by_type(mask) == aggregate_by_type(txs)
+    assert store.daily_history(mask) == build_daily_history(txs)
+    assert store.sum_by("sous_categorie") == {"Supermarché": 42.5, "Boulangerie": 7.5}
+    assert store.totals_by_type(store.mask(category="Alimentation")) == (0.0, 50.0)
+
+
+@pytest.mark.integration
+def test_mise_a_jour_incrementale(store_repo: TransactionRepository, db_path: str):
+    store = columnar.get_store(db_path)
+    assert len(store) == 4
+
+    new_id = store_repo.add(_tx("depense", "Loisirs", 15.0, 10))
+    assert store.sum_by("categorie")["Loisirs"] == 15.0
+
+    row = store_repo.get_by_id(new_id)
+    row["montant"] = 20.0
+    assert store_repo.update(row)
+    assert store.sum_by("categorie")["Loisirs"] == 20.0
+
+    assert store_repo.delete(new_id)
+    assert "Loisirs" not in store.sum_by("categorie")
+    assert len(store) == 4
+    # Rien n'a forcé de rechargement : le snapshot a suivi les écritures
+    assert store.loaded
+
+
+@pytest.mark.integration
+def test_lot_suivi_sans_rechargement(store_repo: TransactionRepository, db_path: str):
+    store = columnar.get_store(db_path)
+    assert len(store) == 4
+
+    ids = store_repo.add_many([_tx("depense", "Loisirs", 15.0, 10), _tx("depense", "Loisirs", 5.0, 11)])
+    assert all(ids)
+    # Lot commité puis répercuté ligne à ligne : pas d'invalidation
+    assert store.loaded
+    assert len(store) == 6 and store.sum_by("categorie")["Loisirs"] == 20.0
+
+
+@pytest.mark.integration
+def test_invalidation_recharge_depuis_la_base(store_repo: TransactionRepository, db_path: str):
+    store = columnar.get_store(db_path)
+    with store_repo._get_conn() as conn:
+        store_repo.add(_tx("depense", "Santé", 30.0, 3), conn=conn)
+    assert not store.loaded
+
+    assert store.total(store.mask(category="Santé")) == 30.0
+    assert store.loaded
+
+
+@pytest.mark.integration
+def test_summarize_transactions_meme_resultat_avec_ou_sans_snapshot(
+    store_repo: TransactionRepository, monkeypatch
+):
+    avec = summarize_transactions(store_repo, start_date=date(2026, 4, 1))
+    monkeypatch.delenv(columnar.ENV_FLAG)
+    sans = summarize_transactions(store_repo, start_date=date(2026, 4, 1))
+    assert avec == sans
+
+
+@pytest.mark.integration
+def test_masque_perime_refuse(store_repo: TransactionRepository, db_path: str):
+    store = columnar.get_store(db_path)
+    mask = store.mask(category="Transport")
+    store.remove([int(store.ids[0])])
+    # Lignes déplacées par la suppression : le masque ne désigne plus les mêmes
+    with pytest.raises(ValueError):
+        store.total(mask)
+
+
+@pytest.mark.integration
+def test_lecture_isolee_des_ecritures_concurrentes(store_repo: TransactionRepository, db_path: str):
+    import threading
+
+    store = columnar.get_store(db_path)
+    writer = threading.Thread(target=store.load)
+    with store.reading():
+        mask = store.mask(type="depense")
+        writer.start()
+        writer.join(timeout=0.2)
+        # Rechargement bloqué tant que la lecture tient le snapshot
+        assert writer.is_alive()
+        assert store.total(mask) == 110.0
+    writer.join()
+    assert store.total(store.mask(type="depense")) == 110.0
@@ -0,0 +1,71 @@
+"""
+Tests du chemin de lecture DataFrame (TransactionRepository.get_dataframe / TransactionService).
+"""
+
+from datetime import date
+
+import pandas as pd
+import pytest
+
+from backend.domains.transactions.model import Transaction
+from backend.domains.transactions.repository import TransactionRepository
+from backend.domains.transactions.service import TransactionService
+
+
+@pytest.fixture
+def df_repo(db_path: str) -> TransactionRepository:
+    repo = TransactionRepository(db_path=db_path, detect_duplicates=False)
+    for i, (type_, cat) in enumerate(
+        [("revenu", "Salaire"), ("depense", "Alimentation"), ("depense", "Alimentation"), ("depense", "Transport")]
+    ):
+        repo.add(
+            Transaction(
+                type=type_,
+                categorie=cat,
+                montant=100.0 + i,
+                date=date(2026, 5, i + 1),
+                description=f"Ligne {i}",
+                source="manual",
+            )
+        )
+    return repo
+
+
+@pytest.mark.integration
+def test_colonnes_typees(df_repo: TransactionRepository):
+    df = df_repo.get_dataframe()
+
+    assert len(df) == 4
+    assert isinstance(df["categorie"].dtype, pd.CategoricalDtype)
+    assert isinstance(df["type"].dtype, pd.CategoricalDtype)
+    assert pd.api.types.is_datetime64_dtype(df["date"])
+    assert df["montant"].dtype == "float64"
+    assert df["echeance_id"].dtype == "Int64"
+    # Tri date décroissante, comme get_filtered()
+    assert df["date"].is_monotonic_decreasing
+
+
+@pytest.mark.integration
+def test_filtres_et_agregat_vectorise(df_repo: TransactionRepository):
+    df = df_repo.get_dataframe(start_date=date(2026, 5, 2), category="Alimentation")
+    assert df["montant"].sum() == pytest.approx(203.0)
+
+    totaux = df_repo.get_dataframe().groupby("type", observed=True)["montant"].sum()
+    assert totaux["revenu"] == pytest.approx(100.0)
+
+
+@pytest.mark.integration
+def test_dataframe_vide_garde_les_dtypes(db_path: str):
+    df = TransactionRepository(db_path=db_path).get_dataframe()
+    assert df.empty
+    assert pd.api.types.is_datetime64_dtype(df["date"])
+    assert df["montant"].dtype == "float64"
+
+
+@pytest.mark.integration
+def test_service_retourne_des_dataframes(df_repo: TransactionRepository):
+    service = TransactionService()
+    service.repository = df_repo
+
+    assert isinstance(service.get_all(), pd.DataFrame)
+    assert len(service.get_filtered(category="Transport")) == 1
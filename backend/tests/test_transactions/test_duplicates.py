@@ -0,0 +1,132 @@
+"""
+Tests de la détection de doublons probables (duplicates.py).
+Fonctions pures + détection incrémentale/batch sur DB de test.
+"""
+
+import pytest
+from datetime import date
+
+from backend.domains.transactions.duplicates import (
+    DuplicateDetector,
+    STATUT_IGNORE,
+    amount_to_cents,
+    description_fingerprint,
+    description_similarity,
+)
+from backend.domains.transactions.model import Transaction
+from backend.domains.transactions.repository import TransactionRepository
+
+
+def _tx(montant: float, jour: int, description: str, categorie: str = "Alimentation") -> Transaction:
+    return Transaction(
+        type="depense",
+        categorie=categorie,
+        montant=montant,
+        date=date(2026, 3, jour),
+        description=description,
+        source="manual",
+    )
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Fonctions pures
+# ─────────────────────────────────────────────────────────────────────────────
+
+
+@pytest.mark.unit
+def test_amount_to_cents_arrondit():
+    assert amount_to_cents(42.5) == 4250
+    assert amount_to_cents(0.1 + 0.2) == 30
+
+
+@pytest.mark.unit
+def test_similarite_description():
+    a = description_fingerprint("CARREFOUR MARKET")
+    b = description_fingerprint("Carrefour Market Vichy")
+    c = description_fingerprint("TOTAL STATION")
+    assert description_similarity(a, b) > 0.6
+    assert description_similarity(a, c) < 0.2
+    assert description_similarity(a, frozenset()) == 0.0
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Détection incrémentale (à l'insertion)
+# ─────────────────────────────────────────────────────────────────────────────
+
+
+@pytest.mark.integration
+def test_insertion_signale_un_doublon(repo: TransactionRepository, db_path: str):
+    """Même montant, date proche, description similaire → paire suspecte."""
+    id1 = repo.add(_tx(42.50, 10, "Carrefour Market"))
+    id2 = repo.add(_tx(42.50, 11, "CARREFOUR MARKET"))
+
+    pairs = DuplicateDetector(db_path).get_suspected()
+    assert len(pairs) == 1
+    assert pairs[0]["transaction_id"] == id2
+    assert pairs[0]["original_id"] == id1
+    assert pairs[0]["transaction"]["montant"] == pytest.approx(42.50)
+
+
+@pytest.mark.integration
+def test_montant_ou_date_differents_pas_de_doublon(repo: TransactionRepository, db_path: str):
+    repo.add(_tx(42.50, 10, "Carrefour Market"))
+    repo.add(_tx(42.51, 10, "Carrefour Market"))  # autre montant
+    repo.add(_tx(42.50, 20, "Carrefour Market"))  # hors fenêtre
+
+    assert DuplicateDetector(db_path).get_suspected() == []
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Batch sur tout l'historique
+# ─────────────────────────────────────────────────────────────────────────────
+
+
+@pytest.mark.integration
+def test_scan_all_retrouve_les_doublons(db_path: str):
+    """Historique inséré sans détection, puis scan complet."""
+    repo = TransactionRepository(db_path=db_path, detect_duplicates=False)
+    repo.add(_tx(10.00, 1, "Boulangerie Paul"))
+    repo.add(_tx(10.00, 2, "BOULANGERIE PAUL"))
+    repo.add(_tx(25.00, 5, "Pharmacie", categorie="Santé"))
+    repo.add(_tx(25.00, 5, "Cinema", categorie="Loisirs"))
+
+    detector = DuplicateDetector(db_path)
+    assert detector.scan_all(chunk_size=2) == 1
+    # Relancer le scan ne recrée pas la paire
+    assert detector.scan_all() == 0
+
+
+@pytest.mark.integration
+def test_scan_all_montants_non_arrondis(db_path: str):
+    """Montants bruts (écritures SQL) arrondis au même centime : dates triées dans le bloc."""
+    from backend.shared.database import db_transaction
+
+    repo = TransactionRepository(db_path=db_path, detect_duplicates=False)
+    ids = [
+        repo.add(_tx(10.00, 1, "Boulangerie Paul")),
+        repo.add(_tx(10.00, 20, "Garage Martin", categorie="Transport")),
+        repo.add(_tx(10.00, 2, "BOULANGERIE PAUL")),
+    ]
+    with db_transaction(db_path) as conn:
+        for montant, tx_id in zip((10.0, 10.002, 10.004), ids):
+            conn.execute("UPDATE transactions SET montant = ? WHERE id = ?", (montant, tx_id))
+
+    detector = DuplicateDetector(db_path)
+    assert detector.scan_all() == 1
+    pair = detector.get_suspected()[0]
+    assert {pair["transaction_id"], pair["original_id"]} == {ids[0], ids[2]}
+
+
+@pytest.mark.integration
+def test_paire_ignoree_non_resignalee(db_path: str):
+    repo = TransactionRepository(db_path=db_path, detect_duplicates=False)
+    repo.add(_tx(10.00, 1, "Boulangerie Paul"))
+    repo.add(_tx(10.00, 1, "Boulangerie Paul"))
+
+    detector = DuplicateDetector(db_path)
+    detector.scan_all()
+    pair = detector.get_suspected()[0]
+    assert detector.set_status(pair["pair_id"], STATUT_IGNORE) is True
+
+    detector.scan_all()
+    assert detector.get_suspected() == []
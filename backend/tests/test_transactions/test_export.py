@@ -0,0 +1,87 @@
+"""
+Tests de l'export en streaming (export.py + TransactionRepository.iter_filtered_chunks).
+"""
+
+import csv
+import io
+import json
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+
+import pytest
+
+from backend.domains.transactions import export as tx_export
+from backend.domains.transactions.model import Transaction
+from backend.domains.transactions.repository import TransactionRepository
+
+
+@pytest.fixture
+def filled_repo(db_path: str) -> TransactionRepository:
+    repo = TransactionRepository(db_path=db_path, detect_duplicates=False)
+    for i in range(7):
+        repo.add(
+            Transaction(
+                type="depense",
+                categorie="Alimentation" if i % 2 == 0 else "Transport",
+                montant=10.0 + i,
+                date=date(2026, 2, i + 1),
+                description=f"Achat {i}",
+                source="manual",
+            )
+        )
+    return repo
+
+
+@pytest.mark.integration
+def test_chunks_respectent_filtres_et_taille(filled_repo: TransactionRepository):
+    chunks = list(
+        filled_repo.iter_filtered_chunks(
+            category="Alimentation", columns=tx_export.EXPORT_COLUMNS, chunk_size=3
+        )
+    )
+    assert [len(c) for c in chunks] == [3, 1]
+    rows = [r for c in chunks for r in c]
+    assert all(r["categorie"] == "Alimentation" for r in rows)
+    # Tri date décroissante (comme GET /api/transactions/)
+    assert [r["date"] for r in rows] == sorted((r["date"] for r in rows), reverse=True)
+
+
+@pytest.mark.integration
+def test_chunks_consommables_depuis_plusieurs_threads(filled_repo: TransactionRepository):
+    """StreamingResponse itère dans le threadpool : chaque next() peut changer de thread."""
+    it = filled_repo.iter_filtered_chunks(chunk_size=2)
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        sizes = [len(pool.submit(next, it).result()) for _ in range(4)]
+    assert sizes == [2, 2, 2, 1]
+
+
+@pytest.mark.integration
+def test_export_csv(filled_repo: TransactionRepository):
+    data = b"".join(
+        tx_export.iter_csv(filled_repo.iter_filtered_chunks(start_date=date(2026, 2, 5)))
+    )
+    reader = csv.DictReader(io.StringIO(data.decode("utf-8-sig")), delimiter=";")
+    rows = list(reader)
+    assert reader.fieldnames == tx_export.EXPORT_COLUMNS
+    assert len(rows) == 3
+    assert float(rows[0]["montant"]) == pytest.approx(16.0)
+
+
+@pytest.mark.integration
+def test_export_ndjson(filled_repo: TransactionRepository):
+    lines = b"".join(
+        tx_export.iter_ndjson(filled_repo.iter_filtered_chunks(chunk_size=4))
+    ).splitlines()
+    assert len(lines) == 7
+    assert json.loads(lines[-1])["description"] == "Achat 0"
+
+
+@pytest.mark.integration
+def test_export_parquet_row_groups(filled_repo: TransactionRepository):
+    pq = pytest.importorskip("pyarrow.parquet")
+    data = b"".join(
+        tx_export.iter_parquet(filled_repo.iter_filtered_chunks(chunk_size=3))
+    )
+    parquet = pq.ParquetFile(io.BytesIO(data))
+    assert parquet.metadata.num_rows == 7
+    assert parquet.metadata.num_row_groups == 3
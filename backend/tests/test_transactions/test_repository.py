@@ -40,6 +40,19 @@ def test_add_transaction_retrouvable(
     assert row["type"] == "depense"
 
 
+@pytest.mark.integration
+def test_add_many_un_commit(repo: TransactionRepository):
+    """Lot inséré sur une connexion ; transaction invalide ou doublon -> None."""
+    def tx(montant, external_id=None):
+        return Transaction(type="depense", categorie="Alimentation", montant=montant,
+                           date=date(2026, 1, 1), external_id=external_id)
+
+    ids = repo.add_many([tx(1.0, "EXT-A"), {"type": "depense", "montant": -5}, tx(2.0, "EXT-A"), tx(3.0)])
+    assert ids[0] and ids[3] and ids[1:3] == [None, None]
+    assert [repo.get_by_id(i)["montant"] for i in (ids[0], ids[3])] == [1.0, 3.0]
+    assert repo.add_many([]) == []
+
+
 @pytest.mark.integration
 def test_add_doublon_external_id_ignore(repo: TransactionRepository):
     """Deux transactions avec le même external_id : la 2e doit être ignorée."""